@@ -3,18 +3,18 @@
 """
 
 import time
+import importlib
+import threading
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QStackedWidget, 
                                QTextEdit, QHBoxLayout, QPushButton, QFrame, QScrollArea)
-from PySide6.QtCore import Qt, QPropertyAnimation, QEasingCurve
+from PySide6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QTimer
 from PySide6.QtGui import QFont
 from styles.generator import StyleGenerator
-from components.tools import JSONFormatter, ImageConverterWidget, FileSearchWidget, EncodeDecodeSuite, RegexFormatterWidget, FileDiffTool, CodeFormatterTool, BaseConverter, ColorPickerWidget, MediaDownloaderWidget, QRToolWidget, ScreenshotWidget
-from components.tools.dashboard import UsageDashboard
-from components.tools.contact import ContactMeForm
-from components.tools.about import AboutAppContent
+from components.page_registry import PAGE_REGISTRY, get_page_spec
 
 # 导入日志系统
 from utils.logger import info, error, warning, log_system_event, log_user_action
+from utils.startup_profiler import startup_profiler
 
 class ChatPage(QWidget):
     """聊天页面 - 微信风格"""
@@ -348,6 +348,9 @@ class DefaultPage(QWidget):
         layout.addStretch()
 
 class ContentArea(QWidget):
+    # 两次空闲预热之间的间隔，保证用户输入优先得到处理
+    PREWARM_INTERVAL_MS = 50
+    
     def __init__(self):
         super().__init__()
         self._setup_ui()
@@ -362,101 +365,184 @@ class ContentArea(QWidget):
         # 使用堆叠窗口管理不同页面
         self.stacked_widget = QStackedWidget()
         
-        # 添加各种页面
+        # 页面按需创建：pages 只保存已经创建好的页面
         self.pages = {}
         self._initialize_pages()
         
-        for page in self.pages.values():
-            self.stacked_widget.addWidget(page)
-        
         # 显示默认页面
-        self.stacked_widget.setCurrentWidget(self.pages["default"])
+        self.stacked_widget.setCurrentWidget(self._get_page("default"))
         
         layout.addWidget(self.stacked_widget)
     
     def _initialize_pages(self):
-        """初始化所有页面，包含错误处理"""
-        info("开始初始化所有页面组件")
-        
-        page_configs = {
-            "default": lambda: DefaultPage("欢迎使用", "请从左侧选择功能开始使用"),
-            "首页": lambda: UsageDashboard(),
-            "dashboard": lambda: UsageDashboard(),
-            "chat": lambda: ChatPage(),
-            "contact_detail": lambda: ContactDetailPage(),
-            "contact_me": lambda: ContactMeForm(),
-            "about": lambda: AboutAppContent(),
-            "groups_page": lambda: DefaultPage("群组管理", "查看和管理您的群组"),
-            "apps_page": lambda: DefaultPage("应用中心", "发现更多实用应用"),
-            "files_page": lambda: DefaultPage("文件管理", "管理您的文件和文档"),
-            "settings_page": lambda: DefaultPage("设置", "个性化您的应用体验"),
-            # 工具页面
-            "json_formatter": lambda: JSONFormatter(),
-            "image_converter": lambda: ImageConverterWidget(),
-            "file_search": lambda: FileSearchWidget(),
-            "encode_decode": lambda: EncodeDecodeSuite(),
-            "regex_formatter": lambda: RegexFormatterWidget(),
-            "file_diff": lambda: FileDiffTool(),
-            "code_formatter": lambda: CodeFormatterTool(),
-            "base_converter": lambda: BaseConverter(),
-            "color_picker": lambda: ColorPickerWidget(),
-            "media_download": lambda: MediaDownloaderWidget(),
-            "qr_tool": lambda: QRToolWidget(),
-            "screenshot": lambda: ScreenshotWidget(),
+        """初始化页面注册表，页面本身在第一次显示时才导入和创建"""
+        info(f"页面注册完成，共 {len(PAGE_REGISTRY)} 个页面，按需加载")
+        
+        # 启动报告：页面键 -> 加载记录
+        self.page_load_records = {}
+        self._prewarm_queue = []
+        self._prewarm_imported = set()
+        self._prewarm_import_seconds = {}
+        self._prewarm_thread = None
+        self._prewarm_started = False
+        
+        self._prewarm_timer = QTimer(self)
+        self._prewarm_timer.setSingleShot(True)
+        self._prewarm_timer.timeout.connect(self._prewarm_next_page)
+    
+    def _get_page(self, page_key, trigger="on_demand"):
+        """获取页面实例，不存在时导入模块并创建"""
+        page = self.pages.get(page_key)
+        if page is None:
+            page = self._build_page(page_key, trigger)
+            self.pages[page_key] = page
+            self.stacked_widget.addWidget(page)
+        return page
+    
+    def _build_page(self, page_key, trigger):
+        """导入并创建单个页面，包含错误处理"""
+        spec = get_page_spec(page_key)
+        info(f"正在加载页面: {page_key} ({spec.module_path}, 触发: {trigger})")
+        record = {
+            "page": page_key,
+            "module": spec.module_path,
+            "trigger": trigger,
+            "import_seconds": 0.0,
+            "build_seconds": 0.0,
+            "status": "ok",
+            "error": None,
         }
+        self.page_load_records[page_key] = record
+        start_time = time.perf_counter()
+        
+        try:
+            page, import_time, build_time = spec.create()
+            # 预热时模块已在后台线程导入，记录后台导入的真实耗时
+            if trigger == "prewarm":
+                import_time = self._prewarm_import_seconds.get(spec.module_path, import_time)
+            record["import_seconds"] = round(import_time, 4)
+            record["build_seconds"] = round(build_time, 4)
+            info(f"页面加载成功: {page_key} (导入: {import_time:.3f}秒, 创建: {build_time:.3f}秒)")
+            return page
+            
+        except ImportError as e:
+            error(f"页面加载失败 - 缺少依赖库: {page_key} - {e}")
+            log_system_event("页面加载失败", f"{page_key}: 缺少依赖 {e}")
+            record["status"] = "import_error"
+            record["error"] = str(e)
+            
+            # 创建错误页面替代
+            hint = f"\n\n请运行: {spec.install_hint}" if spec.install_hint else "\n\n请检查依赖安装情况"
+            return DefaultPage(
+                f"加载失败: {page_key}", 
+                f"缺少必要的依赖库: {e}{hint}"
+            )
+            
+        except Exception as e:
+            error(f"页面加载失败 - 未知错误: {page_key} - {e}")
+            log_system_event("页面加载失败", f"{page_key}: 未知错误 {e}")
+            record["status"] = "error"
+            record["error"] = str(e)
+            
+            # 创建错误页面替代
+            return DefaultPage(
+                f"加载失败: {page_key}", 
+                f"页面初始化出错: {e}\n\n请查看日志获取详细信息"
+            )
+        finally:
+            record["total_seconds"] = round(time.perf_counter() - start_time, 4)
+    
+    def start_prewarm(self):
+        """首帧绘制后调用：后台导入未打开页面的模块，再利用空闲时间逐个创建页面"""
+        if self._prewarm_started:
+            return
+        self._prewarm_started = True
         
-        total_pages = len(page_configs)
-        loaded_successfully = 0
-        failed_pages = []
+        self._prewarm_queue = [
+            key for key, spec in PAGE_REGISTRY.items()
+            if spec.prewarm and key not in self.pages
+        ]
+        if not self._prewarm_queue:
+            self._log_startup_report()
+            return
         
-        for page_key, page_creator in page_configs.items():
+        module_paths = []
+        for key in self._prewarm_queue:
+            module_path = PAGE_REGISTRY[key].module_path
+            if module_path not in module_paths:
+                module_paths.append(module_path)
+        
+        info(f"开始后台预热 {len(self._prewarm_queue)} 个页面")
+        self._prewarm_thread = threading.Thread(
+            target=self._prewarm_imports, args=(module_paths,),
+            name="PagePrewarm", daemon=True
+        )
+        self._prewarm_thread.start()
+        self._prewarm_timer.start(self.PREWARM_INTERVAL_MS)
+    
+    def _prewarm_imports(self, module_paths):
+        """后台线程：只做模块导入（重量级依赖的主要耗时），不创建任何控件"""
+        for module_path in module_paths:
+            start_time = time.perf_counter()
             try:
-                info(f"正在加载页面: {page_key} ({loaded_successfully + 1}/{total_pages})")
-                start_time = time.time()
-                
-                self.pages[page_key] = page_creator()
-                
-                load_time = time.time() - start_time
-                info(f"页面加载成功: {page_key} (耗时: {load_time:.3f}秒)")
-                loaded_successfully += 1
-                
-            except ImportError as e:
-                error(f"页面加载失败 - 缺少依赖库: {page_key} - {e}")
-                log_system_event("页面加载失败", f"{page_key}: 缺少依赖 {e}")
-                failed_pages.append((page_key, f"依赖缺失: {e}"))
-                
-                # 创建错误页面替代
-                self.pages[page_key] = DefaultPage(
-                    f"加载失败: {page_key}", 
-                    f"缺少必要的依赖库: {e}\n\n请检查依赖安装情况"
-                )
-                
+                importlib.import_module(module_path)
             except Exception as e:
-                error(f"页面加载失败 - 未知错误: {page_key} - {e}")
-                log_system_event("页面加载失败", f"{page_key}: 未知错误 {e}")
-                failed_pages.append((page_key, f"加载错误: {e}"))
-                
-                # 创建错误页面替代
-                self.pages[page_key] = DefaultPage(
-                    f"加载失败: {page_key}", 
-                    f"页面初始化出错: {e}\n\n请查看日志获取详细信息"
-                )
-        
-        # 记录加载统计信息
-        failed_count = len(failed_pages)
-        success_rate = (loaded_successfully / total_pages) * 100
-        
-        info(f"页面加载统计: 成功 {loaded_successfully}/{total_pages} ({success_rate:.1f}%)")
+                # 导入失败留给页面创建时统一处理和记录
+                warning(f"预热导入失败: {module_path} - {e}")
+            self._prewarm_import_seconds[module_path] = round(time.perf_counter() - start_time, 4)
+            self._prewarm_imported.add(module_path)
+    
+    def _prewarm_next_page(self):
+        """UI线程空闲时创建一个模块已导入完成的页面"""
+        for index, page_key in enumerate(self._prewarm_queue):
+            if page_key in self.pages:
+                del self._prewarm_queue[index]
+                break
+            if PAGE_REGISTRY[page_key].module_path in self._prewarm_imported:
+                del self._prewarm_queue[index]
+                self._get_page(page_key, trigger="prewarm")
+                break
+        
+        if self._prewarm_queue:
+            self._prewarm_timer.start(self.PREWARM_INTERVAL_MS)
+        else:
+            self._log_startup_report()
+    
+    def get_startup_report(self):
+        """页面加载启动报告"""
+        records = list(self.page_load_records.values())
+        return {
+            "registered_pages": len(PAGE_REGISTRY),
+            "loaded_pages": len(records),
+            "failed_pages": [r["page"] for r in records if r["status"] != "ok"],
+            "total_seconds": round(sum(r.get("total_seconds", 0.0) for r in records), 4),
+            "pages": records,
+        }
+    
+    def _log_startup_report(self):
+        """记录页面加载统计信息"""
+        report = self.get_startup_report()
+        loaded = report["loaded_pages"]
+        failed_count = len(report["failed_pages"])
+        
+        info(f"页面加载统计: 已加载 {loaded}/{report['registered_pages']}，"
+             f"总耗时 {report['total_seconds']:.3f}秒")
+        for record in sorted(report["pages"], key=lambda r: r.get("total_seconds", 0.0), reverse=True):
+            info(f"  - {record['page']}: 导入 {record['import_seconds']:.3f}秒, "
+                 f"创建 {record['build_seconds']:.3f}秒 ({record['trigger']})")
         
         if failed_count > 0:
             warning(f"有 {failed_count} 个页面加载失败:")
-            for page_key, error_msg in failed_pages:
-                warning(f"  - {page_key}: {error_msg}")
+            for record in report["pages"]:
+                if record["status"] != "ok":
+                    warning(f"  - {record['page']}: {record['error']}")
             log_system_event("页面加载警告", f"{failed_count}个页面加载失败")
         else:
-            log_system_event("页面加载完成", f"所有{total_pages}个页面加载成功")
-            
-        info("页面初始化完成")
+            log_system_event("页面加载完成", f"已加载{loaded}个页面")
+        
+        # 启用了启动分析时，把预热后的完整页面报告写入分析结果
+        startup_profiler.add_section("pages", report)
+        startup_profiler.write_report()
     
     def _apply_styles(self):
         """应用样式"""
@@ -467,16 +553,16 @@ class ContentArea(QWidget):
         """)
     
     def show_page(self, page_key):
-        """显示指定页面"""
-        if page_key in self.pages:
+        """显示指定页面，页面首次显示时才会被导入和创建"""
+        if page_key in PAGE_REGISTRY:
             log_user_action("页面切换", f"切换到页面: {page_key}")
             info(f"显示页面: {page_key}")
-            self.stacked_widget.setCurrentWidget(self.pages[page_key])
+            self.stacked_widget.setCurrentWidget(self._get_page(page_key))
         else:
             warning(f"页面不存在: {page_key}")
             log_system_event("页面访问失败", f"尝试访问不存在的页面: {page_key}")
             # 回退到默认页面
-            self.stacked_widget.setCurrentWidget(self.pages["default"])
+            self.stacked_widget.setCurrentWidget(self._get_page("default"))
     
     def show_chat_page(self, contact_name=None):
         """显示聊天页面"""
@@ -571,7 +657,7 @@ class ContentArea(QWidget):
             }}
         """)
         
-        # 刷新所有页面的样式
+        # 刷新所有已创建页面的样式（未创建的页面会在创建时使用当前主题）
         for page in self.pages.values():
             if hasattr(page, 'refresh_styles'):
                 page.refresh_styles()
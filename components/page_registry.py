@@ -0,0 +1,80 @@
+"""
+页面注册表
+每个页面登记为 "模块路径 + 工厂"，只有在第一次需要显示时才导入模块并创建实例，
+避免启动时就加载 PIL / qrcode / requests / Crypto 等重量级依赖
+"""
+
+import importlib
+import time
+
+
+class PageSpec:
+    """页面登记项"""
+
+    def __init__(self, module_path, factory, args=(), install_hint=None, prewarm=True):
+        self.module_path = module_path    # 页面所在模块，例如 components.tools.qr_tool
+        self.factory = factory            # 模块中的类名/工厂函数名
+        self.args = tuple(args)           # 传给工厂的位置参数
+        self.install_hint = install_hint  # 缺少依赖时的安装提示
+        self.prewarm = prewarm            # 是否在首帧绘制后后台预热
+
+    def import_module(self):
+        """导入页面所在模块（可在后台线程中调用）"""
+        return importlib.import_module(self.module_path)
+
+    def create(self):
+        """导入模块并创建页面实例
+
+        Returns:
+            (page, import_seconds, build_seconds)
+        """
+        start_time = time.perf_counter()
+        module = self.import_module()
+        factory = getattr(module, self.factory)
+        imported_time = time.perf_counter()
+
+        page = factory(*self.args)
+        built_time = time.perf_counter()
+        return page, imported_time - start_time, built_time - imported_time
+
+
+_CONTENT = "components.content_area"
+
+# 页面注册表：页面键 -> 页面登记项
+# 顺序即后台预热顺序，常用工具靠前
+PAGE_REGISTRY = {
+    "default": PageSpec(_CONTENT, "DefaultPage", ("欢迎使用", "请从左侧选择功能开始使用")),
+    "首页": PageSpec("components.tools.dashboard", "UsageDashboard"),
+    "dashboard": PageSpec("components.tools.dashboard", "UsageDashboard", prewarm=False),
+    "chat": PageSpec(_CONTENT, "ChatPage", prewarm=False),
+    "contact_detail": PageSpec(_CONTENT, "ContactDetailPage", prewarm=False),
+    "contact_me": PageSpec("components.tools.contact", "ContactMeForm"),
+    "about": PageSpec("components.tools.about", "AboutAppContent"),
+    "groups_page": PageSpec(_CONTENT, "DefaultPage", ("群组管理", "查看和管理您的群组"), prewarm=False),
+    "apps_page": PageSpec(_CONTENT, "DefaultPage", ("应用中心", "发现更多实用应用"), prewarm=False),
+    "files_page": PageSpec(_CONTENT, "DefaultPage", ("文件管理", "管理您的文件和文档"), prewarm=False),
+    "settings_page": PageSpec(_CONTENT, "DefaultPage", ("设置", "个性化您的应用体验"), prewarm=False),
+    # 工具页面
+    "json_formatter": PageSpec("components.tools.json_formatter", "JSONFormatter"),
+    "file_diff": PageSpec("components.tools.file_diff", "FileDiffTool"),
+    "file_search": PageSpec("components.tools.file_search", "FileSearchWidget"),
+    "encode_decode": PageSpec("components.tools.encode_decode", "EncodeDecodeSuite",
+                              install_hint="pip install pycryptodome PyJWT"),
+    "base_converter": PageSpec("components.tools.base_converter", "BaseConverter"),
+    "regex_formatter": PageSpec("components.tools.regex_formatter", "RegexFormatterWidget"),
+    "code_formatter": PageSpec("components.tools.code_formatter", "CodeFormatterTool",
+                               install_hint="pip install jsbeautifier cssbeautifier beautifulsoup4"),
+    "color_picker": PageSpec("components.tools.color_picker", "ColorPickerWidget"),
+    "image_converter": PageSpec("components.tools.image_conver", "ImageConverterWidget",
+                                install_hint="pip install Pillow"),
+    "screenshot": PageSpec("components.tools.screen_shot", "ScreenshotWidget"),
+    "media_download": PageSpec("components.tools.media_download", "MediaDownloaderWidget",
+                               install_hint="pip install requests"),
+    "qr_tool": PageSpec("components.tools.qr_tool", "QrToolWidget",
+                        install_hint="pip install pillow qrcode[pil]"),
+}
+
+
+def get_page_spec(page_key):
+    """获取页面登记项，不存在时返回 None"""
+    return PAGE_REGISTRY.get(page_key)
@@ -1,83 +1,83 @@
 """
 Tools模块初始化文件
+
+各工具类按需导入：只有在第一次访问 ``components.tools.XXX`` 时才导入对应子模块，
+避免导入本包时就加载 PIL / qrcode / pyzbar / requests / Crypto 等重量级依赖
 """
 
-from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout
-from .json_formatter import JSONFormatter
-from .file_search import FileSearchWidget
-from .encode_decode import EncodeDecodeSuite
-from .regex_formatter import RegexFormatterWidget
-from .file_diff import FileDiffTool
-from .code_formatter import CodeFormatterTool
-from .color_picker import ColorPickerWidget
+import importlib
 
-# 检查 base_converter.py 中是否有主要的转换器类
-try:
-    from .base_converter import BaseConverter
-except ImportError:
-    # 如果导入失败，创建一个占位符
-    class BaseConverter(QWidget):
-        def __init__(self):
-            super().__init__()
-            layout = QVBoxLayout(self)
-            label = QLabel("进制转换工具加载失败")
-            layout.addWidget(label)
+# 导出名 -> (子模块, 类名)
+_LAZY_EXPORTS = {
+    'JSONFormatter': ('.json_formatter', 'JSONFormatter'),
+    'ImageConverterWidget': ('.image_conver', 'ImageConverterWidget'),
+    'FileSearchWidget': ('.file_search', 'FileSearchWidget'),
+    'EncodeDecodeSuite': ('.encode_decode', 'EncodeDecodeSuite'),
+    'RegexFormatterWidget': ('.regex_formatter', 'RegexFormatterWidget'),
+    'FileDiffTool': ('.file_diff', 'FileDiffTool'),
+    'CodeFormatterTool': ('.code_formatter', 'CodeFormatterTool'),
+    'BaseConverter': ('.base_converter', 'BaseConverter'),
+    'ColorPickerWidget': ('.color_picker', 'ColorPickerWidget'),
+    'MediaDownloaderWidget': ('.media_download', 'MediaDownloaderWidget'),
+    'QRToolWidget': ('.qr_tool', 'QrToolWidget'),
+    'ScreenshotWidget': ('.screen_shot', 'ScreenshotWidget'),
+}
 
-# 导入图片转换工具
-try:
-    from .image_conver import ImageConverterWidget
-except ImportError:
-    # 如果导入失败，创建一个占位符
-    class ImageConverterWidget(QWidget):
-        def __init__(self):
-            super().__init__()
-            layout = QVBoxLayout(self)
-            label = QLabel("图片转换工具需要安装 Pillow 库\n请运行: pip install Pillow")
-            label.setWordWrap(True)
-            layout.addWidget(label)
+# 可选工具导入失败时使用占位页面: 导出名 -> (提示文本, 提示样式, 是否打印警告)
+_FALLBACKS = {
+    'BaseConverter': ("进制转换工具加载失败", None, False),
+    'ImageConverterWidget': ("图片转换工具需要安装 Pillow 库\n请运行: pip install Pillow", None, False),
+    'MediaDownloaderWidget': ("媒体下载工具加载失败", None, False),
+    'QRToolWidget': (
+        "二维码工具需要安装依赖库\n请运行: pip install pillow qrcode[pil]",
+        "color: orange; padding: 20px; background-color: #fff3cd; border: 1px solid #ffeaa7; border-radius: 4px;",
+        True,
+    ),
+    'ScreenshotWidget': (
+        "截屏工具加载失败\n某些依赖库可能缺失",
+        "color: red; padding: 20px; background-color: #f8d7da; border: 1px solid #f5c6cb; border-radius: 4px;",
+        True,
+    ),
+}
 
-# 导入媒体下载工具
-try:
-    from .media_download import MediaDownloaderWidget
-except ImportError:
-    # 如果导入失败，创建一个占位符
-    class MediaDownloaderWidget(QWidget):
-        def __init__(self):
-            super().__init__()
-            layout = QVBoxLayout(self)
-            label = QLabel("媒体下载工具加载失败")
-            layout.addWidget(label)
 
-# 导入二维码工具
-try:
-    from .qr_tool import QrToolWidget as QRToolWidget
-except ImportError as e:
-    print(f"⚠️  QR工具部分功能不可用: {e}")
-    # 如果导入失败，创建一个占位符
-    from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
-    
-    class QRToolWidget(QWidget):
-        def __init__(self):
-            super().__init__()
-            layout = QVBoxLayout(self)
-            label = QLabel("二维码工具需要安装依赖库\n请运行: pip install pillow qrcode[pil]")
-            label.setWordWrap(True)
-            label.setStyleSheet("color: orange; padding: 20px; background-color: #fff3cd; border: 1px solid #ffeaa7; border-radius: 4px;")
-            layout.addWidget(label)
+def _make_placeholder(name, exc):
+    """为导入失败的可选工具创建占位类"""
+    from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout
+
+    text, style, verbose = _FALLBACKS[name]
+    if verbose:
+        print(f"⚠️  {name} 不可用: {exc}")
 
-# 导入截屏工具
-try:
-    from .screen_shot import ScreenshotWidget
-except ImportError as e:
-    print(f"⚠️  截屏工具不可用: {e}")
-    # 如果导入失败，创建一个占位符 (QWidget 已在上面导入)
-    class ScreenshotWidget(QWidget):
+    class _Placeholder(QWidget):
         def __init__(self):
             super().__init__()
             layout = QVBoxLayout(self)
-            label = QLabel("截屏工具加载失败\n某些依赖库可能缺失")
+            label = QLabel(text)
             label.setWordWrap(True)
-            label.setStyleSheet("color: red; padding: 20px; background-color: #f8d7da; border: 1px solid #f5c6cb; border-radius: 4px;")
+            if style:
+                label.setStyleSheet(style)
             layout.addWidget(label)
 
+    _Placeholder.__name__ = name
+    return _Placeholder
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, attr = _LAZY_EXPORTS[name]
+    try:
+        value = getattr(importlib.import_module(module_name, __name__), attr)
+    except ImportError as e:
+        if name not in _FALLBACKS:
+            raise
+        value = _make_placeholder(name, e)
+
+    # 缓存结果，后续访问不再走 __getattr__
+    globals()[name] = value
+    return value
+
+
 __all__ = ['JSONFormatter', 'ImageConverterWidget', 'FileSearchWidget', 'EncodeDecodeSuite', 'RegexFormatterWidget', 'FileDiffTool', 'CodeFormatterTool', 'BaseConverter', 'ColorPickerWidget', 'MediaDownloaderWidget', 'QRToolWidget', 'ScreenshotWidget']
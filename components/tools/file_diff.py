@@ -1,151 +1,252 @@
 """
 文本对比工具组件
+差异计算见 utils.diff（patience + Myers 行级差异），左右两侧按差异段对齐显示，
+一侧缺少的行用空白占位行补齐，修改过的行再按词标出实际变化的部分。
+文件不整体读入：utils.diff.LineIndex 以 mmap 映射文件并在后台建立行偏移索引与行哈希，
+两侧的 LineView（见 file_diff_view）只解码、绘制可见的行，对比时滚动同步；
+比较在 DiffThread 中直接使用行哈希，过程中界面保持响应、可随时停止
+目录对比模式见 utils.diff.dirdiff：结果显示为新增/删除/修改的文件树，双击修改过的文件进入逐行对比
+三方合并模式见 utils.diff.merge：两侧各自与基础版本比较，不重叠的修改自动合并，只逐个处理真正的冲突
 """
 
+import os
+import time
+
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QTextEdit, QLabel, QFileDialog, QMessageBox, QGroupBox, QSplitter
+    QLabel, QFileDialog, QMessageBox, QGroupBox, QProgressBar,
+    QRadioButton, QButtonGroup, QStackedWidget, QTreeWidget, QTreeWidgetItem, QCheckBox
 )
-from PySide6.QtGui import QTextCharFormat, QColor, QTextCursor, QFont
-from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor
+from PySide6.QtCore import Qt, QThread, Signal
 
 from components.base_content import BaseContent
 from styles.constants import Colors
-from styles.widgets import (
-    ButtonStyles, TextEditStyles, GroupBoxStyles
+from styles.widgets import ButtonStyles, GroupBoxStyles, ProgressBarStyles, CheckBoxStyles
+from components.tools.file_search_model import format_size
+from components.tools.file_diff_view import (
+    LineView, FileRowSource, DiffRowSource, MergeRowSource, HunkTable, InlineDiffCache
+)
+from utils.diff import (
+    DiffStopped, LineIndex, iter_hunks, iter_matching_blocks, intern_lines, DirDiff, DirDiffStopped,
+    merge3, count_conflicts, write_merge, write_unified, write_html, parse_patch, apply_patch
 )
+from utils.logger import error
 
+# 目录对比中各状态的显示名称与文字颜色
+DIR_STATUS_LABELS = {'added': "新增", 'removed': "删除", 'changed': "修改", 'same': "相同"}
+DIR_STATUS_COLORS = {'added': "#2e7d32", 'removed': "#c62828", 'changed': "#ef6c00", 'same': "#9e9e9e"}
 
+SIDE_NAMES = {'left': "左侧", 'right': "右侧"}
+# 三方合并的三个版本
+MERGE_SIDE_NAMES = {'base': "基础版本", 'left': "左侧", 'right': "右侧"}
+# 冲突的处理方式 -> 按钮文字
+CONFLICT_ACTIONS = (
+    ('left', "⬅️ 采用左侧"), ('right', "➡️ 采用右侧"),
+    ('left+right', "⬅️➡️ 左侧 + 右侧"), ('base', "↩️ 保留基础版本"),
+)
 
-class DraggableTextEdit(QTextEdit):
-    """支持拖放文件的 QTextEdit，用于文本对比工具"""
-    def __init__(self, parent=None, side="left"):
-        super().__init__(parent)
-        self.setAcceptDrops(True)
-        self.side = side  # 标记是左侧还是右侧
-        self.diff_tool = None  # 延迟设置 FileDiffTool 引用
-        
-        # 设置样式，使拖放区域更明显
-        self.setStyleSheet("""
-            QTextEdit {
-                border: 2px dashed #cccccc;
-                background-color: #fafafa;
-            }
-            QTextEdit:hover {
-                border: 2px dashed #07c160;
-                background-color: #f0f9ff;
-            }
-        """)
 
-    def set_diff_tool(self, diff_tool):
-        """设置 FileDiffTool 引用"""
-        self.diff_tool = diff_tool
-
-    def dragEnterEvent(self, event):
-        if event.mimeData().hasUrls():
-            # 检查是否有文件URL
-            urls = event.mimeData().urls()
-            if urls and urls[0].isLocalFile():
-                event.acceptProposedAction()
-                # 改变外观提示用户可以拖放
-                self.setStyleSheet("""
-                    QTextEdit {
-                        border: 2px dashed #07c160;
-                        background-color: #e8f5e8;
-                    }
-                """)
-            else:
-                event.ignore()
-        else:
-            super().dragEnterEvent(event)
-
-    def dragLeaveEvent(self, event):
-        # 恢复正常外观
-        if hasattr(self, 'diff_tool') and self.diff_tool:
-            self.setStyleSheet(TextEditStyles.get_code_style())
-        super().dragLeaveEvent(event)
-
-    def dropEvent(self, event):
-        if event.mimeData().hasUrls():
-            urls = event.mimeData().urls()
-            if urls and urls[0].isLocalFile():
-                file_path = urls[0].toLocalFile()
-                
-                if not self.diff_tool:
-                    return
-
-                try:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-                    
-                    # 设置内容并设为只读
-                    self.setPlainText(content)
-                    self.setReadOnly(True)
-
-                    # 更新路径与文件名标签
-                    filename = file_path.split('/')[-1] if '/' in file_path else file_path.split('\\')[-1]
-                    
-                    if self.side == "left":
-                        self.diff_tool.left_file_path = file_path
-                        self.diff_tool.left_file_label.setText(f"已拖入: {filename}")
-                        self.diff_tool.left_file_label.setStyleSheet(f"color: {Colors.WECHAT_GREEN}; padding: 5px; font-weight: bold;")
-                    else:
-                        self.diff_tool.right_file_path = file_path
-                        self.diff_tool.right_file_label.setText(f"已拖入: {filename}")
-                        self.diff_tool.right_file_label.setStyleSheet(f"color: {Colors.WECHAT_GREEN}; padding: 5px; font-weight: bold;")
-                    
-                    # 恢复正常样式
-                    self.setStyleSheet(TextEditStyles.get_code_style())
-                    
-                    self.diff_tool._update_compare_btn_state()
-                    self.diff_tool.set_status(f"✅ 文件拖放成功: {filename}")
-
-                except Exception as e:
-                    QMessageBox.warning(self, "拖放错误", f"读取文件失败：{str(e)}")
-                    if self.diff_tool:
-                        self.diff_tool.set_status("❌ 拖放失败")
-                    # 恢复正常样式
-                    if hasattr(self, 'diff_tool') and self.diff_tool:
-                        self.setStyleSheet(TextEditStyles.get_code_style())
-                        
-            event.acceptProposedAction()
-        else:
-            super().dropEvent(event)
-            
-    def clear(self):
-        """清空内容时同时设置为可编辑状态"""
-        super().clear()
-        self.setReadOnly(False)
-        # 恢复拖放提示样式
-        if hasattr(self, 'diff_tool') and self.diff_tool:
-            self.setStyleSheet("""
-                QTextEdit {
-                    border: 2px dashed #cccccc;
-                    background-color: #fafafa;
-                }
-                QTextEdit:hover {
-                    border: 2px dashed #07c160;
-                    background-color: #f0f9ff;
-                }
-            """)
+class IndexThread(QThread):
+    """为选择的文件建立行索引；构建过程中视图即可显示已索引的行"""
+    progress_updated = Signal(int)  # 百分比
+    index_failed = Signal(str)
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self):
+        try:
+            self.index.build(lambda: self.stopped,
+                             lambda done, total: self.progress_updated.emit(100 * done // total))
+        except DiffStopped:
+            return
+        except Exception as e:
+            error(f"建立行索引失败: {e}")
+            self.index_failed.emit(str(e))
+
+
+class DiffThread(QThread):
+    """后台比较线程：为两个文件建立行索引（已显示且未过期的索引直接复用），比较两侧的行哈希，
+    每隔 BATCH_INTERVAL 秒把新发现的差异段发回界面线程。
+    行内容不经过线程之间的信号，视图按需从索引中读取可见的行
+    """
+    progress_updated = Signal(str, int)     # (阶段, 百分比)
+    indexes_ready = Signal(object, object)  # (左侧 LineIndex, 右侧 LineIndex)
+    hunks_ready = Signal(list, int)         # (有差异的段, 已对齐的行数)
+    diff_finished = Signal(int, int)        # (左侧行数, 右侧行数)
+    diff_failed = Signal(str)
+
+    BATCH_INTERVAL = 0.1
+
+    def __init__(self, left_path, right_path, left_index=None, right_index=None):
+        super().__init__()
+        self.left_path = left_path
+        self.right_path = right_path
+        self.left_index = left_index
+        self.right_index = right_index
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+    def _index(self, index, path, label, base, created):
+        if index is not None and index.complete and index.path == path and index.is_fresh():
+            return index
+        index = LineIndex(path)
+        created.append(index)
+
+        def on_progress(done, total):
+            self.progress_updated.emit(f"正在索引{label}文件", base + 25 * done // total)
+        return index.build(lambda: self.stopped, on_progress)
+
+    def run(self):
+        created = []  # 本线程新建、尚未交给界面线程的索引
+        try:
+            left = self._index(self.left_index, self.left_path, "左侧", 0, created)
+            right = self._index(self.right_index, self.right_path, "右侧", 25, created)
+            self.indexes_ready.emit(left, right)
+            created = []
+            self.progress_updated.emit("正在比较", 50)
+            a, b = intern_lines(left.hashes, right.hashes)
+            blocks = iter_matching_blocks(a, b, should_stop=lambda: self.stopped)
+            del a, b
+            self._stream(iter_hunks(blocks, left.line_count, right.line_count), left.line_count)
+        except DiffStopped:
+            return
+        except Exception as e:
+            error(f"文件对比失败: {e}")
+            self.diff_failed.emit(str(e))
+            return
+        finally:
+            for index in created:
+                index.close()
+        self.diff_finished.emit(left.line_count, right.line_count)
+
+    def _stream(self, hunks, left_count):
+        """按时间间隔发出新发现的差异段与已对齐的行数"""
+        changed, rows = [], 0
+        last_emit = time.monotonic()
+        total = max(left_count, 1)
+        for hunk in hunks:
+            if self.stopped:
+                raise DiffStopped()
+            if hunk.tag != 'equal':
+                changed.append(hunk)
+            rows = hunk.row + hunk.rows
+            if time.monotonic() - last_emit >= self.BATCH_INTERVAL:
+                self.hunks_ready.emit(changed, rows)
+                self.progress_updated.emit("正在比较", 50 + 50 * hunk.left_end // total)
+                changed = []
+                last_emit = time.monotonic()
+        self.hunks_ready.emit(changed, rows)
+
+
+class DirDiffThread(QThread):
+    """目录对比线程"""
+    progress_updated = Signal(str, int, int)  # (阶段, 已完成, 总数)；总数为 0 时进度不确定
+    diff_finished = Signal(list)              # DirDiffEntry 列表
+    diff_failed = Signal(str)
+
+    def __init__(self, left_root, right_root):
+        super().__init__()
+        self.stopped = False
+        self.diff = DirDiff(left_root, right_root, should_stop=lambda: self.stopped)
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self):
+        try:
+            entries = self.diff.compare(
+                on_progress=lambda count: self.progress_updated.emit(f"正在遍历，已发现 {count} 个文件", 0, 0),
+                on_read_progress=lambda done, total: self.progress_updated.emit("正在比较内容", done, total),
+            )
+        except DirDiffStopped:
+            return
+        except Exception as e:
+            error(f"目录对比失败: {e}")
+            self.diff_failed.emit(str(e))
+            return
+        self.diff_finished.emit(entries)
+
+
+class MergeThread(QThread):
+    """三方合并线程：为三个文件建立行索引，两侧分别与基础版本比较行哈希后合并"""
+    progress_updated = Signal(str, int)      # (阶段, 百分比)
+    merge_finished = Signal(object, list)    # ({版本: LineIndex}, MergeChunk 列表)
+    merge_failed = Signal(str)
+
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = dict(paths)
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self):
+        indexes = {}
+        try:
+            for number, (side, path) in enumerate(self.paths.items()):
+                indexes[side] = LineIndex(path)
+
+                def on_progress(done, total, label=MERGE_SIDE_NAMES[side], base=25 * number):
+                    self.progress_updated.emit(f"正在索引{label}", base + 25 * done // total)
+                indexes[side].build(lambda: self.stopped, on_progress)
+            self.progress_updated.emit("正在合并", 75)
+            chunks = merge3(indexes['base'].hashes, indexes['left'].hashes, indexes['right'].hashes,
+                            should_stop=lambda: self.stopped)
+            self.merge_finished.emit(indexes, chunks)
+            indexes = {}
+        except DiffStopped:
+            return
+        except Exception as e:
+            error(f"三方合并失败: {e}")
+            self.merge_failed.emit(str(e))
+        finally:
+            for index in indexes.values():
+                index.close()
 
 
 class FileDiffTool(BaseContent):
     def __init__(self):
         self.left_file_path = None
         self.right_file_path = None
+        self.hunk_table = HunkTable()  # 对齐视图的差异段表（两侧共享）
+        self.current_hunk = -1
+        self.diff_complete = False  # 差异段表已完整（未被停止），可以导出
+        self.diff_thread = None
+        self.indexes = {'left': None, 'right': None}        # 两侧显示的 LineIndex
+        self.index_threads = {'left': None, 'right': None}
+        self.left_dir = None
+        self.right_dir = None
+        self.dir_entries = []     # 目录对比结果（DirDiffEntry）
+        self.dir_thread = None
+        self.merge_paths = {'base': None, 'left': None, 'right': None}
+        self.merge_indexes = {}   # 三方合并结果引用的 LineIndex
+        self.merge_chunks = []    # MergeChunk 列表
+        self.merge_conflicts = [] # 冲突所在的合并块序号
+        self.merge_choices = {}   # 合并块序号 -> 冲突的处理方式
+        self.current_conflict = -1
+        self.merge_thread = None
 
         # 创建主要内容组件
         content_widget = self._create_content_widget()
         
         # 初始化基类
         super().__init__(title="📄 文本对比工具", content_widget=content_widget)
-        
-        # 设置文本编辑器的 diff_tool 引用
-        self.left_text.set_diff_tool(self)
-        self.right_text.set_diff_tool(self)
 
-    
+    @property
+    def diff_hunks(self):
+        """有差异的段（DiffHunk），按对齐视图的行号排列"""
+        return self.hunk_table.hunks
+
     def _create_content_widget(self):
         """创建主要内容区域组件 - 使用全局样式的传统布局"""
         
@@ -155,16 +256,17 @@ class FileDiffTool(BaseContent):
         main_layout.setContentsMargins(15, 15, 15, 15)
         main_layout.setSpacing(20)
         
-        # 创建文本编辑器
-        self.left_text = DraggableTextEdit(side="left")
-        self.left_text.setPlaceholderText("请粘贴原始代码或拖放文件到这里...")
-        self.left_text.setObjectName("left_text")
-        self.left_text.setStyleSheet(TextEditStyles.get_standard_style("left_text"))
-        
-        self.right_text = DraggableTextEdit(side="right")
-        self.right_text.setPlaceholderText("请粘贴原始代码或拖放文件到这里...")
-        self.right_text.setObjectName("right_text")
-        self.right_text.setStyleSheet(TextEditStyles.get_standard_style("right_text"))
+        # 两侧的只读行视图：只绘制可见的行，对比时滚动同步
+        self.left_view = LineView()
+        self.right_view = LineView()
+        for side, view in (("left", self.left_view), ("right", self.right_view)):
+            view.set_placeholder("拖放文件到这里，或点击上方按钮选择文件")
+            view.file_dropped.connect(lambda path, side=side: self._open_file(side, path, "已拖入"))
+        for view, other in ((self.left_view, self.right_view), (self.right_view, self.left_view)):
+            view.verticalScrollBar().valueChanged.connect(
+                lambda value, bar=other.verticalScrollBar(): self._sync_scroll(bar, value))
+            view.horizontalScrollBar().valueChanged.connect(
+                lambda value, bar=other.horizontalScrollBar(): self._sync_scroll(bar, value))
         
         # 使用水平布局创建左右对比面板
         text_compare_widget = QWidget()
@@ -172,14 +274,38 @@ class FileDiffTool(BaseContent):
         text_compare_layout.setSpacing(15)
         
         # 左侧文本面板（包含文件选择器）
-        left_panel = self._create_text_panel_with_selector("左侧文件", self.left_text, "left", "📄 选择左侧文件", self._choose_left_file)
+        left_panel = self._create_text_panel_with_selector("左侧文件", self.left_view, "left", "📄 选择左侧文件", self._choose_left_file)
         text_compare_layout.addWidget(left_panel)
         
         # 右侧文本面板（包含文件选择器）
-        right_panel = self._create_text_panel_with_selector("右侧文件", self.right_text, "right", "📄 选择右侧文件", self._choose_right_file)
+        right_panel = self._create_text_panel_with_selector("右侧文件", self.right_view, "right", "📄 选择右侧文件", self._choose_right_file)
         text_compare_layout.addWidget(right_panel)
         
-        main_layout.addWidget(text_compare_widget, 1)  # 给对比区域更多空间
+        # 对比模式：文件 / 目录 / 三方合并
+        mode_layout = QHBoxLayout()
+        self.mode_group = QButtonGroup(main_widget)
+        self.rb_file_mode = QRadioButton("📄 文件对比")
+        self.rb_dir_mode = QRadioButton("📁 目录对比")
+        self.rb_dir_mode.setToolTip("按相对路径比较两个目录：大小或修改时间不同的文件才读取内容比较，"
+                                    "双击修改过的文件查看逐行差异")
+        self.rb_merge_mode = QRadioButton("🔀 三方合并")
+        self.rb_merge_mode.setToolTip("左右两侧分别与基础版本比较：只有一侧修改或两侧修改相同的部分自动合并，"
+                                      "只需逐个处理真正的冲突")
+        self.rb_file_mode.setChecked(True)
+        for rb in (self.rb_file_mode, self.rb_dir_mode, self.rb_merge_mode):
+            rb.setStyleSheet(CheckBoxStyles.get_standard_style())
+            self.mode_group.addButton(rb)
+            mode_layout.addWidget(rb)
+        mode_layout.addStretch()
+        self.rb_dir_mode.toggled.connect(self._on_mode_changed)
+        self.rb_merge_mode.toggled.connect(self._on_mode_changed)
+        main_layout.addLayout(mode_layout)
+
+        self.view_stack = QStackedWidget()
+        self.view_stack.addWidget(text_compare_widget)
+        self.view_stack.addWidget(self._create_dir_page())
+        self.view_stack.addWidget(self._create_merge_page())
+        main_layout.addWidget(self.view_stack, 1)  # 给对比区域更多空间
         
         # 操作按钮区域 - 放在底部
         button_widget = QWidget()
@@ -192,18 +318,148 @@ class FileDiffTool(BaseContent):
         
         self.compare_btn = QPushButton("🔍 开始对比")
         self.compare_btn.setStyleSheet(ButtonStyles.get_primary_style())
-        self.compare_btn.clicked.connect(self._compare_files)
+        self.compare_btn.clicked.connect(self._start_compare)
         self.compare_btn.setEnabled(False)
-        
+
+        self.stop_btn = QPushButton("⏹️ 停止")
+        self.stop_btn.setStyleSheet(ButtonStyles.get_secondary_style())
+        self.stop_btn.clicked.connect(self._stop_compare)
+        self.stop_btn.setEnabled(False)
+
+        # 差异导航
+        self.prev_hunk_btn = QPushButton("⬆️ 上一处")
+        self.prev_hunk_btn.setStyleSheet(ButtonStyles.get_secondary_style())
+        self.prev_hunk_btn.clicked.connect(lambda: self._goto_hunk(self.current_hunk - 1))
+        self.next_hunk_btn = QPushButton("⬇️ 下一处")
+        self.next_hunk_btn.setStyleSheet(ButtonStyles.get_secondary_style())
+        self.next_hunk_btn.clicked.connect(lambda: self._goto_hunk(self.current_hunk + 1))
+        self.hunk_label = QLabel("")
+        self.hunk_label.setStyleSheet(f"color: {Colors.TEXT_SECONDARY}; padding: 5px;")
+
+        # 导出差异 / 应用补丁
+        self.export_patch_btn = QPushButton("📤 导出补丁")
+        self.export_patch_btn.setToolTip("导出为 unified diff（.patch），可用 git apply / patch 应用")
+        self.export_patch_btn.clicked.connect(lambda: self._export_diff('patch'))
+        self.export_html_btn = QPushButton("🌐 导出 HTML")
+        self.export_html_btn.setToolTip("导出为左右对照的 HTML 页面（样式内联，可直接用浏览器打开）")
+        self.export_html_btn.clicked.connect(lambda: self._export_diff('html'))
+        self.apply_patch_btn = QPushButton("🩹 应用补丁")
+        self.apply_patch_btn.setToolTip("把补丁应用到左侧文件：行号有偏移或上下文略有不同时自动查找位置，"
+                                        "无法应用的部分写入 .rej 文件")
+        self.apply_patch_btn.clicked.connect(self._apply_patch)
+        for btn in (self.export_patch_btn, self.export_html_btn, self.apply_patch_btn):
+            btn.setStyleSheet(ButtonStyles.get_secondary_style())
+        self._update_hunk_nav()
+
+        button_layout.addWidget(self.prev_hunk_btn)
+        button_layout.addWidget(self.next_hunk_btn)
+        button_layout.addWidget(self.hunk_label)
+        button_layout.addWidget(self.export_patch_btn)
+        button_layout.addWidget(self.export_html_btn)
+        button_layout.addWidget(self.apply_patch_btn)
         button_layout.addStretch()
         button_layout.addWidget(self.clear_btn)
+        button_layout.addWidget(self.stop_btn)
         button_layout.addWidget(self.compare_btn)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.progress_bar.setStyleSheet(ProgressBarStyles.get_standard_style())
+        main_layout.addWidget(self.progress_bar)
         
         main_layout.addWidget(button_widget)
         
         # 状态标签已由BaseContent类处理
         return main_widget
     
+    def _create_dir_page(self):
+        """目录对比页：两侧目录选择与结果树"""
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        selector_layout = QHBoxLayout()
+        for side, text in (("left", "📁 选择左侧目录"), ("right", "📁 选择右侧目录")):
+            btn = QPushButton(text)
+            btn.setStyleSheet(ButtonStyles.get_secondary_style())
+            btn.clicked.connect(lambda checked=False, side=side: self._choose_dir(side))
+            label = QLabel("未选择目录")
+            label.setStyleSheet(f"color: {Colors.TEXT_SECONDARY}; padding: 8px; font-size: 13px;")
+            selector_layout.addWidget(btn)
+            selector_layout.addWidget(label, 1)
+            setattr(self, f"{side}_dir_label", label)
+        layout.addLayout(selector_layout)
+
+        self.show_same_check = QCheckBox("显示相同的文件")
+        self.show_same_check.setStyleSheet(CheckBoxStyles.get_standard_style())
+        self.show_same_check.toggled.connect(self._populate_dir_tree)
+        layout.addWidget(self.show_same_check)
+
+        self.dir_tree = QTreeWidget()
+        self.dir_tree.setHeaderLabels(["文件", "状态", "左侧大小", "右侧大小"])
+        self.dir_tree.setColumnWidth(0, 420)
+        self.dir_tree.setUniformRowHeights(True)
+        self.dir_tree.setStyleSheet(f"""
+            QTreeWidget {{
+                border: 1px solid {Colors.BORDER_LIGHT};
+                border-radius: 6px;
+                background-color: white;
+                font-size: 13px;
+            }}
+        """)
+        self.dir_tree.itemDoubleClicked.connect(self._open_dir_entry)
+        layout.addWidget(self.dir_tree, 1)
+        return page
+
+    def _create_merge_page(self):
+        """三方合并页：三个版本的选择、合并结果与冲突处理"""
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        selector_layout = QHBoxLayout()
+        self.merge_labels = {}
+        for side, name in MERGE_SIDE_NAMES.items():
+            btn = QPushButton(f"📄 选择{name}")
+            btn.setStyleSheet(ButtonStyles.get_secondary_style())
+            btn.clicked.connect(lambda checked=False, side=side: self._choose_merge_file(side))
+            label = QLabel("未选择文件")
+            label.setStyleSheet(f"color: {Colors.TEXT_SECONDARY}; padding: 8px; font-size: 13px;")
+            selector_layout.addWidget(btn)
+            selector_layout.addWidget(label, 1)
+            self.merge_labels[side] = label
+        layout.addLayout(selector_layout)
+
+        self.merge_view = LineView()
+        self.merge_view.set_placeholder("选择基础版本与左右两侧修改后的文件，点击“开始对比”进行三方合并")
+        layout.addWidget(self.merge_view, 1)
+
+        conflict_layout = QHBoxLayout()
+        self.prev_conflict_btn = QPushButton("⬆️ 上一处冲突")
+        self.prev_conflict_btn.clicked.connect(lambda: self._goto_conflict(self.current_conflict - 1))
+        self.next_conflict_btn = QPushButton("⬇️ 下一处冲突")
+        self.next_conflict_btn.clicked.connect(lambda: self._goto_conflict(self.current_conflict + 1))
+        self.conflict_label = QLabel("")
+        self.conflict_label.setStyleSheet(f"color: {Colors.TEXT_SECONDARY}; padding: 5px;")
+        conflict_layout.addWidget(self.prev_conflict_btn)
+        conflict_layout.addWidget(self.next_conflict_btn)
+        conflict_layout.addWidget(self.conflict_label)
+        conflict_layout.addStretch()
+        self.resolve_btns = []
+        for choice, text in CONFLICT_ACTIONS:
+            btn = QPushButton(text)
+            btn.clicked.connect(lambda checked=False, choice=choice: self._resolve_conflict(choice))
+            conflict_layout.addWidget(btn)
+            self.resolve_btns.append(btn)
+        self.save_merge_btn = QPushButton("💾 保存合并结果")
+        self.save_merge_btn.clicked.connect(self._save_merge)
+        conflict_layout.addWidget(self.save_merge_btn)
+        for btn in (self.prev_conflict_btn, self.next_conflict_btn, *self.resolve_btns, self.save_merge_btn):
+            btn.setStyleSheet(ButtonStyles.get_secondary_style())
+        layout.addLayout(conflict_layout)
+        self._update_conflict_nav()
+        return page
+
     def _create_file_selector(self, side, button_text, callback):
         """创建文件选择器组件"""
         widget = QWidget()
@@ -239,7 +495,7 @@ class FileDiffTool(BaseContent):
         layout.addWidget(text_edit)
         return panel
     
-    def _create_text_panel_with_selector(self, title, text_edit, side, button_text, callback):
+    def _create_text_panel_with_selector(self, title, view, side, button_text, callback):
         """创建包含文件选择器的文本面板组件"""
         panel = QGroupBox(title)
         panel.setStyleSheet(GroupBoxStyles.get_standard_style())
@@ -249,8 +505,8 @@ class FileDiffTool(BaseContent):
         file_selector = self._create_file_selector(side, button_text, callback)
         layout.addWidget(file_selector)
         
-        # 添加文本编辑器
-        layout.addWidget(text_edit)
+        # 添加行视图
+        layout.addWidget(view)
         
         return panel
     
@@ -263,12 +519,7 @@ class FileDiffTool(BaseContent):
             "文本文件 (*.txt *.py *.js *.html *.css *.json *.xml *.md);;所有文件 (*.*)"
         )
         if file_path:
-            self.left_file_path = file_path
-            filename = file_path.split('/')[-1] if '/' in file_path else file_path.split('\\')[-1]
-            self.left_file_label.setText(f"已选择: {filename}")
-            self.left_file_label.setStyleSheet(f"color: {Colors.WECHAT_GREEN}; padding: 5px; font-weight: bold;")
-            self._load_file_content(file_path, self.left_text)
-            self._update_compare_btn_state()
+            self._open_file("left", file_path, "已选择")
     
     def _choose_right_file(self):
         """选择右侧文件"""
@@ -279,143 +530,683 @@ class FileDiffTool(BaseContent):
             "文本文件 (*.txt *.py *.js *.html *.css *.json *.xml *.md);;所有文件 (*.*)"
         )
         if file_path:
-            self.right_file_path = file_path
-            filename = file_path.split('/')[-1] if '/' in file_path else file_path.split('\\')[-1]
-            self.right_file_label.setText(f"已选择: {filename}")
-            self.right_file_label.setStyleSheet(f"color: {Colors.WECHAT_GREEN}; padding: 5px; font-weight: bold;")
-            self._load_file_content(file_path, self.right_text)
-            self._update_compare_btn_state()
+            self._open_file("right", file_path, "已选择")
     
-    def _load_file_content(self, file_path, text_edit):
-        """加载文件内容到文本编辑器"""
+    def _choose_dir(self, side):
+        """选择目录对比的一侧"""
+        dir_path = QFileDialog.getExistingDirectory(self, "选择左侧目录" if side == "left" else "选择右侧目录")
+        if not dir_path:
+            return
+        setattr(self, f"{side}_dir", dir_path)
+        label = getattr(self, f"{side}_dir_label")
+        label.setText(f"已选择: {dir_path}")
+        label.setStyleSheet(f"color: {Colors.WECHAT_GREEN}; padding: 5px; font-weight: bold;")
+        self._update_compare_btn_state()
+
+    def _dir_mode(self):
+        return self.rb_dir_mode.isChecked()
+
+    def _merge_mode(self):
+        return self.rb_merge_mode.isChecked()
+
+    def _on_mode_changed(self):
+        file_mode = self.rb_file_mode.isChecked()
+        self.view_stack.setCurrentIndex(2 if self._merge_mode() else 1 if self._dir_mode() else 0)
+        for widget in (self.prev_hunk_btn, self.next_hunk_btn, self.hunk_label,
+                       self.export_patch_btn, self.export_html_btn, self.apply_patch_btn):
+            widget.setVisible(file_mode)
+        self._update_compare_btn_state()
+
+    def _start_compare(self):
+        if self._merge_mode():
+            self._merge_files()
+        elif self._dir_mode():
+            self._compare_dirs()
+        else:
+            self._compare_files()
+
+    # -------------- 载入文件 --------------
+    def _view(self, side):
+        return self.left_view if side == "left" else self.right_view
+
+    def _set_file(self, side, file_path, text):
+        """记录一侧的文件路径并更新标签"""
+        setattr(self, f"{side}_file_path", file_path)
+        label = getattr(self, f"{side}_file_label")
+        label.setText(text)
+        label.setStyleSheet(f"color: {Colors.WECHAT_GREEN}; padding: 5px; font-weight: bold;")
+
+    def _open_file(self, side, file_path, action):
+        """选择或拖入一侧的文件"""
+        if self.diff_thread is not None:
+            self._update_status("正在对比，请先停止对比再更换文件", "normal")
+            return
+        self._set_file(side, file_path, f"{action}: {os.path.basename(file_path)}")
+        self._load_file(side)
+        self._update_compare_btn_state()
+
+    def _load_file(self, side):
+        """在后台为一侧的文件建立行索引，已索引的行立即可以浏览"""
+        file_path = getattr(self, f"{side}_file_path")
         try:
-            with open(file_path, "r", encoding="utf-8", errors='ignore') as f:
-                content = f.read()
-            text_edit.setPlainText(content)
-            text_edit.setReadOnly(True)
-            # 恢复正常样式
-            text_edit.setStyleSheet(TextEditStyles.get_code_style())
-        except Exception as e:
+            index = LineIndex(file_path)
+        except (OSError, ValueError) as e:
             QMessageBox.warning(self, "文件读取警告", f"无法读取文件 {file_path}:\n{str(e)}")
-    
+            return
+        # 之前的对比结果作废，另一侧恢复显示其文件内容
+        self._show_files()
+        self._set_index(side, index)
+        self._view(side).set_source(FileRowSource(index))
+        thread = IndexThread(index)
+        thread.progress_updated.connect(lambda percent, side=side: self._update_index_progress(side, percent))
+        thread.index_failed.connect(
+            lambda message, path=file_path: QMessageBox.warning(self, "文件读取警告", f"无法读取文件 {path}:\n{message}"))
+        thread.finished.connect(lambda thread=thread, side=side: self._end_index_thread(side, thread))
+        self.index_threads[side] = thread
+        thread.start()
+
+    def _set_index(self, side, index):
+        """替换一侧的行索引，关闭旧的索引（其后台构建先停止）"""
+        old = self.indexes[side]
+        if old is index:
+            return
+        thread = self.index_threads[side]
+        if thread is not None and thread.index is old:
+            thread.stop()
+            thread.wait()
+        self.indexes[side] = index
+        if old is not None:
+            old.close()
+
+    def _show_files(self):
+        """丢弃对比结果，两侧显示各自文件的内容"""
+        self.hunk_table = HunkTable()
+        self.current_hunk = -1
+        self.diff_complete = False
+        self._update_hunk_nav()
+        for side, index in self.indexes.items():
+            self._view(side).set_source(FileRowSource(index) if index is not None else None)
+
+    def _update_index_progress(self, side, percent):
+        if self.index_threads[side] is None or self.diff_thread is not None:
+            return
+        self._view(side).refresh()
+        self._update_status(f"正在索引{SIDE_NAMES[side]}文件... {percent}%", "normal")
+
+    def _end_index_thread(self, side, thread):
+        thread.wait()
+        thread.deleteLater()
+        if self.index_threads[side] is not thread:
+            return
+        self.index_threads[side] = None
+        if thread.stopped or not thread.index.complete:
+            return
+        self._view(side).refresh()
+        if self.diff_thread is None:
+            index = thread.index
+            self._update_status(f"✅ 已载入{SIDE_NAMES[side]}文件: {os.path.basename(index.path)}，"
+                                f"{index.line_count} 行，{format_size(index.size)}", "normal")
+
+    def _sync_scroll(self, bar, value):
+        """显示对比结果时两侧同步滚动（两侧行数相同，同步后不会再次触发）"""
+        if isinstance(self.left_view.source, DiffRowSource):
+            bar.setValue(value)
+
+    def _compare_ready(self):
+        """当前模式下需要的文件/目录都已选择，且没有正在进行的比较"""
+        if self._merge_mode():
+            return all(self.merge_paths.values()) and self.merge_thread is None
+        if self._dir_mode():
+            return bool(self.left_dir and self.right_dir) and self.dir_thread is None
+        return bool(self.left_file_path and self.right_file_path) and self.diff_thread is None
+
     def _update_compare_btn_state(self):
         """更新对比按钮状态"""
+        if self._merge_mode():
+            self.compare_btn.setEnabled(self._compare_ready())
+            if all(self.merge_paths.values()):
+                self._update_status("点击'开始对比'按钮进行三方合并", "normal")
+            return
+        if self._dir_mode():
+            ready = bool(self.left_dir and self.right_dir)
+            self.compare_btn.setEnabled(ready and self.dir_thread is None)
+            if ready:
+                self._update_status("点击'开始对比'按钮进行目录比较", "normal")
+            return
         if self.left_file_path and self.right_file_path:
-            self.compare_btn.setEnabled(True)
+            self.compare_btn.setEnabled(self.diff_thread is None)
             self._update_status("点击'开始对比'按钮进行文件比较", "normal")
         else:
             self.compare_btn.setEnabled(False)
     
     def _clear_results(self):
         """清空对比结果"""
-        self.left_text.clear()
-        self.right_text.clear()
+        self._stop_compare()
+        if self._merge_mode():
+            self._clear_merge_results()
+            return
+        if self._dir_mode():
+            self._clear_dir_results()
+            return
+        for side in ("left", "right"):
+            self._view(side).set_source(None)
+            self._set_index(side, None)
         self.left_file_path = None
         self.right_file_path = None
         self.left_file_label.setText("未选择文件")
         self.right_file_label.setText("未选择文件")
         self.left_file_label.setStyleSheet(f"color: {Colors.TEXT_SECONDARY}; padding: 5px;")
         self.right_file_label.setStyleSheet(f"color: {Colors.TEXT_SECONDARY}; padding: 5px;")
+        self._show_files()
         self._update_compare_btn_state()
         self._update_status("请选择两个文件进行对比", "normal")
     
     def _compare_files(self):
-        """对比两个文件"""
+        """在后台对比两个文件，结果按批显示"""
         if not self.left_file_path or not self.right_file_path:
             QMessageBox.warning(self, "警告", "请先选择两个文件！")
             return
-            
-        try:
-            # 重新读取文件内容以确保最新
-            with open(self.left_file_path, "r", encoding="utf-8", errors='ignore') as f:
-                left_lines = f.readlines()
-            with open(self.right_file_path, "r", encoding="utf-8", errors='ignore') as f:
-                right_lines = f.readlines()
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"文件读取失败：{str(e)}")
+        if self.diff_thread is not None:
             return
-        
-        # 清除之前的高亮
-        self._clear_highlights()
-        
-        max_lines = max(len(left_lines), len(right_lines))
-        diff_count = 0
-        
-        # 设置不同类型的格式
-        diff_format = QTextCharFormat()
-        diff_format.setBackground(QColor("#ffeb3b"))  # 黄色背景表示不同
-        
-        missing_format = QTextCharFormat()
-        missing_format.setBackground(QColor("#ffcdd2"))  # 浅红色背景表示缺失
-        
-        # 重新设置文本内容并进行逐行比较
-        self.left_text.clear()
-        self.right_text.clear()
-        
-        left_content = ""
-        right_content = ""
-        
-        for i in range(max_lines):
-            left_line = left_lines[i].rstrip('\n') if i < len(left_lines) else ""
-            right_line = right_lines[i].rstrip('\n') if i < len(right_lines) else ""
-            
-            left_content += left_line + '\n'
-            right_content += right_line + '\n'
-            
-            if left_line != right_line:
-                diff_count += 1
-        
-        # 设置文本内容
-        self.left_text.setPlainText(left_content)
-        self.right_text.setPlainText(right_content)
-        
-        # 重新进行高亮处理
-        for i in range(max_lines):
-            left_line = left_lines[i].rstrip('\n') if i < len(left_lines) else ""
-            right_line = right_lines[i].rstrip('\n') if i < len(right_lines) else ""
-            
-            if left_line != right_line:
-                # 高亮不同的行
-                if i < len(left_lines):
-                    self._highlight_line(self.left_text, i, diff_format if left_line else missing_format)
-                if i < len(right_lines):
-                    self._highlight_line(self.right_text, i, diff_format if right_line else missing_format)
-        
-        # 更新状态
-        if diff_count == 0:
+
+        # 两侧先显示各自的文件，索引就绪后切换为对齐视图，差异段逐批加入
+        self._show_files()
+
+        self.compare_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self._update_status("正在索引文件...", "normal")
+
+        # 已建立完成、且文件此后未被修改的索引直接复用，否则重新索引以确保是最新内容
+        self.diff_thread = DiffThread(self.left_file_path, self.right_file_path,
+                                      self.indexes['left'], self.indexes['right'])
+        self.diff_thread.progress_updated.connect(self._update_diff_progress)
+        self.diff_thread.indexes_ready.connect(self._show_diff)
+        self.diff_thread.hunks_ready.connect(self._add_diff_hunks)
+        self.diff_thread.diff_finished.connect(self._diff_finished)
+        self.diff_thread.diff_failed.connect(self._diff_failed)
+        self.diff_thread.finished.connect(self._end_diff_thread)
+        self.diff_thread.start()
+
+    def _stop_compare(self):
+        for thread in (self.diff_thread, self.dir_thread, self.merge_thread):
+            if thread is not None:
+                thread.stop()
+
+    def _diff_active(self):
+        """停止后线程中已排队的信号不再处理"""
+        return self.diff_thread is not None and not self.diff_thread.stopped
+
+    def _update_diff_progress(self, stage, percent):
+        if not self._diff_active():
+            return
+        self.progress_bar.setValue(percent)
+        found = f"，已发现 {len(self.diff_hunks)} 处差异" if self.diff_hunks else ""
+        self._update_status(f"{stage}... {percent}%{found}", "normal")
+
+    def _show_diff(self, left, right):
+        """两侧索引就绪：替换为对齐视图"""
+        if not self._diff_active():
+            for index in (left, right):
+                if index not in self.indexes.values():
+                    index.close()
+            return
+        for side, index in (("left", left), ("right", right)):
+            self._set_index(side, index)
+        self.hunk_table = HunkTable()
+        inline = InlineDiffCache(left, right)
+        self.left_view.set_source(DiffRowSource(left, 'left', self.hunk_table, inline))
+        self.right_view.set_source(DiffRowSource(right, 'right', self.hunk_table, inline))
+
+    def _add_diff_hunks(self, hunks, row_count):
+        """加入一批差异段，对齐视图随之变长"""
+        if not self._diff_active():
+            return
+        first_batch = bool(hunks) and not self.diff_hunks
+        self.hunk_table.add(hunks, row_count)
+        for view in (self.left_view, self.right_view):
+            view.refresh()
+        if first_batch:
+            self._goto_hunk(0)
+        else:
+            self._update_hunk_nav()
+
+    def _diff_finished(self, left_count, right_count):
+        if not self._diff_active():
+            return
+        self.diff_complete = True
+        self._update_hunk_nav()
+        if not self.diff_hunks:
             self._update_status("文件内容完全相同！", "success")
+            return
+        counts = {'replace': 0, 'delete': 0, 'insert': 0}
+        for hunk in self.diff_hunks:
+            counts[hunk.tag] += 1
+        deleted = sum(hunk.left_count for hunk in self.diff_hunks)
+        inserted = sum(hunk.right_count for hunk in self.diff_hunks)
+        self._update_status(
+            f"左侧 {left_count} 行，右侧 {right_count} 行，共 {len(self.diff_hunks)} 处差异"
+            f"（修改 {counts['replace']}、删除 {counts['delete']}、新增 {counts['insert']}；"
+            f"-{deleted} / +{inserted} 行）",
+            "warning"
+        )
+
+    def _diff_failed(self, message):
+        QMessageBox.critical(self, "错误", f"文件对比失败：{message}")
+        self._update_status("❌ 对比失败", "error")
+
+    def _end_diff_thread(self):
+        # finished 在 run() 返回后发出，此前的结果信号都已处理
+        thread, self.diff_thread = self.diff_thread, None
+        thread.wait()
+        stopped = thread.stopped
+        thread.deleteLater()
+        self.progress_bar.setVisible(False)
+        self.stop_btn.setEnabled(False)
+        self.compare_btn.setEnabled(self._compare_ready())
+        if stopped and self.left_file_path and self.right_file_path:
+            self._update_status(f"已停止对比，已显示部分结果（{len(self.diff_hunks)} 处差异）", "normal")
+
+    # -------------- 目录对比 --------------
+    def _compare_dirs(self):
+        """在后台比较两个目录"""
+        if not self.left_dir or not self.right_dir or self.dir_thread is not None:
+            return
+        self.dir_entries = []
+        self.dir_tree.clear()
+        self.compare_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self._update_status("正在遍历目录...", "normal")
+        self.dir_thread = DirDiffThread(self.left_dir, self.right_dir)
+        self.dir_thread.progress_updated.connect(self._update_dir_progress)
+        self.dir_thread.diff_finished.connect(self._dir_diff_finished)
+        self.dir_thread.diff_failed.connect(self._diff_failed)
+        self.dir_thread.finished.connect(self._end_dir_thread)
+        self.dir_thread.start()
+
+    def _update_dir_progress(self, stage, done, total):
+        if self.dir_thread is None or self.dir_thread.stopped:
+            return
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self._update_status(f"{stage}... {done} / {total}" if total else f"{stage}...", "normal")
+
+    def _dir_diff_finished(self, entries):
+        diff = self.dir_thread.diff
+        self.dir_entries = entries
+        self._populate_dir_tree()
+        counts = diff.counts
+        summary = (f"左侧 {diff.left_count} 个文件，右侧 {diff.right_count} 个文件："
+                   f"新增 {counts['added']}、删除 {counts['removed']}、修改 {counts['changed']}、"
+                   f"相同 {counts['same']}（读取比较了 {diff.read_count} 个文件）")
+        self._update_status(summary, "normal")
+
+    def _end_dir_thread(self):
+        thread, self.dir_thread = self.dir_thread, None
+        thread.wait()
+        stopped = thread.stopped
+        thread.deleteLater()
+        self.progress_bar.setVisible(False)
+        self.stop_btn.setEnabled(False)
+        self.compare_btn.setEnabled(self._compare_ready())
+        if stopped:
+            self._update_status("已停止目录对比", "normal")
+
+    def _clear_dir_results(self):
+        self.dir_entries = []
+        self.dir_tree.clear()
+        self.left_dir = self.right_dir = None
+        for label in (self.left_dir_label, self.right_dir_label):
+            label.setText("未选择目录")
+            label.setStyleSheet(f"color: {Colors.TEXT_SECONDARY}; padding: 5px;")
+        self._update_compare_btn_state()
+        self._update_status("请选择两个目录进行对比", "normal")
+
+    def _populate_dir_tree(self):
+        """按目录层级显示对比结果；目录行显示其中有变化的文件数"""
+        self.dir_tree.setUpdatesEnabled(False)
+        self.dir_tree.clear()
+        show_same = self.show_same_check.isChecked()
+        dirs = {}  # 相对目录 -> (目录项, 有变化的文件数)
+        changes = {}
+
+        def dir_item(rel_dir):
+            if rel_dir in dirs:
+                return dirs[rel_dir]
+            parent_dir, name = os.path.split(rel_dir)
+            parent = dir_item(parent_dir) if parent_dir else self.dir_tree.invisibleRootItem()
+            item = QTreeWidgetItem(parent, [f"📁 {name}"])
+            font = item.font(0)
+            font.setBold(True)
+            item.setFont(0, font)
+            dirs[rel_dir] = item
+            return item
+
+        for entry in self.dir_entries:
+            if entry.status == 'same' and not show_same:
+                continue
+            rel_dir, name = os.path.split(entry.rel_path)
+            parent = dir_item(rel_dir) if rel_dir else self.dir_tree.invisibleRootItem()
+            item = QTreeWidgetItem(parent, [
+                name, DIR_STATUS_LABELS[entry.status],
+                format_size(entry.left.size) if entry.left else "",
+                format_size(entry.right.size) if entry.right else "",
+            ])
+            color = QColor(DIR_STATUS_COLORS[entry.status])
+            for column in range(4):
+                item.setForeground(column, color)
+            item.setData(0, Qt.UserRole, entry)
+            if entry.status != 'same':
+                while rel_dir:
+                    changes[rel_dir] = changes.get(rel_dir, 0) + 1
+                    rel_dir = os.path.dirname(rel_dir)
+
+        for rel_dir, item in dirs.items():
+            if changes.get(rel_dir):
+                item.setText(1, f"{changes[rel_dir]} 个文件有变化")
+        # 结果不多时全部展开，否则只展开第一层
+        if len(dirs) <= 200:
+            self.dir_tree.expandAll()
         else:
-            self._update_status(f"共检测 {max_lines} 行，发现 {diff_count} 处差异", "warning")
-    
-    def _clear_highlights(self):
-        """清除所有高亮"""
-        # 清除左侧高亮
-        cursor = self.left_text.textCursor()
-        cursor.select(QTextCursor.Document)
-        format = QTextCharFormat()
-        format.setBackground(QColor("white"))
-        cursor.setCharFormat(format)
-        
-        # 清除右侧高亮
-        cursor = self.right_text.textCursor()
-        cursor.select(QTextCursor.Document)
-        format = QTextCharFormat()
-        format.setBackground(QColor("white"))
-        cursor.setCharFormat(format)
-    
-    def _highlight_line(self, text_edit: QTextEdit, line_number: int, fmt: QTextCharFormat):
-        """高亮指定行"""
-        cursor = text_edit.textCursor()
-        cursor.movePosition(QTextCursor.Start)
-        
-        # 移动到指定行
-        for _ in range(line_number):
-            cursor.movePosition(QTextCursor.Down)
-            
-        # 选中该行
-        cursor.select(QTextCursor.LineUnderCursor)
-        # 设置格式
-        cursor.setCharFormat(fmt)
+            for index in range(self.dir_tree.topLevelItemCount()):
+                self.dir_tree.topLevelItem(index).setExpanded(True)
+        self.dir_tree.setUpdatesEnabled(True)
+
+    def _open_dir_entry(self, item, column):
+        """双击文件：修改过的文件进入逐行对比，只在一侧存在的文件显示其内容"""
+        entry = item.data(0, Qt.UserRole)
+        if entry is None:
+            return
+        if entry.status == 'same':
+            self._update_status(f"两侧内容相同: {entry.rel_path}", "normal")
+            return
+        self.rb_file_mode.setChecked(True)
+        self._clear_results()
+        for side, file_entry in (("left", entry.left), ("right", entry.right)):
+            if file_entry is None:
+                continue
+            self._set_file(side, file_entry.path, f"已选择: {entry.rel_path}")
+        if entry.status == 'changed':
+            self._compare_files()
+            return
+        self._load_file("left" if entry.left else "right")
+        self._update_compare_btn_state()
+        self._update_status(f"仅在{'左' if entry.left else '右'}侧存在: {entry.rel_path}", "normal")
+
+    # -------------- 三方合并 --------------
+    def _choose_merge_file(self, side):
+        """选择三方合并的一个版本"""
+        file_path, _ = QFileDialog.getOpenFileName(self, f"选择{MERGE_SIDE_NAMES[side]}", "", "所有文件 (*.*)")
+        if not file_path:
+            return
+        self.merge_paths[side] = file_path
+        label = self.merge_labels[side]
+        label.setText(f"已选择: {os.path.basename(file_path)}")
+        label.setStyleSheet(f"color: {Colors.WECHAT_GREEN}; padding: 5px; font-weight: bold;")
+        self._update_compare_btn_state()
+
+    def _merge_files(self):
+        """在后台合并三个版本"""
+        if not all(self.merge_paths.values()) or self.merge_thread is not None:
+            return
+        self.compare_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self._update_status("正在索引文件...", "normal")
+        self.merge_thread = MergeThread(self.merge_paths)
+        self.merge_thread.progress_updated.connect(self._update_merge_progress)
+        self.merge_thread.merge_finished.connect(self._merge_finished)
+        self.merge_thread.merge_failed.connect(self._merge_failed)
+        self.merge_thread.finished.connect(self._end_merge_thread)
+        self.merge_thread.start()
+
+    def _update_merge_progress(self, stage, percent):
+        if self.merge_thread is None or self.merge_thread.stopped:
+            return
+        self.progress_bar.setValue(percent)
+        self._update_status(f"{stage}... {percent}%", "normal")
+
+    def _merge_finished(self, indexes, chunks):
+        if self.merge_thread is None or self.merge_thread.stopped:
+            for index in indexes.values():
+                index.close()
+            return
+        self.merge_view.set_source(None)
+        self._close_merge_indexes()
+        self.merge_indexes = indexes
+        self.merge_chunks = chunks
+        self.merge_conflicts = [number for number, chunk in enumerate(chunks) if chunk.kind == 'conflict']
+        self.merge_choices = {}
+        self.current_conflict = -1
+        self._show_merge()
+        self._goto_conflict(0)
+        kinds = {kind: 0 for kind in ('left', 'right', 'both')}
+        for chunk in chunks:
+            if chunk.kind in kinds:
+                kinds[chunk.kind] += 1
+        summary = (f"自动合并 {sum(kinds.values())} 处修改（左侧 {kinds['left']}、右侧 {kinds['right']}、"
+                   f"两侧相同 {kinds['both']}）")
+        if self.merge_conflicts:
+            self._update_status(f"{summary}，{len(self.merge_conflicts)} 处冲突需要处理", "warning")
+        else:
+            self._update_status(f"{summary}，没有冲突", "success")
+
+    def _merge_failed(self, message):
+        QMessageBox.critical(self, "错误", f"三方合并失败：{message}")
+        self._update_status("❌ 合并失败", "error")
+
+    def _end_merge_thread(self):
+        thread, self.merge_thread = self.merge_thread, None
+        thread.wait()
+        stopped = thread.stopped
+        thread.deleteLater()
+        self.progress_bar.setVisible(False)
+        self.stop_btn.setEnabled(False)
+        self.compare_btn.setEnabled(self._compare_ready())
+        if stopped:
+            self._update_status("已停止三方合并", "normal")
+
+    def _merge_labels(self):
+        """冲突标记中各版本的名称"""
+        return {side: os.path.basename(path) for side, path in self.merge_paths.items() if path}
+
+    def _show_merge(self):
+        """按当前的冲突处理方式显示合并结果，保持滚动位置"""
+        first_row = self.merge_view.first_row()
+        self.merge_view.set_source(MergeRowSource(self.merge_indexes, self.merge_chunks,
+                                                  self.merge_choices, self._merge_labels()))
+        self.merge_view.set_first_row(first_row)
+
+    def _goto_conflict(self, index):
+        """跳转到第 index 处冲突"""
+        if self.merge_conflicts:
+            self.current_conflict = max(0, min(index, len(self.merge_conflicts) - 1))
+            row = self.merge_view.source.chunk_row(self.merge_conflicts[self.current_conflict])
+            self.merge_view.set_first_row(max(0, row - 3))
+        self._update_conflict_nav()
+
+    def _resolve_conflict(self, choice):
+        """按 choice 处理当前冲突，然后跳到下一处未处理的冲突"""
+        if self.current_conflict < 0:
+            return
+        self.merge_choices[self.merge_conflicts[self.current_conflict]] = choice
+        self._show_merge()
+        pending = [index for index, number in enumerate(self.merge_conflicts)
+                   if number not in self.merge_choices]
+        later = [index for index in pending if index > self.current_conflict]
+        self._goto_conflict((later or pending or [self.current_conflict])[0])
+
+    def _update_conflict_nav(self):
+        """更新冲突导航、处理与保存按钮"""
+        total = len(self.merge_conflicts)
+        self.prev_conflict_btn.setEnabled(self.current_conflict > 0)
+        self.next_conflict_btn.setEnabled(total > 0 and self.current_conflict < total - 1)
+        for btn in self.resolve_btns:
+            btn.setEnabled(total > 0)
+        self.save_merge_btn.setEnabled(bool(self.merge_indexes))
+        if total:
+            number = self.merge_conflicts[self.current_conflict]
+            state = "已处理" if number in self.merge_choices else "未处理"
+            self.conflict_label.setText(f"第 {self.current_conflict + 1} / {total} 处冲突（{state}），"
+                                        f"已处理 {len(self.merge_choices)} 处")
+        else:
+            self.conflict_label.setText("")
+
+    def _save_merge(self):
+        """保存合并结果；未处理的冲突以冲突标记写入"""
+        unresolved = len(self.merge_conflicts) - len(self.merge_choices)
+        if unresolved > 0:
+            answer = QMessageBox.question(
+                self, "仍有冲突", f"还有 {unresolved} 处冲突未处理，将以冲突标记（<<<<<<< / >>>>>>>）写入文件，是否继续？")
+            if answer != QMessageBox.Yes:
+                return
+        file_path, _ = QFileDialog.getSaveFileName(self, "保存合并结果", self.merge_paths['left'] or "", "所有文件 (*.*)")
+        if not file_path:
+            return
+        try:
+            write_merge(file_path, self.merge_chunks, self.merge_indexes, self.merge_choices, self._merge_labels())
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"保存合并结果失败：{e}")
+            return
+        self._update_status(f"✅ 合并结果已保存: {file_path}", "success")
+
+    def _close_merge_indexes(self):
+        for index in self.merge_indexes.values():
+            index.close()
+        self.merge_indexes = {}
+
+    def _clear_merge_results(self):
+        self.merge_view.set_source(None)
+        self._close_merge_indexes()
+        self.merge_chunks = []
+        self.merge_conflicts = []
+        self.merge_choices = {}
+        self.current_conflict = -1
+        self.merge_paths = dict.fromkeys(self.merge_paths)
+        for label in self.merge_labels.values():
+            label.setText("未选择文件")
+            label.setStyleSheet(f"color: {Colors.TEXT_SECONDARY}; padding: 5px;")
+        self._update_conflict_nav()
+        self._update_compare_btn_state()
+        self._update_status("请选择基础版本与左右两侧的文件进行三方合并", "normal")
+
+    def _goto_hunk(self, index):
+        """跳转到第 index 处差异，两侧同时滚动到该段"""
+        if not self.diff_hunks:
+            return
+        self.current_hunk = max(0, min(index, len(self.diff_hunks) - 1))
+        # 段前留出几行上下文
+        row = self.diff_hunks[self.current_hunk].row
+        for view in (self.left_view, self.right_view):
+            view.set_first_row(max(0, row - 3))
+        self._update_hunk_nav()
+
+    def _update_hunk_nav(self):
+        """更新差异导航按钮与计数"""
+        total = len(self.diff_hunks)
+        self.prev_hunk_btn.setEnabled(self.current_hunk > 0)
+        self.next_hunk_btn.setEnabled(total > 0 and self.current_hunk < total - 1)
+        self.hunk_label.setText(f"第 {self.current_hunk + 1} / {total} 处差异" if total else "")
+        self.export_patch_btn.setEnabled(self.diff_complete and total > 0)
+        self.export_html_btn.setEnabled(self.diff_complete and total > 0)
+
+    # -------------- 导出 / 应用补丁 --------------
+    def _export_diff(self, kind):
+        """把对比结果导出为 unified diff 或 HTML，逐组写出"""
+        if not self.diff_complete or not self.diff_hunks:
+            return
+        left, right = self.indexes['left'], self.indexes['right']
+        base = os.path.splitext(os.path.basename(right.path))[0]
+        if kind == 'patch':
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, "导出补丁", f"{base}.patch", "补丁文件 (*.patch *.diff);;所有文件 (*.*)")
+        else:
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, "导出 HTML", f"{base}.diff.html", "HTML 文件 (*.html);;所有文件 (*.*)")
+        if not file_path:
+            return
+        write = write_unified if kind == 'patch' else write_html
+        try:
+            groups = write(file_path, self.diff_hunks, left, right, left.path, right.path)
+        except (OSError, ValueError) as e:
+            error(f"导出差异失败: {e}")
+            QMessageBox.critical(self, "错误", f"导出失败：{e}")
+            return
+        self._update_status(f"✅ 已导出 {groups} 组差异: {file_path}", "success")
+
+    def _apply_patch(self):
+        """把补丁应用到左侧文件（未选择时询问目标文件），结果与目标文件对比显示"""
+        if self.diff_thread is not None:
+            self._update_status("正在对比，请先停止对比再应用补丁", "normal")
+            return
+        patch_path, _ = QFileDialog.getOpenFileName(
+            self, "选择补丁文件", "", "补丁文件 (*.patch *.diff);;所有文件 (*.*)")
+        if not patch_path:
+            return
+        try:
+            with open(patch_path, 'rb') as f:
+                patch_files = [patch for patch in parse_patch(f) if patch.hunks]
+        except OSError as e:
+            QMessageBox.warning(self, "文件读取警告", f"无法读取补丁 {patch_path}:\n{e}")
+            return
+        if not patch_files:
+            QMessageBox.warning(self, "警告", "补丁中没有可应用的差异段！")
+            return
+
+        target_path = self.left_file_path
+        if not target_path:
+            target_path, _ = QFileDialog.getOpenFileName(self, "选择要应用补丁的文件", "", "所有文件 (*.*)")
+            if not target_path:
+                return
+        # 多文件补丁中选择文件名与目标相同的一项
+        name = os.path.basename(target_path)
+        patch = next((patch for patch in patch_files
+                      if name in (os.path.basename(patch.new_path or ""), os.path.basename(patch.old_path or ""))),
+                     patch_files[0])
+        output_path, _ = QFileDialog.getSaveFileName(self, "保存应用补丁后的文件", target_path, "所有文件 (*.*)")
+        if not output_path:
+            return
+
+        target = self.indexes['left']
+        reuse = (target is not None and target.complete and target.path == target_path and target.is_fresh())
+        try:
+            if not reuse:
+                target = LineIndex(target_path).build()
+            try:
+                results = apply_patch(target, patch.hunks, output_path, reject_path=output_path + ".rej")
+            finally:
+                if not reuse:
+                    target.close()
+        except (OSError, ValueError) as e:
+            error(f"应用补丁失败: {e}")
+            QMessageBox.critical(self, "错误", f"应用补丁失败：{e}")
+            return
+
+        failed = [result for result in results if not result.applied]
+        moved = sum(1 for result in results if result.applied and result.offset)
+        fuzzed = sum(1 for result in results if result.applied and result.fuzz)
+        summary = f"已应用 {len(results) - len(failed)} / {len(results)} 段"
+        if moved or fuzzed:
+            summary += f"（{moved} 段有行号偏移，{fuzzed} 段忽略了部分上下文）"
+        if failed:
+            QMessageBox.warning(self, "部分差异段无法应用",
+                                f"{summary}；{len(failed)} 段无法应用，已写入:\n{output_path}.rej")
+
+        # 目标文件与结果分别在左右两侧载入并对比
+        if os.path.abspath(output_path) == os.path.abspath(target_path):
+            self._open_file("left", target_path, "已应用补丁")
+        else:
+            self._open_file("left", target_path, "已选择")
+            self._open_file("right", output_path, "补丁结果")
+            self._compare_files()
+        self._update_status(f"{'⚠️' if failed else '✅'} {summary}，结果: {os.path.basename(output_path)}",
+                            "warning" if failed else "success")
     
     def _update_status(self, message, status_type="normal"):
         """更新状态显示"""
@@ -0,0 +1,434 @@
+"""
+文本对比的虚拟化行视图
+LineView 只绘制视口中可见的几十行，行内容按需向数据源索取；数据源从 utils.diff.LineIndex
+（mmap + 行偏移索引）中解码这些行，文件再大也不会把全文读成字符串或建立 QTextDocument：
+- FileRowSource: 单个文件的行（选择文件后、对比之前）
+- DiffRowSource: 对齐视图的一侧，按两侧共享的差异段表（HunkTable）把视图行映射为文件行或空白占位行
+- MergeRowSource: 三方合并的结果，按合并片段把视图行映射为某个版本的行或冲突标记行
+"""
+
+import bisect
+from collections import namedtuple, OrderedDict
+
+from PySide6.QtWidgets import QAbstractScrollArea, QApplication
+from PySide6.QtGui import QPainter, QColor, QFont, QKeySequence
+from PySide6.QtCore import Qt, Signal
+
+from styles.constants import Colors
+from utils.diff import inline_diff, merge_pieces
+
+# 差异段的背景色
+REPLACE_COLOR = "#ffeb3b"  # 修改
+DELETE_COLOR = "#ffcdd2"   # 只在左侧
+INSERT_COLOR = "#c8e6c9"   # 只在右侧
+FILLER_COLOR = "#eeeeee"   # 对齐占位行
+TAG_COLORS = {'replace': REPLACE_COLOR, 'delete': DELETE_COLOR, 'insert': INSERT_COLOR}
+# 修改行中实际变化的字符（行内差异）
+INLINE_COLORS = {'left': "#ef9a9a", 'right': "#81c784"}
+# 三方合并结果中各类合并块的背景色
+MERGE_COLORS = {
+    'left': "#c8e6c9",      # 采用左侧的修改
+    'right': "#b3e5fc",     # 采用右侧的修改
+    'both': "#e1bee7",      # 两侧相同的修改
+    'conflict': "#ffcdd2",  # 未解决的冲突
+    'marker': "#ef9a9a",    # 冲突标记行
+    'resolved': "#fff59d",  # 已手动解决的冲突
+}
+SELECTION_COLOR = "#bbdefb"
+GUTTER_COLOR = "#f5f5f5"
+
+TAB_SIZE = 4
+# 每行最多显示的字符数，更长的行截断显示（复制时仍为完整内容）
+MAX_DISPLAY_CHARS = 4000
+
+# 视图中的一行：text 为 None 表示空白占位行；number 为文件中的行号（从 1 开始）；
+# spans 为行内变化的 (起始字符, 长度) 区间
+DisplayRow = namedtuple('DisplayRow', ['text', 'number', 'background', 'spans'])
+
+
+def display_text(line):
+    line = line.expandtabs(TAB_SIZE)
+    return line if len(line) <= MAX_DISPLAY_CHARS else line[:MAX_DISPLAY_CHARS] + "…"
+
+
+# -------------- 数据源 --------------
+class FileRowSource:
+    """单个文件的全部行；索引仍在后台构建时行数随之增长"""
+
+    span_color = None
+
+    def __init__(self, index):
+        self.index = index
+
+    def row_count(self):
+        return self.index.line_count
+
+    def rows(self, first, count):
+        return [DisplayRow(display_text(line), first + offset + 1, None, None)
+                for offset, line in enumerate(self.index.lines(first, count))]
+
+    def texts(self, first, last):
+        """第 first 至 last 行（含）的原始内容，用于复制"""
+        return self.index.lines(first, last - first + 1)
+
+
+class HunkTable:
+    """对齐视图的差异段表，两侧共享
+
+    只保存有差异的段（DiffHunk，按行号排列）；相同的段由相邻差异段推算，
+    流式比较时逐批追加，row_count 为已对齐的行数
+    """
+
+    def __init__(self):
+        self.hunks = []
+        self._rows = []  # 各段的起始行，用于二分查找
+        self.row_count = 0
+
+    def add(self, hunks, row_count):
+        self.hunks.extend(hunks)
+        self._rows.extend(hunk.row for hunk in hunks)
+        self.row_count = row_count
+
+    def locate(self, row, side):
+        """视图行 -> (所在的差异段或 None, 该侧文件行号或 None)；行号为 None 表示空白占位行"""
+        index = bisect.bisect_right(self._rows, row) - 1
+        if index < 0:
+            return None, row
+        hunk = self.hunks[index]
+        if side == 'left':
+            start, count, end = hunk.left_start, hunk.left_count, hunk.left_end
+        else:
+            start, count, end = hunk.right_start, hunk.right_count, hunk.right_end
+        offset = row - hunk.row
+        if offset < hunk.rows:
+            return hunk, (start + offset if offset < count else None)
+        return None, end + offset - hunk.rows
+
+
+class InlineDiffCache:
+    """修改段中成对行的行内差异，按差异段缓存
+
+    只在视图绘制可见行时计算，缓存最近 MAX_HUNKS 个差异段的结果，滚动回看时不重复计算
+    """
+
+    MAX_HUNKS = 512
+
+    def __init__(self, left_index, right_index):
+        self.left_index = left_index
+        self.right_index = right_index
+        self._hunks = OrderedDict()  # 差异段起始行 -> {行号: (左侧区间, 右侧区间) 或 None}
+
+    def spans(self, hunk, row):
+        """修改段中第 row 行（对齐视图行号）两侧变化的区间；不成对或不细分时返回 None"""
+        offset = row - hunk.row
+        if hunk.tag != 'replace' or offset >= min(hunk.left_count, hunk.right_count):
+            return None
+        rows = self._hunks.get(hunk.row)
+        if rows is None:
+            rows = self._hunks[hunk.row] = {}
+            if len(self._hunks) > self.MAX_HUNKS:
+                self._hunks.popitem(last=False)
+        else:
+            self._hunks.move_to_end(hunk.row)
+        if row not in rows:
+            rows[row] = inline_diff(display_text(self.left_index.line(hunk.left_start + offset)),
+                                    display_text(self.right_index.line(hunk.right_start + offset)))
+        return rows[row]
+
+
+class DiffRowSource:
+    """对齐视图的一侧"""
+
+    def __init__(self, index, side, table, inline=None):
+        self.index = index
+        self.side = side
+        self.table = table
+        self.inline = inline
+        self.span_color = INLINE_COLORS[side]
+
+    def row_count(self):
+        return self.table.row_count
+
+    def rows(self, first, count):
+        result = []
+        for row in range(first, min(first + count, self.table.row_count)):
+            hunk, line = self.table.locate(row, self.side)
+            if line is None:
+                result.append(DisplayRow(None, None, FILLER_COLOR, None))
+                continue
+            spans = self.inline.spans(hunk, row) if hunk is not None and self.inline is not None else None
+            result.append(DisplayRow(
+                display_text(self.index.line(line)), line + 1,
+                TAG_COLORS[hunk.tag] if hunk is not None else None,
+                spans and spans[0 if self.side == 'left' else 1],
+            ))
+        return result
+
+    def texts(self, first, last):
+        rows = range(first, min(last + 1, self.table.row_count))
+        lines = (self.table.locate(row, self.side)[1] for row in rows)
+        return [self.index.line(line) for line in lines if line is not None]
+
+
+class MergeRowSource:
+    """三方合并的结果
+
+    Args:
+        indexes: {'base' / 'left' / 'right': LineIndex}
+        chunks: merge3() 产生的 MergeChunk 列表
+        choices / labels: 同 merge_pieces()
+    """
+
+    span_color = None
+
+    def __init__(self, indexes, chunks, choices=None, labels=None):
+        self.indexes = indexes
+        self.chunks = chunks
+        self.choices = choices or {}
+        self.pieces = []
+        self._starts = []       # 各片段在视图中的起始行
+        self._chunk_rows = {}   # 合并块序号 -> 视图中的起始行
+        row = 0
+        for piece in merge_pieces(chunks, choices, labels):
+            self._chunk_rows.setdefault(piece.chunk, row)
+            self.pieces.append(piece)
+            self._starts.append(row)
+            row += piece.end - piece.start
+        self._row_count = row
+
+    def row_count(self):
+        return self._row_count
+
+    def chunk_row(self, number):
+        """第 number 个合并块在视图中的起始行（合并结果为空的块取其后的第一行）"""
+        row = self._chunk_rows.get(number)
+        if row is not None:
+            return row
+        later = [row for chunk, row in self._chunk_rows.items() if chunk > number]
+        return min(later) if later else max(0, self._row_count - 1)
+
+    def _background(self, piece):
+        kind = self.chunks[piece.chunk].kind
+        if kind == 'conflict':
+            if piece.chunk in self.choices:
+                return MERGE_COLORS['resolved']
+            return MERGE_COLORS['marker'] if piece.side is None else MERGE_COLORS['conflict']
+        return MERGE_COLORS.get(kind)
+
+    def _lines(self, first, count):
+        """[(片段, 片段中的行号或 None), ...]"""
+        result = []
+        number = max(0, bisect.bisect_right(self._starts, first) - 1)
+        row = first
+        end = min(first + count, self._row_count)
+        while row < end:
+            piece, start = self.pieces[number], self._starts[number]
+            for offset in range(row - start, min(piece.end - piece.start, end - start)):
+                result.append((piece, piece.start + offset if piece.side else None))
+            row = start + piece.end - piece.start
+            number += 1
+        return result
+
+    def rows(self, first, count):
+        return [
+            DisplayRow(display_text(self.indexes[piece.side].line(line)) if piece.side else piece.text,
+                       first + offset + 1, self._background(piece), None)
+            for offset, (piece, line) in enumerate(self._lines(first, count))
+        ]
+
+    def texts(self, first, last):
+        return [self.indexes[piece.side].line(line) if piece.side else piece.text
+                for piece, line in self._lines(first, last - first + 1)]
+
+
+# -------------- 视图 --------------
+class LineView(QAbstractScrollArea):
+    """只读的虚拟化行视图
+
+    滚动条以行为单位，绘制时只向数据源索取可见的行，绘制开销与文件大小无关。
+    支持单击/Shift+单击选择行、Ctrl+C 复制，拖放文件时发出 file_dropped
+    """
+
+    file_dropped = Signal(str)
+
+    GUTTER_PADDING = 8
+    TEXT_PADDING = 6
+
+    _STYLE = """
+        QAbstractScrollArea {{
+            border: 2px {border} {color};
+            border-radius: 6px;
+            background-color: white;
+        }}
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source = None
+        self.placeholder = ""
+        self._max_width = 0  # 已绘制过的行中最宽的一行，决定水平滚动范围
+        self._anchor = -1    # 选中的行：_anchor 至 _cursor
+        self._cursor = -1
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.Monospace)
+        font.setPixelSize(13)
+        self.setFont(font)
+        self.setAcceptDrops(True)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self._set_frame(dragging=False)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def _set_frame(self, dragging):
+        if dragging:
+            self.setStyleSheet(self._STYLE.format(border="dashed", color=Colors.WECHAT_GREEN))
+        else:
+            self.setStyleSheet(self._STYLE.format(border="solid", color=Colors.BORDER_LIGHT))
+
+    def set_placeholder(self, text):
+        self.placeholder = text
+        self.viewport().update()
+
+    def set_source(self, source):
+        """显示新的数据源（None 清空），滚动到开头"""
+        self.source = source
+        self._max_width = 0
+        self._anchor = self._cursor = -1
+        self.refresh()
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+
+    def refresh(self):
+        """数据源的行数或内容变化后调用"""
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def row_height(self):
+        return self.fontMetrics().lineSpacing()
+
+    def visible_row_count(self):
+        return max(1, self.viewport().height() // self.row_height())
+
+    def first_row(self):
+        return self.verticalScrollBar().value()
+
+    def set_first_row(self, row):
+        self.verticalScrollBar().setValue(row)
+
+    def _row_count(self):
+        return self.source.row_count() if self.source is not None else 0
+
+    def _gutter_width(self):
+        digits = len(str(max(self._row_count(), 1)))
+        return self.fontMetrics().horizontalAdvance("9" * digits) + 2 * self.GUTTER_PADDING
+
+    def _update_scrollbars(self):
+        visible = self.visible_row_count()
+        vbar = self.verticalScrollBar()
+        vbar.setRange(0, max(0, self._row_count() - visible))
+        vbar.setPageStep(visible)
+        width = self.viewport().width()
+        hbar = self.horizontalScrollBar()
+        hbar.setRange(0, max(0, self._gutter_width() + self._max_width + 2 * self.TEXT_PADDING - width))
+        hbar.setPageStep(width)
+        hbar.setSingleStep(self.fontMetrics().horizontalAdvance("0") * 4)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+
+    # -------------- 绘制 --------------
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        rect = self.viewport().rect()
+        painter.fillRect(rect, QColor("white"))
+        if not self._row_count():
+            painter.setPen(QColor(Colors.TEXT_SECONDARY))
+            painter.drawText(rect, Qt.AlignCenter | Qt.TextWordWrap, self.placeholder)
+            return
+
+        metrics = self.fontMetrics()
+        height = self.row_height()
+        gutter = self._gutter_width()
+        first = self.first_row()
+        rows = self.source.rows(first, self.visible_row_count() + 1)
+        x = gutter + self.TEXT_PADDING - self.horizontalScrollBar().value()
+        selected = (min(self._anchor, self._cursor), max(self._anchor, self._cursor))
+        span_color = QColor(self.source.span_color) if self.source.span_color else None
+        widest = self._max_width
+
+        painter.fillRect(0, 0, gutter, rect.height(), QColor(GUTTER_COLOR))
+        for offset, row in enumerate(rows):
+            y = offset * height
+            if selected[0] <= first + offset <= selected[1]:
+                painter.fillRect(gutter, y, rect.width() - gutter, height, QColor(SELECTION_COLOR))
+            elif row.background:
+                painter.fillRect(gutter, y, rect.width() - gutter, height, QColor(row.background))
+            if row.text is None:
+                continue
+            if row.spans and span_color is not None:
+                for start, length in row.spans:
+                    left = metrics.horizontalAdvance(row.text[:start])
+                    painter.fillRect(x + left, y, metrics.horizontalAdvance(row.text[start:start + length]),
+                                     height, span_color)
+            painter.setClipRect(gutter, 0, rect.width() - gutter, rect.height())
+            painter.setPen(QColor(Colors.TEXT_PRIMARY))
+            painter.drawText(x, y + metrics.ascent(), row.text)
+            painter.setClipping(False)
+            painter.setPen(QColor(Colors.TEXT_SECONDARY))
+            painter.drawText(0, y, gutter - self.GUTTER_PADDING, height,
+                             Qt.AlignRight | Qt.AlignVCenter, str(row.number))
+            widest = max(widest, metrics.horizontalAdvance(row.text))
+
+        if widest != self._max_width:
+            self._max_width = widest
+            self._update_scrollbars()
+
+    # -------------- 选择与复制 --------------
+    def _row_at(self, y):
+        return min(self.first_row() + max(0, y) // self.row_height(), self._row_count() - 1)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self._row_count():
+            row = self._row_at(int(event.position().y()))
+            if not (event.modifiers() & Qt.ShiftModifier) or self._anchor < 0:
+                self._anchor = row
+            self._cursor = row
+            self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton and self._anchor >= 0:
+            self._cursor = self._row_at(int(event.position().y()))
+            self.viewport().update()
+        super().mouseMoveEvent(event)
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy) and self._anchor >= 0:
+            first, last = sorted((self._anchor, self._cursor))
+            QApplication.clipboard().setText("\n".join(self.source.texts(first, last)))
+            return
+        super().keyPressEvent(event)
+
+    # -------------- 拖放 --------------
+    def dragEnterEvent(self, event):
+        urls = event.mimeData().urls() if event.mimeData().hasUrls() else []
+        if urls and urls[0].isLocalFile():
+            event.acceptProposedAction()
+            self._set_frame(dragging=True)
+        else:
+            event.ignore()
+
+    def dragMoveEvent(self, event):
+        event.acceptProposedAction()
+
+    def dragLeaveEvent(self, event):
+        self._set_frame(dragging=False)
+        super().dragLeaveEvent(event)
+
+    def dropEvent(self, event):
+        self._set_frame(dragging=False)
+        urls = event.mimeData().urls()
+        if urls and urls[0].isLocalFile():
+            event.acceptProposedAction()
+            self.file_dropped.emit(urls[0].toLocalFile())
@@ -1,24 +1,34 @@
 """
 扩展版 文件查找工具组件
 功能（在原有基础上追加）：
-- 搜索与匹配：支持正则测试（独立工具）、全文搜索、正则搜索、查找替换（对选中文本文件可批量替换并备份原文件）
+- 搜索与匹配：支持正则测试（独立工具）、全文搜索、正则搜索、重复文件查找、查找替换
+  （对选中文本文件先预览差异再批量替换，原子写入并记入替换日志，可一键撤销）
 - 文本处理：排序、去重、大小写转换（upper/lower/title）、统计（行数/词数/字符数）、导出处理结果
+  （在后台按行流式处理，大结果写入临时文件，预览区按页显示）
 
 说明：把该文件放入你的工程中，并确保有 styles 模块或按需替换样式。依赖：PySide6
 """
 
 import os
-import fnmatch
 import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-                               QLabel, QTreeWidget, QTreeWidgetItem,
+                               QLabel, QTreeView, QAbstractItemView,
                                QFileDialog, QMessageBox, QProgressBar, QCheckBox,
                                QSplitter, QTextEdit, QGroupBox, QPushButton, QComboBox,
-                               QRadioButton, QButtonGroup, QFrame)
-from PySide6.QtCore import Qt, QThread, Signal
-from PySide6.QtGui import QFont
+                               QRadioButton, QButtonGroup, QFrame, QSpinBox)
+from PySide6.QtCore import Qt, QThread, Signal, QObject, QTimer, QFileSystemWatcher
+from PySide6.QtGui import QFont, QTextCursor
 
 from components.base_content import BaseContent
+from components.tools.file_search_model import SearchResultModel, LineHitModel, format_size
+from utils.search import (SearchOptions, SearchEngine, TreeSnapshot, text_detector, DEFAULT_EXCLUDES,
+                          split_patterns, split_terms, read_line_window, ReplaceSpec, ReplaceEngine,
+                          ReplaceJournal, DEFAULT_JOURNAL_PATH, TextPipeline, PipelineStopped, text_lines,
+                          DuplicateFinder, FILE_TYPES, parse_size)
+from utils.logger import error, info
 from styles.constants import Colors
 from styles.widgets import (
     ButtonStyles, LineEditStyles, TextEditStyles, GroupBoxStyles,
@@ -27,109 +37,378 @@ from styles.widgets import (
 
 
 class FileSearchThread(QThread):
-    """文件搜索线程"""
-    file_found = Signal(str, str, int)  # file_path, relative_path, size
+    """文件搜索线程：对 utils.search 搜索引擎的 Qt 信号封装"""
+    files_found = Signal(list)  # [(file_path, relative_path, size, hits), ...]
+    duplicates_found = Signal(list)  # [(组号, [(file_path, relative_path, size, None), ...]), ...]
     search_finished = Signal(int)  # total_files_found
     progress_updated = Signal(int)  # processed_count
+    hash_progress = Signal(int, int)  # 重复文件查找：(已比较文件数, 需比较文件数)
 
-    def __init__(self, search_path, search_pattern, search_content="", case_sensitive=False, mode='filename'):
+    # 进度信号的最小间隔（秒），避免大目录下信号风暴
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, search_path, search_pattern, search_content="", case_sensitive=False, mode='filename',
+                 snapshot=None, include=None, exclude=None, use_gitignore=False, context_lines=2,
+                 min_size=None, max_size=None, modified_after=None, modified_before=None, file_types=None,
+                 max_depth=None):
         super().__init__()
         self.search_path = search_path
         self.search_pattern = search_pattern
         self.search_content = search_content
         self.case_sensitive = case_sensitive
-        self.mode = mode  # 'filename', 'fulltext', 'regex'
+        self.mode = mode  # 'filename', 'fulltext', 'regex', 'multi', 'duplicates'
+        self.stopped = False
+        self.finder = None  # 重复文件查找结束后保留，供界面显示统计
+        self._last_progress = 0.0
+        self.options = SearchOptions(
+            self.search_path, self.search_pattern, self.search_content,
+            self.case_sensitive, self.mode,
+            include=include, exclude=exclude, use_gitignore=use_gitignore,
+            line_hits=True, context_lines=context_lines,
+            min_size=min_size, max_size=max_size, modified_after=modified_after,
+            modified_before=modified_before, file_types=file_types, max_depth=max_depth
+        )
+        self.snapshot = snapshot  # 可选 TreeSnapshot：搜索时顺带记录目录快照，供实时监视使用
+
+    def run(self):
+        if self.mode == 'duplicates':
+            self._find_duplicates()
+            return
+        engine = SearchEngine(self.options, should_stop=lambda: self.stopped)
+        on_dir = self.snapshot.record_dir if self.snapshot is not None else None
+        try:
+            for batch in engine.iter_batches(on_progress=self._on_progress, on_dir=on_dir):
+                self.files_found.emit([(e.path, e.rel_path, e.size, engine.hits.pop(e.path, None)) for e in batch])
+        except Exception as e:
+            error(f"文件搜索失败: {e}")
+        self.progress_updated.emit(engine.processed_count)
+        self.search_finished.emit(engine.found_count)
+
+    def _find_duplicates(self):
+        finder = DuplicateFinder(self.options, should_stop=lambda: self.stopped)
+        groups = []
+        try:
+            groups = finder.find(on_progress=self._on_progress, on_hash_progress=self._on_hash_progress)
+        except Exception as e:
+            error(f"重复文件查找失败: {e}")
+        for start in range(0, len(groups), self.options.batch_size):
+            self.duplicates_found.emit([
+                (number, [(e.path, e.rel_path, e.size, None) for e in group.entries])
+                for number, group in enumerate(groups[start:start + self.options.batch_size], start + 1)
+            ])
+        self.finder = finder
+        self.progress_updated.emit(finder.processed_count)
+        self.search_finished.emit(sum(len(group.entries) for group in groups))
+
+    def _on_progress(self, processed_count):
+        now = time.monotonic()
+        if now - self._last_progress >= self.PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.progress_updated.emit(processed_count)
+
+    def _on_hash_progress(self, done, total):
+        now = time.monotonic()
+        if now - self._last_progress >= self.PROGRESS_INTERVAL or done == total:
+            self._last_progress = now
+            self.hash_progress.emit(done, total)
+
+    def stop(self):
+        self.stopped = True
+
+
+class FileReplaceThread(QThread):
+    """批量替换线程：预览 / 执行 / 撤销都在后台进行，不阻塞界面"""
+    progress_updated = Signal(int, int)  # (已处理文件数, 总数)
+    replace_finished = Signal(str, object)  # (action, 结果)
+    replace_failed = Signal(str, str)  # (action, 错误信息)
+
+    def __init__(self, action, spec=None, paths=()):
+        super().__init__()
+        self.action = action  # 'preview', 'apply', 'rollback'
+        self.spec = spec
+        self.paths = list(paths)
         self.stopped = False
 
     def run(self):
-        found_count = 0
-        processed_count = 0
         try:
-            # 如果是正则模式，提前编译
-            regex = None
-            if self.mode == 'regex' and self.search_pattern:
-                flags = 0 if self.case_sensitive else re.IGNORECASE
+            if self.action == 'rollback':
+                journal = ReplaceJournal()
                 try:
-                    regex = re.compile(self.search_pattern, flags=flags)
-                except re.error:
-                    regex = None
-
-            for root, dirs, files in os.walk(self.search_path):
-                if self.stopped:
-                    break
-                for file in files:
-                    if self.stopped:
-                        break
-                    processed_count += 1
-                    if processed_count % 10 == 0:
-                        self.progress_updated.emit(processed_count)
-
-                    file_path = os.path.join(root, file)
-                    relative_path = os.path.relpath(file_path, self.search_path)
-
-                    try:
-                        matched = False
-                        # 模式匹配
-                        if self.mode == 'filename':
-                            pattern = self.search_pattern or '*'
-                            name = file if self.case_sensitive else file.lower()
-                            pat = pattern if self.case_sensitive else pattern.lower()
-                            if fnmatch.fnmatch(name, pat):
-                                matched = True
-                        elif self.mode == 'regex' and regex:
-                            # 检查文件名或相对路径
-                            target = file if self.case_sensitive else file
-                            if regex.search(target):
-                                matched = True
-                            else:
-                                # 也尝试针对相对路径
-                                if regex.search(relative_path):
-                                    matched = True
-                        elif self.mode == 'fulltext':
-                            # 先判断是否文本文件，然后在内容中搜索字符串或正则
-                            if self._is_text_file(file_path):
-                                content = None
-                                try:
-                                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                        content = f.read()
-                                except Exception:
-                                    content = None
-                                if content is not None and self.search_pattern:
-                                    if self.case_sensitive:
-                                        if self.search_pattern in content:
-                                            matched = True
-                                    else:
-                                        if self.search_pattern.lower() in content.lower():
-                                            matched = True
-
-                        if matched:
-                            size = 0
-                            try:
-                                size = os.path.getsize(file_path)
-                            except Exception:
-                                size = 0
-                            self.file_found.emit(file_path, relative_path, size)
-                            found_count += 1
-                    except (OSError, PermissionError):
-                        continue
-        except Exception:
-            pass
-        self.search_finished.emit(found_count)
-
-    def _is_text_file(self, file_path):
-        text_extensions = {'.txt', '.py', '.js', '.html', '.css', '.json', '.xml', '.md', '.rst', '.ini', '.cfg', '.log', '.csv'}
-        _, ext = os.path.splitext(file_path.lower())
-        return ext in text_extensions
+                    result = journal.rollback()
+                finally:
+                    journal.close()
+            else:
+                engine = ReplaceEngine(self.spec, self.paths, should_stop=lambda: self.stopped)
+                if self.action == 'preview':
+                    result = engine.preview(self.progress_updated.emit)
+                else:
+                    result = engine.apply(self.progress_updated.emit)
+        except Exception as e:
+            error(f"批量替换失败 ({self.action}): {e}")
+            self.replace_failed.emit(self.action, str(e))
+            return
+        self.replace_finished.emit(self.action, result)
+
+    def stop(self):
+        self.stopped = True
+
+
+class TextPipelineThread(QThread):
+    """预览区文本处理线程：聚合 / 排序 / 去重 / 大小写转换 / 统计都在后台按行流式进行"""
+    progress_updated = Signal(int)  # 已读取行数
+    pipeline_finished = Signal(str, object)  # (action, 结果)
+    pipeline_failed = Signal(str, str)  # (action, 错误信息)
+
+    def __init__(self, action, paths=(), buffer=None, text=None):
+        super().__init__()
+        self.action = action  # 'aggregate', 'sort', 'uniq', 'upper', 'lower', 'title', 'stats'
+        self.paths = list(paths)
+        self.buffer = buffer  # 输入：上一次的结果（TextBuffer），或
+        self.text = text      # 预览区中的文本
+        self.stopped = False
+
+    def run(self):
+        pipeline = TextPipeline(should_stop=lambda: self.stopped, on_progress=self.progress_updated.emit)
+        try:
+            if self.action == 'aggregate':
+                result = pipeline.aggregate(self.paths)
+            else:
+                lines = self.buffer.iter_lines() if self.buffer is not None else text_lines(self.text)
+                if self.action == 'sort':
+                    result = pipeline.sort(lines)
+                elif self.action == 'uniq':
+                    result = pipeline.dedupe(lines)
+                elif self.action == 'stats':
+                    result = pipeline.stats(lines)
+                else:
+                    result = pipeline.convert_case(lines, self.action)
+        except PipelineStopped:
+            return
+        except Exception as e:
+            error(f"文本处理失败 ({self.action}): {e}")
+            self.pipeline_failed.emit(self.action, str(e))
+            return
+        self.pipeline_finished.emit(self.action, result)
 
     def stop(self):
         self.stopped = True
 
 
+class FileSearchWatcher(QObject):
+    """实时监视搜索目录，增量刷新搜索结果与索引
+
+    目录由 QFileSystemWatcher 监视（Linux 上基于 inotify），超出监视上限或添加失败的目录改为轮询。
+    目录监视只报告新建/删除/重命名，不报告文件的就地修改，因此结果中的文件单独监视，
+    其余已监视目录由轮询逐批复查。
+    所有扫描都在后台线程中进行，只处理发生变化的目录与文件
+    """
+    results_changed = Signal(list, list)  # ([(file_path, relative_path, size, hits), ...], [removed_path, ...])
+    _refreshed = Signal(int, object, object)  # 后台线程 -> 主线程：(generation, DirChanges, 匹配的 FileEntry)
+
+    DEBOUNCE_MS = 300        # 合并短时间内的连续事件
+    POLL_INTERVAL_MS = 2000  # 轮询间隔
+    POLL_BATCH = 256         # 每次轮询复查的未监视目录数
+    SWEEP_BATCH = 32         # 每次轮询复查的已监视目录数（发现就地修改）
+    MAX_WATCHES = 8192       # 监视路径数上限（inotify 的 max_user_watches 由所有进程共享）
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._fs_watcher = QFileSystemWatcher(self)
+        self._fs_watcher.directoryChanged.connect(self._on_dir_changed)
+        self._fs_watcher.fileChanged.connect(self._on_file_changed)
+        self._refreshed.connect(self._on_refreshed)
+
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.timeout.connect(self._flush)
+        self._poll_timer = QTimer(self)
+        self._poll_timer.timeout.connect(self._poll)
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FileSearchWatcher")
+        self._generation = 0
+        self._reset()
+
+    def _reset(self):
+        self._engine = None
+        self._snapshot = None
+        self._result_paths = set()
+        self._watched_dirs = set()
+        self._watched_files = set()
+        self._poll_dirs = []     # 未能监视、需要轮询的目录
+        self._sweep_dirs = []    # 已监视、逐批复查就地修改的目录
+        self._poll_pos = 0
+        self._sweep_pos = 0
+        self._dirty_dirs = set()
+        self._busy = False
+
+    @property
+    def active(self):
+        return self._snapshot is not None
+
+    def start(self, options, snapshot, result_paths):
+        """开始监视一次已完成的搜索"""
+        self.stop()
+        self._engine = SearchEngine(options)
+        self._snapshot = snapshot
+        self._result_paths = set(result_paths)
+        self._add_dirs(snapshot.dirs())
+        self._watch_files(self._result_paths)
+        self._poll_timer.start(self.POLL_INTERVAL_MS)
+        info(f"文件监视已启动: {snapshot.root} (监视 {len(self._watched_dirs)} 个目录, "
+             f"轮询 {len(self._poll_dirs)} 个目录)")
+
+    def stop(self):
+        """停止监视；尚在进行的后台刷新结果会被丢弃"""
+        self._generation += 1
+        self._poll_timer.stop()
+        self._debounce_timer.stop()
+        watched = list(self._watched_dirs | self._watched_files)
+        if watched:
+            self._fs_watcher.removePaths(watched)
+        self._reset()
+
+    # -------------- 监视路径 --------------
+    def _watch_limit(self):
+        limit = self.MAX_WATCHES
+        if sys.platform.startswith('linux'):
+            try:
+                with open('/proc/sys/fs/inotify/max_user_watches') as f:
+                    limit = min(limit, int(f.read()) // 2)
+            except (OSError, ValueError):
+                pass
+        return limit
+
+    def _room(self):
+        return max(0, self._watch_limit() - len(self._watched_dirs) - len(self._watched_files))
+
+    def _add_dirs(self, dirs):
+        room = self._room()
+        to_watch, overflow = dirs[:room], dirs[room:]
+        failed = self._fs_watcher.addPaths(to_watch) if to_watch else []
+        watched = set(to_watch) - set(failed)
+        self._watched_dirs |= watched
+        self._sweep_dirs.extend(path for path in to_watch if path in watched)
+        self._poll_dirs.extend(failed)
+        self._poll_dirs.extend(overflow)
+
+    def _remove_dirs(self, dirs):
+        dirs = set(dirs)
+        unwatch = [path for path in dirs if path in self._watched_dirs]
+        if unwatch:
+            self._fs_watcher.removePaths(unwatch)
+        self._watched_dirs -= dirs
+        self._sweep_dirs = [path for path in self._sweep_dirs if path not in dirs]
+        self._poll_dirs = [path for path in self._poll_dirs if path not in dirs]
+
+    def _watch_files(self, paths):
+        paths = [path for path in paths if path not in self._watched_files][:self._room()]
+        if paths:
+            failed = set(self._fs_watcher.addPaths(paths))
+            self._watched_files.update(path for path in paths if path not in failed)
+
+    def _unwatch_files(self, paths):
+        paths = [path for path in paths if path in self._watched_files]
+        if paths:
+            self._fs_watcher.removePaths(paths)
+            self._watched_files.difference_update(paths)
+
+    # -------------- 事件 --------------
+    def _on_dir_changed(self, path):
+        self._dirty_dirs.add(path)
+        self._debounce_timer.start(self.DEBOUNCE_MS)
+
+    def _on_file_changed(self, path):
+        # 重新扫描文件所在目录即可得到其新的 size/mtime（或发现它已被删除）
+        self._dirty_dirs.add(os.path.dirname(path))
+        self._debounce_timer.start(self.DEBOUNCE_MS)
+
+    def _poll(self):
+        for dirs, attr, batch in ((self._poll_dirs, '_poll_pos', self.POLL_BATCH),
+                                  (self._sweep_dirs, '_sweep_pos', self.SWEEP_BATCH)):
+            if not dirs:
+                continue
+            pos = getattr(self, attr) % len(dirs)
+            chunk = dirs[pos:pos + batch]
+            self._dirty_dirs.update(chunk)
+            setattr(self, attr, pos + len(chunk))
+        self._flush()
+
+    # -------------- 刷新 --------------
+    def _flush(self):
+        if self._busy or not self._dirty_dirs or not self.active:
+            return
+        dirs, self._dirty_dirs = list(self._dirty_dirs), set()
+        self._busy = True
+        self._executor.submit(self._refresh, self._generation, self._snapshot, self._engine, dirs)
+
+    def _refresh(self, generation, snapshot, engine, dirs):
+        """后台线程：重新扫描目录并只检查变化的文件"""
+        changes, matched = None, []
+        try:
+            changes = snapshot.rescan(dirs)
+            if changes.changed or changes.removed:
+                matched = engine.refresh(changes.changed, changes.removed)
+        except Exception as e:
+            error(f"文件监视刷新失败: {e}")
+        self._refreshed.emit(generation, changes, matched)
+
+    def _on_refreshed(self, generation, changes, matched):
+        if generation != self._generation:
+            return
+        self._busy = False
+        if changes:
+            if changes.removed_dirs:
+                self._remove_dirs(changes.removed_dirs)
+            if changes.added_dirs:
+                self._add_dirs(changes.added_dirs)
+
+            matched_paths = {entry.path for entry in matched}
+            removed = [path for path in changes.removed if path in self._result_paths]
+            removed += [entry.path for entry in changes.changed
+                        if entry.path in self._result_paths and entry.path not in matched_paths]
+            self._result_paths.difference_update(removed)
+            self._result_paths.update(matched_paths)
+            self._unwatch_files(removed)
+            self._watch_files(matched_paths)
+            if matched or removed:
+                hits = self._engine.hits
+                added = [(e.path, e.rel_path, e.size, hits.pop(e.path, None)) for e in matched]
+                self.results_changed.emit(added, removed)
+        if self._dirty_dirs:
+            self._flush()
+
+
 class FileSearchWidget(BaseContent):
     """文件查找工具界面（扩展）"""
 
+    # 跳转到命中行时，预览中显示其前后各多少行
+    PREVIEW_HIT_LINES = 200
+    # 替换预览中显示差异的文件数 / 结果对话框中列出的失败文件数
+    MAX_PREVIEW_DIFFS = 50
+    MAX_REPORTED_FAILURES = 10
+    # 文本处理结果超过这么多行时，预览区按页显示（只读）
+    PREVIEW_PAGE_LINES = 5000
+    # 修改时间筛选：(显示名称, 修改于多少秒之内, 修改于多少秒之前)
+    MTIME_PRESETS = (
+        ("不限", None, None),
+        ("24 小时内", 86400, None),
+        ("7 天内", 7 * 86400, None),
+        ("30 天内", 30 * 86400, None),
+        ("1 年内", 365 * 86400, None),
+        ("1 年以前", None, 365 * 86400),
+    )
+    TEXT_ACTION_LABELS = {
+        'aggregate': "聚合", 'sort': "排序", 'uniq': "去重", 'upper': "转换大写",
+        'lower': "转换小写", 'title': "转换首字母大写", 'stats': "统计",
+    }
+
     def __init__(self):
         self.search_thread = None
+        self.replace_thread = None
+        self._replace_preview = None  # (ReplaceSpec, [FilePreview, ...])：最近一次预览，执行替换时使用
+        self.text_thread = None
+        self._text_buffer = None  # 预览区正在分页显示的 TextBuffer
+        self._text_page = 0
         
         # 创建主要内容组件
         content_widget = self._create_content_widget()
@@ -137,6 +416,10 @@ class FileSearchWidget(BaseContent):
         # 初始化基类
         super().__init__(title="文件查找与文本处理", content_widget=content_widget)
 
+        # 搜索完成后实时监视目录变化
+        self.search_watcher = FileSearchWatcher(self)
+        self.search_watcher.results_changed.connect(self._apply_watch_changes)
+
     def _create_content_widget(self):
         """创建主要内容区域组件 - 使用全局样式"""
         
@@ -175,19 +458,28 @@ class FileSearchWidget(BaseContent):
         self.rb_filename = QRadioButton("📄 文件名")
         self.rb_regex = QRadioButton("🔤 正则")
         self.rb_fulltext = QRadioButton("📖 全文")
+        self.rb_multi = QRadioButton("🔑 多关键词")
+        self.rb_multi.setToolTip("在内容中同时搜索多个字面量关键词（以逗号、分号或空白分隔），每个文件只扫描一遍")
+        self.rb_dupes = QRadioButton("🧬 重复文件")
+        self.rb_dupes.setToolTip("查找内容完全相同的文件：先按大小、再按首尾 4KB、最后按全文哈希分组；"
+                                 "模式框为文件名通配符")
         self.rb_filename.setChecked(True)
         
         # 应用复选框样式到单选按钮
-        for rb in [self.rb_filename, self.rb_regex, self.rb_fulltext]:
+        for rb in [self.rb_filename, self.rb_regex, self.rb_fulltext, self.rb_multi, self.rb_dupes]:
             rb.setStyleSheet(CheckBoxStyles.get_standard_style())
         
         self.mode_group.addButton(self.rb_filename)
         self.mode_group.addButton(self.rb_regex)
         self.mode_group.addButton(self.rb_fulltext)
+        self.mode_group.addButton(self.rb_multi)
+        self.mode_group.addButton(self.rb_dupes)
         
         mode_layout.addWidget(self.rb_filename)
         mode_layout.addWidget(self.rb_regex)
         mode_layout.addWidget(self.rb_fulltext)
+        mode_layout.addWidget(self.rb_multi)
+        mode_layout.addWidget(self.rb_dupes)
         mode_layout.addStretch()
         search_layout.addLayout(mode_layout)
 
@@ -231,12 +523,85 @@ class FileSearchWidget(BaseContent):
         
         self.case_sensitive_cb = QCheckBox("🔤 区分大小写")
         self.case_sensitive_cb.setStyleSheet(CheckBoxStyles.get_standard_style())
+
+        self.context_spin = QSpinBox()
+        self.context_spin.setRange(0, 10)
+        self.context_spin.setValue(2)
+        self.context_spin.setToolTip("内容搜索时每个命中行记录的上下文行数")
+
+        self.watch_cb = QCheckBox("🔄 实时更新结果")
+        self.watch_cb.setToolTip("搜索完成后监视目录变化，自动增删结果，无需重新搜索")
+        self.watch_cb.setChecked(True)
+        self.watch_cb.setStyleSheet(CheckBoxStyles.get_standard_style())
+        self.watch_cb.toggled.connect(self._on_watch_toggled)
         
         content_layout.addWidget(QLabel("内容:"))
         content_layout.addWidget(self.content_entry)
         content_layout.addWidget(self.case_sensitive_cb)
+        content_layout.addWidget(QLabel("上下文行:"))
+        content_layout.addWidget(self.context_spin)
+        content_layout.addWidget(self.watch_cb)
         search_layout.addLayout(content_layout)
 
+        # 🚫 遍历剪枝：包含/排除通配符与 .gitignore，被排除的目录不会进入
+        filter_layout = QHBoxLayout()
+        self.include_entry = QLineEdit()
+        self.include_entry.setPlaceholderText("（可选）只搜索匹配的文件，如 *.py, src/**/*.ts")
+        self.include_entry.setStyleSheet(LineEditStyles.get_standard_style())
+
+        self.exclude_entry = QLineEdit()
+        self.exclude_entry.setPlaceholderText("排除的文件/目录，如 node_modules/, *.min.js")
+        self.exclude_entry.setText(", ".join(DEFAULT_EXCLUDES))
+        self.exclude_entry.setStyleSheet(LineEditStyles.get_standard_style())
+
+        self.gitignore_cb = QCheckBox("遵循 .gitignore")
+        self.gitignore_cb.setToolTip("跳过 .gitignore / .ignore 中忽略的文件和目录")
+        self.gitignore_cb.setChecked(True)
+        self.gitignore_cb.setStyleSheet(CheckBoxStyles.get_standard_style())
+
+        filter_layout.addWidget(QLabel("包含:"))
+        filter_layout.addWidget(self.include_entry)
+        filter_layout.addWidget(QLabel("排除:"))
+        filter_layout.addWidget(self.exclude_entry)
+        filter_layout.addWidget(self.gitignore_cb)
+        search_layout.addLayout(filter_layout)
+
+        # 📏 元数据筛选：在遍历线程中直接用目录项的 stat 数据判断，不满足的文件不会进入后续匹配
+        meta_layout = QHBoxLayout()
+        self.min_size_entry = QLineEdit()
+        self.min_size_entry.setPlaceholderText("最小，如 100MB")
+        self.min_size_entry.setStyleSheet(LineEditStyles.get_standard_style())
+        self.max_size_entry = QLineEdit()
+        self.max_size_entry.setPlaceholderText("最大，如 2GB")
+        self.max_size_entry.setStyleSheet(LineEditStyles.get_standard_style())
+
+        self.mtime_combo = QComboBox()
+        for label, _, _ in self.MTIME_PRESETS:
+            self.mtime_combo.addItem(label)
+
+        self.type_combo = QComboBox()
+        self.type_combo.addItem("全部类型", None)
+        for key, (label, extensions) in FILE_TYPES.items():
+            self.type_combo.addItem(label, key)
+            self.type_combo.setItemData(self.type_combo.count() - 1, " ".join(extensions), Qt.ToolTipRole)
+
+        self.depth_spin = QSpinBox()
+        self.depth_spin.setRange(0, 99)
+        self.depth_spin.setSpecialValueText("不限")
+        self.depth_spin.setToolTip("文件的最大目录深度：1 表示只搜索所选目录本身，更深的目录不会进入")
+
+        meta_layout.addWidget(QLabel("大小:"))
+        meta_layout.addWidget(self.min_size_entry)
+        meta_layout.addWidget(QLabel("-"))
+        meta_layout.addWidget(self.max_size_entry)
+        meta_layout.addWidget(QLabel("修改时间:"))
+        meta_layout.addWidget(self.mtime_combo)
+        meta_layout.addWidget(QLabel("类型:"))
+        meta_layout.addWidget(self.type_combo)
+        meta_layout.addWidget(QLabel("深度:"))
+        meta_layout.addWidget(self.depth_spin)
+        search_layout.addLayout(meta_layout)
+
         # ⚡ 操作按钮
         options_layout = QHBoxLayout()
         self.search_button = QPushButton("🔍 开始搜索")
@@ -272,12 +637,45 @@ class FileSearchWidget(BaseContent):
         result_group.setStyleSheet(GroupBoxStyles.get_standard_style())
         result_tree_layout = QVBoxLayout(result_group)
         
-        self.result_tree = QTreeWidget()
-        self.result_tree.setHeaderLabels(["文件名", "相对路径", "大小"])
+        self.result_filter_entry = QLineEdit()
+        self.result_filter_entry.setPlaceholderText("🔎 过滤结果（按相对路径）...")
+        self.result_filter_entry.setStyleSheet(LineEditStyles.get_standard_style())
+        self._filter_timer = QTimer(main_widget)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(150)
+        self._filter_timer.timeout.connect(self._apply_result_filter)
+        self.result_filter_entry.textChanged.connect(lambda _: self._filter_timer.start())
+        result_tree_layout.addWidget(self.result_filter_entry)
+
+        # 结果使用按列存储的模型 + QTreeView，大量结果时不会为每行创建条目对象
+        self.result_model = SearchResultModel(main_widget)
+        self.result_tree = QTreeView()
+        self.result_tree.setModel(self.result_model)
+        self.result_tree.setRootIsDecorated(False)
+        self.result_tree.setUniformRowHeights(True)
         self.result_tree.setAlternatingRowColors(True)
-        self.result_tree.itemClicked.connect(self._preview_file)
-        self.result_tree.itemSelectionChanged.connect(self._on_selection_changed)
-        result_tree_layout.addWidget(self.result_tree)
+        self.result_tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.result_tree.header().setSortIndicator(-1, Qt.AscendingOrder)
+        self.result_tree.setSortingEnabled(True)
+        self.result_tree.setColumnHidden(SearchResultModel.GROUP_COLUMN, True)
+        self.result_tree.clicked.connect(self._preview_file)
+        self.result_tree.selectionModel().selectionChanged.connect(self._on_selection_changed)
+
+        # 内容搜索时右侧显示所点击文件的命中行，点击命中行在预览中跳转到该行
+        self.hit_model = LineHitModel(main_widget)
+        self.hit_tree = QTreeView()
+        self.hit_tree.setModel(self.hit_model)
+        self.hit_tree.setRootIsDecorated(False)
+        self.hit_tree.setUniformRowHeights(True)
+        self.hit_tree.setAlternatingRowColors(True)
+        self.hit_tree.clicked.connect(self._jump_to_hit)
+
+        result_splitter = QSplitter(Qt.Horizontal)
+        result_splitter.addWidget(self.result_tree)
+        result_splitter.addWidget(self.hit_tree)
+        result_splitter.setSizes([500, 400])
+        self._set_hits_visible(False)
+        result_tree_layout.addWidget(result_splitter)
         rlayout.addWidget(result_group)
 
         # 👁️ 文件预览组件
@@ -302,9 +700,22 @@ class FileSearchWidget(BaseContent):
         self.reload_btn.setStyleSheet(ButtonStyles.get_secondary_style())
         self.reload_btn.clicked.connect(self._preview_selected_file)
         
+        # 大结果分页浏览
+        self.page_label = QLabel()
+        self.prev_page_btn = QPushButton("◀ 上一页")
+        self.prev_page_btn.setStyleSheet(ButtonStyles.get_secondary_style())
+        self.prev_page_btn.clicked.connect(lambda: self._change_text_page(-1))
+        self.next_page_btn = QPushButton("下一页 ▶")
+        self.next_page_btn.setStyleSheet(ButtonStyles.get_secondary_style())
+        self.next_page_btn.clicked.connect(lambda: self._change_text_page(1))
+        
         pv_tool_layout.addWidget(self.aggregate_btn)
         pv_tool_layout.addWidget(self.reload_btn)
         pv_tool_layout.addStretch()
+        pv_tool_layout.addWidget(self.page_label)
+        pv_tool_layout.addWidget(self.prev_page_btn)
+        pv_tool_layout.addWidget(self.next_page_btn)
+        self._set_pager_visible(False)
         pv_layout.addLayout(pv_tool_layout)
 
         rlayout.addWidget(preview_group)
@@ -331,9 +742,27 @@ class FileSearchWidget(BaseContent):
         self.fr_case_cb = QCheckBox("🔤 区分大小写")
         self.fr_case_cb.setStyleSheet(CheckBoxStyles.get_standard_style())
         
-        self.replace_btn = QPushButton("🔄 替换并保存到选中文件（备份原文件 .bak）")
-        self.replace_btn.setStyleSheet(ButtonStyles.get_primary_style())
+        self.replace_btn = QPushButton("🔍 预览替换")
+        self.replace_btn.setToolTip("在后台对选中文件试运行替换，预览每个文件的替换次数与差异，不修改文件")
+        self.replace_btn.setStyleSheet(ButtonStyles.get_secondary_style())
         self.replace_btn.clicked.connect(self._replace_in_files)
+
+        self.apply_replace_btn = QPushButton("✅ 执行替换")
+        self.apply_replace_btn.setToolTip("按预览结果原子替换文件，原内容记入替换日志，可一键撤销")
+        self.apply_replace_btn.setStyleSheet(ButtonStyles.get_primary_style())
+        self.apply_replace_btn.setEnabled(False)
+        self.apply_replace_btn.clicked.connect(self._apply_replace)
+
+        self.rollback_btn = QPushButton("↩ 撤销上次替换")
+        self.rollback_btn.setStyleSheet(ButtonStyles.get_secondary_style())
+        self.rollback_btn.setEnabled(os.path.exists(DEFAULT_JOURNAL_PATH))
+        self.rollback_btn.clicked.connect(self._rollback_replace)
+
+        # 查找/替换条件改变后需要重新预览
+        for widget in (self.find_input, self.replace_input):
+            widget.textChanged.connect(self._invalidate_replace_preview)
+        for widget in (self.fr_regex_cb, self.fr_case_cb):
+            widget.toggled.connect(self._invalidate_replace_preview)
         
         fr_layout.addWidget(QLabel("查找:"))
         fr_layout.addWidget(self.find_input)
@@ -342,6 +771,8 @@ class FileSearchWidget(BaseContent):
         fr_layout.addWidget(self.fr_regex_cb)
         fr_layout.addWidget(self.fr_case_cb)
         fr_layout.addWidget(self.replace_btn)
+        fr_layout.addWidget(self.apply_replace_btn)
+        fr_layout.addWidget(self.rollback_btn)
         tt_layout.addLayout(fr_layout)
 
         # ⚙️ 文本处理操作：排序、去重、大小写转换、统计、导出
@@ -349,27 +780,27 @@ class FileSearchWidget(BaseContent):
         
         self.sort_btn = QPushButton("📊 排序 (asc)")
         self.sort_btn.setStyleSheet(ButtonStyles.get_secondary_style())
-        self.sort_btn.clicked.connect(self._sort_preview)
+        self.sort_btn.clicked.connect(lambda: self._run_text_pipeline('sort'))
         
         self.uniq_btn = QPushButton("🔄 去重")
         self.uniq_btn.setStyleSheet(ButtonStyles.get_secondary_style())
-        self.uniq_btn.clicked.connect(self._uniq_preview)
+        self.uniq_btn.clicked.connect(lambda: self._run_text_pipeline('uniq'))
         
         self.upper_btn = QPushButton("🔤 大写")
         self.upper_btn.setStyleSheet(ButtonStyles.get_secondary_style())
-        self.upper_btn.clicked.connect(lambda: self._case_convert('upper'))
+        self.upper_btn.clicked.connect(lambda: self._run_text_pipeline('upper'))
         
         self.lower_btn = QPushButton("🔡 小写")
         self.lower_btn.setStyleSheet(ButtonStyles.get_secondary_style())
-        self.lower_btn.clicked.connect(lambda: self._case_convert('lower'))
+        self.lower_btn.clicked.connect(lambda: self._run_text_pipeline('lower'))
         
         self.title_btn = QPushButton("🔠 首字母大写")
         self.title_btn.setStyleSheet(ButtonStyles.get_secondary_style())
-        self.title_btn.clicked.connect(lambda: self._case_convert('title'))
+        self.title_btn.clicked.connect(lambda: self._run_text_pipeline('title'))
         
         self.stats_btn = QPushButton("📈 统计")
         self.stats_btn.setStyleSheet(ButtonStyles.get_secondary_style())
-        self.stats_btn.clicked.connect(self._stats_preview)
+        self.stats_btn.clicked.connect(lambda: self._run_text_pipeline('stats'))
         
         self.export_btn = QPushButton("💾 导出为文件")
         self.export_btn.setStyleSheet(ButtonStyles.get_primary_style())
@@ -382,6 +813,8 @@ class FileSearchWidget(BaseContent):
         tp_layout.addWidget(self.title_btn)
         tp_layout.addWidget(self.stats_btn)
         tp_layout.addWidget(self.export_btn)
+        self._text_tool_buttons = (self.aggregate_btn, self.sort_btn, self.uniq_btn, self.upper_btn,
+                                   self.lower_btn, self.title_btn, self.stats_btn, self.export_btn)
         tt_layout.addLayout(tp_layout)
 
         splitter.addWidget(text_tool_group)
@@ -415,20 +848,52 @@ class FileSearchWidget(BaseContent):
             mode = 'regex'
         elif self.rb_fulltext.isChecked():
             mode = 'fulltext'
+        elif self.rb_multi.isChecked():
+            mode = 'multi'
+        elif self.rb_dupes.isChecked():
+            mode = 'duplicates'
 
         if not search_path or not os.path.exists(search_path):
             QMessageBox.warning(self, "警告", "请选择有效的搜索目录")
             return
         if not pattern:
             pattern = '*.*'
+        try:
+            min_size = parse_size(self.min_size_entry.text())
+            max_size = parse_size(self.max_size_entry.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", str(e))
+            return
+        now = time.time()
+        _, within, older_than = self.MTIME_PRESETS[self.mtime_combo.currentIndex()]
+        file_type = self.type_combo.currentData()
 
-        self.result_tree.clear(); self.preview_text.clear()
+        self.search_watcher.stop()
+        self.result_model.clear(); self._set_preview_text("")
+        self.hit_model.set_hits(None, [])
+        self._set_hits_visible(mode in ('fulltext', 'multi') or bool(content))
+        self.result_tree.setColumnHidden(SearchResultModel.GROUP_COLUMN, mode != 'duplicates')
         self.search_button.setEnabled(False); self.stop_button.setEnabled(True)
         self.progress_bar.setVisible(True); self.progress_bar.setRange(0, 0)
         self.set_status("搜索中...")
 
-        self.search_thread = FileSearchThread(search_path, pattern, content, case_sensitive, mode)
-        self.search_thread.file_found.connect(self._add_result)
+        # 重复文件的分组无法增量更新，不监视目录
+        snapshot = TreeSnapshot(search_path) if self.watch_cb.isChecked() and mode != 'duplicates' else None
+        self.search_thread = FileSearchThread(
+            search_path, pattern, content, case_sensitive, mode, snapshot,
+            include=split_patterns(self.include_entry.text()),
+            exclude=split_patterns(self.exclude_entry.text()),
+            use_gitignore=self.gitignore_cb.isChecked(),
+            context_lines=self.context_spin.value(),
+            min_size=min_size, max_size=max_size,
+            modified_after=now - within if within else None,
+            modified_before=now - older_than if older_than else None,
+            file_types=[file_type] if file_type else None,
+            max_depth=self.depth_spin.value() or None
+        )
+        self.search_thread.files_found.connect(self._add_results)
+        self.search_thread.duplicates_found.connect(self._add_duplicates)
+        self.search_thread.hash_progress.connect(self._update_hash_progress)
         self.search_thread.search_finished.connect(self._search_finished)
         self.search_thread.progress_updated.connect(self._update_progress)
         self.search_thread.start()
@@ -436,69 +901,149 @@ class FileSearchWidget(BaseContent):
     def _stop_search(self):
         if self.search_thread and self.search_thread.isRunning():
             self.search_thread.stop(); self.search_thread.wait()
-        self._search_finished(self.result_tree.topLevelItemCount())
+        self._search_finished(self.result_model.total_count())
 
     def _clear_results(self):
-        self.result_tree.clear(); self.preview_text.clear(); self.set_status("已清空结果")
+        self.search_watcher.stop()
+        self.result_model.clear(); self._set_preview_text("")
+        self.hit_model.set_hits(None, [])
+        self.set_status("已清空结果")
+
+    def _add_results(self, results):
+        # 模型内部节流，约每 16ms 批量插入一次
+        self.result_model.add_results(results)
 
-    def _add_result(self, file_path, relative_path, file_size):
-        item = QTreeWidgetItem(self.result_tree)
-        item.setText(0, os.path.basename(file_path)); item.setText(1, relative_path); item.setText(2, self._format_size(file_size))
-        item.setData(0, Qt.UserRole, file_path)
+    def _add_duplicates(self, groups):
+        for number, results in groups:
+            self.result_model.add_results(results, group=number)
+
+    def _apply_result_filter(self):
+        self.result_model.set_filter(self.result_filter_entry.text())
 
     def _search_finished(self, total_found):
         self.search_button.setEnabled(True); self.stop_button.setEnabled(False); self.progress_bar.setVisible(False)
+        self.result_model.finish()
         self.set_status(f"搜索完成，找到 {total_found} 个文件")
+        if self.search_thread and self.search_thread.mode == 'multi':
+            self._report_terms(total_found, split_terms(self.search_thread.search_pattern))
+        if self.search_thread and self.search_thread.finder is not None and not self.search_thread.stopped:
+            finder = self.search_thread.finder
+            self.set_status(f"查找完成：{finder.group_count} 组重复文件，多余副本 {finder.duplicate_count} 个，"
+                            f"可释放 {format_size(finder.wasted_bytes)}（比较 {finder.candidate_count} 个文件，"
+                            f"读取 {finder.read_count} 次，其余来自哈希缓存）")
         if self.search_thread:
-            self.search_thread.deleteLater(); self.search_thread = None
+            # 该信号是 run() 的最后一步，等线程真正退出后再释放，避免销毁仍在运行的 QThread
+            self.search_thread.wait()
+            thread = self.search_thread
+            # 只有完整遍历过的目录快照才能用于增量监视
+            if thread.snapshot is not None and not thread.stopped and self.watch_cb.isChecked():
+                self.search_watcher.start(thread.options, thread.snapshot, self.result_model.paths())
+            thread.deleteLater(); self.search_thread = None
+
+    def _report_terms(self, total_found, terms):
+        """多关键词搜索：统计命中与未命中的关键词"""
+        found = self.result_model.hit_terms()
+        missing = [term for i, term in enumerate(terms) if i not in found]
+        message = f"搜索完成，找到 {total_found} 个文件，命中 {len(terms) - len(missing)}/{len(terms)} 个关键词"
+        if missing:
+            shown = ", ".join(missing[:10])
+            message += f"，未命中: {shown}" + (" ..." if len(missing) > 10 else "")
+        self.set_status(message)
+
+    def _on_watch_toggled(self, checked):
+        if not checked and self.search_watcher.active:
+            self.search_watcher.stop()
+            self.set_status("已停止实时更新")
+
+    def _apply_watch_changes(self, added, removed):
+        """应用文件监视带来的增量变化"""
+        added_count, removed_count = self.result_model.update_results(added, removed)
+        self.set_status(f"实时更新: 新增 {added_count} 个, 移除 {removed_count} 个, "
+                        f"共 {self.result_model.total_count()} 个文件")
 
     def _update_progress(self, processed):
         self.set_status(f"已处理 {processed} 个文件...")
 
+    def _update_hash_progress(self, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.set_status(f"正在比较文件内容: {done}/{total}")
+
     # -------------- 预览与聚合 --------------
-    def _preview_file(self, item):
-        path = item.data(0, Qt.UserRole)
+    def _selected_paths(self):
+        """选中行的绝对路径（按视图顺序）"""
+        rows = sorted(index.row() for index in self.result_tree.selectionModel().selectedRows())
+        return [self.result_model.path_at(row) for row in rows]
+
+    def _set_hits_visible(self, visible):
+        self.hit_tree.setVisible(visible)
+        self.result_tree.setColumnHidden(SearchResultModel.HITS_COLUMN, not visible)
+
+    def _preview_file(self, index):
+        path = index.data(Qt.UserRole)
+        hits = self.result_model.hits_at(index.row())
+        self.hit_model.set_hits(path, hits)
+        if hits:
+            self._preview_hit(path, hits[0])
+        else:
+            self._preview_path(path)
+
+    def _jump_to_hit(self, index):
+        path = self.hit_model.path()
+        if path:
+            self._preview_hit(path, self.hit_model.hit_at(index.row()))
+
+    def _preview_hit(self, path, hit):
+        """在预览中显示命中行附近的内容并定位到该行（mmap 按需读取，大文件也只读取附近几百行）"""
+        try:
+            encoding = text_detector.detect(path)
+            first, lines = read_line_window(path, hit.line, encoding, self.PREVIEW_HIT_LINES,
+                                            self.PREVIEW_HIT_LINES, hit.offset)
+        except Exception as e:
+            self._set_preview_text(f"无法预览: {e}")
+            return
+        self._set_preview_text("\n".join(lines))
+        block = self.preview_text.document().findBlockByNumber(hit.line - first)
+        if block.isValid():
+            cursor = QTextCursor(block)
+            cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+            self.preview_text.setTextCursor(cursor)
+            self.preview_text.ensureCursorVisible()
+        self.set_status(f"{os.path.basename(path)} 第 {hit.line} 行, 第 {hit.column} 列")
+
+    def _preview_path(self, path):
         if not path or not os.path.exists(path):
             return
         try:
-            if self._is_text_file(path):
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            encoding = text_detector.detect(path)
+            if encoding is not None:
+                with open(path, 'r', encoding=encoding, errors='replace') as f:
                     content = f.read(20000)
-                self.preview_text.setPlainText(content)
+                self._set_preview_text(content)
             else:
-                self.preview_text.setPlainText(f"[二进制文件] {os.path.basename(path)}")
+                self._set_preview_text(f"[二进制文件] {os.path.basename(path)}")
         except Exception as e:
-            self.preview_text.setPlainText(f"无法预览: {e}")
+            self._set_preview_text(f"无法预览: {e}")
 
     def _on_selection_changed(self):
         # 当选择改变时启用相关按钮（如果需要）
-        selected = self.result_tree.selectedItems()
+        selected = self.result_tree.selectionModel().selectedRows()
         self.aggregate_btn.setEnabled(len(selected) > 0)
         self.reload_btn.setEnabled(len(selected) == 1)
 
     def _aggregate_selected_to_preview(self):
-        items = self.result_tree.selectedItems()
-        if not items:
+        paths = self._selected_paths()
+        if not paths:
             QMessageBox.information(self, "提示", "请先选择要聚合的文件行")
             return
-        lines = []
-        for it in items:
-            path = it.data(0, Qt.UserRole)
-            if path and os.path.exists(path) and self._is_text_file(path):
-                try:
-                    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                        lines.append(f.read())
-                except Exception:
-                    continue
-        self.preview_text.setPlainText('\n\n--- 文件分隔 ---\n\n'.join(lines))
-        self.set_status(f"已聚合 {len(lines)} 个文件到预览区")
+        self._run_text_pipeline('aggregate', paths)
 
     def _preview_selected_file(self):
-        items = self.result_tree.selectedItems()
-        if len(items) != 1:
+        paths = self._selected_paths()
+        if len(paths) != 1:
             QMessageBox.information(self, "提示", "请选择单个文件以重新加载内容")
             return
-        self._preview_file(items[0])
+        self._preview_path(paths[0])
 
     # -------------- 文本处理工具 --------------
     def _regex_test(self):
@@ -514,129 +1059,258 @@ class FileSearchWidget(BaseContent):
         except re.error as e:
             QMessageBox.warning(self, "正则错误", f"正则表达式错误: {e}")
 
+    def _replace_spec(self):
+        return ReplaceSpec(self.find_input.text(), self.replace_input.text(),
+                           self.fr_regex_cb.isChecked(), self.fr_case_cb.isChecked())
+
     def _replace_in_files(self):
-        find = self.find_input.text()
-        replace = self.replace_input.text()
-        use_regex = self.fr_regex_cb.isChecked()
-        case_sensitive = self.fr_case_cb.isChecked()
-        items = self.result_tree.selectedItems()
-        if not find:
+        """预览替换：后台试运行，显示每个文件的替换次数与差异"""
+        spec = self._replace_spec()
+        paths = self._selected_paths()
+        if not spec.find:
             QMessageBox.information(self, "提示", "请输入要查找的内容")
             return
-        if not items:
+        if not paths:
             QMessageBox.information(self, "提示", "请先选择要操作的文件（仅文本文件）")
             return
-        # 执行替换并备份
-        failures = []
-        modified = 0
-        for it in items:
-            path = it.data(0, Qt.UserRole)
-            if not path or not os.path.exists(path) or not self._is_text_file(path):
-                continue
-            try:
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                new_content = content
-                if use_regex:
-                    flags = 0 if case_sensitive else re.IGNORECASE
-                    try:
-                        new_content = re.sub(find, replace, content, flags=flags)
-                    except re.error as e:
-                        failures.append((path, str(e)))
-                        continue
-                else:
-                    if case_sensitive:
-                        new_content = content.replace(find, replace)
-                    else:
-                        # 不区分大小写的替换：使用 re with re.IGNORECASE but preserve case is complex; we do simple approach
-                        pattern = re.compile(re.escape(find), re.IGNORECASE)
-                        new_content = pattern.sub(replace, content)
-                if new_content != content:
-                    # 备份
-                    bak = path + '.bak'
-                    try:
-                        if not os.path.exists(bak):
-                            with open(bak, 'w', encoding='utf-8', errors='ignore') as bf:
-                                bf.write(content)
-                    except Exception:
-                        pass
-                    with open(path, 'w', encoding='utf-8', errors='ignore') as f:
-                        f.write(new_content)
-                    modified += 1
-            except Exception as e:
-                failures.append((path, str(e)))
-        QMessageBox.information(self, "替换完成", f"已修改 {modified} 个文件。失败: {len(failures)} 个。")
-        self.set_status(f"替换完成：修改 {modified} 个文件")
+        try:
+            spec.pattern()
+        except re.error as e:
+            QMessageBox.warning(self, "正则错误", f"正则表达式错误: {e}")
+            return
+        self._start_replace_thread('preview', spec, paths)
+
+    def _apply_replace(self):
+        if self._replace_preview is None:
+            return
+        spec, previews = self._replace_preview
+        paths = [item.path for item in previews if item.count]
+        total = sum(item.count for item in previews)
+        reply = QMessageBox.question(
+            self, "确认替换", f"将在 {len(paths)} 个文件中替换 {total} 处，替换后可通过“撤销上次替换”恢复。是否继续？"
+        )
+        if reply != QMessageBox.Yes:
+            return
+        self._start_replace_thread('apply', spec, paths)
+
+    def _rollback_replace(self):
+        reply = QMessageBox.question(self, "撤销替换", "将把最近一次替换修改的文件恢复为替换前的内容，是否继续？")
+        if reply != QMessageBox.Yes:
+            return
+        self._start_replace_thread('rollback')
+
+    def _start_replace_thread(self, action, spec=None, paths=()):
+        if self.replace_thread is not None:
+            return
+        for button in (self.replace_btn, self.apply_replace_btn, self.rollback_btn):
+            button.setEnabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.set_status({'preview': "正在预览替换...", 'apply': "正在替换...", 'rollback': "正在撤销替换..."}[action])
+        self.replace_thread = FileReplaceThread(action, spec, paths)
+        self.replace_thread.progress_updated.connect(self._update_replace_progress)
+        self.replace_thread.replace_finished.connect(self._replace_finished)
+        self.replace_thread.replace_failed.connect(self._replace_failed)
+        self.replace_thread.start()
+
+    def _update_replace_progress(self, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def _end_replace_thread(self):
+        # 信号是 run() 的最后一步，等线程退出后再释放
+        self.replace_thread.wait()
+        self.replace_thread.deleteLater()
+        self.replace_thread = None
+        self.progress_bar.setVisible(False)
+        self.replace_btn.setEnabled(True)
+        self.apply_replace_btn.setEnabled(self._replace_preview is not None)
+        self.rollback_btn.setEnabled(os.path.exists(DEFAULT_JOURNAL_PATH))
+
+    def _replace_finished(self, action, result):
+        spec = self.replace_thread.spec
+        self._end_replace_thread()
+        if action == 'preview':
+            self._show_replace_preview(spec, result)
+        elif action == 'apply':
+            self._replace_preview = None
+            self.apply_replace_btn.setEnabled(False)
+            transaction, modified, failures = result
+            lines = [f"已修改 {len(modified)} 个文件，共替换 {sum(count for _, count in modified)} 处。"]
+            if failures:
+                lines.append(f"失败 {len(failures)} 个：")
+                lines += [f"  {path}: {reason}" for path, reason in failures[:self.MAX_REPORTED_FAILURES]]
+            QMessageBox.information(self, "替换完成", "\n".join(lines))
+            self.set_status(f"替换完成：修改 {len(modified)} 个文件")
+        else:
+            if result is None:
+                QMessageBox.information(self, "撤销替换", "没有可撤销的替换")
+                return
+            restored, conflicts = result
+            lines = [f"已恢复 {len(restored)} 个文件。"]
+            if conflicts:
+                lines.append(f"未恢复 {len(conflicts)} 个：")
+                lines += [f"  {path}: {reason}" for path, reason in conflicts[:self.MAX_REPORTED_FAILURES]]
+                lines.append("这些文件的原内容仍保留在替换日志中，处理后可再次撤销。")
+            QMessageBox.information(self, "撤销完成", "\n".join(lines))
+            self.set_status(f"撤销完成：恢复 {len(restored)} 个文件")
+
+    def _replace_failed(self, action, message):
+        self._end_replace_thread()
+        QMessageBox.warning(self, "错误", f"批量替换失败: {message}")
+
+    def _show_replace_preview(self, spec, previews):
+        changed = [item for item in previews if item.count]
+        skipped = [item for item in previews if item.error]
+        total = sum(item.count for item in changed)
+        summary = f"将修改 {len(changed)} 个文件，共 {total} 处替换"
+        if skipped:
+            summary += f"，跳过 {len(skipped)} 个文件"
+        parts = [summary, ""]
+        parts += [f"{item.path}: {item.count} 处, {item.hunks} 块" for item in changed]
+        parts += [f"{item.path}: 跳过（{item.error}）" for item in skipped]
+        for item in changed[:self.MAX_PREVIEW_DIFFS]:
+            parts += ["", item.diff]
+        if len(changed) > self.MAX_PREVIEW_DIFFS:
+            parts += ["", f"...（仅显示前 {self.MAX_PREVIEW_DIFFS} 个文件的差异）"]
+        self._set_preview_text("\n".join(parts))
+        self._replace_preview = (spec, previews) if changed else None
+        self.apply_replace_btn.setEnabled(bool(changed))
+        self.set_status(summary)
 
-    def _sort_preview(self):
-        text = self.preview_text.toPlainText()
-        if not text:
+    def _invalidate_replace_preview(self):
+        self._replace_preview = None
+        if self.replace_thread is None:
+            self.apply_replace_btn.setEnabled(False)
+
+    def _run_text_pipeline(self, action, paths=()):
+        """在后台处理预览区内容：分页显示的结果直接从磁盘读取，否则只取一次预览区文本"""
+        if self.text_thread is not None:
             return
-        lines = text.splitlines()
-        lines.sort()
-        self.preview_text.setPlainText('\n'.join(lines))
-        self.set_status('已排序（升序）')
-
-    def _uniq_preview(self):
-        text = self.preview_text.toPlainText()
-        if not text:
+        buffer, text = self._text_buffer, None
+        if action != 'aggregate' and buffer is None:
+            text = self.preview_text.toPlainText()
+            if not text and action != 'stats':
+                return
+        for button in self._text_tool_buttons:
+            button.setEnabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.set_status(f"正在{self.TEXT_ACTION_LABELS[action]}...")
+        self.text_thread = TextPipelineThread(action, paths, buffer, text)
+        self.text_thread.progress_updated.connect(self._update_text_progress)
+        self.text_thread.pipeline_finished.connect(self._text_pipeline_finished)
+        self.text_thread.pipeline_failed.connect(self._text_pipeline_failed)
+        self.text_thread.start()
+
+    def _update_text_progress(self, line_count):
+        label = self.TEXT_ACTION_LABELS[self.text_thread.action]
+        self.set_status(f"正在{label}... 已读取 {line_count} 行")
+
+    def _end_text_thread(self):
+        # 信号是 run() 的最后一步，等线程退出后再释放
+        self.text_thread.wait()
+        source = self.text_thread.buffer
+        self.text_thread.deleteLater()
+        self.text_thread = None
+        # 处理期间预览区已切换到其他内容时，输入缓冲区留到此时才删除
+        if source is not None and source is not self._text_buffer:
+            source.discard()
+        self.progress_bar.setVisible(False)
+        for button in self._text_tool_buttons:
+            button.setEnabled(True)
+        self._on_selection_changed()
+
+    def _text_pipeline_finished(self, action, result):
+        self._end_text_thread()
+        if action == 'stats':
+            QMessageBox.information(self, "统计结果",
+                                    f"行数: {result.lines}\n词数: {result.words}\n字符数: {result.chars}")
             return
-        lines = text.splitlines()
-        seen = set(); out = []
-        for l in lines:
-            if l not in seen:
-                seen.add(l); out.append(l)
-        self.preview_text.setPlainText('\n'.join(out))
-        self.set_status('已去重')
-
-    def _case_convert(self, mode='upper'):
-        text = self.preview_text.toPlainText();
-        if not text:
+        if action == 'aggregate':
+            buffer, count = result
+            status = f"已聚合 {count} 个文件到预览区"
+        elif action == 'uniq':
+            buffer, removed = result
+            status = f"已去重（去掉 {removed} 行）"
+        else:
+            buffer = result
+            status = {'sort': '已排序（升序）', 'upper': '已转换为大写', 'lower': '已转换为小写',
+                      'title': '已转换为首字母大写'}[action]
+        self._show_text_buffer(buffer)
+        self.set_status(f"{status}，共 {len(buffer)} 行")
+
+    def _text_pipeline_failed(self, action, message):
+        self._end_text_thread()
+        QMessageBox.warning(self, "错误", f"文本{self.TEXT_ACTION_LABELS[action]}失败: {message}")
+
+    # -------------- 预览区内容与分页 --------------
+    def _set_preview_text(self, text):
+        """在预览区显示一段普通（可编辑）文本，结束分页显示"""
+        self._drop_text_buffer()
+        self.preview_text.setReadOnly(False)
+        self.preview_text.setPlainText(text)
+
+    def _drop_text_buffer(self):
+        buffer, self._text_buffer = self._text_buffer, None
+        self._set_pager_visible(False)
+        # 正在作为后台处理的输入时，由 _end_text_thread 删除
+        if buffer is not None and (self.text_thread is None or self.text_thread.buffer is not buffer):
+            buffer.discard()
+
+    def _show_text_buffer(self, buffer):
+        """显示处理结果：一页放得下时作为普通文本，否则只读分页显示"""
+        if len(buffer) <= self.PREVIEW_PAGE_LINES:
+            text = "\n".join(buffer.read_lines(0, self.PREVIEW_PAGE_LINES))
+            buffer.discard()
+            self._set_preview_text(text)
             return
-        if mode == 'upper':
-            self.preview_text.setPlainText(text.upper())
-            self.set_status('已转换为大写')
-        elif mode == 'lower':
-            self.preview_text.setPlainText(text.lower())
-            self.set_status('已转换为小写')
-        elif mode == 'title':
-            self.preview_text.setPlainText(text.title())
-            self.set_status('已转换为首字母大写')
-
-    def _stats_preview(self):
-        text = self.preview_text.toPlainText()
-        if text is None:
+        self._drop_text_buffer()
+        self._text_buffer = buffer
+        self._text_page = 0
+        self.preview_text.setReadOnly(True)
+        self._set_pager_visible(True)
+        self._show_text_page()
+
+    def _set_pager_visible(self, visible):
+        for widget in (self.page_label, self.prev_page_btn, self.next_page_btn):
+            widget.setVisible(visible)
+
+    def _page_count(self):
+        return (len(self._text_buffer) + self.PREVIEW_PAGE_LINES - 1) // self.PREVIEW_PAGE_LINES
+
+    def _show_text_page(self):
+        buffer = self._text_buffer
+        start = self._text_page * self.PREVIEW_PAGE_LINES
+        lines = buffer.read_lines(start, self.PREVIEW_PAGE_LINES)
+        self.preview_text.setPlainText("\n".join(lines))
+        self.page_label.setText(f"第 {start + 1}-{start + len(lines)} 行 / 共 {len(buffer)} 行")
+        self.prev_page_btn.setEnabled(self._text_page > 0)
+        self.next_page_btn.setEnabled(self._text_page + 1 < self._page_count())
+
+    def _change_text_page(self, delta):
+        if self._text_buffer is None:
             return
-        lines = text.splitlines(); line_count = len(lines)
-        word_count = sum(len(l.split()) for l in lines)
-        char_count = len(text)
-        QMessageBox.information(self, "统计结果", f"行数: {line_count}\n词数: {word_count}\n字符数: {char_count}")
+        page = min(max(0, self._text_page + delta), self._page_count() - 1)
+        if page != self._text_page:
+            self._text_page = page
+            self._show_text_page()
 
     def _export_preview_to_file(self):
-        text = self.preview_text.toPlainText()
-        if not text:
+        buffer = self._text_buffer
+        text = self.preview_text.toPlainText() if buffer is None else None
+        if buffer is None and not text:
             QMessageBox.information(self, "导出", "预览区为空，无内容可导出")
             return
         p, _ = QFileDialog.getSaveFileName(self, "导出为文本文件", "export.txt", "Text files (*.txt);;All Files (*)")
         if p:
             try:
-                with open(p, 'w', encoding='utf-8') as f:
-                    f.write(text)
+                if buffer is not None:
+                    buffer.copy_to(p)
+                else:
+                    with open(p, 'w', encoding='utf-8') as f:
+                        f.write(text)
                 QMessageBox.information(self, "导出", f"已导出: {p}")
                 self.set_status(f"已导出到 {p}")
             except Exception as e:
                 QMessageBox.warning(self, "导出失败", str(e))
-
-    # -------------- 辅助方法 --------------
-    def _is_text_file(self, file_path):
-        text_extensions = {'.txt', '.py', '.js', '.html', '.css', '.json', '.xml', '.md', '.rst', '.ini', '.cfg', '.log', '.csv'}
-        _, ext = os.path.splitext(file_path.lower())
-        return ext in text_extensions
-
-    def _format_size(self, size):
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} TB"
-
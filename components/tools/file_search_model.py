@@ -0,0 +1,375 @@
+"""
+文件查找结果模型
+按列存储结果：每行只保存目录编号、文件名和大小，目录前缀（绝对/相对）全局去重，
+20 万行结果只占十几 MB；新结果先进入待插入队列，约每 16ms 批量插入一次。
+排序与过滤都在模型内部通过“视图行 -> 存储行”的映射完成，不创建任何条目对象。
+全文搜索的命中行只为有命中的行保存，由 LineHitModel 显示选中文件的命中行；
+重复文件查找的结果额外记录所属的重复组
+"""
+
+import os
+from array import array
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+
+
+def format_size(size):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} TB"
+
+
+class SearchResultModel(QAbstractTableModel):
+    """文件查找结果（文件名 / 相对路径 / 大小 / 命中行数 / 重复组），Qt.UserRole 返回绝对路径"""
+
+    HEADERS = ["文件名", "相对路径", "大小", "命中", "重复组"]
+    HITS_COLUMN = 3
+    GROUP_COLUMN = 4
+    BATCH_INTERVAL_MS = 16
+    # 已删除行的目录编号
+    _DELETED = 0xFFFFFFFF
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.BATCH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush_pending)
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._filter = ""
+        self._reset_storage()
+
+    def _reset_storage(self):
+        self._dir_index = {}        # (绝对目录前缀, 相对目录前缀) -> 目录编号
+        self._dirs = []             # 目录编号 -> (绝对目录前缀, 相对目录前缀)，均以分隔符结尾或为空
+        self._row_dirs = array('I')
+        self._names = []
+        self._sizes = array('q')
+        self._hits = {}             # 存储行 -> [LineHit, ...]，只保存有命中行的结果
+        self._groups = {}           # 存储行 -> 重复组编号，只保存重复文件查找的结果
+        self._group_sizes = {}      # 重复组编号 -> 组内文件数
+        self._live = 0
+        self._order = None          # 视图行 -> 存储行；None 表示按插入顺序显示全部
+        self._pending = []
+
+    # -------------- 存储 --------------
+    def _intern_dir(self, abs_prefix, rel_prefix):
+        key = (abs_prefix, rel_prefix)
+        dir_id = self._dir_index.get(key)
+        if dir_id is None:
+            dir_id = self._dir_index[key] = len(self._dirs)
+            self._dirs.append(key)
+        return dir_id
+
+    def _append_row(self, file_path, relative_path, file_size, hits, group=None):
+        name = os.path.basename(file_path)
+        cut = len(name)
+        if hits:
+            self._hits[len(self._names)] = hits
+        if group is not None:
+            self._groups[len(self._names)] = group
+            self._group_sizes[group] = self._group_sizes.get(group, 0) + 1
+        self._row_dirs.append(self._intern_dir(file_path[:-cut], relative_path[:-cut]))
+        self._names.append(name)
+        self._sizes.append(file_size)
+        self._live += 1
+
+    def _path(self, row):
+        return self._dirs[self._row_dirs[row]][0] + self._names[row]
+
+    def _rel_path(self, row):
+        return self._dirs[self._row_dirs[row]][1] + self._names[row]
+
+    def _storage_row(self, view_row):
+        return view_row if self._order is None else self._order[view_row]
+
+    def _live_rows(self):
+        deleted = self._DELETED
+        return [row for row, dir_id in enumerate(self._row_dirs) if dir_id != deleted]
+
+    def _matches_filter(self, row):
+        return self._filter in self._rel_path(row).casefold()
+
+    # -------------- 公共接口 --------------
+    def clear(self):
+        self._flush_timer.stop()
+        self.beginResetModel()
+        self._reset_storage()
+        self.endResetModel()
+
+    def add_results(self, results, group=None):
+        """追加结果 [(file_path, relative_path, size, hits), ...]，节流后批量插入
+
+        hits 为该文件的 LineHit 列表，没有记录命中行时为 None；group 为这些文件所属的重复组编号
+        """
+        if group is not None:
+            results = [(*result, group) for result in results]
+        self._pending.extend(results)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush_pending(self):
+        """立即插入所有待插入的结果"""
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        start = len(self._names)
+        for result in pending:
+            self._append_row(*result)
+        new_rows = range(start, len(self._names))
+
+        if self._order is None:
+            # 未排序、未过滤、没有删除过行：视图行即存储行
+            self.beginInsertRows(QModelIndex(), start, len(self._names) - 1)
+            self.endInsertRows()
+            return
+        visible = [row for row in new_rows if self._matches_filter(row)] if self._filter else list(new_rows)
+        if visible:
+            first = len(self._order)
+            self.beginInsertRows(QModelIndex(), first, first + len(visible) - 1)
+            self._order.extend(visible)
+            self.endInsertRows()
+
+    def finish(self):
+        """一次搜索结束：插入剩余结果，并按当前排序列重新排序"""
+        self.flush_pending()
+        if self._sort_column >= 0:
+            self.sort(self._sort_column, self._sort_order)
+
+    def total_count(self):
+        """全部结果数（不受过滤影响）"""
+        return self._live + len(self._pending)
+
+    def path_at(self, view_row):
+        return self._path(self._storage_row(view_row))
+
+    def hits_at(self, view_row):
+        return self._hits.get(self._storage_row(view_row)) or []
+
+    def group_at(self, view_row):
+        return self._groups.get(self._storage_row(view_row))
+
+    def paths(self):
+        self.flush_pending()
+        return [self._path(row) for row in self._live_rows()]
+
+    def hit_terms(self):
+        """多关键词搜索中出现过的关键词下标（只统计已记录的命中行）"""
+        found = set()
+        for hits in self._hits.values():
+            for hit in hits:
+                found.update(hit.terms or ())
+        return found
+
+    def update_results(self, added, removed):
+        """应用增量变化：removed 中的路径删除，added 中已存在的更新大小与命中行、其余追加
+
+        Returns:
+            (新增数, 删除数)
+        """
+        self.flush_pending()
+        removed = set(removed)
+        sizes = {file_path: (file_size, hits) for file_path, _, file_size, hits in added}
+        deleted = self._DELETED
+        to_delete = []
+        updated = []
+        for row, dir_id in enumerate(self._row_dirs):
+            if dir_id == deleted:
+                continue
+            path = self._path(row)
+            if path in removed:
+                to_delete.append(row)
+            elif path in sizes:
+                self._sizes[row], hits = sizes.pop(path)
+                if hits:
+                    self._hits[row] = hits
+                else:
+                    self._hits.pop(row, None)
+                updated.append(row)
+
+        if to_delete:
+            self._delete_rows(to_delete)
+        if updated:
+            view_rows = self._view_rows_of(updated)
+            for view_row in view_rows:
+                self.dataChanged.emit(self.index(view_row, 2), self.index(view_row, self.HITS_COLUMN),
+                                      [Qt.DisplayRole])
+        new_results = [result for result in added if result[0] in sizes]
+        self.add_results(new_results)
+        self.flush_pending()
+        return len(new_results), len(to_delete)
+
+    def _view_rows_of(self, storage_rows):
+        if self._order is None:
+            return list(storage_rows)
+        wanted = set(storage_rows)
+        return [view_row for view_row, row in enumerate(self._order) if row in wanted]
+
+    def _delete_rows(self, storage_rows):
+        """删除存储行（只做标记），并从视图中移除"""
+        if self._order is None:
+            self._order = array('I', self._live_rows())
+        view_rows = sorted(self._view_rows_of(storage_rows), reverse=True)
+        for row in storage_rows:
+            self._row_dirs[row] = self._DELETED
+            self._hits.pop(row, None)
+            group = self._groups.pop(row, None)
+            if group is not None:
+                self._group_sizes[group] -= 1
+            self._live -= 1
+        # 按连续区间从后往前移除
+        while view_rows:
+            last = first = view_rows.pop(0)
+            while view_rows and view_rows[0] == first - 1:
+                first = view_rows.pop(0)
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._order[first:last + 1]
+            self.endRemoveRows()
+
+    def set_filter(self, text):
+        """按相对路径过滤（不区分大小写的子串匹配）"""
+        text = text.strip().casefold()
+        if text == self._filter:
+            return
+        self.flush_pending()
+        self._filter = text
+        self._relayout()
+
+    def _rebuild_order(self):
+        rows = self._live_rows()
+        if self._filter:
+            rows = [row for row in rows if self._matches_filter(row)]
+        if self._sort_column >= 0:
+            rows.sort(key=self._sort_key(self._sort_column), reverse=self._sort_order == Qt.DescendingOrder)
+        self._order = array('I', rows)
+
+    def _sort_key(self, column):
+        if column == 0:
+            names = self._names
+            return lambda row: names[row].casefold()
+        if column == 1:
+            return lambda row: self._rel_path(row).casefold()
+        if column == self.HITS_COLUMN:
+            hits = self._hits
+            return lambda row: len(hits.get(row, ()))
+        if column == self.GROUP_COLUMN:
+            groups, names = self._groups, self._names
+            return lambda row: (groups.get(row, 0), names[row].casefold())
+        sizes = self._sizes
+        return sizes.__getitem__
+
+    # -------------- QAbstractTableModel --------------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._names) if self._order is None else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._storage_row(index.row())
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return self._names[row]
+            if column == 1:
+                return self._rel_path(row)
+            if column == self.HITS_COLUMN:
+                hits = self._hits.get(row)
+                return str(len(hits)) if hits else ""
+            if column == self.GROUP_COLUMN:
+                group = self._groups.get(row)
+                return f"#{group}（{self._group_sizes[group]} 个）" if group is not None else ""
+            return format_size(self._sizes[row])
+        if role == Qt.UserRole or (role == Qt.ToolTipRole and column == 1):
+            return self._path(row)
+        if role == Qt.TextAlignmentRole and column >= 2:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """在模型内排序；column < 0 恢复插入顺序"""
+        self.flush_pending()
+        self._sort_column = column
+        self._sort_order = order
+        self._relayout()
+
+    def _relayout(self):
+        """重建视图顺序，并让选中项等持久索引跟随原来的行"""
+        self.layoutAboutToBeChanged.emit()
+        old_persistent = self.persistentIndexList()
+        old_rows = [self._storage_row(index.row()) for index in old_persistent]
+        self._rebuild_order()
+        position = {row: view_row for view_row, row in enumerate(self._order)}
+        new_persistent = [
+            self.index(position[row], index.column()) if row in position else QModelIndex()
+            for row, index in zip(old_rows, old_persistent)
+        ]
+        self.changePersistentIndexList(old_persistent, new_persistent)
+        self.layoutChanged.emit()
+
+
+class LineHitModel(QAbstractTableModel):
+    """一个文件的命中行（行号 / 内容），工具提示显示上下文，Qt.UserRole 返回 LineHit"""
+
+    HEADERS = ["行", "内容"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._path = None
+        self._hits = []
+
+    def set_hits(self, path, hits):
+        self.beginResetModel()
+        self._path = path
+        self._hits = list(hits or [])
+        self.endResetModel()
+
+    def path(self):
+        return self._path
+
+    def hit_at(self, row):
+        return self._hits[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._hits)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        hit = self._hits[index.row()]
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return f"{hit.line}:{hit.column}"
+            return hit.text.strip()
+        if role == Qt.ToolTipRole:
+            first = hit.line - len(hit.before)
+            lines = [f"{first + i:>6}  {text}" for i, text in enumerate(hit.before)]
+            lines.append(f"{hit.line:>6}> {hit.text}")
+            lines += [f"{hit.line + 1 + i:>6}  {text}" for i, text in enumerate(hit.after)]
+            return "\n".join(lines)
+        if role == Qt.UserRole:
+            return hit
+        if role == Qt.TextAlignmentRole and index.column() == 0:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
@@ -1,24 +1,114 @@
+import os
 import json
 from PySide6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QTextEdit,
-    QSplitter, QFrame, QMessageBox, QPushButton, QComboBox
+    QSplitter, QFrame, QMessageBox, QPushButton, QComboBox,
+    QStackedWidget, QTreeView, QFileDialog
 )
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtGui import QFont, QTextCursor, QTextCharFormat, QColor, QPalette
 from styles.constants import Colors
 from styles.widgets import TextEditStyles, ButtonStyles, ComboBoxStyles
 from components.base_content import BaseContent
+from components.tools.file_search_model import format_size
+from components.tools.json_tree_model import JsonTreeModel
+from utils.jsonstream import (
+    JsonIndex, JsonIndexError, JsonIndexStopped, JsonValidator, ValidationStopped, text_edit, merge_edits
+)
+from utils.logger import error
 import re
 from typing import Any
 
+# 停止输入多久后在后台校验（毫秒）
+VALIDATION_DELAY_MS = 400
+# BMP 之外的字符：在 Qt 的位置（UTF-16）中占两个单位，在 Python 字符串中只占一个
+_ASTRAL = re.compile('[\U00010000-\U0010FFFF]')
+
+
+class JsonValidateThread(QThread):
+    """在后台校验输入的 JSON；较长的文本只重新检查编辑处附近"""
+    validation_finished = Signal(object)  # json.JSONDecodeError 或 None
+
+    def __init__(self, validator, text, edit):
+        super().__init__()
+        self.validator = validator
+        self.text = text
+        self.edit = edit
+        self.stopped = False
+        self.completed = False  # 校验完整结束，validator 已保存本次的结果
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self):
+        try:
+            result = self.validator.validate(self.text, self.edit, should_stop=lambda: self.stopped)
+        except ValidationStopped:
+            return
+        except Exception as e:
+            error(f"JSON 校验失败: {e}")
+            return
+        self.completed = True
+        self.validation_finished.emit(result)
+
+
+class JsonIndexThread(QThread):
+    """为 JSON 文件建立稀疏索引；完成后树形视图按需读取节点"""
+    progress_updated = Signal(int)          # 百分比
+    index_ready = Signal(object, object)    # JsonIndex, 根值的 JsonEntry
+    index_failed = Signal(str)
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self):
+        last = [-1]
+
+        def on_progress(done, total):
+            percent = int(done * 100 / total) if total else 100
+            if percent != last[0]:
+                last[0] = percent
+                self.progress_updated.emit(percent)
+
+        try:
+            self.index.build(should_stop=lambda: self.stopped, on_progress=on_progress)
+            root = self.index.root()
+        except JsonIndexStopped:
+            return
+        except JsonIndexError as e:
+            line, column = self.index.line_col(e.pos)
+            self.index_failed.emit(f"{e.message}（第 {line} 行第 {column} 列）")
+            return
+        except (OSError, ValueError) as e:
+            error(f"JSON 文件索引失败: {e}")
+            self.index_failed.emit(str(e))
+            return
+        self.index_ready.emit(self.index, root)
+
+
 class JSONFormatter(BaseContent):
     """JSON格式化工具界面"""
 
     def __init__(self):
+        self.json_index = None    # 以树形视图打开的大文件的 JsonIndex
+        self.index_thread = None
+        self.json_validator = JsonValidator()
+        self.validate_thread = None
+        self._pending_edit = None     # 自上一次完成的校验以来的编辑（EditRange）
+        self._running_edit = None     # 正在进行的校验所基于的编辑
+        self._needs_full_validation = True
+        self._validation_queued = False
         # 创建主要内容组件
         content_widget = self._create_content_widget()
         # 初始化基类
         super().__init__(title="JSON 格式化工具", content_widget=content_widget)
+        # 延迟验证：使用基类的计时器，超时后调用 _on_validation_timeout
+        self.validation_timer.setInterval(VALIDATION_DELAY_MS)
         self._setup_styles()
 
     def _create_content_widget(self):
@@ -47,6 +137,7 @@ class JSONFormatter(BaseContent):
         self.input_text.setStyleSheet(TextEditStyles.get_standard_style("json_input"))
         self.input_text.setMinimumHeight(400)  # 设置最小高度
         self.input_text.textChanged.connect(self._on_input_changed)
+        self.input_text.document().contentsChange.connect(self._on_contents_change)
         left_layout.addWidget(self.input_text, 1)  # 添加拉伸因子，让它占用更多空间
 
         # 右侧输出区域
@@ -64,7 +155,29 @@ class JSONFormatter(BaseContent):
         self.output_text.setPlaceholderText("格式化后的结果将在此处显示...")
         self.output_text.setStyleSheet(TextEditStyles.get_output_style("json_output"))
         self.output_text.setMinimumHeight(400)  # 设置最小高度
-        right_layout.addWidget(self.output_text, 1)  # 添加拉伸因子，让它占用更多空间
+
+        # 大文件以树形视图显示：只为展开过的节点读取内容
+        self.json_tree = QTreeView()
+        self.json_model = JsonTreeModel(self.json_tree)
+        self.json_model.parse_failed.connect(self._tree_parse_failed)
+        self.json_tree.setModel(self.json_model)
+        self.json_tree.setUniformRowHeights(True)
+        self.json_tree.setColumnWidth(0, 240)
+        self.json_tree.setColumnWidth(1, 70)
+        self.json_tree.setStyleSheet(f"""
+            QTreeView {{
+                border: 1px solid {Colors.BORDER_LIGHT};
+                border-radius: 6px;
+                background-color: white;
+                font-size: 13px;
+            }}
+        """)
+        self.json_tree.selectionModel().currentChanged.connect(self._on_tree_current_changed)
+
+        self.output_stack = QStackedWidget()
+        self.output_stack.addWidget(self.output_text)
+        self.output_stack.addWidget(self.json_tree)
+        right_layout.addWidget(self.output_stack, 1)  # 添加拉伸因子，让它占用更多空间
 
         splitter.addWidget(left_widget)
         splitter.addWidget(right_widget)
@@ -106,6 +219,11 @@ class JSONFormatter(BaseContent):
         self.entity_btn.setStyleSheet(ButtonStyles.get_secondary_style())
         self.entity_btn.clicked.connect(self._convert_to_entity)
 
+        self.open_file_btn = QPushButton("📂 打开大文件")
+        self.open_file_btn.setToolTip("以树形视图浏览 JSON 文件：只建立对象/数组的位置索引，"
+                                      "展开节点时才读取内容，数百 MB 的文件也能打开")
+        self.open_file_btn.setStyleSheet(ButtonStyles.get_secondary_style())
+        self.open_file_btn.clicked.connect(self._open_json_file)
 
 
         button_layout.addWidget(self.format_btn)
@@ -113,16 +231,12 @@ class JSONFormatter(BaseContent):
         button_layout.addWidget(self.validate_btn)
         button_layout.addWidget(self.language_selector)
         button_layout.addWidget(self.entity_btn)
+        button_layout.addWidget(self.open_file_btn)
         button_layout.addStretch()
         button_layout.addWidget(self.clear_btn)
 
         layout.addLayout(button_layout)
 
-        # 延迟验证
-        self.validation_timer = QTimer()
-        self.validation_timer.setSingleShot(True)
-        self.validation_timer.timeout.connect(self._auto_validate)
-        
         return content_widget
 
     def _setup_styles(self):
@@ -144,22 +258,63 @@ class JSONFormatter(BaseContent):
         """)
 
     def _on_input_changed(self):
-        self.validation_timer.stop()
-        self.validation_timer.start(1000)
+        # 输入改变时清除高亮（错误位置已不再准确）
+        self._clear_highlights()
+        self.validation_timer.start()
+
+    def _on_contents_change(self, position, removed, added):
+        """记录编辑的范围，下一次校验只重新检查这附近"""
+        if removed or added:
+            self._pending_edit = merge_edits(self._pending_edit, text_edit(position, removed, added))
+
+    def _on_validation_timeout(self):
+        self._auto_validate()
 
     def _auto_validate(self):
-        text = self.input_text.toPlainText().strip()
-        # 输入改变时清除高亮
-        self._clear_highlights()
-        
-        if text:
-            try:
-                json.loads(text)
-                self._update_status("✅ JSON格式正确", "success")
-            except json.JSONDecodeError as e:
-                self._update_status(f"❌ JSON格式错误: {str(e)}", "error")
-        else:
+        """在后台校验输入；上一次校验还在进行时先取消它，结束后再开始"""
+        text = self.input_text.toPlainText()
+        if not text.strip():
             self._update_status("准备就绪", "normal")
+            return
+        if self.validate_thread is not None:
+            self.validate_thread.stop()
+            self._validation_queued = True
+            return
+        # 编辑的位置以 UTF-16 计，文本中有 BMP 之外的字符时与字符串下标不一致，只能重新校验全文
+        full = self._needs_full_validation or (not text.isascii() and _ASTRAL.search(text) is not None)
+        self._running_edit, self._pending_edit = self._pending_edit, None
+        self._needs_full_validation = False
+        thread = JsonValidateThread(self.json_validator, text, None if full else self._running_edit)
+        thread.validation_finished.connect(self._validation_finished)
+        thread.finished.connect(lambda thread=thread: self._end_validate_thread(thread))
+        self.validate_thread = thread
+        thread.start()
+
+    def _validation_finished(self, result):
+        thread = self.validate_thread
+        if thread is None or thread.stopped or self.input_text.toPlainText() != thread.text:
+            # 校验期间文本又改变了：结果已过时，等待下一次校验
+            return
+        if result is None:
+            self._update_status("✅ JSON格式正确", "success")
+        else:
+            self._update_status(f"❌ JSON格式错误: {result}", "error")
+            self._highlight_error_position(result.pos, thread.text, move_cursor=False)
+
+    def _end_validate_thread(self, thread):
+        thread.wait()
+        thread.deleteLater()
+        if self.validate_thread is not thread:
+            return
+        self.validate_thread = None
+        if not thread.completed:
+            # 被取消的校验没有保存结果：它所基于的编辑并入之后的编辑
+            self._pending_edit = merge_edits(self._running_edit, self._pending_edit)
+            self._needs_full_validation = self._needs_full_validation or thread.edit is None
+        self._running_edit = None
+        if self._validation_queued:
+            self._validation_queued = False
+            self._auto_validate()
     
     def _convert_to_entity(self):
         input_text = self.input_text.toPlainText().strip()
@@ -203,7 +358,7 @@ class JSONFormatter(BaseContent):
         else:
             entity_code = "// 不支持的语言"
 
-        self.output_text.setPlainText(entity_code)
+        self._set_output(entity_code)
         self._update_status(f"✅ 成功转换为 {language} 实体", "success")
 
     
@@ -523,7 +678,7 @@ class JSONFormatter(BaseContent):
         try:
             parsed_json = json.loads(input_text)
             formatted_json = json.dumps(parsed_json, indent=2, ensure_ascii=False, sort_keys=True)
-            self.output_text.setPlainText(formatted_json)
+            self._set_output(formatted_json)
             self._update_status("✅ JSON格式化成功", "success")
 
         except json.JSONDecodeError as e:
@@ -545,7 +700,7 @@ class JSONFormatter(BaseContent):
         try:
             parsed_json = json.loads(input_text)
             minified_json = json.dumps(parsed_json, separators=(',', ':'), ensure_ascii=False)
-            self.output_text.setPlainText(minified_json)
+            self._set_output(minified_json)
             self._update_status("✅ JSON压缩成功", "success")
 
         except json.JSONDecodeError as e:
@@ -567,209 +722,60 @@ class JSONFormatter(BaseContent):
         try:
             parsed_json = json.loads(input_text)
             json_info = self._analyze_json(parsed_json)
-            self.output_text.setPlainText(json_info)
+            self._set_output(json_info)
             self._update_status("✅ JSON验证通过", "success")
 
         except json.JSONDecodeError as e:
-            print(f"JSON验证失败: {str(e)}")  # 调试信息
-            
-            # 先添加一个强制高亮测试
-            self._force_highlight_test()
-            
-            # 然后进行正常的错误高亮
             self._highlight_json_error(e, input_text)
             
             error_info = f"JSON格式错误：\n\n{str(e)}\n\n请检查以下常见问题：\n• 是否缺少引号\n• 是否有多余的逗号\n• 括号是否匹配\n• 字符串是否正确转义"
-            self.output_text.setPlainText(error_info)
+            self._set_output(error_info)
             self._update_status(f"❌ JSON验证失败: {str(e)}", "error")
 
-    def _force_highlight_test(self):
-        """强制高亮测试 - 确保高亮功能工作"""
-        text = self.input_text.toPlainText()
-        if not text:
-            return
-            
-        cursor = self.input_text.textCursor()
-        
-        # 强制高亮前10个字符
-        cursor.setPosition(0)
-        cursor.setPosition(min(10, len(text)), QTextCursor.KeepAnchor)
-        
-        # 使用非常明显的格式
-        highlight_format = QTextCharFormat()
-        highlight_format.setBackground(QColor("red"))
-        # highlight_format.setForeground(QColor("white"))
-        highlight_format.setFontWeight(900)  # 超粗
-        highlight_format.setFontPointSize(16)  # 大字体
-        
-        cursor.setCharFormat(highlight_format)
-        cursor.clearSelection()
-        
-        # 强制刷新
-        self.input_text.update()
-        self.input_text.repaint()
-        
-        print("强制高亮测试已执行")  # 调试信息
-
     def _clear_highlights(self):
-        """清除输入框中的所有高亮"""
-        cursor = self.input_text.textCursor()
-        cursor.select(QTextCursor.Document)
-        
-        # 创建默认格式
-        default_format = QTextCharFormat()
-        # default_format.setBackground(QColor("white"))  # 明确设置背景色
-        default_format.setForeground(QColor("#2d3748"))  # 默认文字颜色
-        default_format.setFontWeight(400)  # 正常字重
-        
-        cursor.setCharFormat(default_format)
-        cursor.clearSelection()
-        
-        # 刷新显示
-        self.input_text.update()
+        """清除输入框中的错误高亮（高亮以 ExtraSelection 显示，不修改文档的字符格式）"""
+        self.input_text.setExtraSelections([])
 
     def _highlight_json_error(self, error, text):
-        """高亮显示JSON错误位置"""
-        try:
-            # 从错误信息中提取位置信息
-            error_msg = str(error)
-            print(f"JSON错误信息: {error_msg}")  # 调试信息
-            
-            highlighted = False
-            
-            # 尝试从错误信息中提取行号和列号
-            line_col_match = re.search(r'line (\d+) column (\d+)', error_msg)
-            if line_col_match:
-                line_num = int(line_col_match.group(1))
-                col_num = int(line_col_match.group(2))
-                print(f"找到错误位置: 行{line_num}, 列{col_num}")  # 调试信息
-                
-                # 转换为字符位置
-                lines = text.split('\n')
-                char_pos = 0
-                for i in range(line_num - 1):
-                    if i < len(lines):
-                        char_pos += len(lines[i]) + 1  # +1 for newline
-                char_pos += col_num - 1
-                
-                print(f"字符位置: {char_pos}")  # 调试信息
-                # 高亮错误位置及周围几个字符
-                self._highlight_position(char_pos, max(1, min(5, len(text) - char_pos)), 
-                                       QColor("#ff4444"), QColor("#ffe6e6"))
-                highlighted = True
-                
-            # 尝试从错误信息中提取字符位置
-            elif 'char' in error_msg.lower():
-                char_match = re.search(r'char (\d+)', error_msg)
-                if char_match:
-                    char_pos = int(char_match.group(1))
-                    print(f"找到字符位置: {char_pos}")  # 调试信息
-                    self._highlight_position(char_pos, max(1, min(5, len(text) - char_pos)), 
-                                           QColor("#ff4444"), QColor("#ffe6e6"))
-                    highlighted = True
-            
-            # 如果无法确定具体位置，尝试高亮常见错误模式
-            if not highlighted:
-                print("使用通用错误模式高亮")  # 调试信息
-                self._highlight_common_errors(text, error_msg)
-                
-        except Exception as e:
-            print(f"高亮错误时出现异常: {e}")
-            # 至少高亮第一个字符作为fallback
-            if text:
-                self._highlight_position(0, 1, QColor("#ff4444"), QColor("#ffe6e6"))
+        """高亮显示JSON错误位置；text 为去掉首尾空白后解析的文本"""
+        full_text = self.input_text.toPlainText()
+        offset = len(full_text) - len(full_text.lstrip())
+        self._highlight_error_position(error.pos + offset, full_text)
 
-    def _highlight_position(self, start_pos, length, text_color, bg_color):
-        """在指定位置高亮文本"""
-        if start_pos < 0 or start_pos >= len(self.input_text.toPlainText()):
+    def _highlight_error_position(self, pos, text, move_cursor=True):
+        """高亮 text 中第 pos 个字符起的几个字符；错误在文本末尾时高亮最后一个字符"""
+        if not text:
             return
-            
-        cursor = self.input_text.textCursor()
-        
-        # 确保位置和长度有效
-        text_length = len(self.input_text.toPlainText())
-        if start_pos + length > text_length:
-            length = text_length - start_pos
-            
+        pos = max(0, min(pos, len(text) - 1))
+        end = min(pos + 5, len(text))
+        # Python 字符串下标转换为 Qt 的 UTF-16 位置
+        if not text.isascii():
+            pos, end = (index + len(_ASTRAL.findall(text, 0, index)) for index in (pos, end))
+        self._highlight_position(pos, end - pos, move_cursor)
+
+    def _highlight_position(self, start_pos, length, move_cursor=True):
+        """在指定位置高亮文本"""
+        cursor = QTextCursor(self.input_text.document())
         cursor.setPosition(start_pos)
         cursor.setPosition(start_pos + length, QTextCursor.KeepAnchor)
-        
-        # 设置高亮格式 - 使用更明显的颜色
+
         highlight_format = QTextCharFormat()
         highlight_format.setBackground(QColor(255, 200, 200))  # 明显的红色背景
         highlight_format.setForeground(QColor(180, 0, 0))     # 深红色文字
         highlight_format.setFontWeight(700)  # 加粗
         highlight_format.setUnderlineStyle(QTextCharFormat.WaveUnderline)  # 波浪下划线
         highlight_format.setUnderlineColor(QColor(255, 0, 0))  # 红色下划线
-        
-        cursor.setCharFormat(highlight_format)
-        
-        # 将光标移动到错误位置并显示
-        cursor.setPosition(start_pos)
-        self.input_text.setTextCursor(cursor)
-        self.input_text.ensureCursorVisible()  # 确保错误位置可见
-        
-        # 强制刷新显示
-        self.input_text.update()
 
-    def _highlight_common_errors(self, text, error_msg):
-        """高亮常见的JSON错误模式"""
-        cursor = self.input_text.textCursor()
-        found_error = False
-        
-        # 错误格式设置 - 使用更明显的颜色
-        error_format = QTextCharFormat()
-        error_format.setBackground(QColor(255, 200, 200))  # 明显的红色背景
-        error_format.setForeground(QColor(180, 0, 0))      # 深红色文字
-        error_format.setFontWeight(700)
-        error_format.setUnderlineStyle(QTextCharFormat.WaveUnderline)
-        error_format.setUnderlineColor(QColor(255, 0, 0))
-        
-        warning_format = QTextCharFormat()
-        warning_format.setBackground(QColor(255, 255, 200))  # 明显的黄色背景
-        warning_format.setForeground(QColor(180, 120, 0))    # 橙色文字
-        warning_format.setFontWeight(700)
-        
-        # 检查常见错误模式
-        error_patterns = [
-            (r'[,\]\}]\s*[,\]\}]', "多余的逗号"),      # 多余逗号
-            (r'[{\[]\s*,', "开头的逗号"),              # 开头逗号
-            (r'(?<!")(\w+)(?=\s*:)', "未加引号的键"),   # 未加引号的键
-            (r"'([^']*)'(?=\s*:)", "单引号键名"),       # 单引号键名
-            (r':\s*([^",\[\{\s\d\-][^,\]\}]*?)(?=[,\]\}])', "未加引号的字符串值"),  # 未加引号的值
-            (r'[{\[,]\s*[}\]]', "空结构错误"),          # 空对象/数组后直接逗号
-            (r'(?<!\\)"[^"]*\n[^"]*"', "跨行字符串"),   # 跨行字符串
-        ]
-        
-        print(f"开始检查错误模式...")  # 调试信息
-        
-        for pattern, error_type in error_patterns:
-            matches = list(re.finditer(pattern, text))
-            print(f"模式 '{error_type}' 找到 {len(matches)} 个匹配")  # 调试信息
-            
-            for match in matches:
-                start_pos = match.start()
-                end_pos = match.end()
-                print(f"高亮位置: {start_pos}-{end_pos}, 内容: '{text[start_pos:end_pos]}'")  # 调试信息
-                
-                cursor.setPosition(start_pos)
-                cursor.setPosition(end_pos, QTextCursor.KeepAnchor)
-                cursor.setCharFormat(error_format if "逗号" in error_type else warning_format)
-                found_error = True
-        
-        if found_error:
-            # 刷新显示
-            self.input_text.update()
-            # 移动光标到第一个错误位置
-            cursor.setPosition(0)
+        selection = QTextEdit.ExtraSelection()
+        selection.cursor = cursor
+        selection.format = highlight_format
+        self.input_text.setExtraSelections([selection])
+
+        if move_cursor:
+            # 将光标移动到错误位置并显示
+            cursor.setPosition(start_pos)
             self.input_text.setTextCursor(cursor)
-        else:
-            print("未找到匹配的错误模式，高亮整个文本开头")  # 调试信息
-            # 如果找不到具体错误，高亮前几个字符
-            if text:
-                cursor.setPosition(0)
-                cursor.setPosition(min(10, len(text)), QTextCursor.KeepAnchor)
-                cursor.setCharFormat(error_format)
+            self.input_text.ensureCursorVisible()
 
     def _analyze_json(self, json_obj):
         info_lines = ["JSON验证通过 ✅\n"]
@@ -805,7 +811,90 @@ class JSONFormatter(BaseContent):
 
         return "\n".join(info_lines)
 
+    def _set_output(self, text):
+        """在右侧显示文本结果（替换树形视图）"""
+        self.output_stack.setCurrentWidget(self.output_text)
+        self.output_text.setPlainText(text)
+
+    # -------------- 大文件树形视图 --------------
+    def _open_json_file(self):
+        """选择 JSON 文件，在后台建立索引后以树形视图显示"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "打开 JSON 文件", "", "JSON 文件 (*.json *.geojson);;所有文件 (*.*)")
+        if not file_path:
+            return
+        self._close_json_file()
+        try:
+            index = JsonIndex(file_path)
+        except (OSError, ValueError) as e:
+            self._show_message(f"无法读取文件 {file_path}:\n{e}", "error")
+            return
+        thread = JsonIndexThread(index)
+        thread.progress_updated.connect(self._update_index_progress)
+        thread.index_ready.connect(self._json_index_ready)
+        thread.index_failed.connect(self._json_index_failed)
+        thread.finished.connect(lambda thread=thread: self._end_index_thread(thread))
+        self.index_thread = thread
+        self.open_file_btn.setEnabled(False)
+        self._update_status(f"正在索引 {os.path.basename(file_path)}（{format_size(index.size)}）...", "normal")
+        thread.start()
+
+    def _index_active(self):
+        """停止后线程中已排队的信号不再处理"""
+        return self.index_thread is not None and not self.index_thread.stopped
+
+    def _update_index_progress(self, percent):
+        if self._index_active():
+            self._update_status(f"正在索引 {os.path.basename(self.index_thread.index.path)}... {percent}%", "normal")
+
+    def _json_index_ready(self, index, root):
+        if not self._index_active() or index is not self.index_thread.index:
+            return
+        self.json_index = index
+        self.json_model.set_index(index, root)
+        self.output_stack.setCurrentWidget(self.json_tree)
+        self._update_status(f"✅ 已打开 {os.path.basename(index.path)}（{format_size(index.size)}，"
+                            f"{index.container_count} 个对象/数组），展开节点时读取内容", "success")
+        # 展开根节点时发现的语法错误会覆盖上面的状态
+        self.json_tree.expand(self.json_model.index(0, 0))
+
+    def _json_index_failed(self, message):
+        if not self._index_active():
+            return
+        self._show_message(f"JSON格式错误：{message}", "error")
+        self._update_status(f"❌ 无法打开文件: {message}", "error")
+
+    def _end_index_thread(self, thread):
+        thread.wait()
+        thread.deleteLater()
+        if thread.index is not self.json_index:
+            thread.index.close()
+        if self.index_thread is thread:
+            self.index_thread = None
+            self.open_file_btn.setEnabled(True)
+
+    def _tree_parse_failed(self, e):
+        line, column = self.json_index.line_col(e.pos)
+        self._update_status(f"❌ JSON格式错误: {e.message}（第 {line} 行第 {column} 列），该节点之后的内容无法显示", "error")
+
+    def _on_tree_current_changed(self, current, previous):
+        if current.isValid():
+            entry = self.json_model.entry(current)
+            self._update_status(f"{self.json_model.path(current)}  ·  {format_size(entry.end - entry.start)}", "normal")
+
+    def _close_json_file(self):
+        """关闭树形视图打开的文件（正在建立的索引一并停止）"""
+        if self.index_thread is not None:
+            self.index_thread.stop()
+            self.index_thread = None
+            self.open_file_btn.setEnabled(True)
+        self.json_model.set_index(None)
+        if self.json_index is not None:
+            self.json_index.close()
+            self.json_index = None
+        self.output_stack.setCurrentWidget(self.output_text)
+
     def _clear_all(self):
+        self._close_json_file()
         self.input_text.clear()
         self.output_text.clear()
         self._update_status("已清空所有内容", "normal")
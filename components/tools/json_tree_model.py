@@ -0,0 +1,153 @@
+"""
+大 JSON 文件的树形模型
+节点按需读取：展开时通过 canFetchMore / fetchMore 每次从 JsonIndex 读取一批直接子项，
+只为已经显示过的节点创建条目，打开文件的开销只有索引本身
+"""
+
+from PySide6.QtCore import Qt, QAbstractItemModel, QModelIndex, Signal
+from PySide6.QtGui import QColor
+
+from utils.jsonstream import JsonIndexError, FETCH_BATCH
+
+# 各类型的显示名称与值的文字颜色
+KIND_NAMES = {
+    'object': "对象", 'array': "数组", 'string': "字符串", 'number': "数字", 'boolean': "布尔值", 'null': "null",
+}
+KIND_COLORS = {
+    'string': QColor("#2e7d32"), 'number': QColor("#1565c0"), 'boolean': QColor("#ef6c00"),
+    'null': QColor("#9e9e9e"), 'object': QColor("#757575"), 'array': QColor("#757575"),
+}
+
+
+class JsonTreeItem:
+    """已读取的节点；cursor 不为 None 时还有子项未读取"""
+
+    __slots__ = ('parent', 'row', 'entry', 'children', 'cursor')
+
+    def __init__(self, parent, row, entry, cursor):
+        self.parent = parent
+        self.row = row
+        self.entry = entry
+        self.children = []
+        self.cursor = cursor
+
+
+class JsonTreeModel(QAbstractItemModel):
+    """JSON 文档的树（键 / 类型 / 值），子项在展开时按批读取"""
+
+    HEADERS = ["键", "类型", "值"]
+    parse_failed = Signal(object)  # JsonIndexError：展开节点时发现语法错误
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._index = None
+        self._root = JsonTreeItem(None, 0, None, None)
+
+    def set_index(self, index, root_entry=None):
+        """显示 index 的文档（root_entry 为其根值）；index 为 None 时清空"""
+        self.beginResetModel()
+        self._index = index
+        self._root = JsonTreeItem(None, 0, None, None)
+        if index is not None:
+            self._root.children.append(self._make_item(self._root, 0, root_entry))
+        self.endResetModel()
+
+    def _make_item(self, parent, row, entry):
+        cursor = self._index.first_cursor(entry.node) if entry.node >= 0 else None
+        return JsonTreeItem(parent, row, entry, cursor)
+
+    def _item(self, index):
+        return index.internalPointer() if index.isValid() else self._root
+
+    # -------------- 树结构 --------------
+    def index(self, row, column, parent=QModelIndex()):
+        item = self._item(parent)
+        if row < 0 or row >= len(item.children) or column < 0 or column >= len(self.HEADERS):
+            return QModelIndex()
+        return self.createIndex(row, column, item.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._item(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        item = self._item(parent)
+        return bool(item.children) or item.cursor is not None
+
+    def canFetchMore(self, parent):
+        return self._item(parent).cursor is not None
+
+    def fetchMore(self, parent):
+        """读取下一批子项"""
+        item = self._item(parent)
+        if item.cursor is None:
+            return
+        try:
+            entries, item.cursor = self._index.children(item.entry.node, item.cursor, FETCH_BATCH)
+        except JsonIndexError as e:
+            item.cursor = None
+            self.parse_failed.emit(e)
+            return
+        if not entries:
+            return
+        first = len(item.children)
+        self.beginInsertRows(parent, first, first + len(entries) - 1)
+        item.children.extend(self._make_item(item, first + offset, entry) for offset, entry in enumerate(entries))
+        self.endInsertRows()
+
+    # -------------- 数据 --------------
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = index.internalPointer()
+        entry = item.entry
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                if item.parent is self._root:
+                    return "根"
+                return f"[{entry.key}]" if isinstance(entry.key, int) else entry.key
+            if column == 1:
+                return KIND_NAMES[entry.kind]
+            return self._index.preview(entry)
+        if role == Qt.ForegroundRole and column == 2:
+            return KIND_COLORS[entry.kind]
+        if role == Qt.ToolTipRole:
+            return self.path(index)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def entry(self, index):
+        """index 对应的 JsonEntry"""
+        return self._item(index).entry
+
+    def path(self, index):
+        """节点的 JSONPath，例如 $.data[3].name"""
+        parts = []
+        item = self._item(index)
+        while item is not None and item.parent is not self._root and item.entry is not None:
+            key = item.entry.key
+            if isinstance(key, int):
+                parts.append(f"[{key}]")
+            elif key.isidentifier():
+                parts.append(f".{key}")
+            else:
+                parts.append("['" + key.replace("\\", "\\\\").replace("'", "\\'") + "']")
+            item = item.parent
+        return "$" + "".join(reversed(parts))
@@ -1,5 +1,10 @@
+# 启动性能分析（--profile-startup 或 KIWIKIT_PROFILE_STARTUP=true），必须先于其它导入启用
+from utils.startup_profiler import startup_profiler
+startup_profiler.install_if_enabled()
+
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout
 from PySide6.QtGui import QIcon
+from PySide6.QtCore import QTimer
 from components.header import Header
 from components.nav_primary import NavPrimary
 from components.nav_secondary import NavSecondary
@@ -25,6 +30,7 @@ class MainWindow(QMainWindow):
     def __init__(self):
         try:
             super().__init__()
+            self._first_paint_done = False
             
             # 获取并记录设备唯一码
             try:
@@ -62,6 +68,7 @@ class MainWindow(QMainWindow):
             log_system_event("窗口初始化失败", f"错误: {e}")
             raise
     
+    @startup_profiler.profile_phase
     def _initialize_components(self):
         """初始化主要组件并记录加载状态"""
         try:
@@ -102,6 +109,7 @@ class MainWindow(QMainWindow):
             log_system_event("组件初始化失败", f"错误: {e}")
             raise
     
+    @startup_profiler.profile_phase
     def _setup_layout(self):
         """设置布局"""
         try:
@@ -130,6 +138,7 @@ class MainWindow(QMainWindow):
             log_system_event("布局设置失败", f"错误: {e}")
             raise
     
+    @startup_profiler.profile_phase
     def _connect_signals(self):
         """连接组件间的信号"""
         try:
@@ -158,6 +167,7 @@ class MainWindow(QMainWindow):
             log_system_event("信号连接失败", f"错误: {e}")
             raise
     
+    @startup_profiler.profile_phase
     def _init_navigation(self):
         """初始化导航状态 - 程序启动时自动跳转到首页"""
         try:
@@ -173,6 +183,24 @@ class MainWindow(QMainWindow):
             error(f"导航初始化失败: {e}")
             log_system_event("导航初始化失败", f"错误: {e}")
     
+    def paintEvent(self, event):
+        """首帧绘制完成后再启动页面预热，避免与启动争抢UI线程"""
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            startup_profiler.mark("first_paint")
+            QTimer.singleShot(0, self._on_first_paint)
+    
+    def _on_first_paint(self):
+        """首帧绘制完成"""
+        info("主窗口首帧绘制完成")
+        if startup_profiler.enabled:
+            # 首帧之后的导入（页面预热）不计入启动耗时
+            startup_profiler.uninstall()
+            startup_profiler.add_section("pages", self.content_area.get_startup_report())
+            startup_profiler.write_report()
+        self.content_area.start_prewarm()
+    
     def _on_tool_selected(self, tool_name):
         """工具选择处理"""
         try:
@@ -241,6 +269,7 @@ class MainWindow(QMainWindow):
         except Exception as e:
             error(f"刷新子组件时出错: {e}")
     
+    @startup_profiler.profile_phase
     def _start_background_services(self):
         """启动后台服务"""
         try:
@@ -322,6 +351,7 @@ if __name__ == "__main__":
         GlobalLogger.setup_exception_handling()
         
         app = QApplication(sys.argv)
+        startup_profiler.mark("qapplication_created")
         
         # 获取并记录设备唯一码和系统信息
         try:
@@ -351,7 +381,9 @@ if __name__ == "__main__":
         
         try:
             window = MainWindow()
+            startup_profiler.mark("main_window_created")
             window.show()
+            startup_profiler.mark("main_window_shown")
             info("主窗口显示成功")
             
             # 运行应用
@@ -363,6 +395,10 @@ if __name__ == "__main__":
             critical(f"应用程序启动失败: {e}")
             return 1
     
+    # 打包后的程序中，文件搜索的进程池子进程需要在这里分流
+    import multiprocessing
+    multiprocessing.freeze_support()
+    
     # 启动应用程序
     sys.exit(main())
 
@@ -0,0 +1,63 @@
+"""utils.search.content：分块扫描文件内容"""
+
+from utils.search.content import ContentMatcher, LineHitCollector, scan_file
+
+
+def _scan(path, pattern, **kwargs):
+    return scan_file(str(path), ContentMatcher(pattern, is_regex=True), **kwargs)[0]
+
+
+def test_anchors_match_lines_not_chunks(tmp_path):
+    body = 'x' * 8191 + '\n' + 'abc\n'
+    for prefix in ('', 'y\n'):
+        path = tmp_path / 'a.txt'
+        path.write_text(prefix + body)
+        assert _scan(path, '^abc$')
+        assert not _scan(path, '^bc')
+        assert not _scan(path, 'x$x')
+
+
+def test_anchors_in_decoded_text(tmp_path):
+    path = tmp_path / 'b.txt'
+    path.write_bytes(('中文\n' * 3000 + 'abc\n').encode('gb18030'))
+    assert _scan(path, '^abc')
+    assert not _scan(path, '^文')
+
+
+def test_line_hits_with_anchors(tmp_path):
+    path = tmp_path / 'c.txt'
+    path.write_text('y\n' + 'x' * 8191 + '\nabc\nzabc\n')
+    hits = LineHitCollector(context=0)
+    assert _scan(path, '^abc', hits=hits)
+    assert [hit.line for hit in hits.hits] == [3]
+
+
+def test_regex_counts_characters_not_bytes(tmp_path):
+    path = tmp_path / 'd.txt'
+    path.write_text('乙\n', encoding='utf-8')
+    assert not scan_file(str(path), ContentMatcher('[甲中]', case_sensitive=True, is_regex=True))[0]
+    assert _scan(path, '^.$')
+    assert not _scan(path, '^.{3}$')
+
+    path.write_text('a中b\n', encoding='utf-8')
+    assert _scan(path, 'a.b')
+    assert _scan(path, '^.{3}$')
+    assert _scan(path, r'a\wb')
+    assert not _scan(path, r'a\Wb')
+
+
+def test_bytes_regex_only_for_equivalent_patterns():
+    assert ContentMatcher('中文', case_sensitive=True).bytes_regex is not None
+    assert ContentMatcher(('foo', 'bar')).bytes_regex is not None
+    for pattern in (r'^foo(?:bar|baz)+$', '[a-c]x?', 'ab{2,3}'):
+        assert ContentMatcher(pattern, is_regex=True).bytes_regex is not None
+    for pattern in ('a.b', '[^a]c', r'[\w]', r'\d+', r'\bfoo', '中+'):
+        assert ContentMatcher(pattern, case_sensitive=True, is_regex=True).bytes_regex is None
+
+
+def test_line_hit_columns_with_decoded_regex(tmp_path):
+    path = tmp_path / 'e.txt'
+    path.write_text('中文 a中b\n', encoding='utf-8')
+    hits = LineHitCollector(context=0)
+    assert _scan(path, 'a.b', hits=hits)
+    assert [(hit.line, hit.column) for hit in hits.hits] == [(1, 4)]
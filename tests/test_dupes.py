@@ -0,0 +1,35 @@
+"""utils.search.dupes：重复文件查找"""
+
+import os
+
+from utils.search import SearchOptions, DuplicateFinder
+
+
+def _find(tmp_path, root):
+    finder = DuplicateFinder(SearchOptions(str(root), "", mode='duplicates', processes=1),
+                             cache_path=str(tmp_path / 'hash_cache.sqlite'))
+    return finder, finder.find()
+
+
+def test_hard_links_are_not_duplicates(tmp_path):
+    root = tmp_path / 'root'
+    root.mkdir()
+    (root / 'a.txt').write_text('same content\n')
+    os.link(root / 'a.txt', root / 'b.txt')
+    (root / 'c.txt').write_text('other content\n')
+
+    finder, groups = _find(tmp_path, root)
+    assert groups == []
+    assert finder.wasted_bytes == 0
+
+
+def test_hard_links_collapse_within_a_group(tmp_path):
+    root = tmp_path / 'root'
+    root.mkdir()
+    for name in ('a.txt', 'c.txt'):
+        (root / name).write_text('same content\n')
+    os.link(root / 'a.txt', root / 'b.txt')
+
+    finder, groups = _find(tmp_path, root)
+    assert [[entry.name for entry in group.entries] for group in groups] == [['a.txt', 'c.txt']]
+    assert finder.wasted_bytes == len('same content\n')
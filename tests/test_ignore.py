@@ -0,0 +1,40 @@
+"""utils.search.ignore：通配符组与 ignore 文件的匹配"""
+
+from utils.search.ignore import DEFAULT_EXCLUDES, GlobSet, IgnoreFile
+
+
+def test_globset_anchors_every_pattern():
+    excludes = GlobSet(DEFAULT_EXCLUDES, case_sensitive=True)
+    for name in ('.git', 'venv', 'node_modules', 'build'):
+        assert excludes.match(name, name, is_dir=True)
+    for name in ('.github', '.gitlab', 'builder', 'venv2', 'node_modules_x'):
+        assert not excludes.match(name, name, is_dir=True)
+
+
+def test_globset_name_and_path_patterns():
+    includes = GlobSet(['*.py', '*.txt', 'docs/build'], case_sensitive=True)
+    assert includes.match('a.py', 'src/a.py', is_dir=False)
+    assert includes.match('b.txt', 'b.txt', is_dir=False)
+    assert not includes.match('a.pyc', 'src/a.pyc', is_dir=False)
+    assert not includes.match('b.txt.bak', 'b.txt.bak', is_dir=False)
+    assert includes.match('build', 'docs/build', is_dir=True)
+    assert not includes.match('builds', 'docs/builds', is_dir=True)
+
+
+def test_ignore_file_anchors_every_rule():
+    ignore = IgnoreFile(['*.log', '[bc]', 'out/'])
+    assert ignore.decide('app.log', is_dir=False)
+    assert ignore.decide('sub/b', is_dir=False)
+    assert ignore.decide('out', is_dir=True)
+    assert ignore.decide('app.logger.py', is_dir=False) is None
+    assert ignore.decide('build', is_dir=True) is None
+    assert ignore.decide('c.log', is_dir=False)  # 由 *.log 忽略
+    assert ignore.decide('c.txt', is_dir=False) is None
+    assert ignore.decide('output', is_dir=True) is None
+
+
+def test_ignore_file_negation():
+    ignore = IgnoreFile(['*.log', '!keep.log'])
+    assert ignore.decide('a.log', is_dir=False)
+    assert ignore.decide('keep.log', is_dir=False) is False
+    assert ignore.decide('keep.log.txt', is_dir=False) is None
@@ -0,0 +1,45 @@
+"""utils.diff.merge：三方合并的分组与结果"""
+
+import random
+
+from utils.diff.merge import merge3, merge_pieces
+
+
+def _merged(base, left, right):
+    chunks = merge3(base, left, right)
+    versions = {'base': base, 'left': left, 'right': right}
+    lines = []
+    for piece in merge_pieces(chunks):
+        lines.extend(versions[piece.side][piece.start:piece.end] if piece.side else [piece.text])
+    return chunks, lines
+
+
+def test_touching_changes_are_grouped():
+    base = ['l8', 'l0', 'l6', 'l6']
+    chunks, lines = _merged(base, ['l8', 'n2', 'l0', 'l6'], ['l8', 'l0', 'l6'])
+    assert all(chunk.kind != 'conflict' for chunk in chunks)
+    assert lines == ['l8', 'n2', 'l0', 'l6']
+
+
+def test_touching_different_changes_conflict():
+    base = ['a', 'b', 'c', 'd']
+    chunks, _ = _merged(base, ['a', 'B', 'c', 'd'], ['a', 'b', 'C', 'd'])
+    assert [chunk.kind for chunk in chunks] == ['same', 'conflict', 'same']
+
+
+def test_separated_changes_merge_cleanly():
+    base = ['a', 'b', 'c', 'd', 'e']
+    chunks, lines = _merged(base, ['A', 'b', 'c', 'd', 'e'], ['a', 'b', 'c', 'd', 'E'])
+    assert [chunk.kind for chunk in chunks] == ['left', 'same', 'right']
+    assert lines == ['A', 'b', 'c', 'd', 'E']
+
+
+def test_one_sided_and_identical_changes():
+    rnd = random.Random(7)
+    for _ in range(300):
+        base = [rnd.choice('abcd') for _ in range(rnd.randint(0, 8))]
+        other = [rnd.choice('abcde') for _ in range(rnd.randint(0, 8))]
+        for left, right in ((other, base), (base, other), (other, other)):
+            chunks, lines = _merged(base, left, right)
+            assert all(chunk.kind != 'conflict' for chunk in chunks)
+            assert lines == other
@@ -0,0 +1,106 @@
+"""utils.search.replace：批量替换与撤销"""
+
+import os
+
+import pytest
+
+from utils.search.replace import ReplaceSpec, ReplaceEngine, ReplaceJournal, stage_files
+
+
+def _apply(tmp_path, paths, find='old', replace='new'):
+    engine = ReplaceEngine(ReplaceSpec(find, replace), [str(path) for path in paths],
+                           journal_path=str(tmp_path / 'journal.db'))
+    return engine.apply()
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason="需要符号链接")
+def test_symlink_replaces_target(tmp_path):
+    target = tmp_path / 'target.txt'
+    target.write_text('old value\n')
+    link = tmp_path / 'link.txt'
+    os.symlink(target, link)
+
+    result = _apply(tmp_path, [link])
+    assert result.modified == [(str(link), 1)]
+    assert link.is_symlink()
+    assert target.read_text() == 'new value\n'
+
+    journal = ReplaceJournal(str(tmp_path / 'journal.db'))
+    try:
+        restored, conflicts = journal.rollback()
+    finally:
+        journal.close()
+    assert restored == [str(link)] and not conflicts
+    assert link.is_symlink()
+    assert target.read_text() == 'old value\n'
+
+
+def test_hard_linked_file_is_skipped(tmp_path):
+    original = tmp_path / 'a.txt'
+    original.write_text('old value\n')
+    os.link(original, tmp_path / 'b.txt')
+
+    result = _apply(tmp_path, [original])
+    assert not result.modified
+    assert [path for path, _ in result.failures] == [str(original)]
+    assert (tmp_path / 'b.txt').read_text() == 'old value\n'
+    assert os.stat(original).st_nlink == 2
+
+
+def _rollback(tmp_path, **kwargs):
+    journal = ReplaceJournal(str(tmp_path / 'journal.db'))
+    try:
+        return journal.rollback(**kwargs)
+    finally:
+        journal.close()
+
+
+def test_conflicts_stay_in_journal(tmp_path):
+    a, b = tmp_path / 'a.txt', tmp_path / 'b.txt'
+    a.write_text('old a\n')
+    b.write_text('old b\n')
+    assert len(_apply(tmp_path, [a, b]).modified) == 2
+    b.write_text('edited b\n')
+
+    restored, conflicts = _rollback(tmp_path)
+    assert restored == [str(a)] and [path for path, _ in conflicts] == [str(b)]
+    assert a.read_text() == 'old a\n' and b.read_text() == 'edited b\n'
+
+    # 冲突处理后（改回替换后的内容）可以再次撤销
+    b.write_text('new b\n')
+    assert _rollback(tmp_path) == ([str(b)], [])
+    assert b.read_text() == 'old b\n'
+    assert _rollback(tmp_path) is None
+
+
+def test_force_rollback(tmp_path):
+    a = tmp_path / 'a.txt'
+    a.write_text('old a\n')
+    _apply(tmp_path, [a])
+    a.write_text('edited\n')
+    assert _rollback(tmp_path)[1]
+    assert _rollback(tmp_path, force=True) == ([str(a)], [])
+    assert a.read_text() == 'old a\n'
+
+
+def test_rollback_of_interrupted_apply(tmp_path):
+    done, untouched, edited = (tmp_path / name for name in ('done.txt', 'untouched.txt', 'edited.txt'))
+    for path in (done, untouched, edited):
+        path.write_text(f'old {path.stem}\n')
+    engine = ReplaceEngine(ReplaceSpec('old', 'new'), [str(done), str(untouched), str(edited)],
+                           journal_path=str(tmp_path / 'journal.db'))
+    staged = stage_files(engine.paths, *engine.spec.args())
+    journal = ReplaceJournal(engine.journal_path)
+    try:
+        journal.begin(engine.spec, staged)  # 替换在登记日志之后中断：只替换了第一个文件
+    finally:
+        journal.close()
+    os.replace(staged[0].temp_path, str(done))
+    for item in staged[1:]:
+        os.remove(item.temp_path)
+    edited.write_text('something else\n')
+
+    restored, conflicts = _rollback(tmp_path)
+    assert sorted(restored) == sorted([str(done), str(untouched)])
+    assert [path for path, _ in conflicts] == [str(edited)]
+    assert done.read_text() == 'old done\n' and untouched.read_text() == 'old untouched\n'
@@ -0,0 +1,37 @@
+"""utils.search.textdetect：编码嗅探"""
+
+from utils.search.textdetect import MISSING, TextDetector, sniff_encoding
+
+
+def test_valid_encodings():
+    assert sniff_encoding(b"") == 'utf-8'
+    assert sniff_encoding("中文 text\n".encode('utf-8')) == 'utf-8'
+    assert sniff_encoding("中文文本\n".encode('gb18030')) == 'gb18030'
+    assert sniff_encoding("text\n".encode('utf-16-le')) == 'utf-16-le'
+
+
+def test_binary():
+    assert sniff_encoding(bytes(range(256)) * 4) is None
+    assert sniff_encoding(b"\x01\x02\x03\x04" * 100) is None
+
+
+def test_lossy_fallback():
+    latin = "café naïve résumé ÿ\n".encode('latin-1') * 50
+    log = "日志 line\n".encode('utf-8') * 500 + b"\xff\n" + "日志 line\n".encode('utf-8') * 500
+    assert sniff_encoding(latin) == 'latin-1'
+    assert sniff_encoding(log) == 'utf-8'
+    assert sniff_encoding(latin, strict=True) is None
+    assert sniff_encoding(log, strict=True) is None
+
+
+def test_cache_key_includes_device(tmp_path):
+    detector = TextDetector()
+    binary = tmp_path / 'a.dat'
+    binary.write_bytes(b"\x01\x02\x03\x04" * 100)
+    detector.remember(str(binary), 1, 42, 1.0, 400, None)
+    assert detector.cached(str(tmp_path / 'b.txt'), 2, 42, 1.0, 400) is MISSING
+    assert detector.cached(str(binary), 1, 42, 1.0, 400) is None
+
+    text = tmp_path / 'c.txt'
+    text.write_text('text\n')
+    assert detector.detect(str(text)) == 'utf-8'
@@ -0,0 +1,23 @@
+"""utils.search.walker：并行目录遍历"""
+
+import os
+
+import pytest
+
+from utils.search import walk_files
+
+
+def _walk(root):
+    return sorted(entry.rel_path.replace(os.sep, '/') for batch in walk_files(str(root)) for entry in batch)
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason="需要符号链接")
+def test_symlinks_to_directories_are_skipped(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'a.txt').write_text('a\n')
+    (tmp_path / 'b.txt').write_text('b\n')
+    os.symlink(tmp_path / 'sub', tmp_path / 'link')
+    os.symlink(tmp_path / 'b.txt', tmp_path / 'file_link')
+    os.symlink(tmp_path / 'missing', tmp_path / 'dangling')
+
+    assert _walk(tmp_path) == ['b.txt', 'dangling', 'file_link', 'sub/a.txt']
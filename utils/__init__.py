@@ -1,8 +1,27 @@
 """
 工具包
+
+子模块按需导入，导入本包（例如 utils.logger）不会提前加载网络/图片相关的 Qt 模块
 """
 
-from .http_client import HttpClient, SimpleHttpClient, http_client
-from .image_loader import ImageLoader, RoundImageLabel
+import importlib
+
+# 导出名 -> 子模块
+_LAZY_EXPORTS = {
+    'HttpClient': '.http_client',
+    'SimpleHttpClient': '.http_client',
+    'http_client': '.http_client',
+    'ImageLoader': '.image_loader',
+    'RoundImageLabel': '.image_loader',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = ['HttpClient', 'SimpleHttpClient', 'http_client', 'ImageLoader', 'RoundImageLabel']
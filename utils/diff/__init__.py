@@ -0,0 +1,38 @@
+"""
+文本差异引擎（不依赖 PySide6）
+
+- engine: 行级差异算法（行内容映射为整数编号，patience 锚点 + Myers），按位置顺序流式产出对齐视图所需的差异段
+- intraline: 行内差异（按词/空白/标点比较一对修改过的行，得到变化的字符区间）
+- lineindex: 大文件的行索引（mmap + 行偏移 + 行哈希），差异算法可以直接比较行哈希
+- merge: 三方合并（两侧分别与基础版本比较，不重叠的修改自动合并，只留下真正的冲突）
+- output: 结果文件先写入同目录的临时文件再替换目标，输入文件仍被 mmap 映射时也能安全覆盖
+- patch: 导出 unified diff / 左右对照 HTML（按差异组流式写出），解析并以模糊匹配应用补丁
+- dirdiff: 目录对比（按相对路径配对，大小/修改时间相同的文件不读取，其余在进程池中比较内容）
+
+GUI 中的 FileDiffTool 只负责显示
+"""
+
+from .engine import (
+    DiffHunk, DiffStopped, MYERS_MAX_COST, diff_lines, iter_hunks, iter_matching_blocks,
+    changed_hunks, aligned_rows, intern_lines, read_lines, split_lines
+)
+from .intraline import inline_diff, tokenize
+from .lineindex import LineIndex
+from .merge import (
+    MergeChunk, MergePiece, MERGE_KINDS, CONFLICT_CHOICES, merge3, merge_pieces, count_conflicts, write_merge
+)
+from .output import atomic_output, LineWriter
+from .patch import (
+    PatchHunk, PatchFile, HunkResult, DEFAULT_CONTEXT, MAX_FUZZ, diff_groups, iter_unified, iter_html,
+    write_unified, write_html, parse_patch, locate_hunk, apply_patch
+)
+from .dirdiff import DirDiff, DirDiffEntry, DirDiffStopped, DEFAULT_DIR_EXCLUDES
+
+__all__ = [
+    'DiffHunk', 'DiffStopped', 'MYERS_MAX_COST', 'diff_lines', 'iter_hunks', 'iter_matching_blocks',
+    'changed_hunks', 'aligned_rows', 'intern_lines', 'read_lines', 'split_lines',
+    'inline_diff', 'tokenize', 'LineIndex', 'DirDiff', 'DirDiffEntry', 'DirDiffStopped', 'DEFAULT_DIR_EXCLUDES',
+    'MergeChunk', 'MergePiece', 'MERGE_KINDS', 'CONFLICT_CHOICES', 'merge3', 'merge_pieces', 'count_conflicts',
+    'write_merge', 'atomic_output', 'LineWriter', 'PatchHunk', 'PatchFile', 'HunkResult', 'DEFAULT_CONTEXT', 'MAX_FUZZ', 'diff_groups',
+    'iter_unified', 'iter_html', 'write_unified', 'write_html', 'parse_patch', 'locate_hunk', 'apply_patch',
+]
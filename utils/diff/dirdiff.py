@@ -0,0 +1,174 @@
+"""
+目录对比（不依赖 PySide6）
+两侧目录用搜索引擎的并行遍历列出文件，按相对路径配对后逐步缩小需要读取的范围：
+1. 只在一侧存在：新增 / 删除
+2. 大小不同：内容必然不同，不读取
+3. 大小与修改时间都相同：视为相同，不读取（同 rsync 的快速检查）
+4. 其余（大小相同、修改时间不同）在进程池中逐块比较内容，遇到第一处不同即停止读取
+"""
+
+import os
+from collections import namedtuple, Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.search import walk_files, WalkRules
+from utils.search.engine import _MP_CONTEXT
+
+# 目录对比默认只排除版本库目录；build/、dist/ 等正是比较构建产物时要看的内容
+DEFAULT_DIR_EXCLUDES = ('.git/', '.svn/', '.hg/')
+READ_SIZE = 1024 * 1024
+# 每个进程池任务的文件对数 / 字节数上限；全部待比较的数据不超过一个任务时直接在当前线程比较
+TASK_FILES = 64
+TASK_BYTES = 64 * 1024 * 1024
+
+STATUSES = ('added', 'removed', 'changed', 'same')
+
+# 一个文件的对比结果：status 为 STATUSES 之一，left / right 为两侧的 FileEntry（不存在的一侧为 None）
+DirDiffEntry = namedtuple('DirDiffEntry', ['rel_path', 'status', 'left', 'right'])
+
+
+class DirDiffStopped(Exception):
+    """目录对比被调用方中止"""
+
+
+# -------------- 内容比较（在工作进程中运行） --------------
+def _same_content(left_path, right_path):
+    with open(left_path, 'rb') as left, open(right_path, 'rb') as right:
+        while True:
+            left_chunk = left.read(READ_SIZE)
+            if left_chunk != right.read(READ_SIZE):
+                return False
+            if not left_chunk:
+                return True
+
+
+def compare_contents(pairs):
+    """[(左侧路径, 右侧路径), ...] -> 内容是否相同的列表，无法读取的为 None"""
+    results = []
+    for left_path, right_path in pairs:
+        try:
+            results.append(_same_content(left_path, right_path))
+        except OSError:
+            results.append(None)
+    return results
+
+
+# -------------- 对比 --------------
+class DirDiff:
+    """比较两个目录树
+
+    Args:
+        left_root / right_root: 两侧目录
+        exclude: 排除的文件/目录通配符，默认 DEFAULT_DIR_EXCLUDES
+        should_stop: 可选，返回 True 时抛出 DirDiffStopped
+        processes: 内容比较的进程数，默认 CPU 数
+        workers: 遍历线程数
+    """
+
+    def __init__(self, left_root, right_root, exclude=None, should_stop=None, processes=None, workers=None):
+        self.left_root = os.path.abspath(left_root)
+        self.right_root = os.path.abspath(right_root)
+        self.rules = WalkRules(exclude=DEFAULT_DIR_EXCLUDES if exclude is None else exclude)
+        self.should_stop = should_stop or (lambda: False)
+        self.processes = processes
+        self.workers = workers
+        self.left_count = 0
+        self.right_count = 0
+        self.read_count = 0        # 实际读取内容比较的文件对数
+        self.counts = Counter()    # status -> 文件数
+
+    def _check(self):
+        if self.should_stop():
+            raise DirDiffStopped()
+
+    def _list(self, root, on_progress):
+        files = {}
+        for batch in walk_files(root, should_stop=self.should_stop, workers=self.workers,
+                                on_progress=on_progress, rules=self.rules):
+            for entry in batch:
+                files[entry.rel_path] = entry
+        self._check()
+        return files
+
+    def compare(self, on_progress=None, on_read_progress=None):
+        """比较两侧目录
+
+        Args:
+            on_progress: 遍历进度 on_progress(已遍历文件数)
+            on_read_progress: 内容比较进度 on_read_progress(已比较文件对数, 需比较文件对数)
+
+        Returns:
+            DirDiffEntry 列表，按相对路径排序（含相同的文件）
+        """
+        left = self._list(self.left_root, on_progress)
+        self.left_count = len(left)
+        offset = self.left_count
+        right = self._list(self.right_root, on_progress and (lambda count: on_progress(offset + count)))
+        self.right_count = len(right)
+
+        entries = []
+        unsure = []
+        for rel_path in sorted(left.keys() | right.keys()):
+            left_entry, right_entry = left.get(rel_path), right.get(rel_path)
+            if right_entry is None:
+                status = 'removed'
+            elif left_entry is None:
+                status = 'added'
+            elif left_entry.size != right_entry.size:
+                status = 'changed'
+            elif left_entry.mtime == right_entry.mtime:
+                status = 'same'
+            else:
+                status = None
+                unsure.append(len(entries))
+            entries.append(DirDiffEntry(rel_path, status, left_entry, right_entry))
+
+        same = self._compare_contents([entries[i] for i in unsure], on_read_progress)
+        for i, result in zip(unsure, same):
+            # 无法读取的文件按有差异处理
+            entries[i] = entries[i]._replace(status='same' if result else 'changed')
+        self.read_count = len(unsure)
+        self.counts = Counter(entry.status for entry in entries)
+        return entries
+
+    def _compare_contents(self, entries, on_read_progress):
+        """并行比较内容，返回与 entries 对应的结果列表"""
+        results = [None] * len(entries)
+        if not entries:
+            return results
+        tasks, task, task_bytes = [], [], 0
+        for i, entry in enumerate(entries):
+            task.append(i)
+            task_bytes += entry.left.size
+            if len(task) >= TASK_FILES or task_bytes >= TASK_BYTES:
+                tasks.append(task)
+                task, task_bytes = [], 0
+        if task:
+            tasks.append(task)
+
+        def pairs(task):
+            return [(entries[i].left.path, entries[i].right.path) for i in task]
+
+        done = 0
+        if len(tasks) == 1:
+            results = compare_contents(pairs(tasks[0]))
+            if on_read_progress:
+                on_read_progress(len(entries), len(entries))
+            return results
+
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=_MP_CONTEXT) as pool:
+            futures = {pool.submit(compare_contents, pairs(task)): task for task in tasks}
+            try:
+                for future in as_completed(futures):
+                    task = futures[future]
+                    for i, same in zip(task, future.result()):
+                        results[i] = same
+                    done += len(task)
+                    if on_read_progress:
+                        on_read_progress(done, len(entries))
+                    self._check()
+            except BaseException:
+                for pending in futures:
+                    pending.cancel()
+                raise
+        return results
@@ -0,0 +1,337 @@
+"""
+行级差异算法（不依赖 PySide6）
+1. 行内容先映射为整数编号（相同内容同一编号），之后只比较整数
+2. 去掉首尾相同的行
+3. patience：两侧都只出现一次的行作为锚点，取最长递增子序列，在锚点之间的区间递归
+4. 小区间、或区间内没有唯一行时（例如只剩空行、括号）使用 Myers O(ND) 算法，代价超过 MYERS_MAX_COST 时
+   整段视为替换，避免在几乎完全不同的大区间上退化为平方复杂度
+"""
+
+import os
+import codecs
+import bisect
+import operator
+import itertools
+from collections import namedtuple, Counter
+
+# Myers 算法在单个区间上允许的最大编辑距离
+MYERS_MAX_COST = 1000
+# 两侧行数之和不超过该值的区间直接用 Myers（结果最优；patience 在小区间上容易被偶然唯一的行误导）
+SMALL_REGION = 256
+# 读取文件时每块的字节数
+READ_CHUNK = 4 * 1024 * 1024
+
+# 比较过程中每处理多少个区间检查一次停止标志
+STOP_CHECK_STEPS = 64
+
+
+class DiffStopped(Exception):
+    """比较被调用方中止"""
+
+
+# 一段差异，行号从 0 开始、左闭右开（同 difflib 的 opcodes）
+# tag: 'equal' / 'insert' / 'delete' / 'replace'
+# row: 该段在左右对齐视图中的起始行，视图中的行数为 max(两侧行数)
+DiffHunk = namedtuple('DiffHunk', ['tag', 'left_start', 'left_end', 'right_start', 'right_end', 'row'])
+DiffHunk.left_count = property(lambda self: self.left_end - self.left_start)
+DiffHunk.right_count = property(lambda self: self.right_end - self.right_start)
+DiffHunk.rows = property(lambda self: max(self.left_end - self.left_start, self.right_end - self.right_start))
+
+
+def intern_lines(left, right):
+    """把两侧的行映射为整数编号
+
+    Returns:
+        (左侧编号列表, 右侧编号列表)
+    """
+    ids = {line: number for number, line in enumerate(dict.fromkeys(itertools.chain(left, right)))}
+    lookup = ids.__getitem__
+    return list(map(lookup, left)), list(map(lookup, right))
+
+
+# -------------- 匹配 --------------
+def _longest_increasing(values):
+    """values（互不相同）中递增的最长子序列，返回下标列表"""
+    if values == sorted(values):
+        return list(range(len(values)))
+    tails = []       # tails[k]: 长度为 k+1 的递增子序列的最小结尾值
+    tail_index = []  # 对应的下标
+    previous = [-1] * len(values)
+    for index, value in enumerate(values):
+        k = bisect.bisect_left(tails, value)
+        if k:
+            previous[index] = tail_index[k - 1]
+        if k == len(tails):
+            tails.append(value)
+            tail_index.append(index)
+        else:
+            tails[k] = value
+            tail_index[k] = index
+    result = []
+    index = tail_index[-1] if tail_index else -1
+    while index >= 0:
+        result.append(index)
+        index = previous[index]
+    result.reverse()
+    return result
+
+
+def _myers(a, alo, ahi, b, blo, bhi, max_cost):
+    """Myers 贪心算法，返回匹配块列表；编辑距离超过 max_cost 时返回 None"""
+    n, m = ahi - alo, bhi - blo
+    offset = max_cost + 1
+    v = [0] * (2 * offset + 1)
+    trace = []
+    for d in range(max_cost + 1):
+        # 第 d 轮开始前的 v[-d..d]，回溯时用来确定上一步走的方向
+        trace.append(v[offset - d:offset + d + 1])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_blocks(trace, d, n, m, alo, blo)
+    return None
+
+
+def _myers_blocks(trace, d, n, m, alo, blo):
+    """从终点回溯，收集对角线（匹配）段"""
+    blocks = []
+    x, y = n, m
+    for step in range(d, 0, -1):
+        k = x - y
+        prev_v = trace[step]
+        if k == -step or (k != step and prev_v[k - 1 + step] < prev_v[k + 1 + step]):
+            prev_x = prev_v[k + 1 + step]
+            prev_y = prev_x - k - 1
+            start_x = prev_x
+        else:
+            prev_x = prev_v[k - 1 + step]
+            prev_y = prev_x - k + 1
+            start_x = prev_x + 1
+        if x > start_x:
+            blocks.append((alo + start_x, blo + start_x - k, x - start_x))
+        x, y = prev_x, prev_y
+    if x > 0:
+        blocks.append((alo, blo, x))
+    blocks.reverse()
+    return blocks
+
+
+def _anchors(a, alo, ahi, b, blo, bhi):
+    """patience 锚点：两侧区间内都只出现一次的行，取最长的一致序列
+
+    Returns:
+        (左侧位置列表, 右侧位置列表)，两者都严格递增
+    """
+    left_counts = Counter(a[alo:ahi])
+    right_counts = Counter(b[blo:bhi])
+    right_pos = {value: j for j, value in enumerate(b[blo:bhi], blo) if right_counts[value] == 1}
+    left_pos = [i for i, value in enumerate(a[alo:ahi], alo)
+                if left_counts[value] == 1 and value in right_pos]
+    right_of = [right_pos[a[i]] for i in left_pos]
+    keep = _longest_increasing(right_of)
+    if len(keep) == len(left_pos):
+        return left_pos, right_of
+    return [left_pos[k] for k in keep], [right_of[k] for k in keep]
+
+
+def _anchor_runs(left_pos, right_pos):
+    """把锚点合并为连续的匹配块 (i, j, 长度)"""
+    count = len(left_pos)
+    # 同一块内 i - k 与 j - k 都不变（k 为锚点序号）
+    left_key = list(map(operator.sub, left_pos, range(count)))
+    right_key = list(map(operator.sub, right_pos, range(count)))
+    breaks = list(itertools.compress(range(1, count), map(
+        operator.or_, map(operator.ne, left_key[1:], left_key), map(operator.ne, right_key[1:], right_key)
+    )))
+    starts = [0] + breaks
+    ends = breaks + [count]
+    return [(left_pos[start], right_pos[start], end - start) for start, end in zip(starts, ends)]
+
+
+def matching_blocks(a, b, max_cost=MYERS_MAX_COST):
+    """两个整数序列的匹配块 (i, j, 长度) 列表，按位置排列且互不重叠"""
+    return list(iter_matching_blocks(a, b, max_cost))
+
+
+def iter_matching_blocks(a, b, max_cost=MYERS_MAX_COST, should_stop=None):
+    """按位置顺序逐个产出匹配块：前面的区间确定后立即产出，不必等整个比较完成
+
+    Args:
+        should_stop: 可选，返回 True 时抛出 DiffStopped
+    """
+    return _merge_blocks(_iter_blocks(a, b, max_cost, should_stop))
+
+
+def _iter_blocks(a, b, max_cost, should_stop):
+    # 栈中的项为待处理区间 (alo, ahi, blo, bhi) 或已确定的匹配块列表；后面的先压栈，保证输出有序
+    stack = [(0, len(a), 0, len(b))]
+    steps = 0
+    while stack:
+        steps += 1
+        if should_stop is not None and steps % STOP_CHECK_STEPS == 0 and should_stop():
+            raise DiffStopped()
+        item = stack.pop()
+        if isinstance(item, list):
+            yield from item
+            continue
+        alo, ahi, blo, bhi = item
+        # 相同的前缀与后缀
+        start = alo
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo += 1
+            blo += 1
+        if alo > start:
+            yield start, blo - (alo - start), alo - start
+        end = ahi
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+        suffix = [(ahi, bhi, end - ahi)] if end > ahi else []
+        if alo == ahi or blo == bhi:
+            yield from suffix
+            continue
+
+        small = (ahi - alo) + (bhi - blo) <= SMALL_REGION
+        anchors = None if small else _anchors(a, alo, ahi, b, blo, bhi)
+        if not anchors or not anchors[0]:
+            yield from _myers(a, alo, ahi, b, blo, bhi, max_cost) or ()
+            yield from suffix
+            continue
+
+        # 锚点合并为匹配块，块之间的区间继续递归
+        pending = []
+        prev_i, prev_j = alo, blo
+        for i, j, n in _anchor_runs(*anchors):
+            if i > prev_i or j > prev_j:
+                pending.append((prev_i, i, prev_j, j))
+            pending.append([(i, j, n)])
+            prev_i, prev_j = i + n, j + n
+        if prev_i < ahi or prev_j < bhi:
+            pending.append((prev_i, ahi, prev_j, bhi))
+        if suffix:
+            pending.append(suffix)
+        stack.extend(reversed(pending))
+
+
+def _merge_blocks(blocks):
+    """合并首尾相接的匹配块"""
+    last = None
+    for i, j, n in blocks:
+        if last is not None:
+            pi, pj, pn = last
+            if pi + pn == i and pj + pn == j:
+                last = (pi, pj, pn + n)
+                continue
+            yield last
+        last = (i, j, n)
+    if last is not None:
+        yield last
+
+
+# -------------- 差异段 --------------
+def hunks_from_blocks(blocks, left_count, right_count):
+    """匹配块 -> 首尾相接的 DiffHunk 列表（同时计算对齐视图中的行号）"""
+    return list(iter_hunks(blocks, left_count, right_count))
+
+
+def iter_hunks(blocks, left_count, right_count):
+    """按顺序把匹配块（可以是生成器）转换为 DiffHunk，逐个产出"""
+    row = i = j = 0
+    for bi, bj, n in itertools.chain(blocks, [(left_count, right_count, 0)]):
+        if bi > i or bj > j:
+            tag = 'replace' if bi > i and bj > j else ('delete' if bi > i else 'insert')
+            yield DiffHunk(tag, i, bi, j, bj, row)
+            row += max(bi - i, bj - j)
+        if n:
+            yield DiffHunk('equal', bi, bi + n, bj, bj + n, row)
+            row += n
+        i, j = bi + n, bj + n
+
+
+def diff_lines(left, right, max_cost=MYERS_MAX_COST):
+    """比较两组文本行
+
+    Args:
+        left / right: 行列表（不含换行符），也可以是已映射好的整数编号列表
+        max_cost: 单个无锚点区间上 Myers 算法的最大编辑距离，超过时整段视为替换
+
+    Returns:
+        DiffHunk 列表（含 'equal' 段），按位置排列，首尾相接覆盖两侧全部行
+    """
+    a, b = intern_lines(left, right)
+    return hunks_from_blocks(matching_blocks(a, b, max_cost), len(a), len(b))
+
+
+def read_lines(path, should_stop=None, on_progress=None, chunk_size=READ_CHUNK):
+    """按块读取文本文件并拆成行（UTF-8，无法解码的字节忽略，同界面中的读取方式）
+
+    Args:
+        should_stop: 可选，返回 True 时抛出 DiffStopped
+        on_progress: 可选，on_progress(已读取字节数, 文件大小)，每读取一块调用一次
+    """
+    total = os.path.getsize(path)
+    lines = []
+    tail = ''
+    done = 0
+    with open(path, 'rb') as f:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        while True:
+            if should_stop is not None and should_stop():
+                raise DiffStopped()
+            chunk = f.read(chunk_size)
+            text = tail + decoder.decode(chunk, final=not chunk)
+            # 块末尾的 "\r" 可能与下一块开头的 "\n" 组成一个换行，留到下一块再处理
+            hold = ''
+            if chunk and text.endswith('\r'):
+                text, hold = text[:-1], '\r'
+            parts = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+            if not chunk:
+                if parts[-1] == '':
+                    parts.pop()
+                lines.extend(parts)
+                break
+            tail = parts.pop() + hold
+            lines.extend(parts)
+            done += len(chunk)
+            if on_progress is not None:
+                on_progress(done, total)
+    return lines
+
+
+def split_lines(text):
+    """把文本拆成行（不含换行符）；末尾的换行不产生额外的空行"""
+    lines = text.split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+def changed_hunks(hunks):
+    """只保留有差异的段"""
+    return [hunk for hunk in hunks if hunk.tag != 'equal']
+
+
+def aligned_rows(hunks, left, right, filler=''):
+    """按对齐视图展开两侧的行，行数较少的一侧用 filler 补齐
+
+    Returns:
+        (左侧行列表, 右侧行列表)，两者等长
+    """
+    left_rows, right_rows = [], []
+    for hunk in hunks:
+        left_rows.extend(left[hunk.left_start:hunk.left_end])
+        right_rows.extend(right[hunk.right_start:hunk.right_end])
+        rows = hunk.rows
+        if hunk.left_count < rows:
+            left_rows.extend([filler] * (rows - hunk.left_count))
+        if hunk.right_count < rows:
+            right_rows.extend([filler] * (rows - hunk.right_count))
+    return left_rows, right_rows
@@ -0,0 +1,58 @@
+"""
+行内差异（不依赖 PySide6）
+把一对修改过的行切分为词、空白与标点，用 Myers 算法比较记号序列，得到两侧实际变化的字符区间。
+计算量受行长度（MAX_LINE_LENGTH）与编辑距离（MAX_INLINE_COST）限制，超出时不细分，整行视为修改
+"""
+
+import re
+
+from .engine import intern_lines, _myers
+
+# 超过该长度（字符数）的行不计算行内差异
+MAX_LINE_LENGTH = 4000
+# 记号序列允许的最大编辑距离
+MAX_INLINE_COST = 200
+
+_TOKEN_RE = re.compile(r'\w+|\s+|[^\w\s]')
+
+
+def tokenize(line):
+    """词 / 连续空白 / 单个标点"""
+    return _TOKEN_RE.findall(line)
+
+
+def _changed_spans(tokens, matched):
+    """未匹配的连续记号合并为 (起始字符, 长度) 区间"""
+    spans = []
+    position = 0
+    for index, token in enumerate(tokens):
+        if index not in matched:
+            if spans and spans[-1][0] + spans[-1][1] == position:
+                start, length = spans[-1]
+                spans[-1] = (start, length + len(token))
+            else:
+                spans.append((position, len(token)))
+        position += len(token)
+    return spans
+
+
+def inline_diff(left, right, max_length=MAX_LINE_LENGTH, max_cost=MAX_INLINE_COST):
+    """比较一对行
+
+    Returns:
+        (左侧变化区间列表, 右侧变化区间列表)，区间为 (起始字符, 长度)；
+        行过长、差异过大或两行毫无相同之处时返回 None
+    """
+    if left == right:
+        return [], []
+    if len(left) > max_length or len(right) > max_length:
+        return None
+    left_tokens, right_tokens = tokenize(left), tokenize(right)
+    a, b = intern_lines(left_tokens, right_tokens)
+    blocks = _myers(a, 0, len(a), b, 0, len(b), max_cost)
+    if not blocks:
+        # 没有任何相同的记号：整行都是修改，不再细分
+        return None
+    left_matched = {i + k for i, _, n in blocks for k in range(n)}
+    right_matched = {j + k for _, j, n in blocks for k in range(n)}
+    return _changed_spans(left_tokens, left_matched), _changed_spans(right_tokens, right_matched)
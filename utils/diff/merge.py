@@ -0,0 +1,143 @@
+"""
+三方合并（不依赖 PySide6）
+左右两侧分别与基础版本比较（同 engine 的行级差异），两组差异段按基础版本中的位置排序后分组：
+- 只有一侧修改的组自动采用该侧
+- 两侧修改结果相同的组自动采用
+- 其余为冲突，由调用方选择采用哪一侧，未选择的以 git 风格（diff3）的冲突标记输出
+与 diff3 相同，两侧修改的区间相交或紧挨着（中间没有未改动的行）时归入同一组：
+分开采用会让两侧对同一段内容的修改各自生效，例如两侧删除相邻的重复行时丢失内容
+"""
+
+from collections import namedtuple
+
+from .engine import intern_lines, iter_matching_blocks, iter_hunks
+from .output import atomic_output, LineWriter
+
+# 合并块：kind 为 MERGE_KINDS 之一，三组区间分别为基础版本、左侧、右侧中的行（左闭右开）
+MergeChunk = namedtuple('MergeChunk', [
+    'kind', 'base_start', 'base_end', 'left_start', 'left_end', 'right_start', 'right_end'
+])
+# same: 三方相同；left / right: 只有该侧修改；both: 两侧修改相同；conflict: 冲突
+MERGE_KINDS = ('same', 'left', 'right', 'both', 'conflict')
+# 冲突的处理方式
+CONFLICT_CHOICES = ('left', 'right', 'left+right', 'base')
+
+# 合并结果的一段：side 为 'base' / 'left' / 'right' 时是该版本 [start, end) 的行；
+# side 为 None 时是一行冲突标记 text；chunk 为所属合并块的序号
+MergePiece = namedtuple('MergePiece', ['chunk', 'side', 'start', 'end', 'text'])
+
+
+def _changes(base, other, should_stop):
+    """other 相对 base 的修改（DiffHunk 的 left_* 为基础版本的行，right_* 为 other 的行）"""
+    a, b = intern_lines(base, other)
+    blocks = iter_matching_blocks(a, b, should_stop=should_stop)
+    return [hunk for hunk in iter_hunks(blocks, len(a), len(b)) if hunk.tag != 'equal']
+
+
+def merge3(base, left, right, should_stop=None):
+    """三方合并
+
+    Args:
+        base / left / right: 三个版本的行（可比较相等的任意值，例如 LineIndex.hashes）
+        should_stop: 可选，返回 True 时抛出 DiffStopped
+
+    Returns:
+        按位置排列、覆盖整个基础版本的 MergeChunk 列表
+    """
+    changes = sorted(
+        [(hunk.left_start, hunk.left_end, 0, hunk) for hunk in _changes(base, left, should_stop)]
+        + [(hunk.left_start, hunk.left_end, 1, hunk) for hunk in _changes(base, right, should_stop)],
+        key=lambda change: change[:3]
+    )
+    chunks = []
+    deltas = [0, 0]  # 两侧在当前位置之前累计增加的行数：该侧行号 = 基础版本行号 + 差
+    position = 0
+    index = 0
+    while index < len(changes):
+        lo, hi = changes[index][:2]
+        group = [changes[index]]
+        index += 1
+        while index < len(changes):
+            start, end = changes[index][:2]
+            if start <= hi:
+                group.append(changes[index])
+                hi = max(hi, end)
+                index += 1
+            else:
+                break
+
+        if position < lo:
+            chunks.append(MergeChunk('same', position, lo, position + deltas[0], lo + deltas[0],
+                                     position + deltas[1], lo + deltas[1]))
+        starts = [lo + deltas[0], lo + deltas[1]]
+        for _, _, side, hunk in group:
+            deltas[side] += hunk.right_count - hunk.left_count
+        left_start, left_end = starts[0], hi + deltas[0]
+        right_start, right_end = starts[1], hi + deltas[1]
+        sides = {side for _, _, side, _ in group}
+        if sides == {0}:
+            kind = 'left'
+        elif sides == {1}:
+            kind = 'right'
+        elif left[left_start:left_end] == right[right_start:right_end]:
+            kind = 'both'
+        else:
+            kind = 'conflict'
+        chunks.append(MergeChunk(kind, lo, hi, left_start, left_end, right_start, right_end))
+        position = hi
+
+    if position < len(base):
+        chunks.append(MergeChunk('same', position, len(base), position + deltas[0], len(left),
+                                 position + deltas[1], len(right)))
+    return chunks
+
+
+def merge_pieces(chunks, choices=None, labels=None):
+    """按合并块与冲突的处理方式产出合并结果
+
+    Args:
+        choices: {合并块序号: CONFLICT_CHOICES 之一}，未给出的冲突输出冲突标记
+        labels: 冲突标记中三个版本的名称 {'left': ..., 'base': ..., 'right': ...}
+    """
+    choices = choices or {}
+    labels = {'left': "left", 'base': "base", 'right': "right", **(labels or {})}
+    for number, chunk in enumerate(chunks):
+        ranges = {
+            'base': (chunk.base_start, chunk.base_end),
+            'left': (chunk.left_start, chunk.left_end),
+            'right': (chunk.right_start, chunk.right_end),
+        }
+        if chunk.kind == 'conflict':
+            choice = choices.get(number)
+            if choice is None:
+                sides = (f"<<<<<<< {labels['left']}", 'left', f"||||||| {labels['base']}", 'base',
+                         "=======", 'right', f">>>>>>> {labels['right']}")
+            else:
+                sides = choice.split('+')
+        else:
+            # 相同的部分取左侧，保留左侧的换行符
+            sides = ('right',) if chunk.kind == 'right' else ('left',)
+        for side in sides:
+            if side not in ranges:
+                yield MergePiece(number, None, 0, 1, side)
+            elif ranges[side][0] < ranges[side][1]:
+                yield MergePiece(number, side, *ranges[side], None)
+
+
+def count_conflicts(chunks):
+    return sum(1 for chunk in chunks if chunk.kind == 'conflict')
+
+
+def write_merge(path, chunks, indexes, choices=None, labels=None):
+    """把合并结果写入 path，各行保留其所在版本的原始字节与换行符
+
+    Args:
+        indexes: {'base' / 'left' / 'right': LineIndex}
+    """
+    with atomic_output(path) as output:
+        writer = LineWriter(output)
+        for piece in merge_pieces(chunks, choices, labels):
+            if piece.side:
+                writer.write(indexes[piece.side].raw(piece.start, piece.end))
+            else:
+                writer.write(piece.text.encode('utf-8') + b'\n')
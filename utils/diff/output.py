@@ -0,0 +1,43 @@
+"""
+写出结果文件（不依赖 PySide6）
+合并结果、补丁、HTML 等都先写入同目录下的临时文件，完成后再替换目标文件：
+目标文件正是某个仍被 mmap 映射的输入文件时，不会在读取过程中被截断；写入失败时目标文件保持不变
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_output(path):
+    """以二进制方式写入 path：with 块正常结束后才替换目标文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.kiwi-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            yield output
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class LineWriter:
+    """按行拼接原始字节：上一段以没有换行符的最后一行结束、后面还有内容时补上换行符"""
+
+    def __init__(self, output, newline=b'\n'):
+        self.output = output
+        self.newline = newline
+        self._open_line = False
+
+    def write(self, data):
+        if not data:
+            return
+        if self._open_line:
+            self.output.write(self.newline)
+        self.output.write(data)
+        self._open_line = not data.endswith(b'\n')
@@ -0,0 +1,377 @@
+"""
+补丁的导出与应用（不依赖 PySide6）
+- 导出：按差异段表逐组生成 unified diff（.patch）或自包含的左右对照 HTML，
+  每组只从 LineIndex 读取该组的几行，文件再大内存占用也不随之增长
+- 应用：解析 unified diff，在目标文件的行哈希中查找每段的原始内容：先在预期位置附近查找
+  （允许整体偏移），找不到时依次忽略段首段尾的 1 至 fuzz 行上下文（同 GNU patch 的模糊匹配）。
+  结果按段写出，未能应用的段写入 .rej 文件
+"""
+
+import re
+import html
+from array import array
+from collections import namedtuple
+
+from .engine import DiffHunk
+from .intraline import inline_diff
+from .output import atomic_output, LineWriter
+
+# 每组差异前后保留的上下文行数
+DEFAULT_CONTEXT = 3
+# 应用补丁时最多忽略的上下文行数
+MAX_FUZZ = 2
+
+# 补丁中的一段：lines 为 [操作, 内容, 是否有换行符] 列表，操作为 ' ' / '-' / '+'，内容为不含换行符的字节
+PatchHunk = namedtuple('PatchHunk', ['old_start', 'old_count', 'new_start', 'new_count', 'lines'])
+# 补丁中的一个文件
+PatchFile = namedtuple('PatchFile', ['old_path', 'new_path', 'hunks'])
+# 一段的应用结果：line 为应用位置（从 0 开始），offset 为相对补丁中行号的偏移，fuzz 为忽略的上下文行数
+HunkResult = namedtuple('HunkResult', ['number', 'applied', 'line', 'offset', 'fuzz'])
+
+_HASH_WIDTH = array('q').itemsize
+_HUNK_HEADER = re.compile(rb'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+_NO_NEWLINE = b'\\ No newline at end of file\n'
+
+
+# -------------- 导出 --------------
+def diff_groups(hunks, left_count, context=DEFAULT_CONTEXT):
+    """把有差异的段按上下文合并为组（间隔不超过 2 * context 行的段同组），逐组产出
+
+    Yields:
+        (组内的 DiffHunk 列表, 左侧起始行, 左侧结束行, 右侧起始行, 右侧结束行)，范围含上下文
+    """
+    group = []
+    for hunk in hunks:
+        if hunk.tag == 'equal':
+            continue
+        if group and hunk.left_start - group[-1].left_end > 2 * context:
+            yield _group_range(group, left_count, context)
+            group = []
+        group.append(hunk)
+    if group:
+        yield _group_range(group, left_count, context)
+
+
+def _final_newline_hunks(hunks, left, right):
+    """行哈希不区分最后一行有无换行符：右侧最后一行作为上下文输出、而左侧对应行的换行符与之不同时，
+    把该行并入末尾的修改，补丁才能还原出右侧文件"""
+    hunks = list(hunks)
+    number = next((i for i in range(len(hunks) - 1, -1, -1) if hunks[i].right_count), None)
+    if number is None or hunks[number].tag != 'equal':
+        return hunks
+    hunk = hunks[number]
+    left_newline = left.ends_with_newline if hunk.left_end == left.line_count else True
+    if left_newline == right.ends_with_newline:
+        return hunks
+    del hunks[number:]
+    if hunk.left_count > 1:
+        hunks.append(hunk._replace(left_end=hunk.left_end - 1, right_end=hunk.right_end - 1))
+    hunks.append(DiffHunk('replace', hunk.left_end - 1, left.line_count, hunk.right_end - 1, right.line_count, None))
+    return hunks
+
+
+def _group_range(group, left_count, context):
+    first, last = group[0], group[-1]
+    left_start = max(0, first.left_start - context)
+    left_end = min(left_count, last.left_end + context)
+    right_start = first.right_start - (first.left_start - left_start)
+    right_end = last.right_end + (left_end - last.left_end)
+    return group, left_start, left_end, right_start, right_end
+
+
+def _range(start, count):
+    """unified diff 段头中的行范围"""
+    if count == 1:
+        return f"{start + 1}"
+    return f"{start + 1 if count else start},{count}"
+
+
+def _unified_lines(prefix, index, start, end):
+    lines = []
+    for number in range(start, end):
+        lines.append(prefix + index.line_bytes(number) + b'\n')
+        if number == index.line_count - 1 and not index.ends_with_newline:
+            lines.append(_NO_NEWLINE)
+    return lines
+
+
+def iter_unified(hunks, left, right, left_label, right_label, context=DEFAULT_CONTEXT):
+    """逐组产出 unified diff 的字节
+
+    Args:
+        hunks: DiffHunk（按位置排列，相同的段会被跳过）
+        left / right: 两侧的 LineIndex
+    """
+    yield f"--- {left_label}\n+++ {right_label}\n".encode('utf-8')
+    hunks = _final_newline_hunks(hunks, left, right)
+    for group, left_start, left_end, right_start, right_end in diff_groups(hunks, left.line_count, context):
+        lines = [f"@@ -{_range(left_start, left_end - left_start)} "
+                 f"+{_range(right_start, right_end - right_start)} @@\n".encode('ascii')]
+        position = left_start
+        for hunk in group:
+            lines += _unified_lines(b' ', left, position, hunk.left_start)
+            lines += _unified_lines(b'-', left, hunk.left_start, hunk.left_end)
+            lines += _unified_lines(b'+', right, hunk.right_start, hunk.right_end)
+            position = hunk.left_end
+        lines += _unified_lines(b' ', left, position, left_end)
+        yield b''.join(lines)
+
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 16px; color: #333; }}
+table {{ border-collapse: collapse; width: 100%; table-layout: fixed; font-family: Consolas, monospace; font-size: 13px; }}
+th {{ background: #f5f5f5; text-align: left; padding: 6px; border: 1px solid #ddd; }}
+td {{ white-space: pre-wrap; word-break: break-all; tab-size: 4; padding: 0 6px; vertical-align: top; }}
+td.n {{ width: 4em; color: #999; text-align: right; background: #fafafa; }}
+tr.sep td {{ background: #e3f2fd; color: #555; padding: 4px 6px; }}
+.replace {{ background: #fff9c4; }} .delete {{ background: #ffcdd2; }} .insert {{ background: #c8e6c9; }}
+.filler {{ background: #eeeeee; }}
+.replace del {{ background: #ef9a9a; text-decoration: none; }} .replace ins {{ background: #81c784; text-decoration: none; }}
+</style></head><body>
+<h3>{title}</h3>
+<table><colgroup><col style="width:4em"><col><col style="width:4em"><col></colgroup>
+<tr><th></th><th>{left}</th><th></th><th>{right}</th></tr>
+"""
+_HTML_TAIL = "</table></body></html>\n"
+
+
+def _html_text(text, spans, tag):
+    """转义一行文本，行内变化的区间用 tag 包裹"""
+    if not spans:
+        return html.escape(text)
+    parts, position = [], 0
+    for start, length in spans:
+        parts.append(html.escape(text[position:start]))
+        parts.append(f"<{tag}>{html.escape(text[start:start + length])}</{tag}>")
+        position = start + length
+    parts.append(html.escape(text[position:]))
+    return ''.join(parts)
+
+
+def _html_row(kind, left_number, left_text, right_number, right_text):
+    left_class = 'filler' if left_number is None else kind
+    right_class = 'filler' if right_number is None else kind
+    return (f'<tr><td class="n">{"" if left_number is None else left_number + 1}</td>'
+            f'<td class="{left_class}">{left_text}</td>'
+            f'<td class="n">{"" if right_number is None else right_number + 1}</td>'
+            f'<td class="{right_class}">{right_text}</td></tr>\n')
+
+
+def iter_html(hunks, left, right, left_label, right_label, context=DEFAULT_CONTEXT):
+    """逐组产出左右对照 HTML 的字节（样式内联，不依赖外部文件）"""
+    title = html.escape(f"{left_label} ↔ {right_label}")
+    yield _HTML_HEAD.format(title=title, left=html.escape(left_label), right=html.escape(right_label)).encode('utf-8')
+    for group, left_start, left_end, right_start, right_end in diff_groups(hunks, left.line_count, context):
+        rows = [f'<tr class="sep"><td colspan="4">@@ -{_range(left_start, left_end - left_start)} '
+                f'+{_range(right_start, right_end - right_start)} @@</td></tr>\n']
+        position, offset = left_start, right_start - left_start
+
+        def context_rows(start, end):
+            for number in range(start, end):
+                text = html.escape(left.line(number))
+                rows.append(_html_row('', number, text, number + offset, text))
+
+        for hunk in group:
+            context_rows(position, hunk.left_start)
+            for row in range(hunk.rows):
+                left_number = hunk.left_start + row if row < hunk.left_count else None
+                right_number = hunk.right_start + row if row < hunk.right_count else None
+                left_line = left.line(left_number) if left_number is not None else ''
+                right_line = right.line(right_number) if right_number is not None else ''
+                spans = (inline_diff(left_line, right_line)
+                         if left_number is not None and right_number is not None else None)
+                rows.append(_html_row(
+                    hunk.tag,
+                    left_number, _html_text(left_line, spans and spans[0], 'del'),
+                    right_number, _html_text(right_line, spans and spans[1], 'ins'),
+                ))
+            position = hunk.left_end
+            offset = hunk.right_end - hunk.left_end
+        context_rows(position, left_end)
+        yield ''.join(rows).encode('utf-8')
+    yield _HTML_TAIL.encode('utf-8')
+
+
+def write_unified(path, hunks, left, right, left_label, right_label, context=DEFAULT_CONTEXT):
+    """导出 unified diff，返回差异组数"""
+    return _write_chunks(path, iter_unified(hunks, left, right, left_label, right_label, context))
+
+
+def write_html(path, hunks, left, right, left_label, right_label, context=DEFAULT_CONTEXT):
+    """导出左右对照的 HTML，返回差异组数"""
+    return _write_chunks(path, iter_html(hunks, left, right, left_label, right_label, context)) - 1  # 不计结尾
+
+
+def _write_chunks(path, chunks):
+    count = -1  # 不计文件头
+    with atomic_output(path) as output:
+        for data in chunks:
+            output.write(data)
+            count += 1
+    return count
+
+
+# -------------- 解析 --------------
+def parse_patch(lines):
+    """解析 unified diff
+
+    Args:
+        lines: 字节行的可迭代对象（例如以 'rb' 打开的文件）
+
+    Returns:
+        PatchFile 列表；没有文件头的段归入路径为空的 PatchFile
+    """
+    files = []
+    old_path = None
+    hunk = None
+    remaining_old = remaining_new = 0
+    for raw in lines:
+        line = raw[:-1] if raw.endswith(b'\n') else raw
+        line = line.removesuffix(b'\r')
+        if line.startswith(b'\\'):
+            # "\ No newline at end of file"：上一行没有换行符
+            if hunk is not None and hunk.lines:
+                hunk.lines[-1][2] = False
+            continue
+        if hunk is not None and (remaining_old > 0 or remaining_new > 0):
+            # 一些编辑器会去掉上下文空行行首的空格
+            op = line[:1] or b' '
+            if op in (b' ', b'-', b'+'):
+                hunk.lines.append([op.decode('ascii'), line[1:], True])
+                remaining_old -= op != b'+'
+                remaining_new -= op != b'-'
+                continue
+        if line.startswith(b'--- '):
+            old_path = _patch_path(line[4:])
+        elif line.startswith(b'+++ '):
+            files.append(PatchFile(old_path, _patch_path(line[4:]), []))
+            old_path = None
+        else:
+            match = _HUNK_HEADER.match(line)
+            if match is None:
+                continue
+            old_start, old_count, new_start, new_count = match.groups()
+            hunk = PatchHunk(int(old_start), 1 if old_count is None else int(old_count),
+                             int(new_start), 1 if new_count is None else int(new_count), [])
+            remaining_old, remaining_new = hunk.old_count, hunk.new_count
+            if not files:
+                files.append(PatchFile(None, None, []))
+            files[-1].hunks.append(hunk)
+    return files
+
+
+def _patch_path(value):
+    """文件头中的路径：去掉制表符之后的时间戳"""
+    return value.split(b'\t')[0].decode('utf-8', 'replace').strip()
+
+
+def format_patch_hunk(hunk):
+    """把补丁中的一段重新格式化为 unified diff 字节（用于 .rej 文件）"""
+    lines = [f"@@ -{hunk.old_start},{hunk.old_count} +{hunk.new_start},{hunk.new_count} @@\n".encode('ascii')]
+    for op, text, newline in hunk.lines:
+        lines.append(op.encode('ascii') + text + b'\n')
+        if not newline:
+            lines.append(_NO_NEWLINE)
+    return b''.join(lines)
+
+
+# -------------- 应用 --------------
+def _find_nearest(hashes, needle, expected, lower):
+    """在行哈希的字节串中查找与 expected 行最近、且不早于 lower 行的匹配，返回行号或 None
+
+    bytes.find 是 C 实现的子串查找，只需跳过没有对齐到 8 字节边界的匹配
+    """
+    width = _HASH_WIDTH
+    forward = hashes.find(needle, max(expected, lower) * width)
+    while forward >= 0 and forward % width:
+        forward = hashes.find(needle, forward + 1)
+    backward = -1
+    if expected > lower:
+        end = (expected - 1) * width + len(needle)
+        backward = hashes.rfind(needle, lower * width, end)
+        while backward >= 0 and backward % width:
+            backward = hashes.rfind(needle, lower * width, backward + len(needle) - 1)
+    candidates = [position // width for position in (forward, backward) if position >= 0]
+    return min(candidates, key=lambda line: abs(line - expected)) if candidates else None
+
+
+def locate_hunk(hashes, hunk, expected, lower=0, max_fuzz=MAX_FUZZ):
+    """在目标文件中定位一段补丁
+
+    Args:
+        hashes: 目标文件各行哈希的字节串（LineIndex.hashes.tobytes()）
+        expected: 预期的起始行（补丁中的行号加上之前各段的偏移）
+        lower: 不早于该行（前面的段已应用到此处）
+
+    Returns:
+        (起始行, 忽略的段首上下文行数, 忽略的段尾上下文行数) 或 None
+    """
+    old = [text for op, text, _ in hunk.lines if op != '+']
+    leading = next((i for i, (op, _, _) in enumerate(hunk.lines) if op != ' '), len(hunk.lines))
+    trailing = next((i for i, (op, _, _) in enumerate(reversed(hunk.lines)) if op != ' '), len(hunk.lines))
+    line_count = len(hashes) // _HASH_WIDTH
+    for fuzz in range(max_fuzz + 1):
+        front, back = min(fuzz, leading), min(fuzz, trailing)
+        if fuzz and front + back == 0:
+            break
+        pattern = old[front:len(old) - back]
+        if not pattern:
+            start = max(lower, min(expected + front, line_count))
+            return start - front, front, back
+        needle = array('q', map(hash, pattern)).tobytes()
+        start = _find_nearest(hashes, needle, max(0, expected + front), lower)
+        if start is not None:
+            return start - front, front, back
+    return None
+
+
+def apply_patch(target, hunks, output_path, max_fuzz=MAX_FUZZ, reject_path=None):
+    """把补丁中的各段应用到目标文件，结果写入 output_path
+
+    未改动的部分按原始字节从 target 复制，新增的行使用目标文件的换行符（\\r\\n 或 \\n）
+
+    Args:
+        target: 目标文件的 LineIndex（已 build）
+        hunks: PatchHunk 列表
+        reject_path: 可选，未能应用的段写入该文件
+
+    Returns:
+        HunkResult 列表
+    """
+    hashes = target.hashes.tobytes()
+    newline = b'\r\n' if target.line_count and target.raw(0, 1).endswith(b'\r\n') else b'\n'
+    results, placements, rejects = [], [], []
+    lower = offset = 0
+    for number, hunk in enumerate(hunks):
+        planned = (hunk.old_start - 1 if hunk.old_count else hunk.old_start)
+        found = locate_hunk(hashes, hunk, planned + offset, lower, max_fuzz)
+        if found is None:
+            results.append(HunkResult(number, False, planned + offset, offset, 0))
+            rejects.append(hunk)
+            continue
+        start, front, back = found
+        lines = hunk.lines[front:len(hunk.lines) - back]
+        old_count = sum(1 for op, _, _ in lines if op != '+')
+        new_lines = [text + (newline if has_newline else b'') for op, text, has_newline in lines if op != '-']
+        placements.append((start + front, start + front + old_count, new_lines))
+        lower = start + front + old_count
+        offset = start - planned
+        results.append(HunkResult(number, True, start, offset, max(front, back)))
+
+    with atomic_output(output_path) as output:
+        writer = LineWriter(output, newline)
+        position = 0
+        for start, end, new_lines in placements:
+            writer.write(target.raw(position, start))
+            for data in new_lines:
+                writer.write(data)
+            position = end
+        writer.write(target.raw(position, target.line_count))
+
+    if reject_path and rejects:
+        with atomic_output(reject_path) as output:
+            for hunk in rejects:
+                output.write(format_patch_hunk(hunk))
+    return results
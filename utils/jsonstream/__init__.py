@@ -0,0 +1,20 @@
+"""
+JSON 的流式处理（不依赖 PySide6）
+
+- index: 大 JSON 文件的稀疏索引（mmap + 对象/数组的起止偏移），按需读取节点的直接子项
+- validate: JSON 文本的增量校验（缓存记号流与语法检查点，编辑后只重新检查编辑处附近）
+
+GUI 中的 JSONFormatter 只负责显示
+"""
+
+from .index import (
+    JsonIndex, JsonIndexError, JsonIndexStopped, JsonEntry, JsonCursor, FETCH_BATCH, PREVIEW_CHARS
+)
+from .validate import (
+    JsonValidator, ValidationStopped, EditRange, INCREMENTAL_THRESHOLD, text_edit, merge_edits
+)
+
+__all__ = [
+    'JsonIndex', 'JsonIndexError', 'JsonIndexStopped', 'JsonEntry', 'JsonCursor', 'FETCH_BATCH', 'PREVIEW_CHARS',
+    'JsonValidator', 'ValidationStopped', 'EditRange', 'INCREMENTAL_THRESHOLD', 'text_edit', 'merge_edits',
+]
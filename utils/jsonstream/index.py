@@ -0,0 +1,250 @@
+"""
+大 JSON 文件的稀疏索引（不依赖 PySide6）
+文件以 mmap 只读映射，后台用一个正则扫描一遍：字符串与标量整段跳过，只在对象/数组的括号处回到 Python，
+记录每个对象/数组的起止偏移。每个容器占 24 字节，标量不建索引：
+- 展开节点时从该容器的起始偏移开始读取直接子项，子容器按索引整段跳过，每次只读取一批
+- 打开文件只需要建立索引的时间与内存，不把整个文档解析成 Python 对象
+索引只检查括号是否匹配；逗号、冒号等其余语法在展开节点时检查
+"""
+
+import os
+import re
+import json
+import mmap
+from array import array
+from collections import namedtuple
+
+# 每处理多少个括号检查一次停止标志并报告进度
+CHECK_INTERVAL = 65536
+# 每次展开读取的子项数
+FETCH_BATCH = 500
+# 预览值的最大字符数
+PREVIEW_CHARS = 200
+
+# 节点的一个子项：key 为对象的键或数组的下标；node 为子容器的编号，标量为 -1；end 不含
+JsonEntry = namedtuple('JsonEntry', ['key', 'kind', 'start', 'end', 'node'])
+# 读取子项的位置：position 为上一个子项之后的偏移，node 为下一个子容器的编号，count 为已读取的子项数
+JsonCursor = namedtuple('JsonCursor', ['position', 'node', 'count'])
+
+# 下一个括号（或没有结束的字符串的引号）之前的内容整段跳过；只能从字符串之外的位置锚定匹配
+_STRUCTURE = re.compile(rb'(?:[^"\[\]{}]++|"(?:[^"\\]++|\\.)*+")*+([\[\]{}"])', re.S)
+_WHITESPACE = re.compile(rb'[ \t\n\r]*')
+_STRING = re.compile(rb'"(?:[^"\\]++|\\.)*+"', re.S)
+_SCALAR = re.compile(rb'"(?:[^"\\]++|\\.)*+"|-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?|true|false|null', re.S)
+_SCALAR_KINDS = {ord('"'): 'string', ord('t'): 'boolean', ord('f'): 'boolean', ord('n'): 'null'}
+_OPEN = {ord('{'): 'object', ord('['): 'array'}
+_CLOSE = {ord('}'): ord('{'), ord(']'): ord('[')}
+
+
+class JsonIndexStopped(Exception):
+    """建立索引被取消"""
+
+
+class JsonIndexError(ValueError):
+    """JSON 语法错误；pos 为出错处的字节偏移"""
+
+    def __init__(self, message, pos):
+        super().__init__(f"{message}（偏移 {pos}）")
+        self.message = message
+        self.pos = pos
+
+
+class JsonIndex:
+    """JSON 文件的容器索引
+
+    build() 在后台线程中运行；完成后 root() / children() 按需读取节点
+
+    Args:
+        path: 文件路径（UTF-8 编码的 JSON）
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        # 第 i 个容器（按起始位置排列）的左括号、右括号偏移，以及其后第一个不在其内部的容器编号
+        self.starts = array('q')
+        self.ends = array('q')
+        self.skips = array('q')
+        self.complete = False
+
+    @property
+    def container_count(self):
+        return len(self.starts)
+
+    def build(self, should_stop=None, on_progress=None):
+        """扫描整个文件，记录所有对象/数组的位置
+
+        Args:
+            should_stop: 可选，返回 True 时抛出 JsonIndexStopped
+            on_progress: 可选，on_progress(已扫描字节数, 文件大小)
+
+        Raises:
+            JsonIndexError: 括号不匹配或字符串没有结束
+        """
+        data = self._map
+        starts, ends, skips = self.starts, self.ends, self.skips
+        stack = []
+        count = 0
+        match_structure = _STRUCTURE.match
+        # 每次从上一个括号之后锚定匹配（finditer 匹配失败后会从字符串内部重新查找）；匹配失败即已到文件末尾
+        position = -1
+        while (match := match_structure(data, position + 1)) is not None:
+            position = match.end() - 1
+            char = data[position]
+            if char in _OPEN:
+                stack.append(len(starts))
+                starts.append(position)
+                ends.append(-1)
+                skips.append(-1)
+            elif char == 0x22:  # "
+                raise JsonIndexError("字符串没有结束", position)
+            else:
+                if not stack:
+                    raise JsonIndexError(f"多余的 '{chr(char)}'", position)
+                node = stack.pop()
+                if data[starts[node]] != _CLOSE[char]:
+                    raise JsonIndexError(f"'{chr(data[starts[node]])}' 与 '{chr(char)}' 不匹配", position)
+                ends[node] = position
+                skips[node] = len(starts)
+            count += 1
+            if count % CHECK_INTERVAL == 0:
+                if should_stop is not None and should_stop():
+                    raise JsonIndexStopped()
+                if on_progress is not None:
+                    on_progress(position, self.size)
+        if stack:
+            raise JsonIndexError(f"'{chr(data[starts[stack[-1]]])}' 没有闭合", starts[stack[-1]])
+        if on_progress is not None:
+            on_progress(self.size, self.size)
+        self.complete = True
+        return self
+
+    # -------------- 读取节点 --------------
+    def _skip_whitespace(self, position):
+        return _WHITESPACE.match(self._map, position).end()
+
+    def _value(self, key, position, node):
+        """读取 position 处的值，返回 (JsonEntry, 值之后的偏移, 下一个子容器编号)"""
+        data = self._map
+        if position < self.size and data[position] in _OPEN:
+            if node >= len(self.starts) or self.starts[node] != position:
+                raise JsonIndexError("索引与文件内容不一致", position)
+            end = self.ends[node] + 1
+            return JsonEntry(key, _OPEN[data[position]], position, end, node), end, self.skips[node]
+        match = _SCALAR.match(data, position)
+        if match is None:
+            raise JsonIndexError("应为 JSON 值", position)
+        kind = _SCALAR_KINDS.get(data[position], 'number')
+        return JsonEntry(key, kind, position, match.end(), -1), match.end(), node
+
+    def root(self):
+        """文档的根值；根值之后只能有空白"""
+        entry, position, _ = self._value(None, self._skip_whitespace(0), 0)
+        position = self._skip_whitespace(position)
+        if position < self.size:
+            raise JsonIndexError("根值之后还有多余的内容", position)
+        return entry
+
+    def first_cursor(self, node):
+        """容器的第一个子项的位置；空容器返回 None"""
+        position = self._skip_whitespace(self.starts[node] + 1)
+        if position == self.ends[node]:
+            return None
+        return JsonCursor(self.starts[node] + 1, node + 1, 0)
+
+    def children(self, node, cursor, limit=FETCH_BATCH):
+        """从 cursor 起读取容器的至多 limit 个直接子项
+
+        Returns:
+            (JsonEntry 列表, 下一批的 JsonCursor；已读完时为 None)
+
+        Raises:
+            JsonIndexError: 第一个子项就有语法错误（之前已读取到子项时先返回这些子项，读取下一批时再抛出）
+        """
+        data = self._map
+        is_object = data[self.starts[node]] == 0x7b  # {
+        end = self.ends[node]
+        position, child, count = cursor
+        entries = []
+        while True:
+            position = self._skip_whitespace(position)
+            if position == end:
+                return entries, None
+            if len(entries) >= limit:
+                return entries, JsonCursor(position, child, count)
+            try:
+                entry, next_position, next_child = self._child(data, is_object, position, child, count)
+            except JsonIndexError:
+                if not entries:
+                    raise
+                return entries, JsonCursor(position, child, count)
+            entries.append(entry)
+            position, child = next_position, next_child
+            count += 1
+
+    def _child(self, data, is_object, position, child, count):
+        """读取 position 处的一个子项（含前面的逗号与键）"""
+        if count:
+            if data[position] != 0x2c:  # ,
+                raise JsonIndexError("应为 ','", position)
+            position = self._skip_whitespace(position + 1)
+        if is_object:
+            match = _STRING.match(data, position)
+            if match is None:
+                raise JsonIndexError("应为字符串形式的键", position)
+            try:
+                key = json.loads(match.group())
+            except ValueError:
+                raise JsonIndexError("键中有无效的转义", position) from None
+            position = self._skip_whitespace(match.end())
+            if data[position] != 0x3a:  # :
+                raise JsonIndexError("应为 ':'", position)
+            position = self._skip_whitespace(position + 1)
+        else:
+            key = count
+        return self._value(key, position, child)
+
+    def raw(self, entry, limit=None):
+        """节点的原始字节，limit 给出时至多读取 limit 字节"""
+        end = entry.end if limit is None else min(entry.end, entry.start + limit)
+        return self._map[entry.start:end]
+
+    def preview(self, entry, max_chars=PREVIEW_CHARS):
+        """节点的显示文本：标量为其值（过长时截断），容器为空或省略号"""
+        if entry.node >= 0:
+            brackets = '{}' if entry.kind == 'object' else '[]'
+            empty = self.first_cursor(entry.node) is None
+            return brackets if empty else f"{brackets[0]}…{brackets[1]}"
+        raw = self.raw(entry, max_chars * 4 + 2)
+        if entry.kind != 'string':
+            return raw.decode('ascii', 'replace')
+        if len(raw) == entry.end - entry.start:
+            try:
+                text = json.loads(raw)
+            except ValueError:
+                text = raw[1:-1].decode('utf-8', 'replace')
+        else:
+            text = raw[1:].decode('utf-8', 'replace')
+        if len(text) > max_chars or len(raw) < entry.end - entry.start:
+            return text[:max_chars] + "…"
+        return text
+
+    def line_col(self, pos):
+        """字节偏移对应的行号与列号（从 1 开始）"""
+        line_start = self._map.rfind(b'\n', 0, pos) + 1
+        lines = 1
+        for offset in range(0, line_start, 1 << 24):
+            lines += self._map[offset:min(offset + (1 << 24), line_start)].count(b'\n')
+        return lines, pos - line_start + 1
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._map = b''
+        self._file.close()
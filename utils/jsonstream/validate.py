@@ -0,0 +1,319 @@
+"""
+JSON 文本的增量校验（不依赖 PySide6）
+较短的文本直接交给 json.loads；较长的文本按记号（token）校验，并缓存上一次的结果：
+- 记号流：每个记号的类型与起止位置。编辑后只从编辑处之前重新切分，
+  直到新记号与旧记号（按编辑的长度差平移后）在同一位置重合，其后的旧记号平移后直接复用
+- 语法检查点：每隔 CHECKPOINT_INTERVAL 个记号记录一次语法状态（期待的下一项 + 未闭合的括号）。
+  从编辑处之前的检查点恢复检查，越过编辑区域后只要在某个旧检查点处状态相同，其后的结果（包括错误）直接沿用
+错误以 json.JSONDecodeError 返回，消息与位置同 json.loads（pos 为字符下标）
+"""
+
+import re
+import json
+import json.decoder
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+# 不少于该字符数的文本才按记号增量校验；更短的文本 json.loads 一次只需几毫秒
+INCREMENTAL_THRESHOLD = 256 * 1024
+# 语法检查点的间隔（记号数）
+CHECKPOINT_INTERVAL = 512
+# 每处理多少个记号检查一次停止标志
+CHECK_INTERVAL = 8192
+# 重新切分时从编辑处之前至少这么多字符开始（数字、字面量的匹配会向后多看几个字符）
+RETOKENIZE_MARGIN = 16
+# 平移复用的记号位置时每次处理的个数；分段处理让界面线程能及时得到 GIL
+SHIFT_CHUNK = 65536
+
+# 一次编辑（或多次编辑合并后）的范围：编辑后文本中 [start, end) 已改变，delta 为长度的变化
+EditRange = namedtuple('EditRange', ['start', 'end', 'delta'])
+
+# 记号类型
+STRING, NUMBER, LITERAL, BEGIN_OBJECT, END_OBJECT, BEGIN_ARRAY, END_ARRAY, COLON, COMMA, INVALID = range(10)
+_PUNCTUATION = {'{': BEGIN_OBJECT, '}': END_OBJECT, '[': BEGIN_ARRAY, ']': END_ARRAY, ':': COLON, ',': COMMA}
+_TOKEN = re.compile(r'''[ \t\n\r]*+(?:
+    ("(?:[^"\\\x00-\x1f]++|\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4}))*+")
+  | (-?(?:0|[1-9][0-9]*+)(?:\.[0-9]++)?(?:[eE][-+]?[0-9]++)?|-Infinity)
+  | (true|false|null|NaN|Infinity)
+  | ([{}\[\]:,])
+  | (.)
+)''', re.X | re.S)
+_GROUP_KINDS = (None, STRING, NUMBER, LITERAL, None, INVALID)
+
+# 语法状态：期待的下一项
+(EXPECT_ROOT, EXPECT_ARRAY_FIRST, EXPECT_ARRAY_VALUE, EXPECT_ARRAY_NEXT, EXPECT_OBJECT_FIRST, EXPECT_OBJECT_KEY,
+ EXPECT_COLON, EXPECT_OBJECT_VALUE, EXPECT_OBJECT_NEXT, EXPECT_END) = range(10)
+_VALUE_STATES = (EXPECT_ROOT, EXPECT_ARRAY_FIRST, EXPECT_ARRAY_VALUE, EXPECT_OBJECT_VALUE)
+# 各状态下遇到意外的记号时的错误消息（同 json.loads）
+_EXPECT_MESSAGES = {
+    EXPECT_ROOT: "Expecting value", EXPECT_ARRAY_FIRST: "Expecting value", EXPECT_ARRAY_VALUE: "Expecting value",
+    EXPECT_OBJECT_VALUE: "Expecting value", EXPECT_ARRAY_NEXT: "Expecting ',' delimiter",
+    EXPECT_OBJECT_NEXT: "Expecting ',' delimiter", EXPECT_COLON: "Expecting ':' delimiter",
+    EXPECT_OBJECT_FIRST: "Expecting property name enclosed in double quotes",
+    EXPECT_OBJECT_KEY: "Expecting property name enclosed in double quotes", EXPECT_END: "Extra data",
+}
+
+
+class ValidationStopped(Exception):
+    """校验被取消"""
+
+
+def text_edit(position, removed, added):
+    """QTextDocument.contentsChange(position, charsRemoved, charsAdded) 对应的 EditRange"""
+    return EditRange(position, position + added, added - removed)
+
+
+def merge_edits(first, second):
+    """先后两次编辑合并为一次（second 的坐标基于 first 之后的文本）；任一为 None 时返回另一个"""
+    if first is None or second is None:
+        return first or second
+    start, end, delta = first
+    if end > second.start:
+        # first 改变的区域在 second 之后的部分平移，落在 second 替换掉的范围内的部分被其取代
+        end = end + second.delta if end >= second.end - second.delta else second.end
+    return EditRange(min(start, second.start), max(end, second.end), delta + second.delta)
+
+
+class _TokenState:
+    """一次校验的结果：记号流、语法检查点与第一个错误"""
+
+    __slots__ = ('length', 'kinds', 'starts', 'ends', 'checkpoints', 'states', 'error', 'error_token')
+
+    def __init__(self, length):
+        self.length = length
+        self.kinds = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.checkpoints = array('q')   # 记录了语法状态的记号下标（状态为处理该记号之前的）
+        self.states = []                # (期待的下一项, 未闭合的括号)
+        self.error = None               # (消息, 位置)
+        self.error_token = -1
+
+
+class JsonValidator:
+    """JSON 文本校验器，保存上一次的记号流以便增量校验
+
+    同一时间只能在一个线程中使用；校验完整结束后才替换保存的结果，中途取消不影响下一次增量校验
+    """
+
+    def __init__(self):
+        self._state = None
+
+    def reset(self):
+        self._state = None
+
+    def validate(self, text, edit=None, should_stop=None):
+        """校验 text
+
+        Args:
+            edit: 自上一次完成的校验以来的 EditRange；None 表示重新校验全文
+            should_stop: 可选，返回 True 时抛出 ValidationStopped
+
+        Returns:
+            json.JSONDecodeError 或 None（格式正确）
+        """
+        if len(text) < INCREMENTAL_THRESHOLD:
+            self._state = None
+            try:
+                json.loads(text)
+            except json.JSONDecodeError as e:
+                return e
+            return None
+        old = self._state
+        if old is None or edit is None or old.length != len(text) - edit.delta or edit.end > len(text):
+            state = self._full(text, should_stop)
+        else:
+            state = self._incremental(text, old, edit, should_stop)
+        self._state = state
+        if state.error is None:
+            return None
+        message, position = state.error
+        return json.JSONDecodeError(message, text, position)
+
+    # -------------- 记号 --------------
+    def _tokenize(self, text, position, kinds, starts, ends, should_stop, resync=None):
+        """从 position 起切分记号追加到数组中
+
+        Args:
+            resync: 可选 (旧的记号起始位置数组, 编辑区域结束位置, 长度变化)；
+                新记号越过编辑区域后与某个旧记号的位置重合时停止
+
+        Returns:
+            重合的旧记号下标；没有重合（已切分到文本末尾）时为 None
+        """
+        count = 0
+        for match in _TOKEN.finditer(text, position):
+            group = match.lastindex
+            start = match.start(group)
+            if resync is not None and start >= resync[1]:
+                old_starts = resync[0]
+                index = bisect_left(old_starts, start - resync[2])
+                if index < len(old_starts) and old_starts[index] == start - resync[2]:
+                    return index
+            kinds.append(_GROUP_KINDS[group] if group != 4 else _PUNCTUATION[match.group(4)])
+            starts.append(start)
+            ends.append(match.end())
+            count += 1
+            if count % CHECK_INTERVAL == 0 and should_stop is not None and should_stop():
+                raise ValidationStopped()
+        return None
+
+    def _full(self, text, should_stop):
+        state = _TokenState(len(text))
+        self._tokenize(text, 0, state.kinds, state.starts, state.ends, should_stop)
+        self._parse(text, state, 0, (EXPECT_ROOT, ''), None, should_stop)
+        return state
+
+    def _incremental(self, text, old, edit, should_stop):
+        start, end, delta = edit
+        # 从编辑处之前的记号开始重新切分；之前有无效记号（例如没有结束的字符串）时从它开始，编辑可能使它变得有效
+        first = bisect_left(old.ends, start - RETOKENIZE_MARGIN)
+        invalid = _find(old.kinds, INVALID)
+        if 0 <= invalid < first:
+            first = invalid
+        position = old.starts[first] if first < len(old.starts) else min(start, old.length)
+        position = min(position, start)
+
+        state = _TokenState(len(text))
+        state.kinds = old.kinds[:first]
+        state.starts = old.starts[:first]
+        state.ends = old.ends[:first]
+        synced = self._tokenize(text, position, state.kinds, state.starts, state.ends, should_stop,
+                                (old.starts, end, delta))
+        changed_end = len(state.kinds)
+        shift = 0
+        if synced is not None:
+            # 之后的记号与旧记号相同，位置平移 delta
+            shift = changed_end - synced
+            state.kinds.extend(old.kinds[synced:])
+            _extend_shifted(state.starts, old.starts, synced, delta, should_stop)
+            _extend_shifted(state.ends, old.ends, synced, delta, should_stop)
+
+        # 从改变的第一个记号之前的检查点恢复语法检查
+        checkpoint = bisect_right(old.checkpoints, first) - 1
+        state.checkpoints = old.checkpoints[:checkpoint]
+        state.states = old.states[:checkpoint]
+        resume = (old, synced, changed_end, shift, delta) if synced is not None else None
+        self._parse(text, state, old.checkpoints[checkpoint], old.states[checkpoint], resume, should_stop)
+        return state
+
+    # -------------- 语法 --------------
+    def _parse(self, text, state, index, parser_state, resume, should_stop):
+        """从第 index 个记号起按 parser_state 检查语法，结果写入 state
+
+        Args:
+            resume: 可选 (旧结果, 重合的旧记号下标, 新记号中改变部分的结束下标, 下标平移量, 位置平移量)；
+                越过改变的部分后，在旧检查点处语法状态相同时沿用旧结果并停止
+        """
+        kinds = state.kinds
+        count = len(kinds)
+        expect, stack = parser_state
+        checkpoints, states = state.checkpoints, state.states
+        old_checkpoint = -1
+        if resume is not None:
+            old, synced, changed_end, shift, delta = resume
+            old_position = bisect_left(old.checkpoints, synced)
+            next_old = old.checkpoints[old_position] + shift if old_position < len(old.checkpoints) else -1
+
+        checkpoints.append(index)
+        states.append((expect, stack))
+        while index < count:
+            if index % CHECKPOINT_INTERVAL == 0 and checkpoints[-1] != index:
+                checkpoints.append(index)
+                states.append((expect, stack))
+            if resume is not None and index >= changed_end:
+                while 0 <= next_old < index:
+                    old_position += 1
+                    next_old = old.checkpoints[old_position] + shift if old_position < len(old.checkpoints) else -1
+                if next_old == index and old.states[old_position] == (expect, stack):
+                    # 之后的记号与语法状态都与上一次相同：沿用旧的检查点与错误
+                    if checkpoints[-1] == index:
+                        checkpoints.pop()
+                        states.pop()
+                    checkpoints.extend(map(shift.__add__, old.checkpoints[old_position:]))
+                    states.extend(old.states[old_position:])
+                    if old.error is not None:
+                        state.error = (old.error[0], old.error[1] + delta)
+                        state.error_token = old.error_token + shift
+                    return
+            if index % CHECK_INTERVAL == 0 and should_stop is not None and should_stop():
+                raise ValidationStopped()
+
+            kind = kinds[index]
+            if expect in _VALUE_STATES:
+                if kind <= LITERAL:
+                    expect = _after_value(stack)
+                elif kind == BEGIN_OBJECT:
+                    stack += '{'
+                    expect = EXPECT_OBJECT_FIRST
+                elif kind == BEGIN_ARRAY:
+                    stack += '['
+                    expect = EXPECT_ARRAY_FIRST
+                elif kind == END_ARRAY and expect == EXPECT_ARRAY_FIRST:
+                    stack = stack[:-1]
+                    expect = _after_value(stack)
+                else:
+                    return self._fail(text, state, index, expect)
+            elif expect == EXPECT_ARRAY_NEXT or expect == EXPECT_OBJECT_NEXT:
+                closing = END_ARRAY if expect == EXPECT_ARRAY_NEXT else END_OBJECT
+                if kind == COMMA:
+                    expect = EXPECT_ARRAY_VALUE if expect == EXPECT_ARRAY_NEXT else EXPECT_OBJECT_KEY
+                elif kind == closing:
+                    stack = stack[:-1]
+                    expect = _after_value(stack)
+                else:
+                    return self._fail(text, state, index, expect)
+            elif expect == EXPECT_OBJECT_FIRST or expect == EXPECT_OBJECT_KEY:
+                if kind == STRING:
+                    expect = EXPECT_COLON
+                elif kind == END_OBJECT and expect == EXPECT_OBJECT_FIRST:
+                    stack = stack[:-1]
+                    expect = _after_value(stack)
+                else:
+                    return self._fail(text, state, index, expect)
+            elif expect == EXPECT_COLON:
+                if kind != COLON:
+                    return self._fail(text, state, index, expect)
+                expect = EXPECT_OBJECT_VALUE
+            else:
+                return self._fail(text, state, index, expect)
+            index += 1
+
+        if expect != EXPECT_END:
+            state.error = (_EXPECT_MESSAGES[expect], len(text))
+            state.error_token = count
+
+    def _fail(self, text, state, index, expect):
+        """记录第 index 个记号处的错误；无效的字符串交给 json 的字符串扫描得到确切的消息与位置"""
+        position = state.starts[index]
+        state.error = (_EXPECT_MESSAGES[expect], position)
+        state.error_token = index
+        if state.kinds[index] == INVALID and text[position] == '"' and expect in (
+                *_VALUE_STATES, EXPECT_OBJECT_FIRST, EXPECT_OBJECT_KEY):
+            try:
+                json.decoder.scanstring(text, position + 1, True)
+            except json.JSONDecodeError as e:
+                state.error = (e.msg, e.pos)
+
+
+def _after_value(stack):
+    """一个值结束后期待的下一项"""
+    if not stack:
+        return EXPECT_END
+    return EXPECT_ARRAY_NEXT if stack[-1] == '[' else EXPECT_OBJECT_NEXT
+
+
+def _extend_shifted(target, source, start, delta, should_stop):
+    """把 source[start:] 的各项加上 delta 后追加到 target"""
+    for offset in range(start, len(source), SHIFT_CHUNK):
+        if should_stop is not None and should_stop():
+            raise ValidationStopped()
+        target.extend(map(delta.__add__, source[offset:offset + SHIFT_CHUNK]))
+
+
+def _find(values, value):
+    try:
+        return values.index(value)
+    except ValueError:
+        return -1
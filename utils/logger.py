@@ -197,6 +197,10 @@ class GlobalLogger:
         """记录系统事件"""
         self.info(f"系统事件: {event} - {details}")
     
+    def get_log_dir(self) -> Path:
+        """获取当天的日志目录"""
+        return self.log_dir
+    
     def cleanup_old_logs(self, days_to_keep: int = 30):
         """清理旧日志文件"""
         try:
@@ -260,6 +264,10 @@ def log_system_event(event: str, details: str = ""):
     """记录系统事件"""
     _global_logger.log_system_event(event, details)
 
+def get_log_dir() -> Path:
+    """获取当天的日志目录"""
+    return _global_logger.get_log_dir()
+
 def cleanup_old_logs(days_to_keep: int = 30):
     """清理旧日志文件"""
     _global_logger.cleanup_old_logs(days_to_keep)
@@ -0,0 +1,44 @@
+"""
+文件搜索引擎（不依赖 PySide6）
+
+- walker: 基于 os.scandir 的并行目录遍历，复用 DirEntry 的 stat 数据
+- ignore: 遍历剪枝规则（包含/排除通配符、.gitignore、最大深度），被排除的目录不会进入
+- metafilter: 按大小/修改时间/类型筛选文件，在遍历时直接使用目录项的 stat 数据
+- textdetect: 按文件内容嗅探文本与编码（BOM/NUL/UTF-8/GB18030/UTF-16），结果按设备号+inode+mtime 缓存
+- content: 文件内容扫描，分块流式匹配预编译的模式，可在进程池中运行，可同时记录命中行及上下文
+- lines: 按行号读取文件片段（mmap），用于预览跳转
+- multi: 多关键词搜索的 Aho–Corasick 自动机
+- replace: 批量查找替换（预览差异、原子替换、替换日志与撤销）
+- dupes: 重复文件查找（大小 -> 首尾哈希 -> 全文 BLAKE2，哈希按 路径+大小+mtime 缓存）
+- textpipe: 预览区文本的流式处理（外部归并排序、去重、统计），结果写入按页读取的临时文件
+- engine: 组合遍历与内容扫描，按批次产出搜索结果
+- index: 持久化三元组内容索引
+- watcher: 目录快照，文件变化后只重新扫描发生变化的目录
+
+- cli: 命令行入口（python -m utils.search），结果以 NDJSON 流式输出，便于脚本与 CI 基准测试
+
+GUI 中的 FileSearchThread 只是本引擎的一层 Qt 信号封装
+"""
+
+from .walker import FileEntry, walk_files
+from .engine import SearchOptions, SearchEngine
+from .watcher import DirChanges, TreeSnapshot
+from .textdetect import TextDetector, text_detector, sniff_encoding
+from .ignore import DEFAULT_EXCLUDES, WalkRules, split_patterns
+from .metafilter import FILE_TYPES, MetaFilter, parse_size
+from .content import LineHit
+from .lines import read_line_window
+from .multi import AhoCorasick, split_terms
+from .replace import ReplaceSpec, ReplaceEngine, ReplaceJournal, DEFAULT_JOURNAL_PATH
+from .dupes import DuplicateFinder, DuplicateGroup, HashCache
+from .textpipe import TextBuffer, TextPipeline, TextStats, PipelineStopped, text_lines
+
+__all__ = [
+    'FileEntry', 'walk_files', 'SearchOptions', 'SearchEngine', 'DirChanges', 'TreeSnapshot',
+    'TextDetector', 'text_detector', 'sniff_encoding', 'DEFAULT_EXCLUDES', 'WalkRules', 'split_patterns',
+    'FILE_TYPES', 'MetaFilter', 'parse_size',
+    'LineHit', 'read_line_window', 'AhoCorasick', 'split_terms',
+    'ReplaceSpec', 'ReplaceEngine', 'ReplaceJournal', 'DEFAULT_JOURNAL_PATH',
+    'DuplicateFinder', 'DuplicateGroup', 'HashCache',
+    'TextBuffer', 'TextPipeline', 'TextStats', 'PipelineStopped', 'text_lines',
+]
@@ -0,0 +1,8 @@
+"""python -m utils.search：搜索引擎命令行，见 cli.py"""
+
+import sys
+
+from .cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
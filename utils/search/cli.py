@@ -0,0 +1,284 @@
+"""
+搜索引擎的命令行入口（不依赖 PySide6）：python -m utils.search <命令> ...
+
+- search:   文件名 / 正则 / 全文 / 多关键词搜索
+- dupes:    重复文件查找
+- replace:  批量查找替换（默认只预览，--apply 才写入）
+- rollback: 撤销最近一次替换
+
+结果以 NDJSON（每行一个 JSON 对象）流式写到标准输出，进度与错误写到标准错误；
+与 GUI 中的 FileSearchThread / FileReplaceThread 使用同一套引擎
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+from .engine import SearchOptions, SearchEngine
+from .metafilter import FILE_TYPES, parse_size
+from .ignore import split_patterns
+from .dupes import DuplicateFinder
+from .replace import ReplaceSpec, ReplaceEngine, ReplaceJournal
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+_DURATION_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$', re.IGNORECASE)
+
+
+def parse_duration(text):
+    """"90" / "30m" / "24h" / "7d" / "2w" -> 秒数（不带单位时按天）"""
+    match = _DURATION_RE.match(text)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"无法识别的时长: {text}")
+    return float(match.group(1)) * _DURATION_UNITS[(match.group(2) or 'd').lower()]
+
+
+def _size_arg(text):
+    try:
+        return parse_size(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _emit(record):
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class _Progress:
+    """--progress 时把进度节流后写到标准错误"""
+
+    INTERVAL = 0.5
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self._last = 0.0
+
+    def __call__(self, *values):
+        now = time.monotonic()
+        if self.enabled and now - self._last >= self.INTERVAL:
+            self._last = now
+            sys.stderr.write(f"progress {' / '.join(str(value) for value in values)}\n")
+
+
+# -------------- 命令 --------------
+def _walk_options(args, mode, pattern, **extra):
+    now = time.time()
+    exclude = None
+    if args.exclude is not None:
+        exclude = [item for text in args.exclude for item in split_patterns(text)]
+    return SearchOptions(
+        args.root, pattern, mode=mode, workers=args.workers, processes=args.processes,
+        include=[item for text in args.include for item in split_patterns(text)],
+        exclude=exclude, use_gitignore=args.gitignore,
+        min_size=args.min_size, max_size=args.max_size,
+        modified_after=now - args.newer if args.newer else None,
+        modified_before=now - args.older if args.older else None,
+        file_types=args.type or None, max_depth=args.max_depth,
+        **extra
+    )
+
+
+def _hit_record(hit):
+    record = {'line': hit.line, 'column': hit.column, 'text': hit.text}
+    if hit.before or hit.after:
+        record['before'] = list(hit.before)
+        record['after'] = list(hit.after)
+    return record
+
+
+def cmd_search(args):
+    options = _walk_options(
+        args, args.mode, args.pattern, content=args.content or "", case_sensitive=args.case_sensitive,
+        use_index=not args.no_index, index_dir=args.index_dir,
+        line_hits=args.hits, context_lines=args.context
+    )
+    engine = SearchEngine(options)
+    start = time.perf_counter()
+    for batch in engine.iter_batches(on_progress=_Progress(args.progress)):
+        for entry in batch:
+            record = {'type': 'file', 'path': entry.path, 'rel_path': entry.rel_path,
+                      'size': entry.size, 'mtime': entry.mtime}
+            hits = engine.hits.pop(entry.path, None)
+            if hits:
+                record['hits'] = [_hit_record(hit) for hit in hits]
+            _emit(record)
+        sys.stdout.flush()
+    _emit({'type': 'summary', 'found': engine.found_count, 'processed': engine.processed_count,
+           'elapsed': round(time.perf_counter() - start, 3)})
+    return 0
+
+
+def cmd_dupes(args):
+    options = _walk_options(args, 'duplicates', args.pattern)
+    finder = DuplicateFinder(options, cache_path=args.cache, min_size=args.min_size or 1)
+    start = time.perf_counter()
+    progress = _Progress(args.progress)
+    groups = finder.find(on_progress=progress, on_hash_progress=progress)
+    for group in groups:
+        _emit({'type': 'group', 'size': group.size, 'digest': group.digest.hex(),
+               'paths': [entry.path for entry in group.entries]})
+    _emit({'type': 'summary', 'groups': finder.group_count, 'duplicates': finder.duplicate_count,
+           'wasted_bytes': finder.wasted_bytes, 'processed': finder.processed_count,
+           'compared': finder.candidate_count, 'read': finder.read_count,
+           'elapsed': round(time.perf_counter() - start, 3)})
+    return 0
+
+
+def _read_paths(args):
+    """命令行中的路径；"-" 表示从标准输入读取（每行一个路径，或 search 命令输出的 NDJSON）"""
+    paths = []
+    for item in args.paths:
+        if item != '-':
+            paths.append(item)
+            continue
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                record = json.loads(line)
+                if record.get('type') == 'file':
+                    paths.append(record['path'])
+            else:
+                paths.append(line)
+    return paths
+
+
+def cmd_replace(args):
+    spec = ReplaceSpec(args.find, args.replace, args.regex, args.case_sensitive)
+    try:
+        spec.pattern()
+    except re.error as e:
+        sys.stderr.write(f"正则表达式错误: {e}\n")
+        return 2
+    engine = ReplaceEngine(spec, _read_paths(args), processes=args.processes, journal_path=args.journal)
+    progress = _Progress(args.progress)
+    start = time.perf_counter()
+    if not args.apply:
+        previews = engine.preview(progress)
+        for item in previews:
+            record = {'type': 'preview', 'path': item.path, 'count': item.count, 'hunks': item.hunks}
+            if item.error:
+                record['error'] = item.error
+            elif args.diff and item.count:
+                record['diff'] = item.diff
+            _emit(record)
+        _emit({'type': 'summary', 'files': sum(1 for item in previews if item.count),
+               'replacements': sum(item.count for item in previews),
+               'skipped': sum(1 for item in previews if item.error),
+               'elapsed': round(time.perf_counter() - start, 3)})
+        return 0
+
+    result = engine.apply(progress)
+    for path, count in result.modified:
+        _emit({'type': 'modified', 'path': path, 'count': count})
+    for path, reason in result.failures:
+        _emit({'type': 'failed', 'path': path, 'error': reason})
+    _emit({'type': 'summary', 'transaction': result.transaction, 'files': len(result.modified),
+           'replacements': sum(count for _, count in result.modified), 'failed': len(result.failures),
+           'elapsed': round(time.perf_counter() - start, 3)})
+    return 1 if result.failures else 0
+
+
+def cmd_rollback(args):
+    journal = ReplaceJournal(args.journal)
+    try:
+        result = journal.rollback(args.transaction, force=args.force)
+    finally:
+        journal.close()
+    if result is None:
+        _emit({'type': 'summary', 'restored': 0, 'conflicts': 0})
+        return 0
+    restored, conflicts = result
+    for path in restored:
+        _emit({'type': 'restored', 'path': path})
+    for path, reason in conflicts:
+        _emit({'type': 'conflict', 'path': path, 'error': reason})
+    _emit({'type': 'summary', 'restored': len(restored), 'conflicts': len(conflicts)})
+    return 1 if conflicts else 0
+
+
+# -------------- 参数 --------------
+def _add_walk_arguments(parser):
+    parser.add_argument('root', help="搜索根目录")
+    group = parser.add_argument_group("遍历与筛选")
+    group.add_argument('--include', action='append', default=[], metavar='GLOB',
+                       help="只包含匹配的文件（可重复，或以逗号分隔）")
+    group.add_argument('--exclude', action='append', metavar='GLOB',
+                       help="排除的文件/目录（可重复）；指定后替换默认排除列表，--exclude '' 表示不排除")
+    group.add_argument('--gitignore', action='store_true', help="遵循 .gitignore / .ignore")
+    group.add_argument('--min-size', type=_size_arg, metavar='SIZE', help="最小文件大小，如 100MB")
+    group.add_argument('--max-size', type=_size_arg, metavar='SIZE', help="最大文件大小")
+    group.add_argument('--newer', type=parse_duration, metavar='AGE', help="只包含该时长内修改过的文件，如 7d、24h")
+    group.add_argument('--older', type=parse_duration, metavar='AGE', help="只包含该时长以前修改的文件")
+    group.add_argument('--type', action='append', choices=sorted(FILE_TYPES), help="文件类型（可重复）")
+    group.add_argument('--max-depth', type=int, metavar='N', help="文件的最大深度，1 表示只搜索根目录本身")
+    group.add_argument('--workers', type=int, metavar='N', help="遍历线程数")
+    group.add_argument('--processes', type=int, metavar='N', help="工作进程数")
+    parser.add_argument('--progress', action='store_true', help="把进度写到标准错误")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m utils.search',
+        description="KiwiKit 文件搜索引擎命令行，结果以 NDJSON 输出到标准输出"
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('search', help="文件名 / 正则 / 全文 / 多关键词搜索")
+    _add_walk_arguments(search)
+    search.add_argument('pattern', help="文件名通配符、正则、全文文本或以逗号分隔的关键词")
+    search.add_argument('--mode', choices=('filename', 'regex', 'fulltext', 'multi'), default='filename')
+    search.add_argument('--content', help="文件名/正则模式下附加的内容过滤（正则）")
+    search.add_argument('-s', '--case-sensitive', action='store_true')
+    search.add_argument('--hits', action='store_true', help="输出内容搜索的命中行")
+    search.add_argument('--context', type=int, default=0, metavar='N', help="命中行的上下文行数")
+    search.add_argument('--no-index', action='store_true', help="不使用三元组索引")
+    search.add_argument('--index-dir', help="索引目录")
+    search.set_defaults(func=cmd_search)
+
+    dupes = commands.add_parser('dupes', help="查找重复文件")
+    _add_walk_arguments(dupes)
+    dupes.add_argument('pattern', nargs='?', default='*', help="文件名通配符，默认 *")
+    dupes.add_argument('--cache', help="哈希缓存路径")
+    dupes.set_defaults(func=cmd_dupes)
+
+    replace = commands.add_parser('replace', help="批量查找替换（默认只预览）")
+    replace.add_argument('paths', nargs='+', help="要处理的文件；- 表示从标准输入读取（路径或 search 的输出）")
+    replace.add_argument('--find', required=True)
+    replace.add_argument('--replace', default="")
+    replace.add_argument('--regex', action='store_true')
+    replace.add_argument('-s', '--case-sensitive', action='store_true')
+    replace.add_argument('--apply', action='store_true', help="执行替换（原内容记入替换日志，可用 rollback 撤销）")
+    replace.add_argument('--diff', action='store_true', help="预览时输出差异")
+    replace.add_argument('--journal', help="替换日志路径")
+    replace.add_argument('--processes', type=int, metavar='N', help="工作进程数")
+    replace.add_argument('--progress', action='store_true', help="把进度写到标准错误")
+    replace.set_defaults(func=cmd_replace)
+
+    rollback = commands.add_parser('rollback', help="撤销最近一次（或指定的）替换")
+    rollback.add_argument('--transaction', type=int, help="事务号，默认最近一次")
+    rollback.add_argument('--journal', help="替换日志路径")
+    rollback.add_argument('--force', action='store_true', help="替换后又被修改的文件也用原内容覆盖")
+    rollback.set_defaults(func=cmd_rollback)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'root', None) is not None and not os.path.isdir(args.root):
+        sys.stderr.write(f"目录不存在: {args.root}\n")
+        return 2
+    try:
+        status = args.func(args)
+        sys.stdout.flush()
+        return status
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # 下游（如 head）提前关闭了管道：把标准输出指向空设备，避免退出时再次刷新报错
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
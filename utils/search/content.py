@@ -0,0 +1,391 @@
+"""
+文件内容扫描
+模式只编译一次（每个工作进程缓存一份），文件按块流式读取。
+打开文件时先嗅探开头几 KB 判断是否为文本及其编码：UTF-8 文件的每块直接与 bytes 模式匹配
+（仅限按字节匹配与按字符匹配等价的模式，见 _bytes_equivalent）；GBK/GB18030、UTF-16 等其他编码经增量解码器转换为 str 后再匹配，块边界不会截断多字节字符。
+需要行级结果时，同一遍扫描中记录每个命中行的行号、列号、内容及上下文，不再二次读取文件
+"""
+
+import re
+import codecs
+from collections import deque, namedtuple
+from functools import lru_cache
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from .index import TrigramCollector
+from .multi import AhoCorasick
+from .textdetect import SNIFF_SIZE, UTF8_ENCODINGS, sniff_encoding
+
+CHUNK_SIZE = 1024 * 1024
+# 每个文件最多记录的命中行数，超出后只判断是否匹配
+MAX_HITS_PER_FILE = 1000
+# 命中行/上下文行最多保留的字符数（压缩过的超长行只截取开头）
+MAX_LINE_CHARS = 500
+
+# 一个命中行：行号、列号均从 1 开始；before/after 为上下文行；
+# offset 为该行在文件中的字节偏移（仅 UTF-8 文件，其他编码为 None），预览时据此直接定位；
+# terms 为多关键词搜索时该行出现的关键词下标，其他模式为 None
+LineHit = namedtuple('LineHit', ['line', 'column', 'text', 'before', 'after', 'offset', 'terms'],
+                     defaults=(None,))
+
+
+# 与按字符匹配等价的位置断言（\b、\B 依赖 \w，非 ASCII 字母在 str 中是单词字符、在 bytes 中不是）
+_SAFE_AT = {sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING, sre_constants.AT_END,
+            sre_constants.AT_END_STRING}
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, 'POSSESSIVE_REPEAT'):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+
+def _bytes_equivalent(pattern):
+    """正则按 UTF-8 字节匹配是否与按字符匹配结果相同
+
+    只允许 ASCII 字面量、只含 ASCII 字符/范围的字符类、行首/行尾、分组、分支与作用于它们的量词：
+    UTF-8 中 ASCII 字节只出现在 ASCII 字符里，这些结构在两种模式下匹配同样的文本。
+    "."、取反的字符类、字符类简写与非 ASCII 字符按字节匹配时会把一个多字节字符当作几个字符，只能解码后匹配
+    """
+    if not pattern.isascii():
+        return False
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return False
+
+    def safe(items):
+        for op, arg in items:
+            if op is sre_constants.LITERAL:
+                continue
+            if op is sre_constants.AT:
+                if arg not in _SAFE_AT:
+                    return False
+            elif op is sre_constants.IN:
+                # 分支 "bar|baz" 也会被优化成字符类
+                if any(item_op not in (sre_constants.LITERAL, sre_constants.RANGE) for item_op, _ in arg):
+                    return False
+            elif op is sre_constants.SUBPATTERN:
+                if not safe(arg[-1]):
+                    return False
+            elif op is sre_constants.BRANCH:
+                if not all(safe(branch) for branch in arg[1]):
+                    return False
+            elif op in _REPEATS:
+                if not safe(arg[2]):
+                    return False
+            else:
+                return False
+        return True
+
+    return safe(parsed)
+
+
+class ContentMatcher:
+    """内容匹配器：UTF-8 数据用 bytes 模式搜索，其他编码解码后用 str 模式搜索
+
+    pattern 为关键词元组时按多关键词搜索：由 Aho–Corasick 自动机的 trie 生成一个正则，
+    任一关键词出现即匹配
+    """
+
+    def __init__(self, pattern, case_sensitive=False, is_regex=False):
+        self.pattern = pattern
+        self.case_sensitive = case_sensitive
+        self.is_regex = is_regex
+
+        if isinstance(pattern, tuple):
+            self.automaton = AhoCorasick(pattern, case_sensitive)
+            source = self.automaton.trie_regex()
+            literals = pattern
+        else:
+            self.automaton = None
+            source = pattern if is_regex else re.escape(pattern)
+            literals = (pattern,)
+        # 关键词（转义后的字面量、trie 正则）按字节匹配总是等价的；用户的正则需要检查
+        bytes_safe = not is_regex or isinstance(pattern, tuple) or _bytes_equivalent(pattern)
+        # 文件分块读取，块边界不在行首；MULTILINE 使 ^ / $ 只在行首/行尾匹配，结果与块的划分无关
+        flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+        self.text_regex = re.compile(source, flags)
+        # bytes 模式的 IGNORECASE 只折叠 ASCII；非 ASCII 且忽略大小写时只能解码后匹配
+        if bytes_safe and (case_sensitive or all(literal.isascii() for literal in literals)):
+            self.bytes_regex = re.compile(source.encode('utf-8'), flags)
+        else:
+            self.bytes_regex = None
+        # 非正则模式下跨块匹配最多需要保留的长度
+        longest = max(literals, key=len)
+        self.bytes_overlap = 0 if is_regex else max(0, len(longest.encode('utf-8')) - 1)
+        self.text_overlap = 0 if is_regex else max(0, len(longest) - 1)
+
+    def search_bytes(self, chunk):
+        return self.bytes_regex.search(chunk) is not None
+
+    def search_text(self, chunk):
+        return self.text_regex.search(chunk) is not None
+
+
+@lru_cache(maxsize=8)
+def get_matcher(pattern, case_sensitive=False, is_regex=False):
+    """获取（并缓存）匹配器，工作进程中同一次搜索只编译一次"""
+    return ContentMatcher(pattern, case_sensitive, is_regex)
+
+
+def _read_chunks(f, head, chunk_size):
+    yield head
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            return
+        yield data
+
+
+def _decode_chunks(chunks, encoding):
+    decoder = codecs.getincrementaldecoder(encoding)('replace')
+    for data in chunks:
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _feed_chunks(chunks, feed):
+    for data in chunks:
+        feed(data)
+        yield data
+
+
+def _line_blocks(chunks, newline):
+    """把连续的块重新切分为以整行结尾的块（最后一块可能没有换行符）"""
+    carry = newline[:0]
+    for data in chunks:
+        buf = carry + data if carry else data
+        cut = buf.rfind(newline) + 1
+        if cut == 0:
+            carry = buf
+            continue
+        carry = buf[cut:]
+        yield buf if cut == len(buf) else buf[:cut]
+    if carry:
+        yield carry
+
+
+class LineHitCollector:
+    """在扫描过程中收集命中行及其上下文
+
+    没有命中的块只统计换行符个数、保留末尾几行作为上文，只有命中附近的行才逐行处理
+    """
+
+    def __init__(self, context=2, max_hits=MAX_HITS_PER_FILE):
+        self.context = context
+        self.max_hits = max_hits
+        self.hits = []
+
+    def start(self, regex, newline, decode, track_offset, automaton=None):
+        self._regex = regex
+        self._automaton = automaton
+        self._newline = newline
+        self._decode = decode
+        self._offset = 0 if track_offset else None
+        self._line_no = 1
+        self._before = deque(maxlen=self.context)  # 最近几行（未解码）
+        self._waiting = []  # 还在收集下文的命中
+
+    def _search(self, buf, pos):
+        if len(self.hits) >= self.max_hits:
+            return None
+        return self._regex.search(buf, pos)
+
+    def _text(self, line, text=None):
+        if text is None:
+            text = self._decode(line)
+        if text.endswith('\r'):
+            text = text[:-1]
+        return text[:MAX_LINE_CHARS]
+
+    def _add_after(self, line):
+        text = self._text(line)
+        waiting = []
+        for hit in self._waiting:
+            hit.after.append(text)
+            if len(hit.after) < self.context:
+                waiting.append(hit)
+        self._waiting = waiting
+
+    def _keep_tail(self, buf, pos, end):
+        """保留 buf[pos:end] 的最后几行作为上文（end 处为行尾或块尾）"""
+        newline = self._newline
+        stop = end - 1 if buf[end - 1:end] == newline else end
+        lines = []
+        while len(lines) < self.context and stop >= pos:
+            cut = buf.rfind(newline, pos, stop)
+            start = pos if cut < 0 else cut + 1
+            lines.append(buf[start:stop])
+            stop = start - 1
+        self._before.extend(reversed(lines))
+
+    def feed(self, buf):
+        """处理以整行结尾的一块数据（bytes 或 str）"""
+        newline = self._newline
+        size = len(buf)
+        pos = 0
+        line_no = self._line_no
+        match = self._search(buf, 0)
+        while pos < size and (match is not None or self._waiting):
+            if not self._waiting:
+                # 直接跳到下一个命中所在的行，中间的行只统计个数
+                start = buf.rfind(newline, pos, match.start()) + 1
+                if start > pos:
+                    line_no += buf.count(newline, pos, start)
+                    if self.context:
+                        self._keep_tail(buf, pos, start)
+                    pos = start
+            end = buf.find(newline, pos)
+            if end < 0:
+                end = size
+            line = buf[pos:end]
+            if self._waiting:
+                self._add_after(line)
+            if match is not None and match.start() <= end:
+                column = len(self._decode(line[:match.start() - pos])) + 1
+                offset = self._offset + pos if self._offset is not None else None
+                text = self._decode(line)
+                terms = self._automaton.terms_in(text) if self._automaton is not None else None
+                hit = LineHit(line_no, column, self._text(line, text), [self._text(item) for item in self._before],
+                              [], offset, terms)
+                self.hits.append(hit)
+                if self.context:
+                    self._waiting.append(hit)
+                match = self._search(buf, end + 1)
+            if self.context:
+                self._before.append(line)
+            pos = end + 1
+            line_no += 1
+        if pos < size:
+            line_no += buf.count(newline, pos)
+            if self.context:
+                self._keep_tail(buf, pos, size)
+        self._line_no = line_no
+        if self._offset is not None:
+            self._offset += size
+
+
+def _match_chunks(chunks, search, newline, overlap, feed=None):
+    """对连续的块（bytes 或 str）执行搜索
+
+    每块只扫描到最后一个换行符为止，余下部分并入下一块，
+    保证不跨行的模式不会因分块而漏匹配。
+    传入 feed 时会消费完所有块以便同时建立索引
+    """
+    empty = newline[:0]
+    carry = empty
+    found = False
+    for data in chunks:
+        if feed is not None:
+            feed(data)
+        if found:
+            continue
+        buf = carry + data if carry else data
+        cut = buf.rfind(newline) + 1
+        if cut == 0:
+            # 超长行：扫描整块，只保留字面模式可能跨越的尾部
+            found = search(buf)
+            carry = buf[-overlap:] if overlap else empty
+        else:
+            found = search(buf if cut == len(buf) else buf[:cut])
+            carry = buf[cut:]
+        if found and feed is None:
+            return True
+    return found or (bool(carry) and search(carry))
+
+
+def _utf8_text(data):
+    return data.decode('utf-8', 'replace')
+
+
+def _collect_hits(chunks, encoding, matcher, hits, collector):
+    """读完整个文件并收集命中行"""
+    if encoding in UTF8_ENCODINGS and matcher.bytes_regex is not None:
+        if collector is not None:
+            chunks = _feed_chunks(chunks, collector.feed)
+        newline = b"\n"
+        hits.start(matcher.bytes_regex, newline, _utf8_text, True, matcher.automaton)
+    else:
+        chunks = _decode_chunks(chunks, encoding)
+        if collector is not None:
+            chunks = _feed_chunks(chunks, lambda text: collector.feed(text.encode('utf-8')))
+        newline = "\n"
+        hits.start(matcher.text_regex, newline, str, False, matcher.automaton)
+    for block in _line_blocks(chunks, newline):
+        hits.feed(block)
+    return bool(hits.hits)
+
+
+def scan_file(path, matcher, chunk_size=CHUNK_SIZE, collector=None, hits=None):
+    """嗅探并扫描单个文件
+
+    Args:
+        collector: 可选 TrigramCollector，传入时读完整个文件以同时提取三元组（统一按 UTF-8 提取）
+        hits: 可选 LineHitCollector，传入时读完整个文件并记录命中行
+
+    Returns:
+        (是否匹配, 编码)；二进制文件返回 (False, None)，不做匹配
+    """
+    with open(path, 'rb') as f:
+        head = f.read(SNIFF_SIZE)
+        encoding = sniff_encoding(head)
+        if encoding is None:
+            return False, None
+        chunks = _read_chunks(f, head, chunk_size)
+
+        if hits is not None:
+            return _collect_hits(chunks, encoding, matcher, hits, collector), encoding
+        if encoding in UTF8_ENCODINGS and matcher.bytes_regex is not None:
+            feed = collector.feed if collector is not None else None
+            found = _match_chunks(chunks, matcher.search_bytes, b"\n", matcher.bytes_overlap, feed)
+        else:
+            if collector is not None:
+                feed = lambda text: collector.feed(text.encode('utf-8'))
+            else:
+                feed = None
+            found = _match_chunks(_decode_chunks(chunks, encoding), matcher.search_text, "\n",
+                                  matcher.text_overlap, feed)
+        return found, encoding
+
+
+def scan_files(paths, pattern, case_sensitive=False, is_regex=False, index_flags=None, context=None):
+    """扫描一批文件（进程池任务入口）
+
+    Args:
+        index_flags: 与 paths 对应的布尔列表，为 True 的文件同时提取三元组用于索引
+        context: 不为 None 时记录命中行及前后 context 行上下文
+
+    Returns:
+        (匹配的文件下标列表, {下标: 三元组字节串或 None}, {下标: 编码，二进制为 None},
+         {下标: [LineHit, ...]})；
+        二进制文件的三元组为空字节串，不可读的文件不出现在编码字典中
+    """
+    matcher = get_matcher(pattern, case_sensitive, is_regex)
+    matched = []
+    grams = {}
+    encodings = {}
+    line_hits = {}
+    for index, path in enumerate(paths):
+        collector = TrigramCollector() if index_flags and index_flags[index] else None
+        hits = LineHitCollector(context) if context is not None else None
+        try:
+            found, encoding = scan_file(path, matcher, collector=collector, hits=hits)
+            encodings[index] = encoding
+            if found:
+                matched.append(index)
+                if hits is not None:
+                    line_hits[index] = hits.hits
+            if collector is not None:
+                grams[index] = collector.result() if encoding is not None else b""
+        except (OSError, PermissionError):
+            if collector is not None:
+                grams[index] = None
+    return matched, grams, encodings, line_hits
@@ -0,0 +1,350 @@
+"""
+重复文件查找（不依赖 PySide6）
+复用搜索引擎的目录遍历（包含/排除规则、.gitignore、进度回调），再分三步逐步缩小候选范围：
+1. 按大小分组：大小唯一的文件不可能重复，不读取内容
+2. 同样大小的文件比较首尾各 4 KB 的哈希；不超过 8 KB 的文件此时已读取全部内容
+3. 首尾仍相同的文件在进程池中计算全文 BLAKE2 哈希
+同一文件的多个硬链接在比较之前合并为一个（删除其一不释放空间，不算重复）。
+哈希按 (路径, 大小, mtime) 缓存在 SQLite 中，再次扫描同一目录时未变化的文件无需读取
+"""
+
+import os
+import time
+import sqlite3
+import logging
+from collections import namedtuple, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from hashlib import blake2b
+
+from .engine import SearchEngine, _MP_CONTEXT
+
+logger = logging.getLogger('KiwiKit.search')
+
+DEFAULT_HASH_CACHE_PATH = os.getenv(
+    'KIWIKIT_HASH_CACHE', os.path.join(os.path.expanduser("~"), ".kiwikit", "hash_cache.sqlite")
+)
+# 首尾各读取的字节数
+EDGE_SIZE = 4096
+DIGEST_SIZE = 32
+READ_SIZE = 1024 * 1024
+# 每个进程池任务的文件数 / 字节数上限；全部待读取的数据不超过一个任务时直接在当前线程计算
+TASK_FILES = 64
+TASK_BYTES = 64 * 1024 * 1024
+# 哈希缓存保留的文件数，超出时删除最久未见到的记录
+MAX_CACHE_ENTRIES = 1_000_000
+
+# 一组内容相同的文件：size 为单个文件大小，digest 为全文哈希，entries 为 FileEntry 列表（按路径排序）
+DuplicateGroup = namedtuple('DuplicateGroup', ['size', 'digest', 'entries'])
+
+
+# -------------- 哈希计算（在工作进程中运行） --------------
+def _edge_digest(path, size):
+    with open(path, 'rb') as f:
+        digest = blake2b(digest_size=DIGEST_SIZE)
+        if size <= 2 * EDGE_SIZE:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(EDGE_SIZE))
+            f.seek(-EDGE_SIZE, os.SEEK_END)
+            digest.update(f.read(EDGE_SIZE))
+        return digest.digest()
+
+
+def _full_digest(path, size):
+    with open(path, 'rb') as f:
+        digest = blake2b(digest_size=DIGEST_SIZE)
+        while chunk := f.read(READ_SIZE):
+            digest.update(chunk)
+        return digest.digest()
+
+
+def edge_hashes(items):
+    """[(路径, 大小), ...] -> 首尾哈希列表，无法读取的文件为 None"""
+    return _hash_all(_edge_digest, items)
+
+
+def full_hashes(items):
+    """[(路径, 大小), ...] -> 全文哈希列表，无法读取的文件为 None"""
+    return _hash_all(_full_digest, items)
+
+
+def _hash_all(func, items):
+    results = []
+    for path, size in items:
+        try:
+            results.append(func(path, size))
+        except OSError:
+            results.append(None)
+    return results
+
+
+# -------------- 哈希缓存 --------------
+class HashCache:
+    """路径 -> (大小, mtime, 首尾哈希, 全文哈希)；大小或 mtime 变化后记录作废"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DEFAULT_HASH_CACHE_PATH
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                edge BLOB,
+                full BLOB,
+                seen REAL NOT NULL
+            )
+        """)
+        self._updates = {}
+
+    def lookup(self, entry):
+        """(首尾哈希, 全文哈希)，未缓存或已过期的部分为 None"""
+        row = self._conn.execute(
+            "SELECT size, mtime, edge, full FROM hashes WHERE path=?", (entry.path,)
+        ).fetchone()
+        if row is None or (row[0], row[1]) != (entry.size, entry.mtime):
+            return None, None
+        return row[2], row[3]
+
+    def store(self, entry, edge, full=None):
+        self._updates[entry.path] = (entry.path, entry.size, entry.mtime, edge, full)
+
+    def commit(self):
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hashes (path, size, mtime, edge, full, seen) VALUES (?, ?, ?, ?, ?, ?)",
+                (row + (now,) for row in self._updates.values())
+            )
+        self._updates = {}
+
+    def _prune(self):
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM hashes WHERE path IN "
+                "(SELECT path FROM hashes ORDER BY seen DESC LIMIT -1 OFFSET ?)", (MAX_CACHE_ENTRIES,)
+            )
+
+    def close(self):
+        try:
+            self.commit()
+            self._prune()
+        finally:
+            self._conn.close()
+
+
+# -------------- 查找 --------------
+def _collapse_links(entries):
+    """同样大小的一组文件中，指向同一文件（st_dev, st_ino 相同）的硬链接只保留路径最小的一个
+
+    遍历得到的 inode 不同的文件不必再取 stat；inode 为 0（Windows 的目录项不提供）时取 stat 确认
+    """
+    inodes = defaultdict(int)
+    for entry in entries:
+        inodes[entry.inode] += 1
+    unique, seen = [], set()
+    for entry in sorted(entries, key=lambda entry: entry.path):
+        if entry.inode and inodes[entry.inode] == 1:
+            unique.append(entry)
+            continue
+        try:
+            st = os.stat(entry.path)
+        except OSError:
+            unique.append(entry)
+            continue
+        key = (st.st_dev, st.st_ino)
+        if not st.st_ino or key not in seen:
+            seen.add(key)
+            unique.append(entry)
+    return unique
+
+
+class DuplicateFinder:
+    """重复文件查找
+
+    Args:
+        options: SearchOptions；遍历规则与文件名通配符同文件名搜索（mode 为 'duplicates'）
+        should_stop: 可选，返回 True 时尽快结束（不产出不完整的分组）
+        cache_path: 哈希缓存路径，默认 DEFAULT_HASH_CACHE_PATH
+        min_size: 参与比较的最小文件大小，默认跳过空文件
+    """
+
+    def __init__(self, options, should_stop=None, cache_path=None, min_size=1):
+        self.options = options
+        self.engine = SearchEngine(options, should_stop)
+        self.cache_path = cache_path
+        self.min_size = min_size
+        self.processed_count = 0   # 遍历过的文件数
+        self.candidate_count = 0   # 大小与其他文件相同、需要比较内容的文件数
+        self.read_count = 0        # 实际读取（未命中缓存）的次数
+        self.group_count = 0
+        self.duplicate_count = 0   # 各组中除第一个外的文件数
+        self.wasted_bytes = 0      # 删除多余副本可释放的空间
+        self._on_hash_progress = None
+        self._hashed = self._hash_total = 0
+
+    def is_stopped(self):
+        return self.engine.is_stopped()
+
+    def _open_cache(self):
+        try:
+            return HashCache(self.cache_path)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"哈希缓存不可用，将全部重新计算: {e}")
+            return None
+
+    def _map(self, func, entries, read_bytes):
+        """对 entries 并行计算哈希，返回与 entries 对应的列表；停止时未完成的部分为 None"""
+        results = [None] * len(entries)
+        if not entries:
+            return results
+        tasks, task, task_bytes = [], [], 0
+        for i, entry in enumerate(entries):
+            task.append(i)
+            task_bytes += read_bytes(entry)
+            if len(task) >= TASK_FILES or task_bytes >= TASK_BYTES:
+                tasks.append(task)
+                task, task_bytes = [], 0
+        if task:
+            tasks.append(task)
+
+        def items(task):
+            return [(entries[i].path, entries[i].size) for i in task]
+
+        if len(tasks) == 1:
+            results = func(items(tasks[0]))
+            self._progress(len(entries))
+            return results
+
+        with ProcessPoolExecutor(max_workers=self.options.processes, mp_context=_MP_CONTEXT) as pool:
+            futures = {pool.submit(func, items(task)): task for task in tasks}
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                task = futures[future]
+                try:
+                    for i, digest in zip(task, future.result()):
+                        results[i] = digest
+                except Exception as e:
+                    logger.warning(f"计算文件哈希失败: {e}")
+                self._progress(len(task))
+                if self.is_stopped():
+                    for pending in futures:
+                        pending.cancel()
+        return results
+
+    def find(self, on_progress=None, on_hash_progress=None):
+        """查找重复文件
+
+        Args:
+            on_progress: 遍历进度 on_progress(已处理文件数)
+            on_hash_progress: 内容比较进度 on_hash_progress(已比较文件数, 需比较文件数)
+
+        Returns:
+            DuplicateGroup 列表，按可释放的空间从大到小排列；被停止时返回空列表
+        """
+        by_size = defaultdict(list)
+        for batch in self.engine.iter_batches(on_progress=on_progress):
+            for entry in batch:
+                if entry.size >= self.min_size:
+                    by_size[entry.size].append(entry)
+        self.processed_count = self.engine.processed_count
+        if self.is_stopped():
+            return []
+
+        candidates = []
+        for group in by_size.values():
+            if len(group) > 1:
+                group = _collapse_links(group)
+                if len(group) > 1:
+                    candidates.extend(group)
+        del by_size
+        self.candidate_count = len(candidates)
+        self._on_hash_progress = on_hash_progress
+        self._hashed, self._hash_total = 0, len(candidates)
+
+        cache = self._open_cache()
+        try:
+            groups = self._compare(candidates, cache)
+        finally:
+            if cache is not None:
+                try:
+                    cache.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"保存哈希缓存失败: {e}")
+        if self.is_stopped():
+            return []
+
+        groups.sort(key=lambda group: (-group.size * (len(group.entries) - 1), group.entries[0].path))
+        self.group_count = len(groups)
+        self.duplicate_count = sum(len(group.entries) - 1 for group in groups)
+        self.wasted_bytes = sum(group.size * (len(group.entries) - 1) for group in groups)
+        return groups
+
+    def _progress(self, count):
+        self._hashed += count
+        if self._on_hash_progress:
+            self._on_hash_progress(self._hashed, self._hash_total)
+
+    def _compare(self, candidates, cache):
+        cached = [cache.lookup(entry) if cache is not None else (None, None) for entry in candidates]
+        edges = [edge for edge, _ in cached]
+
+        # 第二步：首尾哈希
+        missing = [i for i, edge in enumerate(edges) if edge is None]
+        self._progress(len(candidates) - len(missing))
+        computed = self._map(edge_hashes, [candidates[i] for i in missing],
+                             lambda entry: min(entry.size, 2 * EDGE_SIZE))
+        for i, edge in zip(missing, computed):
+            edges[i] = edge
+        self.read_count = len(missing)
+        if self.is_stopped():
+            return []
+
+        by_edge = defaultdict(list)
+        for i, entry in enumerate(candidates):
+            if edges[i] is not None:
+                by_edge[(entry.size, edges[i])].append(i)
+
+        # 第三步：全文哈希（首尾已覆盖全部内容的小文件直接沿用首尾哈希）
+        fulls = {}
+        need_full = []
+        for (size, edge), members in by_edge.items():
+            if len(members) < 2:
+                continue
+            for i in members:
+                if size <= 2 * EDGE_SIZE:
+                    fulls[i] = edge
+                elif cached[i][1] is not None and cached[i][0] == edge:
+                    fulls[i] = cached[i][1]
+                else:
+                    need_full.append(i)
+        # 全文哈希按读取量计入进度：需要全文比较的文件再计一次
+        self._hash_total += len(need_full)
+        computed = self._map(full_hashes, [candidates[i] for i in need_full], lambda entry: entry.size)
+        for i, full in zip(need_full, computed):
+            if full is not None:
+                fulls[i] = full
+        self.read_count += len(need_full)
+
+        if cache is not None:
+            for i, entry in enumerate(candidates):
+                if edges[i] is None:
+                    continue
+                full = fulls.get(i)
+                if full is None and cached[i][0] == edges[i]:
+                    full = cached[i][1]
+                cache.store(entry, edges[i], full)
+        if self.is_stopped():
+            return []
+
+        by_digest = defaultdict(list)
+        for i, digest in fulls.items():
+            by_digest[(candidates[i].size, digest)].append(candidates[i])
+        return [
+            DuplicateGroup(size, digest, sorted(entries, key=lambda entry: entry.path))
+            for (size, digest), entries in by_digest.items() if len(entries) > 1
+        ]
@@ -0,0 +1,404 @@
+"""
+文件搜索引擎
+遍历在线程池中并行进行，文件名/正则匹配在遍历线程中完成；
+需要匹配内容时先用三元组索引缩小候选范围，再把候选文件按批提交到进程池扫描验证，
+可同时得到每个文件的命中行（行号/列号/内容/上下文）。
+结果按批次产出
+"""
+
+import os
+import re
+import time
+import fnmatch
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from .walker import walk_files
+from .ignore import WalkRules
+from .metafilter import MetaFilter
+from .content import scan_files
+from .index import TrigramIndex, MAX_INDEX_FILE_SIZE, literal_trigrams, regex_trigrams
+from .textdetect import text_detector
+from .multi import split_terms
+
+logger = logging.getLogger('KiwiKit.search')
+
+# 每个进程池任务包含的文件数 / 字节数上限
+TASK_FILES = 64
+TASK_BYTES = 16 * 1024 * 1024
+# 宿主进程运行着 Qt 线程，fork 出的子进程会继承其状态而崩溃，统一使用 spawn
+_MP_CONTEXT = multiprocessing.get_context('spawn')
+
+
+class SearchOptions:
+    """搜索参数"""
+
+    def __init__(self, root, pattern, content="", case_sensitive=False, mode='filename',
+                 workers=None, processes=None, batch_size=256, batch_interval=0.1,
+                 use_index=True, index_dir=None, include=None, exclude=None, use_gitignore=False,
+                 line_hits=False, context_lines=2, min_size=None, max_size=None, modified_after=None,
+                 modified_before=None, file_types=None, max_depth=None):
+        self.root = root
+        self.pattern = pattern
+        self.content = content                # 可选：文件名/正则模式下附加的内容过滤（正则）
+        self.case_sensitive = case_sensitive
+        self.mode = mode                      # 'filename', 'fulltext', 'regex', 'multi'（多关键词）, 'duplicates'
+        self.workers = workers                # 遍历线程数
+        self.processes = processes            # 内容扫描进程数
+        self.batch_size = batch_size          # 每批最多结果数
+        self.batch_interval = batch_interval  # 两批之间的最长间隔（秒）
+        self.use_index = use_index            # 内容搜索是否使用三元组索引
+        self.index_dir = index_dir            # 索引目录，默认 ~/.kiwikit/search_index
+        self.include = include                # 文件包含通配符列表，空表示全部
+        self.exclude = exclude                # 排除通配符列表，None 表示默认排除（.git、node_modules 等）
+        self.use_gitignore = use_gitignore    # 是否遵循 .gitignore / .ignore
+        self.line_hits = line_hits            # 内容搜索时是否记录命中行
+        self.context_lines = context_lines    # 命中行的上下文行数
+        self.min_size = min_size              # 元数据筛选：大小范围（字节）
+        self.max_size = max_size
+        self.modified_after = modified_after  # 元数据筛选：修改时间范围（时间戳）
+        self.modified_before = modified_before
+        self.file_types = file_types          # 元数据筛选：metafilter.FILE_TYPES 中的类型键列表
+        self.max_depth = max_depth            # 文件最大深度（根目录中的文件为 1），None 表示不限
+
+
+class _Batcher:
+    """把零散结果聚合成批：达到数量上限或时间间隔时输出"""
+
+    def __init__(self, size, interval):
+        self.size = size
+        self.interval = interval
+        self.items = []
+        self.last_flush = time.monotonic()
+
+    def add(self, items):
+        self.items.extend(items)
+        if len(self.items) >= self.size or time.monotonic() - self.last_flush >= self.interval:
+            return self.flush()
+        return None
+
+    def flush(self):
+        items, self.items = self.items, []
+        self.last_flush = time.monotonic()
+        return items
+
+
+class SearchEngine:
+    """文件搜索引擎"""
+
+    def __init__(self, options, should_stop=None):
+        self.options = options
+        meta = MetaFilter(options.min_size, options.max_size, options.modified_after, options.modified_before,
+                          options.file_types)
+        self.rules = WalkRules(options.include, options.exclude, options.use_gitignore, meta, options.max_depth)
+        self._should_stop = should_stop
+        self.stopped = False
+        self.processed_count = 0
+        self.found_count = 0
+        # 文件路径 -> [LineHit, ...]（options.line_hits 为 True 时），由调用方随批次取走
+        self.hits = {}
+
+    def stop(self):
+        self.stopped = True
+
+    def is_stopped(self):
+        return self.stopped or bool(self._should_stop and self._should_stop())
+
+    # -------------- 匹配规则 --------------
+    def _content_query(self):
+        """内容匹配条件 (pattern, is_regex)，不需要匹配内容时返回 None
+
+        多关键词模式下 pattern 为关键词元组
+        """
+        opts = self.options
+        if opts.mode == 'fulltext':
+            return (opts.pattern, False) if opts.pattern else None
+        if opts.mode == 'multi':
+            terms = split_terms(opts.pattern)
+            return (terms, False) if terms else None
+        if opts.content:
+            try:
+                re.compile(opts.content)
+                return (opts.content, True)
+            except re.error:
+                # 不是合法正则时按普通文本处理
+                return (opts.content, False)
+        return None
+
+    def _scan_args(self, content_query):
+        """scan_files 除路径与索引标记外的参数"""
+        pattern, is_regex = content_query
+        opts = self.options
+        context = opts.context_lines if opts.line_hits else None
+        return pattern, opts.case_sensitive, is_regex, context
+
+    def _build_name_filter(self):
+        """构建在遍历线程中执行的文件名过滤函数"""
+        opts = self.options
+        if opts.mode in ('filename', 'duplicates'):
+            # 重复文件查找同样按文件名通配符筛选参与比较的文件
+            pattern = opts.pattern or '*'
+            flags = 0 if opts.case_sensitive else re.IGNORECASE
+            name_regex = re.compile(fnmatch.translate(pattern), flags)
+            return lambda entry: name_regex.match(entry.name) is not None
+
+        if opts.mode == 'regex':
+            flags = 0 if opts.case_sensitive else re.IGNORECASE
+            try:
+                regex = re.compile(opts.pattern, flags=flags)
+            except re.error:
+                return lambda entry: False
+            # 先检查文件名，再检查相对路径
+            return lambda entry: bool(regex.search(entry.name) or regex.search(entry.rel_path))
+
+        if opts.mode in ('fulltext', 'multi'):
+            if not opts.pattern:
+                return lambda entry: False
+            return lambda entry: True
+
+        return lambda entry: False
+
+    def _build_file_filter(self, content_query, seen):
+        name_filter = self._build_name_filter()
+        if content_query is None:
+            return name_filter
+
+        def file_filter(entry):
+            seen.add(entry.path)
+            # 是否为文本由内容扫描时嗅探决定，这里只排除已知的二进制文件
+            return name_filter(entry) and text_detector.entry_may_be_text(entry)
+        return file_filter
+
+    # -------------- 搜索 --------------
+    def iter_batches(self, on_progress=None, on_dir=None):
+        """执行搜索，按批产出 FileEntry 列表
+
+        on_dir 以 keep_all=True 传给 walk_files，可用于在搜索的同时建立目录快照
+        """
+        opts = self.options
+        batcher = _Batcher(opts.batch_size, opts.batch_interval)
+        content_query = self._content_query()
+        seen = set()
+        walked = {}  # 已遍历的目录 -> WalkState
+
+        def progress(count):
+            self.processed_count = count
+            if on_progress:
+                on_progress(count)
+
+        def dir_done(dir_path, rel_dir, all_files, subdirs, state):
+            walked[dir_path] = state
+            if on_dir:
+                on_dir(dir_path, rel_dir, all_files, subdirs, state)
+
+        entry_batches = walk_files(
+            opts.root, self._build_file_filter(content_query, seen), self.is_stopped, opts.workers, progress,
+            dir_done, self.rules, keep_all=on_dir is not None
+        )
+        if content_query is not None:
+            results = self._scan_contents(entry_batches, content_query, seen, walked)
+        else:
+            results = entry_batches
+
+        for entries in results:
+            self.found_count += len(entries)
+            batch = batcher.add(entries)
+            if batch:
+                yield batch
+        batch = batcher.flush()
+        if batch:
+            yield batch
+
+    def refresh(self, entries, removed=()):
+        """只重新检查发生变化的文件（供文件监视使用），同时更新索引
+
+        Args:
+            entries: 新建或被修改的 FileEntry 列表
+            removed: 已删除文件的路径
+
+        Returns:
+            entries 中仍符合搜索条件的 FileEntry 列表
+        """
+        name_filter = self._build_name_filter()
+        candidates = [entry for entry in entries if name_filter(entry)]
+        content_query = self._content_query()
+        if content_query is None:
+            return candidates
+
+        candidates = [entry for entry in candidates if text_detector.entry_may_be_text(entry)]
+        pattern, case_sensitive, is_regex, context = self._scan_args(content_query)
+        index = self._open_index()
+        try:
+            if index is not None:
+                index.remove_paths(removed)
+            flags = [index is not None and entry.size <= MAX_INDEX_FILE_SIZE for entry in candidates]
+            matched, grams, encodings, line_hits = scan_files(
+                [entry.path for entry in candidates], pattern, case_sensitive, is_regex, flags, context
+            )
+            for i, encoding in encodings.items():
+                text_detector.remember_entry(candidates[i], encoding)
+            for i, hits in line_hits.items():
+                self.hits[candidates[i].path] = hits
+            if index is not None:
+                for i, entry in enumerate(candidates):
+                    index.add_file(entry.path, entry.mtime, entry.size, grams.get(i))
+            return [candidates[i] for i in matched]
+        finally:
+            if index is not None:
+                try:
+                    index.close()
+                except Exception as e:
+                    logger.warning(f"保存三元组索引失败: {e}")
+
+    def _open_index(self):
+        """打开搜索根目录的三元组索引，失败时退化为全量扫描"""
+        if not self.options.use_index:
+            return None
+        try:
+            return TrigramIndex(self.options.root, self.options.index_dir)
+        except Exception as e:
+            logger.warning(f"三元组索引不可用，将全量扫描: {e}")
+            return None
+
+    def _filters_stat(self):
+        meta = self.rules.meta
+        return meta is not None and meta.checks_stat
+
+    def _deleted_paths(self, paths, seen, walked):
+        """完整遍历后，从索引中未被遍历到的路径里找出确实已被删除的文件
+
+        未被遍历到的文件也可能只是被剪枝规则排除（所在目录被剪掉、文件本身被排除或类型不符），
+        这些文件仍保留在索引中，切换规则后无需重新建立
+        """
+        root = os.path.abspath(self.options.root)
+        deleted = []
+        for path in paths:
+            if path in seen:
+                continue
+            parent, child = os.path.dirname(path), path
+            while parent not in walked and len(parent) > len(root):
+                parent, child = os.path.dirname(parent), parent
+            state = walked.get(parent)
+            if state is None:
+                deleted.append(path)
+                continue
+            rel_path = os.path.relpath(child, root)
+            name = os.path.basename(child)
+            if child == path:
+                meta = self.rules.meta
+                excluded = state.skip_file(name, rel_path) or (meta is not None and not meta.match_name(name))
+            else:
+                excluded = state.skip_dir(name, rel_path)
+            if not excluded:
+                deleted.append(path)
+        return deleted
+
+    def _scan_contents(self, entry_batches, content_query, seen, walked):
+        """用索引筛选候选文件，再分批交给进程池扫描，产出命中的 FileEntry 列表"""
+        opts = self.options
+        pattern, case_sensitive, is_regex, context = self._scan_args(content_query)
+
+        index = self._open_index()
+        states, candidates = {}, None
+        if index is not None:
+            states = index.file_states()
+            if isinstance(pattern, tuple):
+                candidates = index.query_any(literal_trigrams(term, case_sensitive) for term in pattern)
+            elif is_regex:
+                candidates = index.query(regex_trigrams(pattern, case_sensitive))
+            else:
+                candidates = index.query(literal_trigrams(pattern, case_sensitive))
+
+        pool = None
+        futures = {}
+        task, task_bytes = [], 0
+        max_in_flight = (opts.processes or os.cpu_count() or 1) * 4
+
+        def submit(entries):
+            nonlocal pool
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=opts.processes, mp_context=_MP_CONTEXT)
+            flags = [needs_index for _, needs_index in entries]
+            future = pool.submit(scan_files, [e.path for e, _ in entries], pattern, case_sensitive, is_regex,
+                                 flags, context)
+            futures[future] = entries
+
+        def record(entries, matched, grams, encodings, line_hits):
+            """缓存嗅探结果、登记新索引的文件与命中行，并返回命中的 FileEntry"""
+            for i, encoding in encodings.items():
+                text_detector.remember_entry(entries[i][0], encoding)
+            for i, hits in line_hits.items():
+                self.hits[entries[i][0].path] = hits
+            if index is not None:
+                for i, (entry, needs_index) in enumerate(entries):
+                    if needs_index:
+                        index.add_file(entry.path, entry.mtime, entry.size, grams.get(i))
+            return [entries[i][0] for i in matched]
+
+        def collect(done):
+            for future in done:
+                entries = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"内容扫描任务失败，跳过其中 {len(entries)} 个文件"
+                                   f"（{entries[0][0].path} 等）: {e}")
+                    continue
+                found = record(entries, *result)
+                if found:
+                    yield found
+
+        try:
+            for entries in entry_batches:
+                for entry in entries:
+                    state = states.get(entry.path)
+                    fresh = state is not None and state.matches(entry)
+                    if fresh and state.indexed and candidates is not None and state.file_id not in candidates:
+                        # 索引表明该文件不可能匹配，无需读取
+                        continue
+                    if index is not None and not fresh and entry.size > MAX_INDEX_FILE_SIZE:
+                        index.add_file(entry.path, entry.mtime, entry.size, None)
+                        fresh = True
+                    task.append((entry, index is not None and not fresh))
+                    task_bytes += entry.size
+                    if len(task) >= TASK_FILES or task_bytes >= TASK_BYTES:
+                        submit(task)
+                        task, task_bytes = [], 0
+
+                # 控制在途任务数量，同时及时产出已完成的结果
+                done = [f for f in futures if f.done()]
+                if len(futures) - len(done) >= max_in_flight:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+
+            if self.is_stopped():
+                return
+
+            if task:
+                if pool is None:
+                    # 候选文件很少：直接在当前线程扫描，省去启动进程池的开销
+                    flags = [needs_index for _, needs_index in task]
+                    result = scan_files([e.path for e, _ in task], pattern, case_sensitive, is_regex, flags, context)
+                    found = record(task, *result)
+                    if found:
+                        yield found
+                else:
+                    submit(task)
+
+            while futures and not self.is_stopped():
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+
+            # 完整遍历结束后，清理索引中已被删除的文件；按大小/修改时间筛选时
+            # 未遍历到的文件也可能只是不满足条件，无法区分，留到下次不带这些条件的搜索再清理
+            if index is not None and not self.is_stopped() and not self._filters_stat():
+                index.remove_paths(self._deleted_paths(states, seen, walked))
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=not self.is_stopped(), cancel_futures=True)
+            if index is not None:
+                try:
+                    index.close()
+                except Exception as e:
+                    logger.warning(f"保存三元组索引失败: {e}")
@@ -0,0 +1,245 @@
+"""
+遍历剪枝规则：包含/排除通配符与 .gitignore / .ignore，以及最大深度与元数据筛选（MetaFilter）
+规则在遍历线程中逐条目判断，被排除的目录直接跳过、不再进入，而不是遍历后再过滤文件。
+每组通配符预先编译成一个正则，每个目录项只匹配一次
+
+通配符写法：
+- 不含 "/" 的模式匹配文件/目录名，如 node_modules、*.min.js
+- 含 "/" 的模式匹配相对搜索根目录的路径（统一使用 "/"），如 docs/build、src/**/gen
+- 以 "/" 结尾的模式只匹配目录
+"""
+
+import os
+import re
+
+# 默认排除的目录（几乎没人需要搜索其中的内容）
+DEFAULT_EXCLUDES = (
+    '.git/', '.svn/', '.hg/', 'node_modules/', 'venv/', '.venv/', '__pycache__/',
+    '.mypy_cache/', '.pytest_cache/', '.tox/', '.idea/', 'build/', 'dist/',
+)
+
+IGNORE_FILES = ('.gitignore', '.ignore')
+
+_SEP = os.sep
+
+
+def split_patterns(text):
+    """把界面/命令行输入的 "a, b; c" 拆成模式列表"""
+    return [item.strip() for item in re.split(r'[,;\s]+', text or '') if item.strip()]
+
+
+def _to_posix(rel_path):
+    return rel_path.replace(_SEP, '/') if _SEP != '/' else rel_path
+
+
+def _translate_glob(pattern):
+    """gitignore 风格的通配符 -> 正则（"*" 不跨目录，"**" 可跨目录）"""
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**/', i):
+                parts.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                parts.append('.*')
+                i += 2
+                continue
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append(f'[{body}]')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return ''.join(parts)
+
+
+def _alternation(regexes, flags=0):
+    """把多个正则合并成一个整体匹配的正则；列表为空时返回 None"""
+    if not regexes:
+        return None
+    # 整个选择分支都要锚定到末尾，否则 \Z 只作用于最后一个分支，其余分支变成前缀匹配
+    return re.compile('(?:' + '|'.join(f'(?:{regex})' for regex in regexes) + r')\Z', flags)
+
+
+class GlobSet:
+    """一组通配符，编译成按名称 / 按路径两个正则"""
+
+    def __init__(self, patterns, case_sensitive=(os.name != 'nt')):
+        name_any, name_dir, path_any, path_dir = [], [], [], []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern:
+                continue
+            dir_only = pattern.endswith('/')
+            pattern = pattern.rstrip('/')
+            if '/' in pattern:
+                regex = _translate_glob(pattern.lstrip('/'))
+                (path_dir if dir_only else path_any).append(regex)
+            else:
+                regex = _translate_glob(pattern)
+                (name_dir if dir_only else name_any).append(regex)
+
+        flags = 0 if case_sensitive else re.IGNORECASE
+        self._name_file = _alternation(name_any, flags)
+        self._name_dir = _alternation(name_any + name_dir, flags)
+        self._path_file = _alternation(path_any, flags)
+        self._path_dir = _alternation(path_any + path_dir, flags)
+        self.empty = not (name_any or name_dir or path_any or path_dir)
+
+    def match(self, name, rel_path, is_dir):
+        name_regex = self._name_dir if is_dir else self._name_file
+        if name_regex is not None and name_regex.match(name):
+            return True
+        path_regex = self._path_dir if is_dir else self._path_file
+        return path_regex is not None and path_regex.match(_to_posix(rel_path)) is not None
+
+
+class IgnoreFile:
+    """一个 .gitignore / .ignore 文件中的规则，匹配相对该文件所在目录的路径"""
+
+    def __init__(self, lines):
+        self.rules = []  # (regex, negate, dir_only)，按文件中的顺序
+        for line in lines:
+            line = line.rstrip('\n').rstrip('\r')
+            if not line.endswith('\\ '):
+                line = line.rstrip(' ')
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith('\\'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line
+            regex = _translate_glob(line.lstrip('/'))
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            self.rules.append((regex, negate, dir_only))
+
+        # 没有取反规则时（最常见）合并成一个正则，每个条目只匹配一次；否则按顺序逐条判断
+        self.simple = not any(negate for _, negate, _ in self.rules)
+        if self.simple:
+            self._files = _alternation([regex for regex, _, dir_only in self.rules if not dir_only])
+            self._dirs = _alternation([regex for regex, _, _ in self.rules])
+        else:
+            self.rules = [(re.compile(regex + r'\Z'), negate, dir_only) for regex, negate, dir_only in self.rules]
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(f.readlines())
+        except OSError:
+            return None
+
+    def decide(self, rel_path, is_dir):
+        """True = 忽略, False = 明确不忽略（取反规则）, None = 没有规则匹配"""
+        if self.simple:
+            regex = self._dirs if is_dir else self._files
+            return True if regex is not None and regex.match(rel_path) else None
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                return not negate
+        return None
+
+
+class WalkState:
+    """某个目录的剪枝状态：规则 + 从根目录到该目录沿途的 ignore 文件"""
+
+    __slots__ = ('rules', 'parent', 'ignores', 'depth')
+
+    def __init__(self, rules, parent=None, ignores=(), depth=-1):
+        self.rules = rules
+        self.parent = parent
+        self.ignores = ignores  # ((相对根目录的目录前缀 posix, IgnoreFile), ...)，由浅到深
+        self.depth = depth      # 目录深度：根目录为 0，root_state() 为 -1
+
+    def enter(self, dir_path, rel_dir):
+        """进入目录：读取其中的 ignore 文件，返回该目录的状态"""
+        ignores = self.ignores
+        if self.rules.use_gitignore:
+            prefix = _to_posix(rel_dir) + '/' if rel_dir else ''
+            for name in IGNORE_FILES:
+                ignore_file = IgnoreFile.load(os.path.join(dir_path, name))
+                if ignore_file is not None and ignore_file.rules:
+                    ignores = ignores + ((prefix, ignore_file),)
+        return WalkState(self.rules, self, ignores, self.depth + 1)
+
+    def _ignored(self, rel_path, is_dir):
+        posix = _to_posix(rel_path)
+        # 越深的 ignore 文件优先级越高
+        for prefix, ignore_file in reversed(self.ignores):
+            decision = ignore_file.decide(posix[len(prefix):], is_dir)
+            if decision is not None:
+                return decision
+        return False
+
+    def skip_dir(self, name, rel_path):
+        rules = self.rules
+        # 子目录中文件的深度为 depth + 2（根目录中的文件深度为 1）
+        if rules.max_depth and self.depth + 2 > rules.max_depth:
+            return True
+        if rules.exclude.match(name, rel_path, True):
+            return True
+        if rules.use_gitignore and name == '.git':
+            return True
+        return bool(self.ignores) and self._ignored(rel_path, True)
+
+    def skip_file(self, name, rel_path):
+        rules = self.rules
+        if rules.include is not None and not rules.include.match(name, rel_path, False):
+            return True
+        if rules.exclude.match(name, rel_path, False):
+            return True
+        return bool(self.ignores) and self._ignored(rel_path, False)
+
+
+class WalkRules:
+    """遍历剪枝规则
+
+    Args:
+        include: 文件必须匹配其中之一的通配符（为空表示不限制），只作用于文件
+        exclude: 排除的文件/目录通配符；None 表示使用 DEFAULT_EXCLUDES
+        use_gitignore: 是否遵循搜索根目录及其子目录中的 .gitignore / .ignore
+        meta: 可选 MetaFilter，按大小/修改时间/类型筛选文件
+        max_depth: 文件的最大深度（根目录中的文件为 1），None 或 0 表示不限制
+    """
+
+    def __init__(self, include=None, exclude=None, use_gitignore=False, meta=None, max_depth=None):
+        include = list(include or [])
+        self.include = GlobSet(include) if include else None
+        self.exclude = GlobSet(DEFAULT_EXCLUDES if exclude is None else exclude)
+        self.use_gitignore = use_gitignore
+        self.meta = meta if meta is not None and meta.active else None
+        self.max_depth = max_depth or None
+
+    @property
+    def active(self):
+        return (self.include is not None or not self.exclude.empty or self.use_gitignore
+                or self.meta is not None or self.max_depth is not None)
+
+    def root_state(self):
+        """根目录的父状态，遍历时对根目录调用 enter"""
+        return WalkState(self)
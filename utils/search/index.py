@@ -0,0 +1,328 @@
+"""
+持久化三元组（trigram）内容索引
+每个搜索根目录一个 SQLite 文件：
+- files:    path / mtime / size -> 文件 id（文件变化后换新 id，旧 id 作废）
+- postings: (trigram, 段号) -> 文件 id 数组（uint32）。每次写入追加一个新段，
+            无需读改写已有数据；压缩时合并各段并剔除作废的 id
+
+全文/正则搜索先用查询中必然出现的三元组求交集得到候选文件，再由内容扫描验证；
+下次搜索时只重新索引 stat 发生变化的文件
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+from array import array
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+logger = logging.getLogger('KiwiKit.search')
+
+DEFAULT_INDEX_DIR = os.getenv(
+    'KIWIKIT_INDEX_DIR', os.path.join(os.path.expanduser("~"), ".kiwikit", "search_index")
+)
+
+# 超过该大小的文件不建索引，每次都直接扫描
+MAX_INDEX_FILE_SIZE = 16 * 1024 * 1024
+# 内存中待写入的 posting 数量上限
+FLUSH_POSTINGS = 4 * 1024 * 1024
+# 作废的 posting 超过有效 posting 的比例、或段数超过上限时压缩
+COMPACT_RATIO = 0.5
+MAX_SEGMENTS = 64
+
+SCHEMA_VERSION = 1
+_NEWLINE = ord('\n')
+
+
+# -------------- 三元组提取 --------------
+def trigrams_of_lines(lines):
+    """从（已转小写的）文本行中提取三元组，返回排序后的 uint32 数组字节串
+
+    每行两端补换行符后再提取，重复行只处理一次
+    """
+    grams = set()
+    for line in lines:
+        line = b"\n" + line + b"\n"
+        grams.update(zip(line, line[1:], line[2:]))
+    return array('I', sorted((a << 16) | (b << 8) | c for a, b, c in grams)).tobytes()
+
+
+class TrigramCollector:
+    """流式收集文件的三元组，配合分块读取使用"""
+
+    def __init__(self):
+        self.lines = set()
+        self.tail = b""
+
+    def feed(self, data):
+        data = self.tail + data.lower()
+        lines = data.split(b"\n")
+        self.tail = lines.pop()
+        self.lines.update(lines)
+
+    def result(self):
+        if self.tail:
+            self.lines.add(self.tail)
+            self.tail = b""
+        return trigrams_of_lines(self.lines)
+
+
+def _literal_trigrams(data, case_sensitive):
+    """字面量（bytes）中的三元组；忽略大小写时跳过含非 ASCII 字节的三元组"""
+    data = data.lower()
+    grams = set()
+    for i in range(len(data) - 2):
+        gram = data[i:i + 3]
+        if _NEWLINE in gram:
+            continue
+        if not case_sensitive and not gram.isascii():
+            continue
+        grams.add((gram[0] << 16) | (gram[1] << 8) | gram[2])
+    return grams
+
+
+def literal_trigrams(text, case_sensitive=False):
+    """普通文本查询所需的三元组"""
+    return _literal_trigrams(text.encode('utf-8'), case_sensitive)
+
+
+def regex_trigrams(pattern, case_sensitive=False):
+    """正则查询中必然出现的三元组（只取顺序出现的字面量片段，保守估计）"""
+    try:
+        parsed = sre_parse.parse(pattern, 0 if case_sensitive else sre_constants.SRE_FLAG_IGNORECASE)
+    except Exception:
+        return set()
+
+    runs = []
+
+    def walk(items):
+        current = []
+        for op, arg in items:
+            if op is sre_constants.LITERAL:
+                current.append(chr(arg))
+                continue
+            if current:
+                runs.append("".join(current))
+                current = []
+            if op is sre_constants.SUBPATTERN:
+                walk(arg[-1])
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and arg[0] >= 1:
+                walk(arg[2])
+        if current:
+            runs.append("".join(current))
+
+    walk(parsed)
+    grams = set()
+    for run in runs:
+        grams |= _literal_trigrams(run.encode('utf-8'), case_sensitive)
+    return grams
+
+
+# -------------- 索引 --------------
+class FileState:
+    __slots__ = ('file_id', 'mtime', 'size', 'indexed')
+
+    def __init__(self, file_id, mtime, size, indexed):
+        self.file_id = file_id
+        self.mtime = mtime
+        self.size = size
+        self.indexed = indexed
+
+    def matches(self, entry):
+        return self.mtime == entry.mtime and self.size == entry.size
+
+
+class TrigramIndex:
+    """某个搜索根目录的三元组索引（同一实例只能在创建它的线程中使用）"""
+
+    def __init__(self, root, index_dir=None):
+        self.root = os.path.abspath(root)
+        index_dir = index_dir or DEFAULT_INDEX_DIR
+        os.makedirs(index_dir, exist_ok=True)
+        digest = hashlib.sha1(os.path.normcase(self.root).encode('utf-8')).hexdigest()[:16]
+        self.db_path = os.path.join(index_dir, f"{digest}.sqlite")
+
+        self._pending = {}          # trigram -> array('I') 新文件 id
+        self._pending_count = 0
+        self._conn = sqlite3.connect(self.db_path)
+        self._setup()
+
+    def _setup(self):
+        conn = self._conn
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = conn.execute("SELECT value FROM meta WHERE key='schema'").fetchone()
+        if row is None or int(row[0]) != SCHEMA_VERSION:
+            conn.executescript("""
+                DROP TABLE IF EXISTS files;
+                DROP TABLE IF EXISTS postings;
+            """)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT UNIQUE NOT NULL,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                indexed INTEGER NOT NULL,
+                grams INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                trigram INTEGER NOT NULL,
+                seg INTEGER NOT NULL,
+                ids BLOB NOT NULL,
+                PRIMARY KEY (trigram, seg)
+            ) WITHOUT ROWID;
+        """)
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+        conn.execute("INSERT OR IGNORE INTO meta VALUES ('root', ?)", (self.root,))
+        conn.execute("INSERT OR IGNORE INTO meta VALUES ('dead_postings', '0')")
+        conn.execute("INSERT OR IGNORE INTO meta VALUES ('live_postings', '0')")
+        conn.execute("INSERT OR IGNORE INTO meta VALUES ('segments', '0')")
+        conn.commit()
+
+    def _meta_int(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def _add_meta(self, key, delta):
+        if delta:
+            self._conn.execute(
+                "UPDATE meta SET value = CAST(value AS INTEGER) + ? WHERE key=?", (delta, key)
+            )
+
+    def file_states(self):
+        """path -> FileState"""
+        return {
+            path: FileState(file_id, mtime, size, indexed)
+            for file_id, path, mtime, size, indexed
+            in self._conn.execute("SELECT id, path, mtime, size, indexed FROM files")
+        }
+
+    def query(self, grams):
+        """返回包含全部三元组的文件 id 集合；grams 为空时返回 None（无法缩小范围）"""
+        if not grams:
+            return None
+        self.flush()
+        rows = []
+        for gram in grams:
+            blob = b"".join(row[0] for row in self._conn.execute(
+                "SELECT ids FROM postings WHERE trigram=?", (gram,)
+            ))
+            if not blob:
+                return set()
+            rows.append(blob)
+
+        # 从最短的 posting 开始求交集
+        rows.sort(key=len)
+        result = None
+        for blob in rows:
+            ids = array('I')
+            ids.frombytes(blob)
+            result = set(ids) if result is None else result.intersection(ids)
+            if not result:
+                break
+        return result
+
+    def query_any(self, gram_sets):
+        """返回至少满足其中一组三元组的文件 id 集合（多关键词搜索）；任一组无法缩小范围时返回 None"""
+        result = set()
+        for grams in gram_sets:
+            ids = self.query(grams)
+            if ids is None:
+                return None
+            result |= ids
+        return result
+
+    def add_file(self, path, mtime, size, grams):
+        """登记（重新）索引的文件；grams 为 None 表示未建索引（过大或不可读）"""
+        self.remove_paths((path,))
+        trigram_ids = array('I')
+        if grams is not None:
+            trigram_ids.frombytes(grams)
+        cursor = self._conn.execute(
+            "INSERT INTO files (path, mtime, size, indexed, grams) VALUES (?, ?, ?, ?, ?)",
+            (path, mtime, size, 0 if grams is None else 1, len(trigram_ids))
+        )
+        if grams is None:
+            return
+
+        file_id = cursor.lastrowid
+        for gram in trigram_ids:
+            pending = self._pending.get(gram)
+            if pending is None:
+                self._pending[gram] = array('I', (file_id,))
+            else:
+                pending.append(file_id)
+        self._pending_count += len(trigram_ids)
+        self._add_meta('live_postings', len(trigram_ids))
+        if self._pending_count >= FLUSH_POSTINGS:
+            self.flush()
+
+    def remove_paths(self, paths):
+        """删除文件记录；其 posting 留在数组中作废，查询时与 files 表对照，压缩时清理"""
+        conn = self._conn
+        for path in paths:
+            row = conn.execute("SELECT id, grams FROM files WHERE path=?", (path,)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM files WHERE id=?", (row[0],))
+                self._add_meta('live_postings', -row[1])
+                self._add_meta('dead_postings', row[1])
+
+    def flush(self):
+        """把内存中的新 posting 追加写入数据库"""
+        if self._pending:
+            segment = self._meta_int('segments') + 1
+            self._conn.executemany(
+                "INSERT INTO postings (trigram, seg, ids) VALUES (?, ?, ?)",
+                ((gram, segment, ids.tobytes()) for gram, ids in self._pending.items())
+            )
+            self._conn.execute("UPDATE meta SET value=? WHERE key='segments'", (str(segment),))
+            self._pending = {}
+            self._pending_count = 0
+        self._conn.commit()
+
+    def compact_if_needed(self):
+        """作废 posting 过多或段数过多时，合并各段并剔除作废的 id"""
+        dead = self._meta_int('dead_postings')
+        live = self._meta_int('live_postings')
+        segments = self._meta_int('segments')
+        if segments <= MAX_SEGMENTS and (dead == 0 or dead < live * COMPACT_RATIO):
+            return False
+        self.flush()
+        start = time.perf_counter()
+        conn = self._conn
+        live_ids = {row[0] for row in conn.execute("SELECT id FROM files WHERE indexed=1")}
+
+        merged = {}
+        for gram, blob in conn.execute("SELECT trigram, ids FROM postings"):
+            ids = array('I')
+            ids.frombytes(blob)
+            kept = merged.get(gram)
+            if kept is None:
+                kept = merged[gram] = array('I')
+            kept.extend(i for i in ids if i in live_ids)
+
+        conn.execute("DELETE FROM postings")
+        conn.executemany(
+            "INSERT INTO postings (trigram, seg, ids) VALUES (?, 0, ?)",
+            ((gram, ids.tobytes()) for gram, ids in merged.items() if ids)
+        )
+        conn.execute("UPDATE meta SET value='0' WHERE key IN ('dead_postings', 'segments')")
+        conn.commit()
+        logger.info(f"三元组索引已压缩: {self.db_path} (耗时 {time.perf_counter() - start:.2f}秒)")
+        return True
+
+    def close(self):
+        try:
+            self.flush()
+            self.compact_if_needed()
+        finally:
+            self._conn.close()
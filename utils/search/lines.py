@@ -0,0 +1,97 @@
+"""
+按行号读取文件片段（预览跳转用）
+文件通过 mmap 映射，只读取目标行附近的数据：已知行首字节偏移时直接定位，
+否则按块统计换行符跳到目标行，不把整个文件读入内存，适合 GB 级日志
+"""
+
+import mmap
+import codecs
+import itertools
+
+# 统计换行符时每次处理的字节数
+COUNT_BLOCK = 4 * 1024 * 1024
+# 换行符不是单字节 0x0A 的编码，只能解码后逐行读取
+_WIDE_ENCODINGS = ('utf-16', 'utf-32')
+
+
+def _is_wide(encoding):
+    name = codecs.lookup(encoding).name
+    return name.startswith(_WIDE_ENCODINGS)
+
+
+def _line_start(mm, line_no):
+    """第 line_no 行（从 1 开始）的字节偏移；文件行数不足时返回 None"""
+    remaining = line_no - 1
+    pos = 0
+    size = len(mm)
+    while remaining > 0:
+        if pos >= size:
+            return None
+        end = min(pos + COUNT_BLOCK, size)
+        count = mm[pos:end].count(b"\n")
+        if count < remaining:
+            remaining -= count
+            pos = end
+            continue
+        # 目标行在这一块中
+        while remaining > 0:
+            pos = mm.find(b"\n", pos, end) + 1
+            remaining -= 1
+    return pos if pos <= size else None
+
+
+def _read_mapped(path, line_no, encoding, before, after, offset):
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            return 1, []
+        with mm:
+            start = offset if offset is not None else _line_start(mm, line_no)
+            if start is None:
+                return line_no, []
+            first = line_no
+            while first > 1 and first > line_no - before and start > 0:
+                start = mm.rfind(b"\n", 0, start - 1) + 1
+                first -= 1
+            end = start
+            for _ in range(line_no - first + after + 1):
+                cut = mm.find(b"\n", end)
+                if cut < 0:
+                    end = len(mm)
+                    break
+                end = cut + 1
+            data = mm[start:end]
+
+    if first == 1:
+        data = data.removeprefix(codecs.BOM_UTF8)
+    lines = data.split(b"\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    # 只按 "\n" 分行，与扫描时的行号一致（str.splitlines 还会在 \x0b、\u2028 等处分行）
+    return first, [line.decode(encoding, 'replace').removesuffix('\r') for line in lines]
+
+
+def _read_decoded(path, line_no, encoding, before, after):
+    first = max(1, line_no - before)
+    with open(path, 'r', encoding=encoding, errors='replace', newline='') as f:
+        lines = itertools.islice(f, first - 1, line_no + after)
+        return first, [line.rstrip('\r\n') for line in lines]
+
+
+def read_line_window(path, line_no, encoding='utf-8', before=100, after=100, offset=None):
+    """读取第 line_no 行及其前后若干行
+
+    Args:
+        encoding: 文件编码（通常来自 text_detector）
+        offset: 可选，第 line_no 行行首的字节偏移（LineHit.offset），已知时无需统计换行符
+
+    Returns:
+        (返回内容第一行的行号, 行列表)
+    """
+    line_no = max(1, line_no)
+    encoding = encoding or 'utf-8'
+    if _is_wide(encoding):
+        return _read_decoded(path, line_no, encoding, before, after)
+    return _read_mapped(path, line_no, encoding, before, after, offset)
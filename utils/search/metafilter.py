@@ -0,0 +1,86 @@
+"""
+按元数据筛选文件：大小范围、修改时间范围、文件类型（按扩展名归类）
+在遍历线程中直接用 DirEntry 的 stat 数据判断，不满足条件的文件不会生成 FileEntry，
+也不会进入文件名/内容匹配；文件类型只看文件名，在 stat 之前判断
+"""
+
+import re
+
+# 类型 -> (显示名称, 扩展名)
+FILE_TYPES = {
+    'document': ("文档", (
+        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods', '.odp',
+        '.rtf', '.txt', '.md', '.csv', '.epub', '.pages', '.numbers', '.key',
+    )),
+    'image': ("图片", (
+        '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.svg', '.ico', '.tif', '.tiff',
+        '.heic', '.heif', '.psd', '.raw', '.cr2', '.nef', '.dng',
+    )),
+    'audio': ("音频", ('.mp3', '.wav', '.flac', '.aac', '.ogg', '.m4a', '.wma', '.opus', '.aiff')),
+    'video': ("视频", ('.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.mpg', '.mpeg', '.ts')),
+    'archive': ("压缩包", (
+        '.zip', '.rar', '.7z', '.tar', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.iso', '.dmg', '.cab',
+    )),
+    'code': ("代码", (
+        '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.kt', '.c', '.h', '.cpp', '.hpp', '.cc', '.cs',
+        '.go', '.rs', '.rb', '.php', '.swift', '.m', '.scala', '.lua', '.sh', '.bat', '.ps1', '.sql',
+        '.html', '.css', '.scss', '.vue', '.json', '.yaml', '.yml', '.toml', '.xml', '.ini',
+    )),
+    'executable': ("可执行文件", ('.exe', '.msi', '.app', '.apk', '.deb', '.rpm', '.appimage', '.dll', '.so', '.dylib')),
+}
+
+_SIZE_UNITS = {'': 1, 'b': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+_SIZE_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*$', re.IGNORECASE)
+
+
+def parse_size(text):
+    """"100MB" / "1.5g" / "512k" / "2048" -> 字节数；空字符串返回 None，无法解析时抛出 ValueError"""
+    if not text or not text.strip():
+        return None
+    match = _SIZE_RE.match(text)
+    if match is None:
+        raise ValueError(f"无法识别的大小: {text}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()])
+
+
+class MetaFilter:
+    """元数据筛选条件，未设置的条件不限制
+
+    Args:
+        min_size / max_size: 文件大小范围（字节，含边界）
+        modified_after / modified_before: 修改时间范围（时间戳，含边界）
+        file_types: FILE_TYPES 中的类型键列表
+    """
+
+    def __init__(self, min_size=None, max_size=None, modified_after=None, modified_before=None, file_types=None):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_after = modified_after
+        self.modified_before = modified_before
+        extensions = []
+        for file_type in file_types or ():
+            extensions.extend(FILE_TYPES[file_type][1])
+        self.extensions = tuple(extensions) or None
+
+    @property
+    def active(self):
+        return self.extensions is not None or self.checks_stat
+
+    @property
+    def checks_stat(self):
+        return any(value is not None for value in
+                   (self.min_size, self.max_size, self.modified_after, self.modified_before))
+
+    def match_name(self, name):
+        return self.extensions is None or name.lower().endswith(self.extensions)
+
+    def match_stat(self, size, mtime):
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        if self.modified_after is not None and mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and mtime > self.modified_before:
+            return False
+        return True
@@ -0,0 +1,95 @@
+"""
+多关键词搜索（Aho–Corasick）
+每次搜索只构建一次自动机（工作进程中随匹配器缓存）：
+- 自动机的 trie 被转换成一个前缀共享的正则，由 re 在 C 中一遍扫描文件，
+  每个位置只沿 trie 的一条分支比较，而不是对 N 个关键词逐个 in / re 扫描 N 遍
+- 命中的行再交给自动机本身，得到该行出现的全部关键词（包括相互重叠的关键词）
+"""
+
+import re
+from collections import deque
+
+
+def split_terms(text):
+    """把输入框中的 "id1, id2; id3 ..." 拆成去重后的关键词元组（保持输入顺序）"""
+    terms = [item for item in re.split(r'[,;\s]+', text or '') if item]
+    return tuple(dict.fromkeys(terms))
+
+
+class AhoCorasick:
+    """字面量关键词的 Aho–Corasick 自动机
+
+    Args:
+        terms: 关键词序列，匹配结果以其下标表示
+        case_sensitive: False 时按小写匹配
+    """
+
+    def __init__(self, terms, case_sensitive=False):
+        self.terms = tuple(terms)
+        self.case_sensitive = case_sensitive
+        self._goto = [{}]    # 状态 -> {字符: 下一状态}
+        self._fail = [0]     # 失败转移
+        self._output = [()]  # 状态 -> 在此结束的关键词下标（含失败链上的）
+        self._ends = set()   # 有关键词在此结束的状态
+        for index, term in enumerate(self.terms):
+            self._add(self._fold(term), index)
+        self._link()
+
+    def _fold(self, text):
+        return text if self.case_sensitive else text.lower()
+
+    def _add(self, term, index):
+        goto = self._goto
+        state = 0
+        for ch in term:
+            next_state = goto[state].get(ch)
+            if next_state is None:
+                next_state = goto[state][ch] = len(goto)
+                goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += (index,)
+        self._ends.add(state)
+
+    def _link(self):
+        """按广度优先建立失败转移，并合并沿失败链可达的输出"""
+        goto, fail, output = self._goto, self._fail, self._output
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in goto[state].items():
+                queue.append(next_state)
+                target = fail[state]
+                while target and ch not in goto[target]:
+                    target = fail[target]
+                fail[next_state] = goto[target].get(ch, 0)
+                output[next_state] += output[fail[next_state]]
+
+    def finditer(self, text):
+        """产出 (结束位置, 关键词下标)，包括相互重叠的匹配"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for pos, ch in enumerate(self._fold(text)):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in output[state]:
+                yield pos, index
+
+    def terms_in(self, text):
+        """text 中出现的关键词下标（升序元组）"""
+        return tuple(sorted({index for _, index in self.finditer(text)}))
+
+    def trie_regex(self):
+        """把 trie 转换为等价的正则源码（同一节点的分支首字符互不相同，不会回溯到其他关键词）"""
+        return self._node_regex(0)
+
+    def _node_regex(self, state):
+        branches = [re.escape(ch) + self._node_regex(next_state)
+                    for ch, next_state in self._goto[state].items()]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # 有关键词在此结束时其余部分可选；贪婪匹配优先取更长的关键词
+        return f'(?:{body})?' if state in self._ends else body
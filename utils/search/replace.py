@@ -0,0 +1,468 @@
+"""
+批量查找替换（不依赖 PySide6）
+- 预览：工作进程按原编码解码文件并执行替换，只返回替换次数与差异，不写任何文件
+- 执行：工作进程把新内容写入目标文件同目录下的临时文件；原内容压缩后记入替换日志（SQLite），
+  日志落盘后再逐个 os.replace 原子替换，目标文件任何时刻要么是旧内容、要么是新内容
+- 撤销：按日志把文件恢复为替换前的内容，替换后又被修改过的文件不会被覆盖；
+  这些文件的原内容留在日志中，处理冲突后可以再次撤销（或强制覆盖）
+
+文件按原始字节解码（surrogateescape），不做换行符转换，编码、BOM 与换行符都保持不变；
+无法无损往返编码的文件直接跳过。符号链接替换其指向的文件；有多个硬链接的文件无法原子替换
+而不断开链接，也直接跳过
+"""
+
+import os
+import re
+import time
+import zlib
+import codecs
+import shutil
+import hashlib
+import difflib
+import logging
+import sqlite3
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+from .engine import _MP_CONTEXT
+from .textdetect import SNIFF_SIZE, sniff_encoding
+
+logger = logging.getLogger('KiwiKit.search')
+
+DEFAULT_JOURNAL_PATH = os.getenv(
+    'KIWIKIT_REPLACE_JOURNAL', os.path.join(os.path.expanduser("~"), ".kiwikit", "replace_journal.sqlite")
+)
+# 日志中保留的替换事务数
+MAX_TRANSACTIONS = 20
+# 每个进程池任务包含的文件数；文件数不超过它时直接在当前线程处理
+TASK_FILES = 32
+# 预览差异的上下文行数 / 每个文件最多返回的差异行数
+DIFF_CONTEXT = 2
+MAX_DIFF_LINES = 200
+TEMP_SUFFIX = '.kiwikit-tmp'
+
+# 带 BOM 的文件：BOM 单独保留，正文用明确字节序的编码读写，写回时字节序不变
+_BOM_CODECS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+# 预览结果：替换次数、差异块数、统一格式差异（可能被截断）；error 不为 None 时表示跳过
+FilePreview = namedtuple('FilePreview', ['path', 'count', 'hunks', 'diff', 'error'])
+# 暂存结果：新内容已写入 temp_path；original 为压缩后的原内容，mtime_ns/size 为读取时的状态，
+# digest 为新内容的哈希（替换中断时据此判断文件是否已被替换）
+StagedFile = namedtuple('StagedFile', ['path', 'temp_path', 'original', 'count', 'mtime_ns', 'size', 'error',
+                                       'digest'], defaults=(None,))
+# 一次替换的结果
+ReplaceResult = namedtuple('ReplaceResult', ['transaction', 'modified', 'failures'])
+
+
+class ReplaceSpec:
+    """替换参数；pattern() 编译失败时抛出 re.error"""
+
+    def __init__(self, find, replace, use_regex=False, case_sensitive=False):
+        self.find = find
+        self.replace = replace
+        self.use_regex = use_regex
+        self.case_sensitive = case_sensitive
+
+    def args(self):
+        return self.find, self.replace, self.use_regex, self.case_sensitive
+
+    def pattern(self):
+        return _compile(self.find, self.use_regex, self.case_sensitive)
+
+
+@lru_cache(maxsize=8)
+def _compile(find, use_regex, case_sensitive):
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return re.compile(find if use_regex else re.escape(find), flags)
+
+
+def _substitute(text, find, replace, use_regex, case_sensitive):
+    """返回 (新文本, 替换次数)；非正则模式下替换文本按字面使用，不解释反斜杠"""
+    pattern = _compile(find, use_regex, case_sensitive)
+    return pattern.subn(replace if use_regex else lambda match: replace, text)
+
+
+def _decode(data):
+    """按原编码解码文件内容
+
+    Returns:
+        (BOM, 编码, 文本)
+    Raises:
+        ValueError: 二进制文件、无法确定编码或无法无损往返编码
+    """
+    encoding = sniff_encoding(data[:SNIFF_SIZE], strict=True)
+    if encoding is None:
+        raise ValueError("二进制文件或无法确定编码")
+    bom = b""
+    for mark, codec in _BOM_CODECS:
+        if data.startswith(mark):
+            bom, encoding = mark, codec
+            break
+    body = data[len(bom):]
+    try:
+        text = body.decode(encoding, 'surrogateescape')
+        if text.encode(encoding, 'surrogateescape') == body:
+            return bom, encoding, text
+    except UnicodeError:
+        pass
+    raise ValueError(f"无法按 {encoding} 无损读写")
+
+
+def _display(line):
+    """差异中的文本转为可显示的形式（无法解码的原始字节显示为转义序列）"""
+    return line.encode('utf-8', 'backslashreplace').decode('utf-8')
+
+
+def _diff(path, old, new):
+    """返回 (差异块数, 统一格式差异文本)；差异文本最多 MAX_DIFF_LINES 行"""
+    old_lines = old.split('\n')
+    new_lines = new.split('\n')
+    if len(old_lines) == len(new_lines):
+        # 行数不变（最常见）：逐行比较即可，不需要 SequenceMatcher
+        changed = [i for i, (a, b) in enumerate(zip(old_lines, new_lines)) if a != b]
+        groups = []
+        for i in changed:
+            if groups and i - groups[-1][1] <= 2 * DIFF_CONTEXT:
+                groups[-1][1] = i
+            else:
+                groups.append([i, i])
+        lines = [f"--- {path}", f"+++ {path}"]
+        for first, last in groups:
+            lo = max(0, first - DIFF_CONTEXT)
+            hi = min(len(old_lines), last + DIFF_CONTEXT + 1)
+            lines.append(f"@@ -{lo + 1},{hi - lo} +{lo + 1},{hi - lo} @@")
+            for j in range(lo, hi):
+                if old_lines[j] == new_lines[j]:
+                    lines.append(' ' + old_lines[j])
+                else:
+                    lines.append('-' + old_lines[j])
+                    lines.append('+' + new_lines[j])
+                if len(lines) > MAX_DIFF_LINES:
+                    break
+        hunks = len(groups)
+    else:
+        lines = [line.rstrip('\n') for line in difflib.unified_diff(
+            old_lines, new_lines, path, path, n=DIFF_CONTEXT, lineterm=''
+        )]
+        hunks = sum(1 for line in lines if line.startswith('@@'))
+    if len(lines) > MAX_DIFF_LINES:
+        lines = lines[:MAX_DIFF_LINES] + ["..."]
+    return hunks, '\n'.join(_display(line) for line in lines)
+
+
+def preview_files(paths, find, replace, use_regex=False, case_sensitive=False):
+    """预览一批文件的替换结果（进程池任务入口），不修改任何文件"""
+    results = []
+    for path in paths:
+        try:
+            with open(_resolve_target(path), 'rb') as f:
+                data = f.read()
+            _, _, text = _decode(data)
+            new_text, count = _substitute(text, find, replace, use_regex, case_sensitive)
+            if count and new_text != text:
+                hunks, diff = _diff(path, text, new_text)
+                results.append(FilePreview(path, count, hunks, diff, None))
+            else:
+                results.append(FilePreview(path, 0, 0, "", None))
+        except (OSError, ValueError) as e:
+            results.append(FilePreview(path, 0, 0, "", str(e)))
+    return results
+
+
+def _resolve_target(path):
+    """替换的目标文件：符号链接解析为其指向的文件（否则 os.replace 会把链接本身换成普通文件）
+
+    Raises:
+        ValueError: 文件有多个硬链接
+    """
+    target = os.path.realpath(path)
+    if os.stat(target).st_nlink > 1:
+        raise ValueError("文件有多个硬链接，替换会断开链接，已跳过")
+    return target
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _write_temp(path, data):
+    """把 data 写入 path 同目录下的临时文件（保留权限位），返回临时文件路径"""
+    directory, name = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=TEMP_SUFFIX, dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, temp_path)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+    return temp_path
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def stage_files(paths, find, replace, use_regex=False, case_sensitive=False):
+    """执行替换并把新内容写入临时文件（进程池任务入口），不修改目标文件"""
+    results = []
+    for path in paths:
+        try:
+            target = _resolve_target(path)
+            with open(target, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                data = f.read()
+            bom, encoding, text = _decode(data)
+            new_text, count = _substitute(text, find, replace, use_regex, case_sensitive)
+            if not count or new_text == text:
+                continue
+            new_data = bom + new_text.encode(encoding, 'surrogateescape')
+            temp_path = _write_temp(target, new_data)
+            results.append(StagedFile(path, temp_path, zlib.compress(data), count, stat.st_mtime_ns,
+                                      stat.st_size, None, _digest(new_data)))
+        except (OSError, ValueError, UnicodeError) as e:
+            results.append(StagedFile(path, None, None, 0, 0, 0, str(e)))
+    return results
+
+
+class ReplaceJournal:
+    """替换日志：每次替换一个事务，记录每个文件压缩后的原内容、新内容的哈希及替换后的 mtime/size
+
+    事务状态：pending（已登记、正在替换）→ committed → rolled_back；
+    撤销时有文件冲突则为 partially_rolled_back，冲突文件的条目保留，可以再次撤销
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DEFAULT_JOURNAL_PATH
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created REAL NOT NULL,
+                find TEXT NOT NULL,
+                replace TEXT NOT NULL,
+                status TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                tx INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                original BLOB NOT NULL,
+                mtime_ns INTEGER,
+                size INTEGER,
+                digest BLOB,
+                PRIMARY KEY (tx, path)
+            );
+        """)
+        # 旧版本创建的日志没有 digest 列
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        if 'digest' not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE entries ADD COLUMN digest BLOB")
+
+    def close(self):
+        self._conn.close()
+
+    def begin(self, spec, staged):
+        """登记事务及各文件的原内容（状态 pending），返回事务号"""
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO transactions (created, find, replace, status) VALUES (?, ?, ?, 'pending')",
+                (time.time(), spec.find, spec.replace)
+            )
+            tx = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO entries (tx, path, original, digest) VALUES (?, ?, ?, ?)",
+                [(tx, item.path, item.original, item.digest) for item in staged]
+            )
+        return tx
+
+    def finish(self, tx, replaced, skipped):
+        """记录替换后的文件状态，删除未替换文件的条目，并把事务标记为 committed"""
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE entries SET mtime_ns=?, size=? WHERE tx=? AND path=?",
+                [(mtime_ns, size, tx, path) for path, mtime_ns, size in replaced]
+            )
+            self._conn.executemany("DELETE FROM entries WHERE tx=? AND path=?", [(tx, path) for path in skipped])
+            self._conn.execute("UPDATE transactions SET status='committed' WHERE id=?", (tx,))
+        self._prune()
+
+    def _prune(self):
+        with self._conn:
+            old = [row[0] for row in self._conn.execute(
+                "SELECT id FROM transactions ORDER BY id DESC LIMIT -1 OFFSET ?", (MAX_TRANSACTIONS,)
+            )]
+            self._conn.executemany("DELETE FROM entries WHERE tx=?", [(tx,) for tx in old])
+            self._conn.executemany("DELETE FROM transactions WHERE id=?", [(tx,) for tx in old])
+
+    def last_transaction(self):
+        """最近一次可撤销的事务 (id, created, find, replace, 文件数)，没有时返回 None"""
+        return self._conn.execute("""
+            SELECT t.id, t.created, t.find, t.replace, COUNT(e.path)
+            FROM transactions t LEFT JOIN entries e ON e.tx = t.id
+            WHERE t.status IN ('committed', 'pending', 'partially_rolled_back')
+            GROUP BY t.id ORDER BY t.id DESC LIMIT 1
+        """).fetchone()
+
+    def rollback(self, tx=None, force=False):
+        """把事务中的文件恢复为替换前的内容
+
+        替换后又被修改（mtime/size 不一致且内容不是替换后的内容）或已不存在的文件视为冲突，不覆盖；
+        替换未完成的文件按内容判断：仍是原内容的无需恢复，是替换后的内容的照常恢复。
+        冲突文件的条目保留在日志中（事务状态 partially_rolled_back），处理后可以再次撤销。
+
+        Args:
+            force: 为 True 时冲突的文件也用原内容覆盖（已不存在的文件除外）
+
+        Returns:
+            (恢复的文件列表, [(冲突文件, 原因), ...])；没有可撤销的事务时返回 None
+        """
+        if tx is None:
+            last = self.last_transaction()
+            if last is None:
+                return None
+            tx = last[0]
+        restored, conflicts = [], []
+        rows = self._conn.execute("SELECT path, original, mtime_ns, size, digest FROM entries WHERE tx=?", (tx,))
+        for path, original, mtime_ns, size, digest in rows.fetchall():
+            try:
+                target = _resolve_target(path)
+                stat = os.stat(target)
+                data = zlib.decompress(original)
+                if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size) and not force:
+                    with open(target, 'rb') as f:
+                        current = f.read()
+                    if mtime_ns is None and current == data:
+                        # 替换在写入该文件之前中断：文件仍是原内容
+                        restored.append(path)
+                        continue
+                    if digest is None or _digest(current) != digest:
+                        conflicts.append((path, "替换未完成，文件不是替换后的内容" if mtime_ns is None
+                                          else "替换后文件又被修改"))
+                        continue
+                os.replace(_write_temp(target, data), target)
+                restored.append(path)
+            except (OSError, ValueError, zlib.error) as e:
+                conflicts.append((path, str(e)))
+        with self._conn:
+            self._conn.executemany("DELETE FROM entries WHERE tx=? AND path=?", [(tx, path) for path in restored])
+            status = 'partially_rolled_back' if conflicts else 'rolled_back'
+            self._conn.execute("UPDATE transactions SET status=? WHERE id=?", (status, tx))
+        return restored, conflicts
+
+
+class ReplaceEngine:
+    """批量替换引擎：预览与暂存在进程池中并行，提交在调用线程中完成"""
+
+    def __init__(self, spec, paths, processes=None, should_stop=None, journal_path=None):
+        self.spec = spec
+        self.paths = list(paths)
+        self.processes = processes
+        self._should_stop = should_stop
+        self.journal_path = journal_path
+
+    def is_stopped(self):
+        return bool(self._should_stop and self._should_stop())
+
+    def _map(self, func, failed, on_progress=None):
+        """按任务分批并行执行 func，按输入顺序返回所有结果
+
+        停止时不再启动新任务，但仍收集已在运行的任务结果（以便清理其临时文件）；
+        任务异常时其中的文件以 failed(path, 原因) 的结果返回
+        """
+        paths = self.paths
+        tasks = [paths[i:i + TASK_FILES] for i in range(0, len(paths), TASK_FILES)]
+        args = self.spec.args()
+        if len(tasks) <= 1:
+            results = func(paths, *args) if paths else []
+            if on_progress:
+                on_progress(len(paths), len(paths))
+            return results
+
+        order = {path: i for i, path in enumerate(paths)}
+        results = []
+        done = 0
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=_MP_CONTEXT) as pool:
+            futures = {pool.submit(func, task, *args): task for task in tasks}
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                task = futures[future]
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    results.extend(failed(path, str(e)) for path in task)
+                done += len(task)
+                if on_progress:
+                    on_progress(done, len(paths))
+                if self.is_stopped():
+                    for pending in futures:
+                        pending.cancel()
+        results.sort(key=lambda item: order[item.path])
+        return results
+
+    def preview(self, on_progress=None):
+        """预览替换，返回 FilePreview 列表（与输入顺序一致）"""
+        self.spec.pattern()
+        return self._map(preview_files, lambda path, error: FilePreview(path, 0, 0, "", error), on_progress)
+
+    def apply(self, on_progress=None):
+        """执行替换
+
+        Returns:
+            ReplaceResult(事务号或 None, [(路径, 替换次数), ...], [(路径, 原因), ...])
+        """
+        self.spec.pattern()
+        staged = self._map(stage_files, lambda path, error: StagedFile(path, None, None, 0, 0, 0, error),
+                           on_progress)
+        failures = [(item.path, item.error) for item in staged if item.error]
+        staged = [item for item in staged if not item.error]
+        if self.is_stopped() or not staged:
+            for item in staged:
+                _remove_quietly(item.temp_path)
+            return ReplaceResult(None, [], failures)
+
+        journal = ReplaceJournal(self.journal_path)
+        try:
+            try:
+                tx = journal.begin(self.spec, staged)
+            except sqlite3.Error:
+                for item in staged:
+                    _remove_quietly(item.temp_path)
+                raise
+
+            # 日志已落盘，逐个原子替换；读取之后又被修改的文件放弃替换
+            replaced, skipped, modified = [], [], []
+            for item in staged:
+                try:
+                    target = _resolve_target(item.path)
+                    stat = os.stat(target)
+                    if (stat.st_mtime_ns, stat.st_size) != (item.mtime_ns, item.size):
+                        raise OSError("读取后文件又被修改，已跳过")
+                    os.replace(item.temp_path, target)
+                    stat = os.stat(target)
+                    replaced.append((item.path, stat.st_mtime_ns, stat.st_size))
+                    modified.append((item.path, item.count))
+                except (OSError, ValueError) as e:
+                    _remove_quietly(item.temp_path)
+                    skipped.append(item.path)
+                    failures.append((item.path, str(e)))
+            journal.finish(tx, replaced, skipped)
+            logger.info(f"批量替换完成: 事务 {tx}, 修改 {len(modified)} 个文件, 失败 {len(failures)} 个")
+            return ReplaceResult(tx, modified, failures)
+        finally:
+            journal.close()
@@ -0,0 +1,163 @@
+"""
+文本文件识别与编码嗅探
+只读取文件开头几 KB 判断：BOM、NUL 字节（含无 BOM 的 UTF-16 特征）、控制字符比例、
+UTF-8 合法性，最后尝试 GB18030（GBK 的超集）。都不合法但没有 NUL、控制字符也很少时
+仍按文本处理（见 sniff_encoding 的 strict 参数）。结果按设备号 + inode + mtime 缓存，
+搜索引擎与文件查找界面共用同一个检测器
+"""
+
+import os
+import codecs
+import threading
+
+# 嗅探读取的字节数
+SNIFF_SIZE = 8192
+# 控制字符（不含常见空白）超过该比例视为二进制
+CONTROL_RATIO = 0.05
+# 既不是合法 UTF-8 也不是 GB18030 的文本：无效字节不超过该比例时仍按 UTF-8（替换无效字节）读取，
+# 否则按 Latin-1 读取（Latin-1 / cp1252 等单字节编码的文本）
+LOSSY_UTF8_RATIO = 0.01
+# 缓存条目上限，超出后整体清空
+MAX_CACHE = 200000
+
+# 一看扩展名就知道是二进制的文件，不必读取
+BINARY_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.tif', '.tiff', '.psd',
+    '.mp3', '.mp4', '.avi', '.mov', '.mkv', '.flv', '.wav', '.flac', '.ogg', '.m4a',
+    '.zip', '.rar', '.7z', '.gz', '.bz2', '.xz', '.tar', '.jar', '.whl',
+    '.exe', '.dll', '.so', '.dylib', '.o', '.a', '.lib', '.obj', '.bin', '.class', '.pyc', '.pyd',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.ttf', '.otf', '.woff', '.woff2', '.sqlite', '.db',
+}
+
+# BOM -> 编码（UTF-32 需在 UTF-16 之前判断）
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# 视为二进制特征的控制字符：除 \b \t \n \f \r ESC 之外的 0x00-0x1f
+_CONTROL_BYTES = bytes(b for b in range(0x20) if b not in b"\b\t\n\f\r\x1b")
+
+UTF8_ENCODINGS = ('utf-8', 'utf-8-sig')
+
+# 缓存未命中的标记（None 表示“已知是二进制”）
+MISSING = object()
+
+
+def _sniff_utf16(head):
+    """无 BOM 的 UTF-16：ASCII 字符的高位字节为 0，NUL 集中在奇数或偶数位置"""
+    half = len(head) // 2
+    if half < 4:
+        return None
+    zeros_even = head[0::2].count(0)
+    zeros_odd = head[1::2].count(0)
+    if zeros_odd > half * 0.3 and zeros_even < half * 0.05:
+        return 'utf-16-le'
+    if zeros_even > half * 0.3 and zeros_odd < half * 0.05:
+        return 'utf-16-be'
+    return None
+
+
+def sniff_encoding(head, strict=False):
+    """根据文件开头的字节判断编码
+
+    Args:
+        strict: 为 True 时只返回能正确解码的编码；为 False 时无法确定编码的文本按 UTF-8 或 Latin-1 读取，
+            解码结果可能有替换字符或乱码（可以搜索，但不能按该编码写回，批量替换使用 strict=True）
+
+    Returns:
+        编码名；二进制文件（strict 时还包括无法确定编码的文件）返回 None
+    """
+    if not head:
+        return 'utf-8'
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    if b"\0" in head:
+        return _sniff_utf16(head)
+
+    control = len(head) - len(head.translate(None, _CONTROL_BYTES))
+    if control > len(head) * CONTROL_RATIO:
+        return None
+    # 末尾可能截断在多字节字符中间，用增量解码器且不做 final
+    for encoding in ('utf-8', 'gb18030'):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    if strict:
+        return None
+    invalid = codecs.getincrementaldecoder('utf-8')('replace').decode(head, final=False).count('\ufffd')
+    return 'utf-8' if invalid <= len(head) * LOSSY_UTF8_RATIO else 'latin-1'
+
+
+def has_binary_extension(name):
+    return os.path.splitext(name)[1].lower() in BINARY_EXTENSIONS
+
+
+class TextDetector:
+    """带缓存的文本检测器，缓存键为 (st_dev, st_ino)（无 inode 时为路径），失效条件为 mtime/size 变化"""
+
+    def __init__(self):
+        self._cache = {}  # key -> (mtime, size, encoding or None)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path, dev, inode):
+        # inode 只在同一文件系统内唯一，需要与设备号一起作为键
+        return (dev, inode) if inode else os.path.normcase(os.path.abspath(path))
+
+    def cached(self, path, dev, inode, mtime, size):
+        """返回缓存的编码（二进制为 None）；未缓存或已失效时返回 MISSING"""
+        state = self._cache.get(self._key(path, dev, inode))
+        if state is None or state[0] != mtime or state[1] != size:
+            return MISSING
+        return state[2]
+
+    def remember(self, path, dev, inode, mtime, size, encoding):
+        with self._lock:
+            if len(self._cache) >= MAX_CACHE:
+                self._cache.clear()
+            self._cache[self._key(path, dev, inode)] = (mtime, size, encoding)
+
+    # -------------- FileEntry --------------
+    def entry_may_be_text(self, entry):
+        """遍历阶段的快速判断：扩展名或缓存已知是二进制时返回 False，其余都需要读取确认"""
+        if has_binary_extension(entry.name):
+            return False
+        return self.cached(entry.path, entry.dev, entry.inode, entry.mtime, entry.size) is not None
+
+    def remember_entry(self, entry, encoding):
+        self.remember(entry.path, entry.dev, entry.inode, entry.mtime, entry.size, encoding)
+
+    # -------------- 路径 --------------
+    def detect(self, path):
+        """返回文件编码，二进制文件（或无法读取）返回 None"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        encoding = self.cached(path, st.st_dev, st.st_ino, st.st_mtime, st.st_size)
+        if encoding is not MISSING:
+            return encoding
+        if has_binary_extension(path):
+            encoding = None
+        else:
+            try:
+                with open(path, 'rb') as f:
+                    encoding = sniff_encoding(f.read(SNIFF_SIZE))
+            except OSError:
+                return None
+        self.remember(path, st.st_dev, st.st_ino, st.st_mtime, st.st_size, encoding)
+        return encoding
+
+    def is_text(self, path):
+        return self.detect(path) is not None
+
+
+# 进程内共享的检测器
+text_detector = TextDetector()
@@ -0,0 +1,325 @@
+"""
+流式文本处理（预览区的聚合 / 排序 / 去重 / 大小写转换 / 统计，不依赖 PySide6）
+输入按行流式读取（选中的文件、上一次的结果或预览区中的文本），结果写入磁盘上的 TextBuffer，
+界面只按页读取其中的几千行，处理过程不在界面线程中复制整段文本：
+- sort: 外部归并排序，按内存预算切分成有序段写入临时文件，再多路归并，输入可以大于内存
+- dedupe: 按行的 BLAKE2 摘要去重（保留首次出现），内存只与不同的行数成正比
+- convert_case / stats: 单遍处理
+"""
+
+import io
+import os
+import heapq
+import itertools
+from hashlib import blake2b
+import tempfile
+import weakref
+from collections import namedtuple
+
+from .textdetect import text_detector
+
+# 聚合多个文件时插入的分隔行
+FILE_SEPARATOR = '--- 文件分隔 ---'
+# 排序时每个有序段占用的内存上限（按字符数加每行的对象开销估算）
+SORT_MEMORY = 64 * 1024 * 1024
+LINE_OVERHEAD = 56
+# 多路归并一次最多打开的有序段数，超过时先分组归并
+MERGE_FANIN = 64
+# 去重时长行的摘要长度（字节）
+DIGEST_SIZE = 16
+# TextBuffer 每隔多少行记录一个行首偏移
+INDEX_STEP = 1024
+# 每处理多少行检查一次停止标志并报告进度
+PROGRESS_LINES = 100_000
+
+TextStats = namedtuple('TextStats', ['lines', 'words', 'chars'])
+
+
+class PipelineStopped(Exception):
+    """处理被调用方中止"""
+
+
+def _encode_block(lines):
+    return ('\n'.join(lines) + '\n').encode('utf-8', 'surrogatepass')
+
+
+def _batches(lines, size=INDEX_STEP):
+    it = iter(lines)
+    while batch := list(itertools.islice(it, size)):
+        yield batch
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def text_lines(text):
+    """按 "\\n" 把文本拆成行（QTextEdit.toPlainText 只使用 "\\n"）"""
+    for line in io.StringIO(text, newline='\n'):
+        yield line.removesuffix('\n')
+
+
+def file_lines(path, encoding):
+    """按行读取文本文件（通用换行符），编码错误的字节替换为 U+FFFD"""
+    with open(path, 'r', encoding=encoding, errors='replace') as f:
+        for line in f:
+            yield line.removesuffix('\n')
+
+
+def _run_lines(f):
+    """读取临时有序段中的行"""
+    f.seek(0)
+    reader = io.TextIOWrapper(f, encoding='utf-8', errors='surrogatepass', newline='\n')
+    for line in reader:
+        yield line.removesuffix('\n')
+
+
+class TextBuffer:
+    """磁盘上的文本结果（UTF-8，每行以 "\\n" 结尾）
+
+    写入时每隔 INDEX_STEP 行记录行首字节偏移，按页读取时只需从最近的偏移向后跳过不到
+    INDEX_STEP 行。临时文件在 discard() 或对象被回收（含程序退出）时删除
+    """
+
+    def __init__(self, directory=None):
+        fd, self.path = tempfile.mkstemp(prefix='kiwikit-text-', suffix='.txt', dir=directory)
+        self._file = os.fdopen(fd, 'wb')
+        self._finalizer = weakref.finalize(self, _remove, self.path)
+        self._pending = []  # 攒满 INDEX_STEP 行后一次编码写入
+        self._offsets = []
+        self._pos = 0
+        self.line_count = 0
+
+    def __len__(self):
+        return self.line_count
+
+    def append(self, line):
+        self._pending.append(line)
+        self.line_count += 1
+        if len(self._pending) >= INDEX_STEP:
+            self._flush()
+
+    def extend(self, lines):
+        self._pending.extend(lines)
+        self.line_count += len(lines)
+        if len(self._pending) >= INDEX_STEP:
+            self._flush()
+
+    def _flush(self, final=False):
+        """把攒下的行按 INDEX_STEP 行一块写入；final 时连同不足一块的剩余行"""
+        pending = self._pending
+        end = len(pending) if final else len(pending) - len(pending) % INDEX_STEP
+        for start in range(0, end, INDEX_STEP):
+            data = _encode_block(pending[start:start + INDEX_STEP])
+            self._offsets.append(self._pos)
+            self._file.write(data)
+            self._pos += len(data)
+        self._pending = pending[end:]
+
+    def finish(self):
+        """写入结束，之后只读"""
+        if self._file is not None:
+            self._flush(final=True)
+            self._file.close()
+            self._file = None
+        return self
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._pending = []
+        self._finalizer()
+
+    @property
+    def size(self):
+        return self._pos
+
+    def read_lines(self, start, count):
+        """读取第 start 行（从 0 开始）起的至多 count 行"""
+        start = max(0, start)
+        if start >= self.line_count or count <= 0:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self._offsets[start // INDEX_STEP])
+            for _ in range(start % INDEX_STEP):
+                f.readline()
+            lines = []
+            for _ in range(min(count, self.line_count - start)):
+                lines.append(f.readline().decode('utf-8', 'surrogatepass').removesuffix('\n'))
+        return lines
+
+    def iter_lines(self):
+        with open(self.path, 'r', encoding='utf-8', errors='surrogatepass', newline='\n') as f:
+            for line in f:
+                yield line.removesuffix('\n')
+
+    def copy_to(self, path):
+        """导出为 UTF-8 文本文件"""
+        with open(self.path, 'rb') as src, open(path, 'wb') as dst:
+            while True:
+                chunk = src.read(1024 * 1024)
+                if not chunk:
+                    break
+                dst.write(chunk)
+
+
+class TextPipeline:
+    """一次流式文本处理
+
+    Args:
+        should_stop: 可选，返回 True 时抛出 PipelineStopped（不产生不完整的结果）
+        on_progress: 可选，on_progress(已读取行数)，每 PROGRESS_LINES 行调用一次
+        temp_dir: 结果与排序临时文件所在目录，默认使用系统临时目录
+        sort_memory: 排序时每个有序段的内存预算（字节）
+    """
+
+    def __init__(self, should_stop=None, on_progress=None, temp_dir=None, sort_memory=SORT_MEMORY):
+        self.should_stop = should_stop or (lambda: False)
+        self.on_progress = on_progress
+        self.temp_dir = temp_dir
+        self.sort_memory = sort_memory
+        self.line_count = 0
+
+    def _check(self):
+        if self.should_stop():
+            raise PipelineStopped()
+
+    def _read(self, lines):
+        """输入行：顺带检查停止标志并报告进度"""
+        for line in lines:
+            self.line_count += 1
+            if self.line_count % PROGRESS_LINES == 0:
+                self._check()
+                if self.on_progress is not None:
+                    self.on_progress(self.line_count)
+            yield line
+
+    def _write(self, lines):
+        buffer = TextBuffer(self.temp_dir)
+        try:
+            for batch in _batches(lines):
+                buffer.extend(batch)
+                self._check()
+        except BaseException:
+            buffer.discard()
+            raise
+        return buffer.finish()
+
+    # -------------- 处理操作 --------------
+    def aggregate(self, paths):
+        """把多个文本文件按顺序拼接，文件之间插入分隔行；二进制或无法读取的文件跳过
+
+        Returns:
+            (TextBuffer, 聚合的文件数)
+        """
+        count = 0
+
+        def lines():
+            nonlocal count
+            for path in paths:
+                self._check()
+                encoding = text_detector.detect(path) if path else None
+                if encoding is None:
+                    continue
+                try:
+                    file_iter = iter(file_lines(path, encoding))
+                    first = next(file_iter, None)
+                except OSError:
+                    continue
+                if count:
+                    yield from ('', FILE_SEPARATOR, '')
+                count += 1
+                if first is None:
+                    continue
+                yield first
+                try:
+                    yield from file_iter
+                except OSError:
+                    # 读取途中出错（例如文件被删除），保留已读取的部分
+                    continue
+
+        buffer = self._write(self._read(lines()))
+        return buffer, count
+
+    def sort(self, lines):
+        """升序排序；输入超过内存预算时分段排序写入临时文件，再多路归并"""
+        runs = []
+        try:
+            chunk, size = [], 0
+            for line in self._read(lines):
+                chunk.append(line)
+                size += len(line) + LINE_OVERHEAD
+                if size >= self.sort_memory:
+                    runs.append(self._write_run(chunk))
+                    chunk, size = [], 0
+            if not runs:
+                chunk.sort()
+                return self._write(chunk)
+            if chunk:
+                runs.append(self._write_run(chunk))
+            del chunk
+            while len(runs) > MERGE_FANIN:
+                group, runs = runs[:MERGE_FANIN], runs[MERGE_FANIN:]
+                try:
+                    runs.append(self._write_run(heapq.merge(*map(_run_lines, group)), presorted=True))
+                finally:
+                    for f in group:
+                        f.close()
+            return self._write(heapq.merge(*map(_run_lines, runs)))
+        finally:
+            for f in runs:
+                f.close()
+
+    def _write_run(self, lines, presorted=False):
+        """写入一个有序段（匿名临时文件，关闭即删除）"""
+        if not presorted:
+            lines.sort()
+        f = tempfile.TemporaryFile(dir=self.temp_dir)
+        for batch in _batches(lines):
+            f.write(_encode_block(batch))
+            self._check()
+        return f
+
+    def dedupe(self, lines):
+        """去掉重复行，保留每行首次出现的位置
+
+        Returns:
+            (TextBuffer, 去掉的行数)
+        """
+        seen = set()
+        removed = 0
+
+        def unique():
+            nonlocal removed
+            for line in self._read(lines):
+                # 短行直接存放（不比摘要大），长行只存摘要；str 与 bytes 不会相等，两者不会混淆
+                key = line if len(line) <= DIGEST_SIZE else \
+                    blake2b(line.encode('utf-8', 'surrogatepass'), digest_size=DIGEST_SIZE).digest()
+                if key in seen:
+                    removed += 1
+                    continue
+                seen.add(key)
+                yield line
+
+        buffer = self._write(unique())
+        return buffer, removed
+
+    def convert_case(self, lines, mode):
+        """mode: 'upper' / 'lower' / 'title'"""
+        convert = {'upper': str.upper, 'lower': str.lower, 'title': str.title}[mode]
+        return self._write(convert(line) for line in self._read(lines))
+
+    def stats(self, lines):
+        """行数 / 词数 / 字符数（字符数包含行之间的换行符，与整段文本的长度一致）"""
+        line_count = word_count = char_count = 0
+        for line in self._read(lines):
+            line_count += 1
+            word_count += len(line.split())
+            char_count += len(line)
+        if line_count:
+            char_count += line_count - 1
+        return TextStats(line_count, word_count, char_count)
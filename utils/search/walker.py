@@ -0,0 +1,125 @@
+"""
+并行目录遍历
+每个目录由线程池中的一个任务通过 os.scandir 扫描，子目录作为新任务提交；
+文件的大小/修改时间直接取自 DirEntry.stat()，不再对每个文件单独 getsize。
+传入 WalkRules 时，被排除/忽略的目录在扫描其父目录时就被剪掉，不会进入；
+元数据筛选（大小/修改时间/类型）直接使用 DirEntry 的数据，不满足的文件不会生成 FileEntry
+"""
+
+import os
+import stat as stat_module
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# path: 绝对路径, rel_path: 相对搜索根目录的路径, size: 字节数, mtime: 修改时间,
+# inode / dev: stat 的 st_ino / st_dev（平台不提供时为 0）
+FileEntry = namedtuple('FileEntry', ['path', 'rel_path', 'name', 'size', 'mtime', 'inode', 'dev'], defaults=(0,))
+
+
+def default_workers():
+    """目录遍历线程数：IO 密集，适当多于 CPU 核数"""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def scan_dir(dir_path, rel_dir, file_filter=None, keep_all=False, parent_state=None):
+    """扫描单个目录
+
+    Args:
+        parent_state: 父目录的 WalkState（根目录传 WalkRules.root_state()），None 表示不剪枝
+
+    Returns:
+        (匹配的文件列表, 子目录列表, 已处理文件数, 全部文件列表, 本目录的 WalkState)；
+        keep_all 为 False 时全部文件列表为 None。被规则排除的文件和目录不会出现在任何列表中
+    """
+    state = parent_state.enter(dir_path, rel_dir) if parent_state is not None else None
+    meta = state.rules.meta if state is not None else None
+    files = []
+    subdirs = []
+    all_files = [] if keep_all else None
+    processed = 0
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                rel_path = f"{rel_dir}{os.sep}{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if state is None or not state.skip_dir(entry.name, rel_path):
+                            subdirs.append((entry.path, rel_path))
+                        continue
+                    # 指向目录的符号链接既不进入（与 os.walk 默认一致，避免循环），也不当作文件
+                    if entry.is_symlink() and entry.is_dir():
+                        continue
+                except OSError:
+                    continue
+                if state is not None and state.skip_file(entry.name, rel_path):
+                    continue
+                if meta is not None and not meta.match_name(entry.name):
+                    continue
+
+                processed += 1
+                try:
+                    st = entry.stat()
+                    size = st.st_size if stat_module.S_ISREG(st.st_mode) else 0
+                    mtime = st.st_mtime
+                    inode = st.st_ino
+                    dev = st.st_dev
+                except OSError:
+                    size = 0
+                    mtime = 0.0
+                    inode = dev = 0
+                if meta is not None and not meta.match_stat(size, mtime):
+                    continue
+
+                file_entry = FileEntry(entry.path, rel_path, entry.name, size, mtime, inode, dev)
+                if all_files is not None:
+                    all_files.append(file_entry)
+                if file_filter is None or file_filter(file_entry):
+                    files.append(file_entry)
+    except (OSError, PermissionError):
+        pass
+    return files, subdirs, processed, all_files, state
+
+
+def walk_files(root, file_filter=None, should_stop=None, workers=None, on_progress=None, on_dir=None,
+               rules=None, keep_all=False):
+    """并行遍历 root 下的所有文件
+
+    Args:
+        root: 搜索根目录
+        file_filter: 可选过滤函数 f(FileEntry) -> bool，在遍历线程中执行
+        should_stop: 可选函数，返回 True 时尽快停止
+        workers: 线程数，默认 default_workers()
+        on_progress: 可选回调 f(processed_count)，每扫描完一个目录调用一次
+        on_dir: 可选回调 f(dir_path, rel_dir, all_files, subdirs, state)，每扫描完一个目录调用一次
+        rules: 可选 WalkRules，按包含/排除通配符与 .gitignore 剪枝
+        keep_all: 为 True 时 on_dir 收到的 all_files 为该目录下未经 file_filter 过滤的全部 FileEntry
+                  （用于建立目录快照），否则为 None
+
+    Yields:
+        每个目录中通过过滤的 FileEntry 列表
+    """
+    root = os.path.abspath(root)
+    processed = 0
+    with ThreadPoolExecutor(max_workers=workers or default_workers(),
+                            thread_name_prefix="FileWalker") as pool:
+        root_state = rules.root_state() if rules is not None and rules.active else None
+        pending = {pool.submit(scan_dir, root, "", file_filter, keep_all, root_state): (root, "")}
+        while pending:
+            if should_stop and should_stop():
+                for future in pending:
+                    future.cancel()
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dir_path, rel_dir = pending.pop(future)
+                files, subdirs, count, all_files, state = future.result()
+                if on_dir:
+                    on_dir(dir_path, rel_dir, all_files, subdirs, state)
+                for sub_path, sub_rel in subdirs:
+                    child = pool.submit(scan_dir, sub_path, sub_rel, file_filter, keep_all, state)
+                    pending[child] = (sub_path, sub_rel)
+                processed += count
+                if on_progress:
+                    on_progress(processed)
+                if files:
+                    yield files
@@ -0,0 +1,120 @@
+"""
+目录快照与增量变化计算（不依赖 PySide6）
+搜索时通过 walk_files 的 on_dir 回调顺带记录每个目录的文件及其 size/mtime，
+之后只需重新扫描发生事件的目录并与快照比较，即可得到新建/修改/删除的文件，
+工作量与变化的目录数成正比，无需重新遍历整个目录树。
+
+由哪些目录发生了变化由调用方决定：GUI 中是 QFileSystemWatcher（Linux 上基于 inotify）
+的通知，加上对无法监视的目录的轮询
+"""
+
+import os
+
+from .walker import scan_dir
+
+
+class DirChanges:
+    """一次重新扫描得到的变化"""
+
+    __slots__ = ('changed', 'removed', 'added_dirs', 'removed_dirs')
+
+    def __init__(self):
+        self.changed = []       # 新建或被修改的 FileEntry
+        self.removed = []       # 被删除的文件路径
+        self.added_dirs = []    # 新出现的目录
+        self.removed_dirs = []  # 被删除的目录
+
+    def __bool__(self):
+        return bool(self.changed or self.removed or self.added_dirs or self.removed_dirs)
+
+
+class TreeSnapshot:
+    """搜索根目录的快照：目录 -> (相对路径, {文件名: (size, mtime)}, 子目录集合, WalkState)
+
+    重新扫描时沿用搜索时的剪枝规则（WalkState），被排除的目录和文件不会出现在变化中。
+
+    record_dir 在搜索线程中调用，rescan 在之后的刷新线程中调用，两者不会并发
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._dirs = {}
+
+    def __len__(self):
+        return len(self._dirs)
+
+    def __contains__(self, dir_path):
+        return dir_path in self._dirs
+
+    def dirs(self):
+        return list(self._dirs)
+
+    def record_dir(self, dir_path, rel_dir, all_files, subdirs, state=None):
+        """walk_files 的 on_dir 回调"""
+        files = {entry.name: (entry.size, entry.mtime) for entry in all_files}
+        self._dirs[dir_path] = (rel_dir, files, {path for path, _ in subdirs}, state)
+
+    def rescan(self, dir_paths):
+        """重新扫描指定目录，与快照比较后更新快照
+
+        Returns:
+            DirChanges
+        """
+        changes = DirChanges()
+        for dir_path in dir_paths:
+            self._rescan_dir(dir_path, changes)
+        return changes
+
+    def _rescan_dir(self, dir_path, changes):
+        state = self._dirs.get(dir_path)
+        if state is None:
+            # 不在快照中（例如已随父目录一起删除）
+            return
+        rel_dir, old_files, old_subdirs, walk_state = state
+        if not os.path.isdir(dir_path):
+            self._drop_dir(dir_path, changes)
+            return
+
+        # 从父状态重新进入，目录中的 .gitignore 被修改时规则随之更新
+        parent_state = walk_state.parent if walk_state is not None else None
+        _, subdirs, _, all_files, walk_state = scan_dir(dir_path, rel_dir, keep_all=True, parent_state=parent_state)
+        files = {}
+        for entry in all_files:
+            stat = (entry.size, entry.mtime)
+            files[entry.name] = stat
+            if old_files.get(entry.name) != stat:
+                changes.changed.append(entry)
+        for name in old_files.keys() - files.keys():
+            changes.removed.append(os.path.join(dir_path, name))
+
+        new_subdirs = {path for path, _ in subdirs}
+        self._dirs[dir_path] = (rel_dir, files, new_subdirs, walk_state)
+        for path in old_subdirs - new_subdirs:
+            self._drop_dir(path, changes)
+        for path, rel_path in subdirs:
+            if path not in old_subdirs:
+                self._add_tree(path, rel_path, walk_state, changes)
+
+    def _add_tree(self, dir_path, rel_dir, parent_state, changes):
+        """登记新出现的目录树，其中的文件全部视为新建"""
+        stack = [(dir_path, rel_dir, parent_state)]
+        while stack:
+            path, rel_path, parent = stack.pop()
+            _, subdirs, _, all_files, state = scan_dir(path, rel_path, keep_all=True, parent_state=parent)
+            self.record_dir(path, rel_path, all_files, subdirs, state)
+            changes.added_dirs.append(path)
+            changes.changed.extend(all_files)
+            stack.extend((sub_path, sub_rel, state) for sub_path, sub_rel in subdirs)
+
+    def _drop_dir(self, dir_path, changes):
+        """从快照中移除目录树，其中的文件全部视为删除"""
+        stack = [dir_path]
+        while stack:
+            path = stack.pop()
+            state = self._dirs.pop(path, None)
+            if state is None:
+                continue
+            _, files, subdirs, _ = state
+            changes.removed_dirs.append(path)
+            changes.removed.extend(os.path.join(path, name) for name in files)
+            stack.extend(subdirs)
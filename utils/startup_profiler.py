@@ -0,0 +1,306 @@
+"""
+启动性能分析器
+通过 --profile-startup 参数或 KIWIKIT_PROFILE_STARTUP=true 环境变量启用，记录：
+- 每个模块的导入耗时（与 python -X importtime 相同的 self / cumulative 口径）
+- MainWindow.__init__ 各阶段耗时
+- 首帧绘制时间
+结果以 JSON 写入日志目录（logs/<日期>/startup_profile_<时间>.json）
+
+同时提供导入预算检查，防止工具模块在被打开之前把重量级依赖拉进导入图：
+    python -m utils.startup_profiler --check-imports
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from datetime import datetime
+
+# 计时起点：本模块被导入的时刻（main.py 第一条导入语句）
+_ORIGIN = time.perf_counter()
+
+# 重量级依赖：只允许在对应工具被打开时才导入
+HEAVY_MODULES = ('PIL', 'requests', 'Crypto', 'bs4', 'jsbeautifier', 'cssbeautifier', 'qrcode', 'pyzbar')
+
+# 工具模块 -> 允许其导入的重量级依赖
+TOOL_HEAVY_ALLOWANCE = {
+    'components.tools.image_conver': {'PIL'},
+    'components.tools.qr_tool': {'PIL', 'qrcode', 'pyzbar'},
+    'components.tools.media_download': {'requests'},
+    'components.tools.encode_decode': {'Crypto'},
+    'components.tools.code_formatter': {'jsbeautifier', 'cssbeautifier', 'bs4'},
+}
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class _TimedLoader:
+    """包装模块加载器，统计 create_module / exec_module 耗时"""
+
+    def __init__(self, loader, profiler, fullname):
+        self._loader = loader
+        self._profiler = profiler
+        self._fullname = fullname
+        self._create_frame = None
+
+    def create_module(self, spec):
+        create = getattr(self._loader, 'create_module', None)
+        if create is None:
+            return None
+        # 扩展模块（.so/.pyd）的加载主要发生在 create_module 中
+        self._create_frame = self._profiler._time_import(self._fullname, record=False)
+        with self._create_frame:
+            return create(spec)
+
+    def exec_module(self, module):
+        # 恢复原始加载器，避免包装对象残留在 module.__loader__ / __spec__ 上
+        module.__loader__ = self._loader
+        if getattr(module, '__spec__', None) is not None:
+            module.__spec__.loader = self._loader
+        with self._profiler._time_import(self._fullname, carry=self._create_frame):
+            self._loader.exec_module(module)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer:
+    """sys.meta_path 查找器：委托其它查找器定位模块，并为其加载器计时"""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        # 防止在委托查找时递归进入自身
+        if getattr(self._local, 'finding', False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                        spec.loader = _TimedLoader(spec.loader, self._profiler, fullname)
+                    return spec
+            return None
+        finally:
+            self._local.finding = False
+
+
+class _ImportFrame:
+    """单个模块导入的计时帧，嵌套导入的耗时计入父帧的 children"""
+
+    def __init__(self, profiler, fullname, record=True, carry=None):
+        self.profiler = profiler
+        self.fullname = fullname
+        self.record = record
+        self.carry = carry  # create_module 阶段的计时帧
+        self.cumulative = 0.0
+        self.children = 0.0
+
+    def __enter__(self):
+        stack = self.profiler._import_stack()
+        self.start = time.perf_counter()
+        self.depth = len(stack)
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stack = self.profiler._import_stack()
+        stack.pop()
+        self.cumulative = time.perf_counter() - self.start
+        if stack:
+            stack[-1].children += self.cumulative
+        if self.record:
+            cumulative, children = self.cumulative, self.children
+            if self.carry is not None:
+                cumulative += self.carry.cumulative
+                children += self.carry.children
+            self.profiler.imports.append({
+                'module': self.fullname,
+                'self_ms': _ms(cumulative - children),
+                'cumulative_ms': _ms(cumulative),
+                'depth': self.depth,
+                'failed': exc_type is not None,
+            })
+        return False
+
+
+class StartupProfiler:
+    """启动性能分析器"""
+
+    def __init__(self):
+        self.enabled = False
+        self.imports = []
+        self.phases = []
+        self.marks = {}
+        self.sections = {}
+        self.report_path = None
+        self._finder = None
+        self._local = threading.local()
+
+    @staticmethod
+    def is_requested():
+        """是否通过命令行参数或环境变量请求了启动分析"""
+        return (
+            '--profile-startup' in sys.argv or
+            os.getenv('KIWIKIT_PROFILE_STARTUP', 'False').lower() == 'true'
+        )
+
+    def install_if_enabled(self):
+        """按需启用分析器，需在应用其它模块导入之前调用"""
+        if self.enabled or not self.is_requested():
+            return self.enabled
+        self.enabled = True
+        self._finder = _ImportTimer(self)
+        sys.meta_path.insert(0, self._finder)
+        return True
+
+    def uninstall(self):
+        """停止统计导入耗时（首帧之后的导入不计入启动）"""
+        if self._finder is not None and self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self._finder = None
+
+    def elapsed_ms(self):
+        return _ms(time.perf_counter() - _ORIGIN)
+
+    def _import_stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _time_import(self, fullname, record=True, carry=None):
+        return _ImportFrame(self, fullname, record, carry)
+
+    def profile_phase(self, func):
+        """阶段计时装饰器，未启用时直接调用原函数"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            depth = getattr(self._local, 'phase_depth', 0)
+            self._local.phase_depth = depth + 1
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.phase_depth = depth
+                self.phases.append({
+                    'phase': func.__name__,
+                    'start_ms': _ms(start - _ORIGIN),
+                    'duration_ms': _ms(time.perf_counter() - start),
+                    'depth': depth,
+                })
+        return wrapper
+
+    def mark(self, name):
+        """记录一个时间点（相对计时起点）"""
+        if self.enabled:
+            self.marks[name] = self.elapsed_ms()
+
+    def add_section(self, name, data):
+        """附加其它组件的统计数据（例如页面加载报告）"""
+        if self.enabled:
+            self.sections[name] = data
+
+    def build_report(self):
+        imports = sorted(self.imports, key=lambda r: r['cumulative_ms'], reverse=True)
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'argv': sys.argv,
+            'marks_ms': self.marks,
+            'phases': self.phases,
+            'import_total_ms': round(sum(r['self_ms'] for r in self.imports), 3),
+            'imports': imports,
+            # 启动期间（首帧之前）被导入的重量级依赖
+            'heavy_modules_loaded': sorted({
+                r['module'].split('.')[0] for r in self.imports
+                if r['module'].split('.')[0] in HEAVY_MODULES
+            }),
+            **self.sections,
+        }
+
+    def write_report(self):
+        """把分析结果写入日志目录，返回文件路径；未启用时返回 None"""
+        if not self.enabled:
+            return None
+        from utils.logger import get_log_dir, info, error
+        try:
+            if self.report_path is None:
+                stamp = datetime.now().strftime("%H%M%S")
+                self.report_path = get_log_dir() / f"startup_profile_{stamp}.json"
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                json.dump(self.build_report(), f, ensure_ascii=False, indent=2)
+            info(f"启动性能分析报告已写入: {self.report_path}")
+            return self.report_path
+        except Exception as e:
+            error(f"写入启动性能分析报告失败: {e}")
+            return None
+
+
+# 全局分析器实例
+startup_profiler = StartupProfiler()
+
+
+# -------------- 导入预算检查 --------------
+def _heavy_imports_of(module_name, cwd):
+    """在干净的解释器中导入模块，返回被拉进导入图的重量级依赖"""
+    import subprocess
+    code = (
+        "import importlib, json, sys\n"
+        f"importlib.import_module({module_name!r})\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=cwd,
+        capture_output=True, text=True, timeout=120,
+        env={**os.environ, 'KIWIKIT_NO_CONSOLE': 'true', 'QT_QPA_PLATFORM': 'offscreen'},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module_name} 失败:\n{result.stderr.strip()}")
+    return set(json.loads(result.stdout.strip().splitlines()[-1]))
+
+
+def check_import_budget(cwd=None):
+    """检查导入预算，返回违规列表 [(模块, 多出的重量级依赖)]
+
+    - 启动路径（main、内容区、页面注册表、工具包）不得导入任何重量级依赖
+    - 每个工具模块只能导入 TOOL_HEAVY_ALLOWANCE 中登记的依赖
+    """
+    from components.page_registry import PAGE_REGISTRY
+
+    cwd = cwd or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    startup_modules = ['main', 'components.content_area', 'components.page_registry', 'components.tools']
+    tool_modules = sorted({spec.module_path for spec in PAGE_REGISTRY.values()} - set(startup_modules))
+
+    violations = []
+    for module_name in startup_modules + tool_modules:
+        allowed = TOOL_HEAVY_ALLOWANCE.get(module_name, set())
+        extra = _heavy_imports_of(module_name, cwd) - allowed
+        if extra:
+            violations.append((module_name, sorted(extra)))
+    return violations
+
+
+if __name__ == "__main__":
+    if '--check-imports' not in sys.argv:
+        print("用法: python -m utils.startup_profiler --check-imports")
+        sys.exit(2)
+
+    problems = check_import_budget()
+    if problems:
+        for module_name, extra in problems:
+            print(f"❌ {module_name} 在工具打开前导入了重量级依赖: {', '.join(extra)}")
+        sys.exit(1)
+    print("✅ 导入预算检查通过")
+    sys.exit(0)